@@ -4,7 +4,7 @@ import { useState, useEffect } from "react";
 import { useRouter } from "next/navigation";
 import { useSession } from "next-auth/react";
 import Link from "next/link";
-import { applicationService, ScholarshipApplication } from "../../services/api";
+import { dashboardService, DashboardApplication } from "../../services/api";
 import { toast } from "react-toastify";
 import {
     ClipboardDocumentListIcon,
@@ -19,7 +19,7 @@ import {
 export default function DashboardPage() {
     const router = useRouter();
     const { data: session, status } = useSession();
-    const [applications, setApplications] = useState<ScholarshipApplication[]>([]);
+    const [applications, setApplications] = useState<DashboardApplication[]>([]);
     const [isLoading, setIsLoading] = useState(true);
 
     useEffect(() => {
@@ -33,11 +33,9 @@ export default function DashboardPage() {
         const fetchApplications = async () => {
             if (status === "authenticated") {
                 try {
-                    // Utiliser getAll pour obtenir toutes les candidatures, puis filtrer celles de l'utilisateur actuel
-                    const data = await applicationService.getAll();
-                    // Filtrer les candidatures de l'utilisateur actuel
-                    const userApplications = data.filter(app => app.user.id === session?.user?.id);
-                    setApplications(userApplications);
+                    // Le tableau de bord ne contient que les candidatures de l'utilisateur connecté
+                    const data = await dashboardService.get();
+                    setApplications(data.applications);
                 } catch (error) {
                     toast.error("Erreur lors du chargement des candidatures");
                     console.error("Erreur:", error);
@@ -92,6 +92,32 @@ export interface ApplicationComment {
     updated_at: string;
 }
 
+export interface DashboardApplication {
+    id: number;
+    full_name: string;
+    scholarship_type: ScholarshipType;
+    status: string;
+    status_display: string;
+    status_changed_at: string | null;
+    ai_score: number | null;
+    comment_count: number;
+    last_commented_at: string | null;
+    recent_comments: ApplicationComment[];
+    created_at: string;
+    updated_at: string;
+}
+
+// Tableau de bord du candidat, construit en une seule requête
+export interface Dashboard {
+    applications: DashboardApplication[];
+    counts: {
+        total: number;
+        by_status: Record<string, number>;
+    };
+    scholarship_types: ScholarshipType[];
+    last_event_id: number;
+}
+
 // Services API
 export const scholarshipTypeService = {
     getAll: async () => {
@@ -206,8 +232,8 @@ export const applicationService = {
         return response.data;
     },
     getComments: async (id: number) => {
-        const response = await api.get<ApplicationComment[]>(`/applications/${id}/comments/`);
-        return response.data;
+        const response = await api.get<{ next: string | null; previous: string | null; results: ApplicationComment[] }>(`/applications/${id}/comments/`);
+        return response.data.results;
     },
     addComment: async (id: number, content: string) => {
         const response = await api.post<ApplicationComment>(`/applications/${id}/add_comment/`, { content });
@@ -215,4 +241,11 @@ export const applicationService = {
     },
 };
 
+export const dashboardService = {
+    get: async () => {
+        const response = await api.get<Dashboard>("/me/dashboard/");
+        return response.data;
+    },
+};
+
 export default api; 
\ No newline at end of file
@@ -43,6 +43,26 @@ export interface Comment {
     created_at: string;
 }
 
+export interface ApplicationEvent {
+    id: number;
+    application: number;
+    kind: 'status_changed' | 'comment_added' | 'evaluated';
+    created_at: string;
+    status?: string;
+    status_display?: string;
+    previous_status?: string;
+    comment?: number;
+    author?: string;
+    ai_score?: number;
+}
+
+// Réponse d'un dépôt en mode afflux (202) ou de son suivi
+export interface SubmissionReceipt {
+    submission_id: string;
+    status: 'queued' | 'ingested';
+    application?: Application;
+}
+
 export interface ApplicationFilter {
     status?: string;
     scholarship_type?: number;
@@ -94,6 +114,16 @@ const applicationService = {
         }
     },
 
+    getSubmission: async (submissionId: string): Promise<SubmissionReceipt> => {
+        try {
+            const response = await axios.get(`${API_URL}/applications/submissions/${submissionId}/`);
+            return response.data;
+        } catch (error) {
+            console.error(`Erreur lors du suivi du dépôt ${submissionId}:`, error);
+            throw error;
+        }
+    },
+
     update: async (id: number, applicationData: Partial<Application>) => {
         try {
             const response = await axios.patch(`${API_URL}/applications/${id}/`, applicationData);
@@ -127,7 +157,7 @@ const applicationService = {
     getComments: async (id: number) => {
         try {
             const response = await axios.get(`${API_URL}/applications/${id}/comments/`);
-            return response.data;
+            return response.data.results;
         } catch (error) {
             console.error(`Erreur lors de la récupération des commentaires pour la candidature ${id}:`, error);
             throw error;
@@ -154,6 +184,18 @@ const applicationService = {
         }
     },
 
+    // Long-polling : sans `since`, renvoie seulement le point de départ du flux
+    waitForEvents: async (since?: number): Promise<{ events: ApplicationEvent[]; last_event_id: number }> => {
+        try {
+            const params = since === undefined ? {} : { since };
+            const response = await axios.get(`${API_URL}/events/`, { params });
+            return response.data;
+        } catch (error) {
+            console.error('Erreur lors de la récupération des événements des candidatures:', error);
+            throw error;
+        }
+    },
+
     deleteApplication: async (id: number) => {
         try {
             await axios.delete(`${API_URL}/applications/${id}/`);
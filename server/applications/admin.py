@@ -1,23 +1,75 @@
-from django.contrib import admin
-from .models import ScholarshipType, ScholarshipApplication, ApplicationComment
+from django.conf import settings
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.forms.models import BaseInlineFormSet
+from .models import (
+    ScholarshipType, ScholarshipApplication, ApplicationComment, ScoringPolicy, DuplicateMatch, Cycle,
+    ArchivedApplication, EvaluationJob
+)
+from .pagination import EstimatedCountPaginator
+from .recommendations import render_application
+
+@admin.register(Cycle)
+class CycleAdmin(admin.ModelAdmin):
+    list_display = ('name', 'starts_on', 'ends_on', 'is_closed', 'archived_at')
+    list_filter = ('is_closed',)
+    search_fields = ('name',)
+    readonly_fields = ('archived_at', 'created_at')
 
 @admin.register(ScholarshipType)
 class ScholarshipTypeAdmin(admin.ModelAdmin):
-    list_display = ('name', 'duration', 'amount', 'is_active')
-    list_filter = ('is_active', 'duration')
+    list_display = ('name', 'cycle', 'duration', 'amount', 'is_active')
+    list_filter = ('is_active', 'duration', 'cycle')
+    list_select_related = ('cycle',)
     search_fields = ('name', 'description')
 
+class PaginatedCommentFormSet(BaseInlineFormSet):
+    """Formset n'affichant qu'une page du fil de commentaires"""
+    per_page = 20
+    page_number = 1
+
+    def get_queryset(self):
+        if not hasattr(self, '_queryset'):
+            queryset = super().get_queryset().select_related('user', 'application__scholarship_type')
+            self.page = Paginator(queryset, self.per_page).get_page(self.page_number)
+            self._queryset = self.page.object_list
+        return self._queryset
+
 class ApplicationCommentInline(admin.TabularInline):
     model = ApplicationComment
     extra = 0
+    formset = PaginatedCommentFormSet
+    fields = ('user', 'content', 'created_at')
+    readonly_fields = ('user', 'created_at')
+    template = 'admin/applications/paginated_tabular.html'
+    page_param = 'comments_page'
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.page_number = request.GET.get(self.page_param, 1)
+        formset.page_param = self.page_param
+        return formset
+
+def _selection(queryset):
+    """
+    Candidatures sélectionnées dans la liste, sous forme de sous-requête :
+    « sélectionner tous les résultats » d'un filtre n'est jamais chargé en mémoire.
+    """
+    return ScholarshipApplication.objects.filter(pk__in=queryset.values('pk'))
 
 @admin.register(ScholarshipApplication)
 class ScholarshipApplicationAdmin(admin.ModelAdmin):
     list_display = ('full_name', 'email', 'scholarship_type', 'status', 'ai_score', 'created_at')
     list_filter = ('status', 'scholarship_type', 'current_year', 'baccalaureate_mention')
     search_fields = ('full_name', 'email', 'current_institution')
-    readonly_fields = ('created_at', 'updated_at', 'ai_score', 'ai_recommendations', 
-                      'ai_academic_score', 'ai_socioeconomic_score', 'ai_motivation_score')
+    list_select_related = ('scholarship_type',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    autocomplete_fields = ('scholarship_type',)
+    raw_id_fields = ('user',)
+    readonly_fields = ('created_at', 'updated_at', 'status_changed_at', 'ai_score', 'recommendations_text', 
+                      'ai_academic_score', 'ai_socioeconomic_score', 'ai_motivation_score',
+                      'ai_letter_similarity', 'ai_similar_letter', 'ai_evaluated_at')
     inlines = [ApplicationCommentInline]
     fieldsets = (
         ('Informations personnelles', {
@@ -46,9 +98,10 @@ class ScholarshipApplicationAdmin(admin.ModelAdmin):
         }),
         ('Évaluation', {
             'fields': (
-                'status', 'ai_score', 'ai_recommendations', 
+                'status', 'status_changed_at', 'ai_score', 'recommendations_text', 
                 'ai_academic_score', 'ai_socioeconomic_score', 
-                'ai_motivation_score', 'admin_notes'
+                'ai_motivation_score', 'ai_letter_similarity', 'ai_similar_letter',
+                'ai_evaluated_at', 'admin_notes'
             )
         }),
         ('Métadonnées', {
@@ -57,8 +110,136 @@ class ScholarshipApplicationAdmin(admin.ModelAdmin):
         }),
     )
 
+    @admin.display(description="Recommandations IA")
+    def recommendations_text(self, obj):
+        return render_application(obj) or '-'
+
+    @admin.action(description="Évaluer les candidatures sélectionnées")
+    def evaluate_selected(self, request, queryset):
+        self._evaluate(request, _selection(queryset), "évaluée(s)")
+
+    @admin.action(description="Réévaluer les évaluations obsolètes de la sélection")
+    def reevaluate_stale(self, request, queryset):
+        from .rescoring import stale_applications
+        self._evaluate(request, stale_applications().filter(pk__in=queryset.values('pk')), "réévaluée(s)")
+
+    def _evaluate(self, request, selection, verb):
+        from .jobs import create_evaluation_job
+        from .rescoring import evaluable_applications, rescore_selection
+        selection = evaluable_applications().filter(pk__in=selection.values('pk'))
+        count = selection.count()
+        if not count:
+            self.message_user(request, "Aucune candidature évaluable dans la sélection", messages.WARNING)
+            return
+        chunk_size = settings.ADMIN_ACTION_CHUNK_SIZE
+        if count <= settings.ADMIN_ACTION_BACKGROUND_THRESHOLD:
+            scored = rescore_selection(selection, chunk_size=chunk_size)
+            self.message_user(request, f"{scored} candidature(s) {verb}", messages.SUCCESS)
+            return
+        # Trop long pour la requête : la commande run_evaluation_jobs s'en charge
+        job = create_evaluation_job(selection, request.user)
+        self.message_user(
+            request,
+            f"{count} candidatures seront évaluées par la tâche n° {job.pk} (commande run_evaluation_jobs) ; "
+            f"les scores apparaîtront au fur et à mesure",
+            messages.INFO
+        )
+
+    def _status_action(new_status, label):
+        @admin.action(description=f"Passer le statut à « {label} »")
+        def action(self, request, queryset):
+            # Une seule requête UPDATE ; une décision finale libère les attributions en cours
+            updated = _selection(queryset).exclude(status=new_status).set_status(
+                new_status, changed_by=request.user, claimed_by=None, claimed_until=None
+            )
+            self.message_user(request, f"{updated} candidature(s) passée(s) au statut « {label} »",
+                              messages.SUCCESS)
+        action.__name__ = f"mark_{new_status}"
+        return action
+
+    mark_accepted = _status_action('accepted', "Acceptée")
+    mark_rejected = _status_action('rejected', "Rejetée")
+    mark_waiting_list = _status_action('waiting_list', "Liste d'attente")
+    del _status_action
+
+    actions = ['evaluate_selected', 'reevaluate_stale', 'mark_accepted', 'mark_rejected', 'mark_waiting_list']
+
+    def save_model(self, request, obj, form, change):
+        # Auteur du changement de statut éventuel, pour l'historique
+        obj.changed_by = request.user
+        super().save_model(request, obj, form, change)
+
+    def save_formset(self, request, form, formset, change):
+        if formset.model is not ApplicationComment:
+            return super().save_formset(request, form, formset, change)
+
+        # Les commentaires ajoutés depuis l'admin sont signés par l'administrateur
+        comments = formset.save(commit=False)
+        for comment in comments:
+            if comment.user_id is None:
+                comment.user = request.user
+            comment.save()
+        for comment in formset.deleted_objects:
+            comment.delete()
+        formset.save_m2m()
+        form.instance.refresh_comment_counters()
+
 @admin.register(ApplicationComment)
 class ApplicationCommentAdmin(admin.ModelAdmin):
     list_display = ('application', 'user', 'created_at')
     list_filter = ('created_at',)
     search_fields = ('content', 'application__full_name', 'user__username')
+    list_select_related = ('application__scholarship_type', 'user')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    raw_id_fields = ('application', 'user')
+
+@admin.register(ScoringPolicy)
+class ScoringPolicyAdmin(admin.ModelAdmin):
+    list_display = ('name', 'is_active', 'academic_weight', 'socioeconomic_weight', 'motivation_weight', 'updated_at')
+    list_filter = ('is_active',)
+    search_fields = ('name',)
+
+@admin.register(DuplicateMatch)
+class DuplicateMatchAdmin(admin.ModelAdmin):
+    list_display = ('cluster', 'application', 'duplicate_of', 'score', 'reasons', 'is_dismissed', 'detected_at')
+    list_filter = ('is_dismissed', 'detected_at')
+    list_editable = ('is_dismissed',)
+    search_fields = ('application__full_name', 'duplicate_of__full_name', '=cluster')
+    list_select_related = ('application__scholarship_type', 'duplicate_of__scholarship_type')
+    raw_id_fields = ('application', 'duplicate_of')
+    readonly_fields = ('score', 'reasons', 'cluster', 'detected_at')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+@admin.register(ArchivedApplication)
+class ArchivedApplicationAdmin(admin.ModelAdmin):
+    list_display = ('full_name', 'email', 'cycle', 'status', 'ai_score', 'created_at', 'archived_at')
+    list_filter = ('cycle', 'status')
+    search_fields = ('full_name', 'email', '=original_id')
+    list_select_related = ('cycle',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    # Les archives ne sont consultables qu'en lecture
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(EvaluationJob)
+class EvaluationJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'status', 'processed', 'total', 'attempts', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    list_select_related = ('created_by',)
+    exclude = ('selection',)
+    readonly_fields = ('status', 'total', 'processed', 'max_id', 'last_id', 'attempts', 'claimed_at', 'error',
+                       'created_by', 'created_at', 'finished_at')
+
+    # Les tâches sont créées par l'action « Évaluer » et suivies en lecture
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -1,5 +1,11 @@
 import random
-from .models import ScholarshipApplication
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import ScholarshipApplication, ScoringPolicy
+from .events import record_event
+from .plagiarism import index_letter, similar_letters
+from .recommendations import CATALOGUE_VERSION, encode, recommendation_band
 import math
 
 class AIEvaluator:
@@ -11,9 +17,17 @@ class AIEvaluator:
     3. Motivation et projet
     """
     
-    def __init__(self, application):
-        """Initialise l'évaluateur avec une candidature"""
+    def __init__(self, application, policy=None, update_letter_index=True):
+        """
+        Initialise l'évaluateur avec une candidature et une politique d'évaluation
+        (la politique active par défaut). Sans `update_letter_index`, l'index
+        des lettres est seulement consulté, pas mis à jour.
+        """
         self.application = application
+        self.policy = policy or ScoringPolicy.get_active()
+        self.update_letter_index = update_letter_index
+        # (id de candidature, similarité) de la lettre la plus proche d'un autre candidat
+        self.similar_letter = None
     
     def evaluate(self):
         """
@@ -22,20 +36,23 @@ class AIEvaluator:
         Returns:
             tuple: (score_total, recommandations)
         """
-        # Évaluation académique (40% du score total)
+        # Évaluation académique (40% du score total par défaut)
         academic_score = self._evaluate_academic()
         
-        # Évaluation socio-économique (30% du score total)
+        # Évaluation socio-économique (30% du score total par défaut)
         socioeconomic_score = self._evaluate_socioeconomic()
         
-        # Évaluation de la motivation (30% du score total)
+        # Recherche d'une lettre quasi identique dans l'index LSH
+        self.similar_letter = self._find_similar_letter()
+        
+        # Évaluation de la motivation (30% du score total par défaut)
         motivation_score = self._evaluate_motivation()
         
-        # Calcul du score total pondéré
+        # Calcul du score total pondéré selon la politique
         total_score = (
-            academic_score * 0.4 +
-            socioeconomic_score * 0.3 +
-            motivation_score * 0.3
+            academic_score * float(self.policy.academic_weight) +
+            socioeconomic_score * float(self.policy.socioeconomic_weight) +
+            motivation_score * float(self.policy.motivation_weight)
         )
         
         # Arrondir à deux décimales
@@ -63,7 +80,7 @@ class AIEvaluator:
         # Évaluation de la moyenne générale (0-20 points → 0-60 points)
         if self.application.average_grade:
             # Convertir la note sur 20 en note sur 60
-            grade_score = (self.application.average_grade / 20) * 60
+            grade_score = (float(self.application.average_grade) / 20) * 60
             score += grade_score
         
         # Évaluation de la mention au baccalauréat (0-40 points)
@@ -91,34 +108,34 @@ class AIEvaluator:
         # Évaluation des revenus familiaux (0-50 points)
         # Plus les revenus sont bas, plus le score est élevé
         if self.application.family_income:
-            # Seuils de revenus (en FCFA)
-            low_income = 1000000  # 1 million FCFA
-            medium_income = 3000000  # 3 millions FCFA
-            high_income = 5000000  # 5 millions FCFA
+            family_income = float(self.application.family_income)
+
+            # Seuils de revenus (en FCFA, 1M / 3M / 5M par défaut)
+            low_income = float(self.policy.low_income_threshold)
+            medium_income = float(self.policy.medium_income_threshold)
+            high_income = float(self.policy.high_income_threshold)
             
-            if self.application.family_income <= low_income:
+            if family_income <= low_income:
                 score += 50
-            elif self.application.family_income <= medium_income:
+            elif family_income <= medium_income:
                 # Interpolation linéaire entre 50 et 25 points
-                score += 50 - ((self.application.family_income - low_income) / (medium_income - low_income)) * 25
-            elif self.application.family_income <= high_income:
+                score += 50 - ((family_income - low_income) / (medium_income - low_income)) * 25
+            elif family_income <= high_income:
                 # Interpolation linéaire entre 25 et 10 points
-                score += 25 - ((self.application.family_income - medium_income) / (high_income - medium_income)) * 15
+                score += 25 - ((family_income - medium_income) / (high_income - medium_income)) * 15
             else:
                 score += 10
         
-        # Évaluation du nombre de personnes à charge (0-30 points)
+        # Évaluation du nombre de personnes à charge (0-30 points par défaut)
         if self.application.number_of_dependents:
-            if self.application.number_of_dependents >= 5:
-                score += 30
-            elif self.application.number_of_dependents >= 3:
-                score += 20
-            elif self.application.number_of_dependents >= 1:
-                score += 10
+            for minimum, points in self.policy.get_dependents_brackets():
+                if self.application.number_of_dependents >= minimum:
+                    score += points
+                    break
         
-        # Bonus pour situation de handicap (20 points)
+        # Bonus pour situation de handicap (20 points par défaut)
         if self.application.has_disability:
-            score += 20
+            score += self.policy.disability_bonus
         
         return min(score, 100)  # Plafonner à 100 points
     
@@ -150,8 +167,26 @@ class AIEvaluator:
             content_score = random.uniform(40, 70)
             score += content_score
         
+        # Pénalité pour une lettre copiée ou issue d'un modèle
+        if self.similar_letter:
+            score *= 1 - settings.LETTER_SIMILARITY_PENALTY
+        
         return min(score, 100)  # Plafonner à 100 points
     
+    def _find_similar_letter(self):
+        """
+        Indexe la lettre de motivation et cherche la plus proche parmi celles
+        des autres candidats
+        
+        Returns:
+            tuple: (id de candidature, similarité) ou None
+        """
+        if not self.application.pk or not self.application.motivation_letter:
+            return None
+        signature = index_letter(self.application) if self.update_letter_index else None
+        matches = similar_letters(self.application, signature=signature)
+        return matches[0] if matches else None
+    
     def _generate_recommendations(self, academic_score, socioeconomic_score, motivation_score, total_score):
         """
         Génère des recommandations basées sur les scores d'évaluation
@@ -163,57 +198,13 @@ class AIEvaluator:
             total_score (float): Score total
             
         Returns:
-            str: Recommandations textuelles
+            tuple: (bande, drapeaux), rendus en texte par `recommendations.render`
         """
-        recommendations = []
-        
         # Recommandation générale basée sur le score total
-        if total_score >= 80:
-            recommendations.append(
-                "Candidature exceptionnelle. Le candidat présente un excellent profil académique "
-                "et une situation socio-économique justifiant l'attribution d'une bourse. "
-                "Recommandation: Acceptation prioritaire."
-            )
-        elif total_score >= 70:
-            recommendations.append(
-                "Très bonne candidature. Le candidat présente un bon profil global. "
-                "Recommandation: Acceptation."
-            )
-        elif total_score >= 60:
-            recommendations.append(
-                "Candidature satisfaisante. Le candidat présente un profil intéressant. "
-                "Recommandation: Acceptation sous réserve de places disponibles."
-            )
-        elif total_score >= 50:
-            recommendations.append(
-                "Candidature moyenne. Le candidat pourrait bénéficier d'une bourse, mais n'est pas prioritaire. "
-                "Recommandation: Liste d'attente."
-            )
-        else:
-            recommendations.append(
-                "Candidature insuffisante selon nos critères d'évaluation. "
-                "Recommandation: Refus avec possibilité de recandidature l'année prochaine."
-            )
-        
+        band = recommendation_band(total_score)
         # Recommandations spécifiques basées sur les scores individuels
-        if academic_score < 50:
-            recommendations.append(
-                "Le profil académique est en dessous de nos attentes. "
-                "Nous recommandons au candidat d'améliorer ses résultats scolaires."
-            )
-        
-        if socioeconomic_score >= 80:
-            recommendations.append(
-                "La situation socio-économique du candidat justifie pleinement l'attribution d'une bourse."
-            )
-        
-        if motivation_score < 60:
-            recommendations.append(
-                "La lettre de motivation pourrait être améliorée. "
-                "Nous recommandons au candidat de mieux expliciter son projet d'études et ses ambitions."
-            )
-        
-        return "\n\n".join(recommendations)
+        flags = encode(academic_score, socioeconomic_score, motivation_score, self.similar_letter)
+        return band, flags
 
 def evaluate_application(application_id):
     """
@@ -223,7 +214,7 @@ def evaluate_application(application_id):
         application_id (int): ID de la candidature à évaluer
         
     Returns:
-        tuple: (score, recommendations) ou (None, message d'erreur)
+        tuple: (score, (bande, drapeaux)) ou (None, message d'erreur)
     """
     try:
         application = ScholarshipApplication.objects.get(id=application_id)
@@ -240,10 +231,17 @@ def evaluate_application(application_id):
     
     # Mettre à jour les champs d'évaluation
     application.ai_score = total_score
-    application.ai_recommendations = recommendations
+    application.ai_recommendation_band, application.ai_recommendation_flags = recommendations
+    application.ai_recommendation_version = CATALOGUE_VERSION
+    # Le texte est désormais rendu à partir des codes
+    application.ai_recommendations = None
     application.ai_academic_score = academic_score
     application.ai_socioeconomic_score = socioeconomic_score
     application.ai_motivation_score = motivation_score
-    application.save()
+    application.ai_similar_letter_id, application.ai_letter_similarity = evaluator.similar_letter or (None, None)
+    application.ai_evaluated_at = timezone.now()
+    with transaction.atomic():
+        application.save()
+        record_event(application, 'evaluated', ai_score=total_score)
     
     return total_score, recommendations 
\ No newline at end of file
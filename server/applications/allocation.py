@@ -0,0 +1,295 @@
+"""
+Allocation des bourses sous contrainte budgétaire.
+
+Les candidatures éligibles sont chargées dans des tableaux numpy, puis
+sélectionnées de façon gloutonne pour maximiser la somme des scores IA dans le
+budget de chaque enveloppe :
+
+- avec un budget par type de bourse, le coût est identique dans une enveloppe
+  et la sélection par score décroissant est optimale ;
+- avec un budget partagé, les candidatures sont prises par score par franc
+  décroissant, en continuant après un dépassement pour remplir le reste du
+  budget (au plus une candidature d'écart avec l'optimum fractionnaire).
+
+Les quotas minimaux (par exemple `has_disability` ou `gender`) sont servis en
+premier, par les meilleurs candidats du groupe concerné.
+"""
+import math
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+
+from .models import ScholarshipApplication, ScholarshipType
+
+ELIGIBLE_STATUSES = ('pending', 'under_review', 'waiting_list')
+
+TRUE_VALUES = ('1', 'true', 'oui', 'yes')
+FALSE_VALUES = ('0', 'false', 'non', 'no')
+
+
+def parse_flag(value, name='valeur'):
+    """Booléen d'une requête (JSON ou texte) ; toute autre valeur est refusée"""
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise AllocationError(f"{name} invalide : '{value}' (attendu true ou false)")
+
+
+# Champs sur lesquels un quota peut porter, avec leur conversion depuis la requête
+QUOTA_FIELDS = {
+    'has_disability': lambda value: parse_flag(value, 'has_disability'),
+    'gender': str,
+}
+
+SHARED_POOL = 'shared'
+
+
+class AllocationError(ValueError):
+    """Paramètres d'allocation invalides"""
+
+
+class Quota:
+    """Nombre (ou part) minimum de candidatures acceptées pour un groupe"""
+
+    def __init__(self, field, value, min_count=None, min_share=None):
+        if field not in QUOTA_FIELDS:
+            raise AllocationError(f"Quota impossible sur le champ '{field}'")
+        if min_count is None and min_share is None:
+            raise AllocationError("Un quota doit préciser min_count ou min_share")
+        if min_share is not None and not 0 <= float(min_share) <= 1:
+            raise AllocationError("min_share doit être compris entre 0 et 1")
+        self.field = field
+        self.value = QUOTA_FIELDS[field](value)
+        self.min_count = int(min_count) if min_count is not None else None
+        self.min_share = float(min_share) if min_share is not None else None
+
+    @classmethod
+    def from_dict(cls, data):
+        try:
+            return cls(data['field'], data['value'], data.get('min_count'), data.get('min_share'))
+        except (KeyError, TypeError, ValueError) as exc:
+            raise AllocationError(f"Quota invalide : {exc}")
+
+    def target(self, accepted_count):
+        if self.min_count is not None:
+            return self.min_count
+        return math.ceil(self.min_share * accepted_count)
+
+    def label(self):
+        return f"{self.field}={self.value}"
+
+
+def unit_cost(type_id, amount, duration, multiply_by_duration=False):
+    """
+    Coût d'une bourse en centimes. Un montant nul ou une durée nulle rendrait
+    la bourse gratuite et fausserait toute l'allocation : ils sont refusés.
+    """
+    if amount is None or amount <= 0:
+        raise AllocationError(f"Montant invalide pour le type de bourse {type_id} : {amount}")
+    if not multiply_by_duration:
+        return int(amount * 100)
+    if duration is None or duration < 1:
+        raise AllocationError(f"Durée invalide pour le type de bourse {type_id} : {duration} (en mois, au moins 1)")
+    return int(amount * duration * 100)
+
+
+class Candidates:
+    """Colonnes des candidatures éligibles, triées par score décroissant"""
+
+    def __init__(self, ids, type_ids, scores, costs, attributes):
+        order = np.lexsort((ids, -scores))
+        self.ids = ids[order]
+        self.type_ids = type_ids[order]
+        self.scores = scores[order]
+        self.costs = costs[order]
+        self.attributes = {field: values[order] for field, values in attributes.items()}
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_snapshot(cls, snapshot, multiply_by_duration=False):
+        """Candidatures éligibles lues dans l'instantané en colonnes"""
+        data = snapshot.data[snapshot.status_mask(*ELIGIBLE_STATUSES) & ~np.isnan(snapshot['ai_score'])]
+        type_ids = data['scholarship_type_id'].astype(np.int64)
+        unit_costs = {
+            type_id: unit_cost(type_id, amount, duration, multiply_by_duration)
+            for type_id, amount, duration in ScholarshipType.objects.filter(
+                pk__in=np.unique(type_ids).tolist()
+            ).values_list('id', 'amount', 'duration')
+        }
+        unknown = set(np.unique(type_ids).tolist()) - set(unit_costs)
+        if unknown:
+            # Type supprimé depuis la construction de l'instantané (instantané partagé pas encore relu)
+            raise AllocationError(
+                f"Types de bourse inconnus dans l'instantané : {', '.join(map(str, sorted(unknown)))} ; "
+                "réessayer une fois l'instantané à jour"
+            )
+        costs = np.array([unit_costs[type_id] for type_id in type_ids.tolist()], dtype=np.int64)
+        attributes = {
+            'has_disability': data['has_disability'].astype(bool),
+            'gender': snapshot.decode('gender', data['gender']),
+        }
+        return cls(data['id'].astype(np.int64), type_ids, data['ai_score'].astype(np.float64), costs, attributes)
+
+
+class AllocationResult:
+    def __init__(self, accepted, waiting_list, pools, quotas, total_score):
+        self.accepted = accepted
+        self.waiting_list = waiting_list
+        self.pools = pools
+        self.quotas = quotas
+        self.total_score = total_score
+
+    def as_dict(self):
+        return {
+            'accepted_count': len(self.accepted),
+            'waiting_list_count': len(self.waiting_list),
+            'total_score': round(self.total_score, 2),
+            'pools': self.pools,
+            'quotas': self.quotas,
+            'accepted': self.accepted,
+            'waiting_list': self.waiting_list,
+        }
+
+
+def _to_cents(amount):
+    try:
+        cents = int(Decimal(str(amount)) * 100)
+    except (ArithmeticError, ValueError):
+        raise AllocationError(f"Budget invalide : {amount}")
+    if cents < 0:
+        raise AllocationError("Un budget ne peut pas être négatif")
+    return cents
+
+
+def _greedy_fill(candidates, order, selected, pool_of, remaining, limit=None):
+    """
+    Parcourt les candidatures dans l'ordre donné et sélectionne celles qui
+    tiennent dans le budget restant de leur enveloppe.
+    """
+    taken = 0
+    min_cost = {}
+    for pool in remaining:
+        pool_costs = candidates.costs[pool_of == pool]
+        min_cost[pool] = int(pool_costs.min()) if len(pool_costs) else None
+
+    for index in order.tolist():
+        if limit is not None and taken >= limit:
+            break
+        if selected[index]:
+            continue
+        pool = pool_of[index]
+        if pool not in remaining:
+            continue
+        cost = int(candidates.costs[index])
+        if cost <= remaining[pool]:
+            selected[index] = True
+            remaining[pool] -= cost
+            taken += 1
+            # Plus rien ne tient dans cette enveloppe
+            if min_cost[pool] is not None and remaining[pool] < min_cost[pool]:
+                del remaining[pool]
+                if not remaining:
+                    break
+    return taken
+
+
+def allocate(candidates, budgets=None, shared_budget=None, quotas=(), waiting_list_size=50):
+    """
+    Choisit les candidatures acceptées et la liste d'attente.
+
+    Args:
+        candidates (Candidates): Candidatures éligibles
+        budgets (dict): Budget par identifiant de type de bourse
+        shared_budget (Decimal): Budget commun à tous les types
+        quotas (list[Quota]): Quotas minimaux à respecter si possible
+        waiting_list_size (int): Taille de la liste d'attente (par enveloppe)
+
+    Returns:
+        AllocationResult
+    """
+    if (budgets is None) == (shared_budget is None):
+        raise AllocationError("Préciser soit des budgets par type, soit un budget partagé")
+
+    if shared_budget is not None:
+        pool_of = np.full(len(candidates), SHARED_POOL, dtype=object)
+        initial = {SHARED_POOL: _to_cents(shared_budget)}
+        # Score par franc : favorise les bourses les moins coûteuses à score égal
+        ratio = candidates.scores / np.maximum(candidates.costs, 1)
+        fill_order = np.lexsort((candidates.ids, -candidates.scores, -ratio))
+    else:
+        initial = {int(type_id): _to_cents(amount) for type_id, amount in budgets.items()}
+        pool_of = candidates.type_ids.astype(object)
+        fill_order = np.arange(len(candidates))
+
+    # Allocation sans quota, pour dimensionner les quotas exprimés en part
+    selected = np.zeros(len(candidates), dtype=bool)
+    _greedy_fill(candidates, fill_order, selected, pool_of, dict(initial))
+    unconstrained_count = int(selected.sum())
+
+    selected = np.zeros(len(candidates), dtype=bool)
+    remaining = dict(initial)
+    quota_report = []
+    for quota in quotas:
+        in_group = candidates.attributes[quota.field] == quota.value
+        target = quota.target(unconstrained_count)
+        already = int((selected & in_group).sum())
+        group_order = np.flatnonzero(in_group)
+        if target > already:
+            _greedy_fill(candidates, group_order, selected, pool_of, remaining, limit=target - already)
+        quota_report.append({
+            'quota': quota.label(),
+            'target': target,
+            'available': int(in_group.sum()),
+        })
+
+    _greedy_fill(candidates, fill_order, selected, pool_of, remaining)
+
+    for report, quota in zip(quota_report, quotas):
+        in_group = candidates.attributes[quota.field] == quota.value
+        report['accepted'] = int((selected & in_group).sum())
+        report['satisfied'] = report['accepted'] >= report['target']
+
+    # Liste d'attente : meilleurs scores non retenus de chaque enveloppe budgétée
+    waiting = []
+    for pool in initial:
+        pool_waiting = np.flatnonzero((pool_of == pool) & ~selected)[:waiting_list_size]
+        waiting.extend(pool_waiting.tolist())
+    waiting.sort(key=lambda index: (-candidates.scores[index], candidates.ids[index]))
+
+    pools = {}
+    for pool, budget in initial.items():
+        in_pool = (pool_of == pool) & selected
+        spent = int(candidates.costs[in_pool].sum())
+        pools[str(pool)] = {
+            'budget': str(Decimal(budget) / 100),
+            'spent': str(Decimal(spent) / 100),
+            'accepted': int(in_pool.sum()),
+        }
+
+    accepted = candidates.ids[selected]
+    return AllocationResult(
+        accepted=accepted.tolist(),
+        waiting_list=candidates.ids[waiting].tolist(),
+        pools=pools,
+        quotas=quota_report,
+        total_score=float(candidates.scores[selected].sum()),
+    )
+
+
+def apply_allocation(result):
+    """
+    Applique le résultat en une seule transaction : un UPDATE par statut.
+    """
+    # Les candidatures décidées entre-temps ne sont pas modifiées
+    eligible = ScholarshipApplication.objects.filter(status__in=ELIGIBLE_STATUSES)
+    with transaction.atomic():
+        accepted = eligible.set_status_for_ids(result.accepted, 'accepted')
+        waiting = eligible.set_status_for_ids(result.waiting_list, 'waiting_list')
+    return accepted, waiting
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class ApplicationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'applications'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        # Enregistre la vérification du cache du flux d'événements (check --deploy)
+        from . import events  # noqa: F401
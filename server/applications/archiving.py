@@ -0,0 +1,121 @@
+"""
+Archivage des campagnes fermées.
+
+Les candidatures d'une campagne fermée sont déplacées par lots vers la table
+ArchivedApplication, avec leurs commentaires et leur historique de statuts,
+puis supprimées des tables courantes, qui ne gardent ainsi que les campagnes
+ouvertes. Chaque lot est traité dans une transaction : une interruption
+n'archive jamais une candidature à moitié et la commande peut simplement être
+relancée.
+
+La suppression emporte volontairement les lignes dérivées de la candidature,
+que les données archivées permettent de reconstruire : événements du flux
+temps réel, clés de blocage et doublons détectés, index des lettres, index
+des pièces jointes (les chemins des fichiers restent dans `data`).
+L'historique des statuts est cumulé (`refresh_rollups`) avant l'archivage :
+les indicateurs de délai ne perdent aucun changement.
+"""
+import gzip
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from .history import refresh_rollups
+from .models import ApplicationComment, ApplicationStatusEvent, ArchivedApplication, ScholarshipApplication
+
+COMMENT_FIELDS = ('id', 'application_id', 'user_id', 'user__username', 'content', 'created_at')
+STATUS_EVENT_FIELDS = (
+    'id', 'application_id', 'from_status', 'to_status', 'changed_at', 'previous_changed_at', 'changed_by_id',
+    'changed_by__username',
+)
+
+
+class ArchiveError(ValueError):
+    """Campagne impossible à archiver"""
+
+
+def _by_application(queryset, fields, username_field):
+    """Lignes liées regroupées par candidature, le nom d'utilisateur recopié"""
+    grouped = {}
+    for row in queryset.values(*fields):
+        application_id = row.pop('application_id')
+        row['username'] = row.pop(username_field)
+        grouped.setdefault(application_id, []).append(row)
+    return grouped
+
+
+def _archive_batch(cycle, ids, export_file=None):
+    rows = list(ScholarshipApplication.objects.filter(pk__in=ids).order_by('id').values())
+    comments = _by_application(
+        ApplicationComment.objects.filter(application_id__in=ids).order_by('created_at', 'id'),
+        COMMENT_FIELDS, 'user__username'
+    )
+    status_history = _by_application(
+        ApplicationStatusEvent.objects.filter(application_id__in=ids).order_by('id'),
+        STATUS_EVENT_FIELDS, 'changed_by__username'
+    )
+
+    archived = [
+        ArchivedApplication(
+            original_id=row['id'], cycle=cycle, user_id=row['user_id'],
+            scholarship_type_id=row['scholarship_type_id'], full_name=row['full_name'], email=row['email'],
+            status=row['status'], ai_score=row['ai_score'], created_at=row['created_at'],
+            data=row, comments=comments.get(row['id'], []), status_history=status_history.get(row['id'], []),
+        )
+        for row in rows
+    ]
+    # L'export est écrit avant la suppression : une relance peut dupliquer
+    # des lignes de l'export, jamais en perdre
+    if export_file is not None:
+        for row in rows:
+            export_file.write(json.dumps(
+                {**row, 'comments': comments.get(row['id'], []), 'status_history': status_history.get(row['id'], [])},
+                cls=DjangoJSONEncoder, ensure_ascii=False
+            ) + '\n')
+        export_file.flush()
+
+    with transaction.atomic():
+        ArchivedApplication.objects.bulk_create(archived)
+        # Suppression en cascade des commentaires, de l'historique et des lignes dérivées
+        ScholarshipApplication.objects.filter(pk__in=ids).delete()
+    return len(rows)
+
+
+def archive_cycle(cycle, batch_size=1000, export_path=None, progress=None):
+    """
+    Archive toutes les candidatures d'une campagne fermée.
+
+    Args:
+        cycle (Cycle): Campagne à archiver
+        batch_size (int): Nombre de candidatures par transaction
+        export_path (str): Fichier JSON Lines compressé (gzip) recevant aussi les candidatures
+        progress (callable): Appelé avec le nombre de candidatures archivées
+
+    Returns:
+        int: Nombre de candidatures archivées
+    """
+    if not cycle.is_closed:
+        raise ArchiveError(f"La campagne {cycle} n'est pas fermée")
+
+    # Les changements de statut supprimés avec les candidatures doivent déjà être cumulés
+    refresh_rollups()
+    remaining = ScholarshipApplication.objects.filter(cycle=cycle).order_by('id')
+    export_file = gzip.open(export_path, 'at', encoding='utf-8') if export_path else None
+    total = 0
+    try:
+        while True:
+            ids = list(remaining.values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            total += _archive_batch(cycle, ids, export_file)
+            if progress:
+                progress(total)
+    finally:
+        if export_file is not None:
+            export_file.close()
+
+    cycle.archived_at = timezone.now()
+    cycle.save(update_fields=['archived_at'])
+    return total
@@ -0,0 +1,126 @@
+"""
+File de travail des évaluateurs.
+
+`claim_next` attribue à un évaluateur les prochaines candidatures en attente
+ou en cours d'examen qui ne sont attribuées à personne, par ordre de
+priorité. Une attribution est un bail : elle expire après REVIEW_CLAIM_LEASE
+secondes et la candidature redevient disponible.
+
+Chaque attribution est une mise à jour conditionnelle d'une seule ligne
+(« compare-and-swap ») : elle ne réussit que si la candidature est encore
+libre au moment de l'écriture. Deux évaluateurs ne peuvent donc jamais
+obtenir la même candidature, sans verrou sur la table. Sur les bases qui
+verrouillent les lignes (PostgreSQL, MySQL, Oracle), les candidates sont en
+plus lues avec SELECT ... FOR UPDATE SKIP LOCKED : les évaluateurs simultanés
+se répartissent les lignes au lieu de se disputer les mêmes.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import ScholarshipApplication
+
+CLAIMABLE_STATUSES = ('pending', 'under_review')
+
+ORDERINGS = {
+    # Meilleur score IA d'abord, candidatures non évaluées en dernier
+    'score': (F('ai_score').desc(nulls_last=True), 'created_at', 'id'),
+    # Plus anciennes d'abord
+    'age': ('created_at', 'id'),
+}
+
+# Nombre de candidates lues par candidature manquante, sans verrou de ligne
+CANDIDATE_FACTOR = 4
+
+
+def claimable(now=None):
+    """Candidatures à examiner dont l'attribution est absente ou expirée"""
+    now = now or timezone.now()
+    return ScholarshipApplication.objects.filter(status__in=CLAIMABLE_STATUSES).filter(
+        Q(claimed_until__isnull=True) | Q(claimed_until__lte=now)
+    )
+
+
+def _try_claim(pk, user, now, until):
+    return claimable(now).filter(pk=pk).update(claimed_by=user, claimed_until=until) == 1
+
+
+def _claim_round(candidates, missing, user, now, until):
+    """Une passe d'attribution ; retourne (ids obtenus, nombre de candidates lues)"""
+    if connection.features.has_select_for_update_skip_locked:
+        # Les lignes verrouillées par un autre évaluateur sont sautées, pas attendues
+        with transaction.atomic():
+            ids = list(candidates.select_for_update(skip_locked=True).values_list('id', flat=True)[:missing])
+            return [pk for pk in ids if _try_claim(pk, user, now, until)], len(ids)
+
+    ids = list(candidates.values_list('id', flat=True)[:missing * CANDIDATE_FACTOR])
+    claimed = []
+    for pk in ids:
+        if _try_claim(pk, user, now, until):
+            claimed.append(pk)
+            if len(claimed) == missing:
+                break
+    return claimed, len(ids)
+
+
+def claim_next(user, count=1, order='score', lease=None):
+    """
+    Attribue à `user` jusqu'à `count` candidatures libres.
+
+    Args:
+        user (User): Évaluateur
+        count (int): Nombre de candidatures souhaitées
+        order (str): Priorité, une clé de ORDERINGS
+        lease (int): Durée de l'attribution en secondes (REVIEW_CLAIM_LEASE par défaut)
+
+    Returns:
+        list: Candidatures attribuées, par ordre de priorité
+    """
+    now = timezone.now()
+    until = now + timedelta(seconds=lease or settings.REVIEW_CLAIM_LEASE)
+    ordering = ORDERINGS[order]
+    claimed = []
+    while len(claimed) < count:
+        candidates = claimable(now).order_by(*ordering)
+        obtained, read = _claim_round(candidates, count - len(claimed), user, now, until)
+        claimed += obtained
+        # Une attribution manquée signifie qu'un autre évaluateur a progressé :
+        # on recommence tant qu'il reste des candidates
+        if not read:
+            break
+    return list(
+        ScholarshipApplication.objects.filter(pk__in=claimed).select_related('user', 'scholarship_type')
+        .order_by(*ordering)
+    )
+
+
+def active_claims(user, now=None):
+    """Candidatures actuellement attribuées à `user`"""
+    now = now or timezone.now()
+    return ScholarshipApplication.objects.filter(claimed_by=user, claimed_until__gt=now)
+
+
+def claim_holder(application, now=None):
+    """Évaluateur détenant une attribution valide sur la candidature, ou None"""
+    now = now or timezone.now()
+    if application.claimed_by_id and application.claimed_until and application.claimed_until > now:
+        return application.claimed_by_id
+    return None
+
+
+def release(application, user):
+    """
+    Libère l'attribution de `user` sur la candidature.
+
+    Returns:
+        bool: True si l'attribution appartenait à `user`
+    """
+    released = ScholarshipApplication.objects.filter(pk=application.pk, claimed_by=user).update(
+        claimed_by=None, claimed_until=None
+    ) == 1
+    if released:
+        application.claimed_by, application.claimed_until = None, None
+    return released
@@ -0,0 +1,106 @@
+"""
+Tableau de bord du candidat (`GET /api/me/dashboard/`).
+
+Tout ce qu'affiche la page d'accueil du candidat, en une réponse : ses
+candidatures avec leurs derniers commentaires, le décompte par statut, les
+bourses ouvertes et la position du flux d'événements. La réponse est
+construite en un nombre fixe de requêtes, quel que soit le nombre de
+candidatures et de commentaires.
+
+La réponse est mise en cache par utilisateur. La clé contient trois
+compteurs de version, incrémentés après le commit de chaque changement :
+- celui du flux d'événements du candidat (statut, commentaire, évaluation) ;
+- celui du tableau de bord du candidat (dépôt, modification, suppression) ;
+- un compteur global (bourses, campagnes).
+Les changements groupés (`set_status`, réévaluations) n'incrémentent que les
+compteurs des candidats concernés.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch
+
+from .events import OWNER_VERSION_KEY, current_version, latest_event_id
+from .models import ApplicationComment, ScholarshipApplication, ScholarshipType
+from .serializers import DashboardApplicationSerializer, ScholarshipTypeSerializer
+
+GLOBAL_VERSION_KEY = 'applications:dashboard:version'
+USER_VERSION_KEY = 'applications:dashboard:version:{}'
+CACHE_KEY = 'applications:dashboard:{}:{}:{}:{}'
+
+# Commentaires affichés par candidature
+RECENT_COMMENTS = 3
+
+
+def _bump(*keys):
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, timeout=None)
+
+
+def invalidate_dashboard(user_id=None):
+    """
+    Invalide le tableau de bord d'un candidat, ou de tous les candidats sans
+    `user_id`, après le commit de la transaction en cours.
+    """
+    key = GLOBAL_VERSION_KEY if user_id is None else USER_VERSION_KEY.format(user_id)
+    transaction.on_commit(lambda: _bump(key))
+
+
+def invalidate_dashboards(user_ids):
+    """Invalide les tableaux de bord de plusieurs candidats après le commit de la transaction en cours"""
+    keys = [USER_VERSION_KEY.format(user_id) for user_id in user_ids]
+    transaction.on_commit(lambda: _bump(*keys))
+
+
+def cache_key(user):
+    return CACHE_KEY.format(
+        user.pk,
+        current_version(GLOBAL_VERSION_KEY),
+        current_version(USER_VERSION_KEY.format(user.pk)),
+        current_version(OWNER_VERSION_KEY.format(user.pk)),
+    )
+
+
+def build_dashboard(user):
+    """Contenu du tableau de bord, en quatre requêtes"""
+    recent_comments = ApplicationComment.objects.select_related('user').order_by('-created_at', '-id')
+    applications = list(
+        ScholarshipApplication.objects.filter(user=user)
+        .select_related('scholarship_type')
+        .prefetch_related(Prefetch(
+            'comments', queryset=recent_comments[:RECENT_COMMENTS], to_attr='recent_comments'
+        ))
+        .order_by('-created_at')
+    )
+    by_status = {code: 0 for code, _ in ScholarshipApplication.STATUS_CHOICES}
+    for application in applications:
+        by_status[application.status] += 1
+
+    return {
+        'applications': DashboardApplicationSerializer(applications, many=True).data,
+        'counts': {'total': len(applications), 'by_status': by_status},
+        'scholarship_types': ScholarshipTypeSerializer(
+            ScholarshipType.objects.filter(is_active=True).order_by('name'), many=True
+        ).data,
+        # Position à partir de laquelle suivre le flux d'événements
+        'last_event_id': latest_event_id(user),
+    }
+
+
+def get_dashboard(user):
+    """
+    Tableau de bord d'un candidat, lu dans le cache s'il est à jour.
+
+    Returns:
+        tuple: (contenu, True si lu dans le cache)
+    """
+    key = cache_key(user)
+    dashboard = cache.get(key)
+    if dashboard is not None:
+        return dashboard, True
+    dashboard = build_dashboard(user)
+    cache.set(key, dashboard, timeout=settings.DASHBOARD_CACHE_TIMEOUT)
+    return dashboard, False
@@ -0,0 +1,323 @@
+"""
+Extraction du texte des pièces jointes (CV, relevés de notes, lettres de
+recommandation, documents supplémentaires).
+
+Le dépôt d'une candidature se contente d'enregistrer ses pièces jointes
+(`register_documents`) ; tout le reste est fait par la commande
+`extract_documents`, hors des requêtes :
+1. chaque nouveau fichier est haché (SHA-256, lu par blocs) et rattaché au
+   `DocumentText` de son empreinte : un fichier déjà vu n'est pas réextrait ;
+2. chaque `DocumentText` en attente est réservé par une mise à jour
+   conditionnelle, puis extrait page par page (PDF, DOCX, texte, images) ;
+   plusieurs extracteurs peuvent tourner en parallèle sans traiter deux fois
+   le même fichier ;
+3. les mots du texte, normalisés, alimentent l'index inversé `DocumentTerm`
+   utilisé par la recherche.
+
+Le PDF nécessite le module `pypdf`, les images `Pillow` et `pytesseract`.
+Sans eux, les documents concernés sont marqués « non pris en charge » et
+peuvent être repris une fois les modules installés (`--retry-unsupported`).
+"""
+import codecs
+import hashlib
+import logging
+import re
+import unicodedata
+import zipfile
+from datetime import timedelta
+from xml.etree import ElementTree
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import ApplicationDocument, DocumentTerm, DocumentText, ScholarshipApplication
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_FIELDS = [name for name, _ in ApplicationDocument.FIELD_CHOICES]
+
+BLOCK_SIZE = 64 * 1024
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 40
+
+WORD_NAMESPACE = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+IMAGE_SIGNATURES = (b'\x89PNG\r\n\x1a\n', b'\xff\xd8\xff', b'II*\x00', b'MM\x00*', b'GIF8', b'BM')
+
+
+class UnsupportedDocument(Exception):
+    """Format inconnu, ou module d'extraction non installé"""
+
+
+def register_documents(application):
+    """
+    Enregistre les pièces jointes d'une candidature. Les fichiers ne sont pas
+    lus : ils seront hachés et extraits par `extract_documents`.
+    """
+    current = {name: getattr(application, name).name for name in DOCUMENT_FIELDS if getattr(application, name)}
+    known = dict(application.documents.values_list('field', 'name'))
+    removed = [name for name in known if name not in current]
+    if removed:
+        application.documents.filter(field__in=removed).delete()
+    for name, file_name in current.items():
+        if known.get(name) != file_name:
+            ApplicationDocument.objects.update_or_create(
+                application=application, field=name, defaults={'name': file_name, 'document': None}
+            )
+
+
+def terms(text):
+    """Mots normalisés (minuscules, sans accents) d'un texte"""
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode().lower()
+    return {word[:MAX_TERM_LENGTH] for word in re.findall(r'[a-z0-9]+', text) if len(word) >= MIN_TERM_LENGTH}
+
+
+def _storage(field_name):
+    return ScholarshipApplication._meta.get_field(field_name).storage
+
+
+def _hash_file(storage, name):
+    digest = hashlib.sha256()
+    size = 0
+    with storage.open(name, 'rb') as stored:
+        for block in iter(lambda: stored.read(BLOCK_SIZE), b''):
+            digest.update(block)
+            size += len(block)
+    return digest.hexdigest(), size
+
+
+def hash_attachments(limit):
+    """
+    Rattache les nouvelles pièces jointes au `DocumentText` de leur empreinte.
+
+    Returns:
+        int: Nombre de pièces jointes traitées
+    """
+    attachments = list(ApplicationDocument.objects.filter(document__isnull=True).order_by('id')[:limit])
+    for attachment in attachments:
+        try:
+            sha256, size = _hash_file(_storage(attachment.field), attachment.name)
+        except OSError:
+            # Fichier supprimé ou remplacé depuis le dépôt
+            logger.warning("Pièce jointe %s illisible, ignorée", attachment.name)
+            attachment.delete()
+            continue
+        try:
+            with transaction.atomic():
+                document, _ = DocumentText.objects.get_or_create(sha256=sha256, defaults={'size': size})
+        except IntegrityError:
+            # Même fichier haché au même moment par un autre extracteur
+            document = DocumentText.objects.get(sha256=sha256)
+        # Le fichier a pu être remplacé pendant le hachage : le nouveau fichier sera haché au passage suivant
+        ApplicationDocument.objects.filter(pk=attachment.pk, name=attachment.name).update(document=document)
+    return len(attachments)
+
+
+def detect_kind(name, head):
+    """Format d'un fichier d'après ses premiers octets, puis son extension"""
+    if head.startswith(b'%PDF'):
+        return 'pdf'
+    if head.startswith(b'PK\x03\x04'):
+        return 'docx'
+    if head.startswith(IMAGE_SIGNATURES):
+        return 'image'
+    if name.lower().endswith(('.txt', '.md', '.csv')) or b'\x00' not in head:
+        return 'txt'
+    return None
+
+
+def _text_pages(stored):
+    # Texte brut : un bloc par « page », décodé sans couper un caractère multi-octets
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    for block in iter(lambda: stored.read(BLOCK_SIZE), b''):
+        yield decoder.decode(block)
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def _docx_pages(stored):
+    # Le XML du document est lu au fil de l'eau : un paragraphe à la fois
+    try:
+        archive = zipfile.ZipFile(stored)
+        member = archive.open('word/document.xml')
+    except (zipfile.BadZipFile, KeyError):
+        raise UnsupportedDocument("Archive ZIP qui n'est pas un document Word")
+    with archive, member:
+        paragraph = []
+        for _, element in ElementTree.iterparse(member):
+            if element.tag == f'{WORD_NAMESPACE}t' and element.text:
+                paragraph.append(element.text)
+            elif element.tag == f'{WORD_NAMESPACE}tab':
+                paragraph.append('\t')
+            elif element.tag == f'{WORD_NAMESPACE}p':
+                yield ''.join(paragraph) + '\n'
+                paragraph = []
+                element.clear()
+
+
+def _pdf_pages(stored):
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise UnsupportedDocument("Module pypdf non installé")
+    # Les pages sont analysées une à une, à la demande
+    for page in PdfReader(stored).pages:
+        yield (page.extract_text() or '') + '\n'
+
+
+def _image_pages(stored):
+    try:
+        import pytesseract
+        from PIL import Image, ImageSequence
+    except ImportError:
+        raise UnsupportedDocument("Modules Pillow et pytesseract non installés")
+    with Image.open(stored) as image:
+        # Une page par image d'un TIFF multipage
+        for frame in ImageSequence.Iterator(image):
+            yield pytesseract.image_to_string(frame) + '\n'
+
+
+EXTRACTORS = {
+    'pdf': _pdf_pages,
+    'docx': _docx_pages,
+    'txt': _text_pages,
+    'image': _image_pages,
+}
+
+
+def extract_text(storage, name, max_chars=None):
+    """
+    Extrait le texte d'un fichier page par page.
+
+    Args:
+        storage (Storage): Stockage du fichier
+        name (str): Nom du fichier dans le stockage
+        max_chars (int): Longueur maximale conservée (DOCUMENT_TEXT_MAX_CHARS par défaut)
+
+    Returns:
+        tuple: (format, texte, nombre de pages)
+
+    Raises:
+        UnsupportedDocument: Format inconnu ou module d'extraction manquant
+    """
+    max_chars = max_chars or settings.DOCUMENT_TEXT_MAX_CHARS
+    with storage.open(name, 'rb') as stored:
+        kind = detect_kind(name, stored.read(1024))
+        if kind is None:
+            raise UnsupportedDocument("Format non reconnu")
+        stored.seek(0)
+        parts, length, pages = [], 0, 0
+        for page in EXTRACTORS[kind](stored):
+            pages += 1
+            parts.append(page[:max_chars - length])
+            length += len(parts[-1])
+            if length >= max_chars:
+                # Texte tronqué : les pages suivantes ne sont pas lues
+                break
+    return kind, ''.join(parts), pages
+
+
+def _claimable(now):
+    timeout = now - timedelta(seconds=settings.DOCUMENT_EXTRACTION_TIMEOUT)
+    return DocumentText.objects.filter(
+        Q(status='pending') | Q(status='processing', claimed_at__lt=timeout),
+        attempts__lt=settings.DOCUMENT_EXTRACTION_MAX_ATTEMPTS,
+    )
+
+
+def claim_documents(limit):
+    """Réserve jusqu'à `limit` documents à extraire ; chacun n'est réservé que par un extracteur"""
+    now = timezone.now()
+    claimed = []
+    for pk in _claimable(now).order_by('id').values_list('id', flat=True)[:limit]:
+        if _claimable(now).filter(pk=pk).update(status='processing', claimed_at=now) == 1:
+            claimed.append(pk)
+    return claimed
+
+
+def extract_document(document):
+    """Extrait un document réservé et met à jour son texte et l'index des termes"""
+    attachment = document.attachments.order_by('id').first()
+    if attachment is None:
+        # Plus aucune candidature n'utilise ce fichier
+        document.delete()
+        return
+    DocumentText.objects.filter(pk=document.pk).update(attempts=document.attempts + 1)
+    try:
+        kind, text, pages = extract_text(_storage(attachment.field), attachment.name)
+    except UnsupportedDocument as exc:
+        DocumentText.objects.filter(pk=document.pk).update(status='unsupported', error=str(exc)[:255],
+                                                           claimed_at=None)
+        return
+    except Exception as exc:
+        logger.exception("Échec de l'extraction de %s", attachment.name)
+        # Nouvel essai au passage suivant, dans la limite de DOCUMENT_EXTRACTION_MAX_ATTEMPTS
+        retry = document.attempts + 1 < settings.DOCUMENT_EXTRACTION_MAX_ATTEMPTS
+        DocumentText.objects.filter(pk=document.pk).update(
+            status='pending' if retry else 'failed', error=str(exc)[:255], claimed_at=None
+        )
+        return
+
+    with transaction.atomic():
+        DocumentText.objects.filter(pk=document.pk).update(
+            status='done', kind=kind, text=text, page_count=pages, error='', claimed_at=None,
+            extracted_at=timezone.now()
+        )
+        DocumentTerm.objects.filter(document=document).delete()
+        DocumentTerm.objects.bulk_create(
+            [DocumentTerm(document=document, term=term) for term in sorted(terms(text))], batch_size=1000
+        )
+
+
+def process(batch_size=None):
+    """
+    Un passage de l'extracteur : hachage des nouvelles pièces jointes puis
+    extraction des documents en attente.
+
+    Returns:
+        tuple: (pièces jointes hachées, documents extraits)
+    """
+    batch_size = batch_size or settings.DOCUMENT_EXTRACTION_BATCH_SIZE
+    hashed = hash_attachments(batch_size)
+    claimed = claim_documents(batch_size)
+    for document in DocumentText.objects.filter(pk__in=claimed).only('id', 'attempts'):
+        extract_document(document)
+    return hashed, len(claimed)
+
+
+def retry_unsupported():
+    """Remet en attente les documents non pris en charge (après installation d'un module)"""
+    return DocumentText.objects.filter(status='unsupported').update(status='pending', attempts=0, error='')
+
+
+def search(query, field=None):
+    """
+    Pièces jointes dont le texte contient tous les mots de `query`.
+
+    Returns:
+        QuerySet: ApplicationDocument correspondants, les plus récents d'abord
+    """
+    words = terms(query)
+    if not words:
+        return ApplicationDocument.objects.none()
+    documents = (
+        DocumentTerm.objects.filter(term__in=words).values('document')
+        .annotate(matched=Count('term')).filter(matched=len(words)).values('document')
+    )
+    attachments = ApplicationDocument.objects.filter(document__in=documents)
+    if field:
+        attachments = attachments.filter(field=field)
+    return attachments.order_by('-application_id', 'field')
+
+
+def snippet(text, query, width=160):
+    """Extrait du texte autour de la première occurrence d'un mot de la requête"""
+    # Lettre de base de chaque caractère : les positions restent celles du texte d'origine
+    folded = ''.join(unicodedata.normalize('NFKD', char)[:1].lower()[:1] for char in text)
+    positions = [folded.find(word) for word in terms(query)]
+    start = min((position for position in positions if position >= 0), default=0)
+    start = max(0, start - width // 4)
+    return ' '.join(text[start:start + width].split())
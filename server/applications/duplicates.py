@@ -0,0 +1,319 @@
+"""
+Détection des candidatures en double.
+
+Chaque candidature reçoit des clés de regroupement (nom phonétique, date de
+naissance associée au nom, chiffres du téléphone, identifiant email) stockées dans une table
+indexée. La comparaison fine n'est faite qu'entre candidatures partageant au
+moins une clé, ce qui évite la comparaison de toutes les paires.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+from itertools import combinations, groupby
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import ApplicantBlockingKey, DuplicateMatch, ScholarshipApplication
+
+# Au-delà de cette taille, une clé est trop commune pour être discriminante
+MAX_BLOCK_SIZE = 50
+
+DUPLICATE_THRESHOLD = 0.6
+
+# Similarité minimale de deux noms dont les codes phonétiques diffèrent
+NAME_SIMILARITY_THRESHOLD = 0.8
+
+# Poids de chaque élément concordant dans le score de similarité
+WEIGHTS = {
+    'name': 0.4,
+    'birth': 0.25,
+    'phone': 0.25,
+    'email': 0.2,
+}
+
+IDENTITY_FIELDS = ('id', 'user_id', 'full_name', 'date_of_birth', 'phone', 'email')
+
+PHONETIC_RULES = (
+    (re.compile(r'ph'), 'f'),
+    (re.compile(r'(?<=[bcdfgjklmnpqrstvwxz])h|^h'), ''),
+    (re.compile(r'c(?=[eiy])'), 's'),
+    (re.compile(r'ck|qu|q|c'), 'k'),
+    (re.compile(r'gu(?=[ei])'), 'g'),
+    (re.compile(r'ou|oo'), 'u'),
+    (re.compile(r'[yi]'), 'i'),
+    (re.compile(r'z'), 's'),
+    (re.compile(r'w'), 'v'),
+    (re.compile(r'x'), 'ks'),
+)
+
+
+def normalize_name(name):
+    """Minuscules, sans accents ni ponctuation, mots triés"""
+    text = unicodedata.normalize('NFKD', name or '').encode('ascii', 'ignore').decode().lower()
+    return ' '.join(sorted(re.findall(r'[a-z]+', text)))
+
+
+@lru_cache(maxsize=65536)
+def phonetic(word):
+    """
+    Code phonétique simplifié adapté aux noms francophones et ouest-africains :
+    les graphies proches (Mamadou / Mamadu, Diallo / Dialo) donnent le même code.
+    """
+    for pattern, replacement in PHONETIC_RULES:
+        word = pattern.sub(replacement, word)
+    if not word:
+        return ''
+    # Première lettre conservée, voyelles suivantes supprimées, lettres doublées fusionnées
+    head, tail = word[0], re.sub(r'[aeiou]', '', word[1:])
+    code = re.sub(r'(.)\1+', r'\1', head + tail)
+    return code[:6]
+
+
+def name_key(full_name, normalized=None):
+    words = (normalized if normalized is not None else normalize_name(full_name)).split()
+    return ' '.join(sorted(code for code in map(phonetic, words) if code))
+
+
+def phone_key(phone):
+    digits = re.sub(r'\D', '', phone or '')
+    # Les 9 derniers chiffres ignorent les indicatifs internationaux
+    return digits[-9:] if len(digits) >= 7 else ''
+
+
+def email_key(email):
+    local = (email or '').lower().partition('@')[0]
+    return local.partition('+')[0].replace('.', '')
+
+
+def blocking_keys(full_name, date_of_birth, phone, email):
+    """Retourne l'ensemble des clés (type, valeur) d'une candidature"""
+    codes = name_key(full_name)
+    keys = {
+        ('name', codes[:100]),
+        ('phone', phone_key(phone)),
+        ('email', email_key(email)[:100]),
+    }
+    # Une date de naissance seule regroupe trop de personnes : elle est
+    # combinée au début du code phonétique de chaque mot du nom
+    if date_of_birth:
+        keys.update(('birth', f"{date_of_birth.isoformat()}:{code[:3]}") for code in codes.split())
+    return {(kind, value) for kind, value in keys if value}
+
+
+def refresh_blocking_keys(application):
+    """
+    Met à jour les clés d'une candidature si ses champs d'identité ont changé.
+
+    Returns:
+        bool: True si les clés ont été modifiées
+    """
+    keys = blocking_keys(application.full_name, application.date_of_birth, application.phone, application.email)
+    existing = set(application.blocking_keys.values_list('kind', 'value'))
+    if keys == existing:
+        return False
+    with transaction.atomic():
+        application.blocking_keys.all().delete()
+        ApplicantBlockingKey.objects.bulk_create([
+            ApplicantBlockingKey(application=application, kind=kind, value=value) for kind, value in keys
+        ])
+    return True
+
+
+def rebuild_blocking_keys(batch_size=5000):
+    """Recalcule les clés de toutes les candidatures, par lots"""
+    ApplicantBlockingKey.objects.all().delete()
+    rows = ScholarshipApplication.objects.order_by().values_list(
+        'id', 'full_name', 'date_of_birth', 'phone', 'email'
+    ).iterator(chunk_size=batch_size)
+    batch, total = [], 0
+    for app_id, full_name, date_of_birth, phone, email in rows:
+        batch.extend(
+            ApplicantBlockingKey(application_id=app_id, kind=kind, value=value)
+            for kind, value in blocking_keys(full_name, date_of_birth, phone, email)
+        )
+        total += 1
+        if len(batch) >= batch_size:
+            ApplicantBlockingKey.objects.bulk_create(batch, batch_size=batch_size)
+            batch = []
+    ApplicantBlockingKey.objects.bulk_create(batch)
+    return total
+
+
+def bigrams(text):
+    return frozenset(text[i:i + 2] for i in range(len(text) - 1))
+
+
+def identity(row):
+    """Précalcule les formes normalisées des champs d'identité d'une candidature"""
+    name = normalize_name(row['full_name'])
+    return {
+        'user_id': row['user_id'],
+        'bigrams': bigrams(name),
+        'name_key': name_key(row['full_name'], normalized=name),
+        'birth': row['date_of_birth'],
+        'phone': phone_key(row['phone']),
+        'email': email_key(row['email']),
+    }
+
+
+def similarity(first, second, threshold=0):
+    """
+    Score de similarité entre deux identités (voir `identity`), entre 0 et 1,
+    et liste des éléments concordants. La comparaison des noms est omise
+    lorsqu'elle ne peut plus faire atteindre le seuil.
+    """
+    score, reasons = 0.0, []
+    for field in ('birth', 'phone', 'email'):
+        if first[field] and first[field] == second[field]:
+            score += WEIGHTS[field]
+            reasons.append(field)
+
+    if first['name_key'] and first['name_key'] == second['name_key']:
+        score += WEIGHTS['name']
+        reasons.insert(0, 'name')
+    elif score + WEIGHTS['name'] >= threshold and first['bigrams'] and second['bigrams']:
+        # Coefficient de Dice sur les bigrammes de caractères des noms normalisés
+        common = len(first['bigrams'] & second['bigrams'])
+        ratio = 2 * common / (len(first['bigrams']) + len(second['bigrams']))
+        if ratio >= NAME_SIMILARITY_THRESHOLD:
+            score += WEIGHTS['name'] * ratio
+            reasons.insert(0, 'name')
+    return min(round(score, 3), 1.0), reasons
+
+
+def _identities(ids, batch_size=2000):
+    identities = {}
+    ids = list(ids)
+    for start in range(0, len(ids), batch_size):
+        for row in ScholarshipApplication.objects.filter(pk__in=ids[start:start + batch_size]).values(*IDENTITY_FIELDS):
+            identities[row['id']] = identity(row)
+    return identities
+
+
+def _score_pairs(pairs, identities, threshold):
+    matches = []
+    for first_id, second_id in pairs:
+        first, second = identities[first_id], identities[second_id]
+        # Plusieurs candidatures d'un même compte ne sont pas des doublons
+        if first['user_id'] == second['user_id']:
+            continue
+        score, reasons = similarity(first, second, threshold)
+        if score >= threshold:
+            matches.append((first_id, second_id, score, reasons))
+    return matches
+
+
+def _clusters(matches):
+    """Union-find : associe à chaque candidature le plus petit id de son groupe"""
+    parent = {}
+
+    def find(node):
+        parent.setdefault(node, node)
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for first_id, second_id, _, _ in matches:
+        root_first, root_second = find(first_id), find(second_id)
+        if root_first != root_second:
+            parent[max(root_first, root_second)] = min(root_first, root_second)
+    return {node: find(node) for node in parent}
+
+
+def scan_duplicates(threshold=DUPLICATE_THRESHOLD, max_block_size=MAX_BLOCK_SIZE):
+    """
+    Parcourt toutes les clés de regroupement et enregistre les doublons potentiels.
+    Les paires déjà écartées par un relecteur sont conservées telles quelles.
+
+    Returns:
+        dict: Nombre de blocs, de paires comparées, de doublons et de groupes
+    """
+    rows = ApplicantBlockingKey.objects.order_by('kind', 'value').values_list(
+        'kind', 'value', 'application_id'
+    ).iterator(chunk_size=10000)
+
+    pairs, blocks = set(), 0
+    for _, block in groupby(rows, key=lambda row: (row[0], row[1])):
+        members = sorted({row[2] for row in block})
+        if 1 < len(members) <= max_block_size:
+            blocks += 1
+            pairs.update(combinations(members, 2))
+
+    identities = _identities({app_id for pair in pairs for app_id in pair})
+    matches = _score_pairs(sorted(pairs), identities, threshold)
+    clusters = _clusters(matches)
+
+    dismissed = set(DuplicateMatch.objects.filter(is_dismissed=True).values_list('application_id', 'duplicate_of_id'))
+    with transaction.atomic():
+        DuplicateMatch.objects.filter(is_dismissed=False).delete()
+        DuplicateMatch.objects.bulk_create([
+            DuplicateMatch(
+                application_id=second_id, duplicate_of_id=first_id, score=score,
+                reasons=','.join(reasons), cluster=clusters[first_id]
+            )
+            for first_id, second_id, score, reasons in matches
+            if (second_id, first_id) not in dismissed
+        ], batch_size=2000)
+
+    return {
+        'blocks': blocks,
+        'pairs': len(pairs),
+        'matches': len(matches),
+        'clusters': len(set(clusters.values())),
+    }
+
+
+def find_duplicates(application, threshold=DUPLICATE_THRESHOLD, max_block_size=MAX_BLOCK_SIZE):
+    """
+    Cherche les doublons d'une seule candidature via ses clés de regroupement.
+
+    Returns:
+        list: (id de la candidature similaire, score, éléments concordants)
+    """
+    keys = list(application.blocking_keys.values_list('kind', 'value'))
+    candidates = set()
+    for kind, value in keys:
+        # Bloc compté avec la candidature elle-même, comme dans `scan_duplicates`
+        members = set(
+            ApplicantBlockingKey.objects.filter(kind=kind, value=value)
+            .values_list('application_id', flat=True)[:max_block_size + 1]
+        )
+        if len(members) <= max_block_size:
+            candidates.update(members - {application.pk})
+
+    identities = _identities(candidates | {application.pk})
+    matches = _score_pairs(((application.pk, other) for other in sorted(candidates)), identities, threshold)
+    return sorted(
+        ((other, score, reasons) for _, other, score, reasons in matches),
+        key=lambda match: -match[1]
+    )
+
+
+def record_duplicates(application, threshold=DUPLICATE_THRESHOLD):
+    """
+    Enregistre les doublons d'une candidature nouvellement créée ou modifiée,
+    en la rattachant au groupe existant le cas échéant ; les groupes qu'elle
+    relie sont fusionnés sous le plus petit identifiant.
+    """
+    matches = find_duplicates(application, threshold=threshold)
+    if not matches:
+        return []
+    other_ids = [other for other, _, _ in matches]
+    # Groupes déjà formés par les candidatures concernées, de part et d'autre des paires
+    members = [application.pk, *other_ids]
+    with transaction.atomic():
+        existing_clusters = set(DuplicateMatch.objects.filter(
+            Q(application_id__in=members) | Q(duplicate_of_id__in=members)
+        ).values_list('cluster', flat=True))
+        cluster = min([*members, *existing_clusters])
+        # Une candidature qui relie plusieurs groupes les fusionne : toutes leurs paires changent de groupe
+        DuplicateMatch.objects.filter(cluster__in=existing_clusters - {cluster}).update(cluster=cluster)
+        for other, score, reasons in matches:
+            first_id, second_id = sorted((application.pk, other))
+            DuplicateMatch.objects.update_or_create(
+                application_id=second_id, duplicate_of_id=first_id,
+                defaults={'score': score, 'reasons': ','.join(reasons), 'cluster': cluster}
+            )
+    return matches
@@ -0,0 +1,260 @@
+"""
+Flux des changements de candidatures (statut, commentaires, évaluations).
+
+Chaque changement est ajouté à la table ApplicationEvent, puis un compteur de
+version est incrémenté dans le cache (un global pour les administrateurs, un
+par propriétaire de candidature). Les clients connectés ne consultent que ce
+compteur, créé au premier accès : la base n'est interrogée que lorsqu'il a
+changé, et un client inactif ne lui coûte rien.
+
+Les compteurs ne sont vus par tous les processus que si le cache est partagé
+(Redis, Memcached ; vérifié par `check --deploy`, W002). Avec LocMemCache, un
+client n'est réveillé que par les changements faits dans son processus ; les
+autres lui parviennent à la fin de l'attente (long-polling) ou à la
+reconnexion (SSE, après EVENT_STREAM_MAX_DURATION).
+
+Sous ASGI, l'attente (long-polling et SSE) se fait dans la boucle
+d'événements (`asyncio.sleep`) : un client inactif n'occupe ni worker ni
+thread. Sous WSGI, chaque client en attente occupe un thread du serveur
+pendant toute la connexion (jusqu'à EVENT_STREAM_MAX_DURATION pour SSE) :
+au-delà de EVENT_STREAM_MAX_PER_PROCESS clients par processus, un flux SSE
+est refusé (503) et le long-polling répond sans attendre.
+"""
+import asyncio
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+from django.db import transaction
+
+from scholarship_management.caching import is_shared_cache
+
+from .models import ApplicationEvent
+
+GLOBAL_VERSION_KEY = 'applications:events:version'
+OWNER_VERSION_KEY = 'applications:events:version:{}'
+
+# Nombre maximal d'événements renvoyés par lecture
+BATCH_SIZE = 100
+
+
+def version_key(user):
+    return GLOBAL_VERSION_KEY if user.is_staff else OWNER_VERSION_KEY.format(user.pk)
+
+
+def current_version(key):
+    version = cache.get(key)
+    if version is None:
+        # Cache vidé ou redémarré : la valeur change, les clients relisent une fois
+        cache.add(key, 0, timeout=None)
+        version = cache.get(key, 0)
+    return version
+
+
+def user_version(user):
+    """Version du flux d'un utilisateur : change dès qu'un nouvel événement lui est visible"""
+    # Lue dans le cache seulement : l'attente ne coûte aucune requête
+    return current_version(version_key(user))
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_event_cache(app_configs=None, **kwargs):
+    """Les compteurs de version du flux doivent être vus par tous les processus"""
+    if is_shared_cache():
+        return []
+    return [checks.Warning(
+        "Le cache 'default' est propre à chaque processus : les clients du flux d'événements ne sont "
+        "réveillés que par les changements faits dans leur processus.",
+        hint="Configurer un cache partagé (Redis, Memcached) pour 'default'.",
+        id='scholarship_management.W002',
+    )]
+
+
+# Attentes occupant un thread (WSGI) dans ce processus
+_waiting = threading.BoundedSemaphore(settings.EVENT_STREAM_MAX_PER_PROCESS)
+
+
+def reserve_thread():
+    """Réserve une place d'attente synchrone ; False si le processus est saturé"""
+    return _waiting.acquire(blocking=False)
+
+
+def release_thread():
+    _waiting.release()
+
+
+def bump_versions(owner_ids):
+    """Prévient les clients des administrateurs et des propriétaires donnés"""
+    for key in [GLOBAL_VERSION_KEY] + [OWNER_VERSION_KEY.format(owner_id) for owner_id in owner_ids]:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, timeout=None)
+
+
+def record_event(application, kind, **payload):
+    """
+    Ajoute un événement au journal. Les clients sont prévenus après le commit
+    de la transaction en cours.
+    """
+    event = ApplicationEvent.objects.create(
+        application_id=application.pk, owner_id=application.user_id, kind=kind, payload=payload
+    )
+    transaction.on_commit(lambda: bump_versions([application.user_id]))
+    return event
+
+
+def visible_events(user):
+    events = ApplicationEvent.objects.all()
+    if not user.is_staff:
+        events = events.filter(owner=user)
+    return events
+
+
+def latest_event_id(user):
+    return visible_events(user).order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def events_since(user, last_event_id, limit=BATCH_SIZE):
+    return list(
+        visible_events(user).filter(id__gt=last_event_id)
+        .order_by('id')
+        .values('id', 'application_id', 'kind', 'payload', 'created_at')[:limit]
+    )
+
+
+def serialize_event(event):
+    return {
+        'id': event['id'],
+        'application': event['application_id'],
+        'kind': event['kind'],
+        'created_at': event['created_at'],
+        **event['payload'],
+    }
+
+
+def wait_for_events(user, last_event_id, timeout):
+    """
+    Attend de nouveaux événements (long-polling) en ne consultant que la
+    version du flux. Sous ASGI, utiliser `async_wait_for_events`.
+
+    Returns:
+        list: Événements postérieurs à last_event_id, éventuellement vide
+    """
+    version = user_version(user)
+    events = events_since(user, last_event_id)
+    deadline = time.monotonic() + timeout
+    while not events and time.monotonic() < deadline:
+        time.sleep(settings.EVENT_STREAM_POLL_INTERVAL)
+        new_version = user_version(user)
+        if new_version != version:
+            version = new_version
+            events = events_since(user, last_event_id)
+    return events
+
+
+async def async_wait_for_events(user, last_event_id, timeout):
+    """`wait_for_events` pour ASGI : l'attente ne bloque aucun thread"""
+    version = await sync_to_async(user_version)(user)
+    events = await sync_to_async(events_since)(user, last_event_id)
+    deadline = time.monotonic() + timeout
+    while not events and time.monotonic() < deadline:
+        await asyncio.sleep(settings.EVENT_STREAM_POLL_INTERVAL)
+        new_version = await sync_to_async(user_version)(user)
+        if new_version != version:
+            version = new_version
+            events = await sync_to_async(events_since)(user, last_event_id)
+    return events
+
+
+def _sse_message(event, encode):
+    return b''.join((
+        f"id: {event['id']}\nevent: {event['kind']}\ndata: ".encode(),
+        encode(serialize_event(event)),
+        b"\n\n",
+    ))
+
+
+class _StreamState:
+    """
+    État d'un flux SSE : dernier identifiant envoyé et version du flux. La
+    connexion est fermée après EVENT_STREAM_MAX_DURATION et le client reprend
+    avec Last-Event-ID.
+    """
+
+    def __init__(self, user, last_event_id, encode):
+        self.user = user
+        self.last_event_id = last_event_id
+        self.encode = encode
+        self.version = None
+        self.started = self.last_sent = time.monotonic()
+
+    def open(self):
+        return time.monotonic() - self.started < settings.EVENT_STREAM_MAX_DURATION
+
+    def poll(self):
+        """Messages à envoyer : nouveaux événements, ou commentaire de maintien"""
+        messages = []
+        new_version = user_version(self.user)
+        if new_version != self.version:
+            self.version = new_version
+            events = events_since(self.user, self.last_event_id)
+            while events:
+                messages.extend(_sse_message(event, self.encode) for event in events)
+                self.last_event_id = events[-1]['id']
+                events = events_since(self.user, self.last_event_id) if len(events) == BATCH_SIZE else []
+        if messages:
+            self.last_sent = time.monotonic()
+        elif time.monotonic() - self.last_sent >= settings.EVENT_STREAM_HEARTBEAT:
+            # Commentaire SSE : garde la connexion ouverte à travers les proxys
+            messages.append(b": ping\n\n")
+            self.last_sent = time.monotonic()
+        return messages
+
+
+def event_stream(user, last_event_id, encode):
+    """Générateur Server-Sent Events (WSGI : occupe un thread pendant toute la connexion)"""
+    state = _StreamState(user, last_event_id, encode)
+    yield f"retry: {settings.EVENT_STREAM_RETRY_MS}\n\n".encode()
+    while state.open():
+        yield from state.poll()
+        time.sleep(settings.EVENT_STREAM_POLL_INTERVAL)
+
+
+class ReservedStream:
+    """
+    Flux occupant une place réservée par `reserve_thread`, libérée à la
+    fermeture de la réponse (appel de `close` par le serveur), même si le
+    flux n'a jamais été lu.
+    """
+
+    def __init__(self, iterator):
+        self.iterator = iterator
+        self.released = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self.iterator)
+
+    def close(self):
+        try:
+            self.iterator.close()
+        finally:
+            if not self.released:
+                self.released = True
+                release_thread()
+
+
+async def async_event_stream(user, last_event_id, encode):
+    """Générateur Server-Sent Events asynchrone (ASGI)"""
+    state = _StreamState(user, last_event_id, encode)
+    yield f"retry: {settings.EVENT_STREAM_RETRY_MS}\n\n".encode()
+    while state.open():
+        for message in await sync_to_async(state.poll)():
+            yield message
+        await asyncio.sleep(settings.EVENT_STREAM_POLL_INTERVAL)
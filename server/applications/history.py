@@ -0,0 +1,181 @@
+"""
+Historique des statuts : cumuls incrémentaux et indicateurs de délai.
+
+Chaque changement de statut ajoute une ligne à `ApplicationStatusEvent`
+(voir `ScholarshipApplication.save` et `set_status`). Les indicateurs ne
+parcourent pas cet historique : `refresh_rollups` ajoute les événements
+apparus depuis son dernier passage à deux cumuls journaliers,
+- `StatusTransitionRollup` : nombre de transitions par jour ;
+- `StatusDurationRollup` : histogramme des durées passées dans un statut,
+  par jour de sortie du statut, en classes logarithmiques (4 par doublement,
+  soit une précision d'environ 9 % sur les centiles).
+
+Un événement n'est cumulé qu'une fois : la position du cumul est avancée
+dans la transaction qui écrit les compteurs. Les événements des
+ROLLUP_LAG dernières secondes sont laissés au passage suivant, pour ne pas
+dépasser un événement dont la transaction n'est pas encore validée.
+"""
+import math
+from collections import Counter
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import (
+    ApplicationStatusEvent, RollupCursor, ScholarshipApplication, StatusDurationRollup, StatusTransitionRollup
+)
+
+CURSOR_NAME = 'status_events'
+BATCH_SIZE = 5000
+ROLLUP_LAG = 60
+
+BUCKETS_PER_DOUBLING = 4
+DEFAULT_PERCENTILES = (50, 90, 95)
+
+
+def duration_bucket(seconds):
+    """Classe d'une durée : 0 pour moins d'une seconde, puis 4 classes par doublement"""
+    if seconds < 1:
+        return 0
+    return 1 + int(math.log2(seconds) * BUCKETS_PER_DOUBLING)
+
+
+def bucket_seconds(bucket):
+    """Valeur représentative d'une classe (moyenne géométrique de ses bornes)"""
+    if bucket == 0:
+        return 0.5
+    return 2 ** ((bucket - 0.5) / BUCKETS_PER_DOUBLING)
+
+
+def _increment(model, counts, key_fields):
+    """Ajoute des compteurs aux lignes existantes et crée les autres"""
+    for key, count in counts.items():
+        filters = dict(zip(key_fields, key))
+        if not model.objects.filter(**filters).update(count=F('count') + count):
+            model.objects.create(count=count, **filters)
+
+
+def refresh_rollups(batch_size=BATCH_SIZE, lag=ROLLUP_LAG):
+    """
+    Cumule les événements apparus depuis le dernier passage.
+
+    Returns:
+        int: Nombre d'événements cumulés
+    """
+    total = 0
+    horizon = timezone.now() - timedelta(seconds=lag)
+    while True:
+        with transaction.atomic():
+            cursor, _ = RollupCursor.objects.get_or_create(name=CURSOR_NAME)
+            # Un seul cumul à la fois (verrou de ligne sur les bases qui le permettent)
+            cursor = RollupCursor.objects.select_for_update().get(pk=cursor.pk)
+            events = list(
+                ApplicationStatusEvent.objects.filter(id__gt=cursor.last_id).order_by('id')
+                .values_list('id', 'from_status', 'to_status', 'changed_at', 'previous_changed_at')[:batch_size]
+            )
+            transitions, durations = Counter(), Counter()
+            last_id = cursor.last_id
+            for event_id, from_status, to_status, changed_at, previous_changed_at in events:
+                if changed_at >= horizon:
+                    break
+                day = timezone.localdate(changed_at)
+                transitions[(day, from_status or '', to_status)] += 1
+                if from_status and previous_changed_at:
+                    seconds = max(0.0, (changed_at - previous_changed_at).total_seconds())
+                    durations[(day, from_status, duration_bucket(seconds))] += 1
+                last_id = event_id
+            if last_id == cursor.last_id:
+                return total
+            _increment(StatusTransitionRollup, transitions, ('day', 'from_status', 'to_status'))
+            _increment(StatusDurationRollup, durations, ('day', 'status', 'bucket'))
+            processed = sum(transitions.values())
+            RollupCursor.objects.filter(pk=cursor.pk).update(last_id=last_id, updated_at=timezone.now())
+        total += processed
+        if processed < len(events):
+            # Arrêt sur un événement trop récent
+            return total
+
+
+def _percentiles_from_histogram(histogram, percentiles):
+    """Centiles (en secondes) d'un histogramme {classe: nombre}"""
+    total = sum(histogram.values())
+    results = {}
+    for percentile in percentiles:
+        rank = max(1, math.ceil(total * percentile / 100))
+        seen = 0
+        for bucket in sorted(histogram):
+            seen += histogram[bucket]
+            if seen >= rank:
+                results[f'p{percentile:g}'] = round(bucket_seconds(bucket))
+                break
+    return results
+
+
+def time_in_status(since=None, until=None, statuses=None, percentiles=DEFAULT_PERCENTILES):
+    """
+    Durées passées dans chaque statut par les candidatures qui l'ont quitté
+    entre `since` et `until` (dates incluses), d'après les cumuls.
+
+    Returns:
+        dict: {statut: {'count': n, 'p50': secondes, ...}}
+    """
+    rows = StatusDurationRollup.objects.all()
+    if since:
+        rows = rows.filter(day__gte=since)
+    if until:
+        rows = rows.filter(day__lte=until)
+    if statuses:
+        rows = rows.filter(status__in=statuses)
+    histograms = {}
+    for status, bucket, count in rows.values('status', 'bucket').annotate(total=Sum('count')).values_list(
+        'status', 'bucket', 'total'
+    ):
+        histograms.setdefault(status, {})[bucket] = count
+    return {
+        status: {'count': sum(histogram.values()), **_percentiles_from_histogram(histogram, percentiles)}
+        for status, histogram in histograms.items()
+    }
+
+
+def current_time_in_status(status, percentiles=DEFAULT_PERCENTILES, now=None):
+    """
+    Ancienneté des candidatures encore dans `status` : chaque centile est lu
+    directement sur l'index (status, status_changed_at).
+    """
+    now = now or timezone.now()
+    queryset = ScholarshipApplication.objects.filter(status=status, status_changed_at__isnull=False)
+    count = queryset.count()
+    results = {'count': count}
+    if not count:
+        return results
+    # Les durées croissantes correspondent aux dates d'entrée décroissantes
+    ordered = queryset.order_by('-status_changed_at').values_list('status_changed_at', flat=True)
+    for percentile in percentiles:
+        rank = max(1, math.ceil(count * percentile / 100))
+        entered = ordered[rank - 1]
+        results[f'p{percentile:g}'] = round((now - entered).total_seconds())
+    return results
+
+
+def daily_transitions(since=None, until=None):
+    """Nombre de changements de statut par jour et par transition, d'après les cumuls"""
+    rows = StatusTransitionRollup.objects.all()
+    if since:
+        rows = rows.filter(day__gte=since)
+    if until:
+        rows = rows.filter(day__lte=until)
+    return [
+        {'day': day, 'from_status': from_status or None, 'to_status': to_status, 'count': count}
+        for day, from_status, to_status, count in rows.order_by('day', 'from_status', 'to_status').values_list(
+            'day', 'from_status', 'to_status', 'count'
+        )
+    ]
+
+
+def changes_between(start, end):
+    """Changements de statut d'une période, lus sur l'index changed_at"""
+    return ApplicationStatusEvent.objects.filter(changed_at__gte=start, changed_at__lt=end).select_related(
+        'application', 'changed_by'
+    ).order_by('-changed_at', '-id')
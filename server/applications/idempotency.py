@@ -0,0 +1,145 @@
+"""
+Prise en charge de l'en-tête Idempotency-Key.
+
+Un client qui renvoie une requête avec la même clé (par exemple après une
+coupure réseau) reçoit la réponse enregistrée au lieu de recréer une
+candidature ou de relancer une évaluation. Une clé est propre à un
+utilisateur et conservée IDEMPOTENCY_KEY_TTL secondes.
+
+- même clé, même requête, traitement terminé : réponse rejouée, avec ses
+  en-têtes REPLAYED_HEADERS (en-tête `Idempotent-Replayed: true`) ;
+- même clé, traitement encore en cours : 409 Conflict ;
+- même clé pour une requête différente : 422.
+"""
+import hashlib
+import json
+import random
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+# En-têtes de la réponse d'origine enregistrés avec elle et renvoyés au rejeu
+REPLAYED_HEADERS = ('Location', 'Content-Location', 'ETag', 'Last-Modified', 'Retry-After')
+
+
+def _describe(value):
+    if isinstance(value, UploadedFile):
+        return f"{value.name}:{value.size}"
+    return str(value)
+
+
+def request_fingerprint(request):
+    data = request.data
+    if hasattr(data, 'lists'):
+        data = sorted((key, [_describe(value) for value in values]) for key, values in data.lists())
+    payload = json.dumps([request.method, request.path, data], sort_keys=True, default=_describe)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def prune_expired_keys():
+    """Supprime les clés plus anciennes que IDEMPOTENCY_KEY_TTL"""
+    cutoff = timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
+
+
+def _claim(user, key, fingerprint):
+    """
+    Réserve la clé pour cette requête.
+
+    Returns:
+        tuple: (IdempotencyKey, True si la clé vient d'être réservée)
+    """
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(user=user, key=key, fingerprint=fingerprint), True
+    except IntegrityError:
+        pass
+
+    record = IdempotencyKey.objects.filter(user=user, key=key).first()
+    if record is None:
+        # Clé supprimée entre-temps (purge) : nouvel essai
+        return _claim(user, key, fingerprint)
+
+    expired = record.created_at < now - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    abandoned = (
+        record.status == 'processing'
+        and record.created_at < now - timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT)
+    )
+    if expired or abandoned:
+        # Reprise conditionnelle : un seul des essais concurrents obtient la clé
+        reclaimed = IdempotencyKey.objects.filter(pk=record.pk, created_at=record.created_at).update(
+            fingerprint=fingerprint, status='processing', response_status=None, response_body=None,
+            response_headers={}, created_at=now
+        )
+        if reclaimed:
+            record.refresh_from_db()
+            return record, True
+        record.refresh_from_db()
+    return record, False
+
+
+def idempotent(view_method):
+    """
+    Décorateur d'action de viewset DRF rendant la requête rejouable avec
+    l'en-tête Idempotency-Key. Sans en-tête, la requête est traitée normalement.
+    """
+    @wraps(view_method)
+    def wrapped(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key or not request.user.is_authenticated:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {"detail": f"L'en-tête {HEADER} ne doit pas dépasser {MAX_KEY_LENGTH} caractères"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if random.random() < settings.IDEMPOTENCY_PRUNE_PROBABILITY:
+            prune_expired_keys()
+
+        fingerprint = request_fingerprint(request)
+        record, claimed = _claim(request.user, key, fingerprint)
+        if not claimed:
+            if record.fingerprint != fingerprint:
+                return Response(
+                    {"detail": f"Cette clé {HEADER} a déjà été utilisée pour une autre requête"},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+            if record.status == 'processing':
+                return Response(
+                    {"detail": "Une requête avec cette clé est en cours de traitement"},
+                    status=status.HTTP_409_CONFLICT, headers={'Retry-After': '1'}
+                )
+            return Response(record.response_body, status=record.response_status,
+                            headers={**record.response_headers, 'Idempotent-Replayed': 'true'})
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+
+        if response.status_code >= 500 or not hasattr(response, 'data'):
+            # Erreur serveur : le client doit pouvoir réessayer avec la même clé
+            record.delete()
+        else:
+            record.status = 'completed'
+            record.response_status = response.status_code
+            record.response_body = response.data
+            record.response_headers = {name: response[name] for name in REPLAYED_HEADERS if response.has_header(name)}
+            record.save(update_fields=['status', 'response_status', 'response_body', 'response_headers'])
+        return response
+    return wrapped
@@ -0,0 +1,114 @@
+"""
+Tâches d'évaluation groupée de l'admin.
+
+Une sélection trop grande pour être évaluée pendant la requête
+(ADMIN_ACTION_BACKGROUND_THRESHOLD) devient une ligne `EvaluationJob`. La
+sélection y est enregistrée comme requête (`QuerySet.query` sérialisé avec
+pickle, la méthode documentée par Django pour recréer un queryset) et bornée
+par le plus grand identifiant sélectionné : « sélectionner tous les
+résultats » sur 50 000 candidatures n'est jamais chargé en mémoire. Une tâche
+créée avant une mise à jour de Django peut ne plus se relire : elle passe en
+échec et doit être relancée depuis l'admin. La
+commande `run_evaluation_jobs` la réserve par une mise à jour conditionnelle,
+comme l'extraction des documents, puis l'évalue par tranches :
+- les identifiants sont lus par pages (id > dernier id traité) ;
+- chaque tranche est écrite dans sa propre transaction, et la progression
+  (`last_id`, `processed`) est enregistrée aussitôt après ;
+- une tâche dont le processus s'est arrêté n'avance plus : elle est reprise
+  après ADMIN_JOB_TIMEOUT à partir de `last_id` ;
+- une erreur est enregistrée sur la tâche, qui est retentée après le même
+  délai, dans la limite de ADMIN_JOB_MAX_ATTEMPTS essais.
+"""
+import logging
+import pickle
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, F, Max, Q
+from django.utils import timezone
+
+from .models import EvaluationJob, ScholarshipApplication
+
+logger = logging.getLogger(__name__)
+
+
+def create_evaluation_job(selection, user=None):
+    """Enregistre une tâche pour les candidatures d'un queryset, sans lire leurs identifiants"""
+    selection = selection.order_by()
+    bounds = selection.aggregate(total=Count('pk'), max_id=Max('pk'))
+    return EvaluationJob.objects.create(
+        selection=pickle.dumps(selection.query), max_id=bounds['max_id'] or 0, total=bounds['total'],
+        created_by=user
+    )
+
+
+def job_selection(job):
+    """Queryset de la sélection d'une tâche"""
+    queryset = ScholarshipApplication.objects.all()
+    queryset.query = pickle.loads(bytes(job.selection))
+    return queryset.filter(pk__lte=job.max_id)
+
+
+def _claimable(now):
+    timeout = now - timedelta(seconds=settings.ADMIN_JOB_TIMEOUT)
+    return EvaluationJob.objects.filter(
+        Q(status='pending', claimed_at__isnull=True) | Q(status__in=('pending', 'running'), claimed_at__lt=timeout),
+        attempts__lt=settings.ADMIN_JOB_MAX_ATTEMPTS,
+    )
+
+
+def claim_job():
+    """Réserve la plus ancienne tâche disponible ; une tâche n'est réservée que par un processus"""
+    now = timezone.now()
+    for pk in _claimable(now).order_by('created_at', 'id').values_list('id', flat=True)[:10]:
+        if _claimable(now).filter(pk=pk).update(status='running', claimed_at=now, attempts=F('attempts') + 1):
+            return EvaluationJob.objects.get(pk=pk)
+    return None
+
+
+def run_job(job, chunk_size=None):
+    """Évalue les candidatures restantes d'une tâche réservée"""
+    from .rescoring import rescore_selection
+
+    chunk_size = chunk_size or settings.ADMIN_ACTION_CHUNK_SIZE
+    last_id = job.last_id
+    try:
+        selection = job_selection(job).order_by('pk')
+        while True:
+            chunk = list(selection.filter(pk__gt=last_id).values_list('pk', flat=True)[:chunk_size])
+            if not chunk:
+                break
+            # Les candidatures devenues non évaluables entre-temps sont ignorées
+            scored = rescore_selection(ScholarshipApplication.objects.filter(pk__in=chunk), chunk_size=chunk_size)
+            last_id = chunk[-1]
+            EvaluationJob.objects.filter(pk=job.pk).update(
+                last_id=last_id, processed=F('processed') + scored, claimed_at=timezone.now()
+            )
+    except Exception as exc:
+        logger.exception("Échec de la tâche d'évaluation %s", job.pk)
+        retry = job.attempts < settings.ADMIN_JOB_MAX_ATTEMPTS
+        # claimed_at est conservé : la tâche n'est reprise qu'après ADMIN_JOB_TIMEOUT
+        EvaluationJob.objects.filter(pk=job.pk).update(
+            status='pending' if retry else 'failed', error=str(exc), claimed_at=timezone.now()
+        )
+        return False
+    EvaluationJob.objects.filter(pk=job.pk).update(
+        status='done', error='', claimed_at=None, finished_at=timezone.now()
+    )
+    return True
+
+
+def process(chunk_size=None):
+    """
+    Exécute les tâches disponibles.
+
+    Returns:
+        int: Nombre de tâches exécutées
+    """
+    count = 0
+    while True:
+        job = claim_job()
+        if job is None:
+            return count
+        run_job(job, chunk_size)
+        count += 1
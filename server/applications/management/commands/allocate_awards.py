@@ -0,0 +1,71 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from applications.allocation import AllocationError, Candidates, Quota, allocate, apply_allocation
+from applications.snapshot import get_snapshot
+
+
+def parse_budget(value):
+    type_id, _, amount = value.partition('=')
+    if not amount:
+        raise ValueError(value)
+    return int(type_id), amount
+
+
+def parse_quota(value):
+    # champ=valeur:minimum, où minimum est un nombre (>= 1) ou une part (< 1)
+    condition, _, minimum = value.partition(':')
+    field, _, field_value = condition.partition('=')
+    if not minimum:
+        raise ValueError(value)
+    if float(minimum) < 1:
+        return Quota(field, field_value, min_share=minimum)
+    return Quota(field, field_value, min_count=int(minimum))
+
+
+class Command(BaseCommand):
+    help = "Alloue les bourses dans le budget disponible (simulation par défaut)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budget', type=parse_budget, action='append', default=[],
+                            help="Budget d'un type de bourse : TYPE_ID=MONTANT (répétable)")
+        parser.add_argument('--shared-budget', help="Budget commun à tous les types")
+        parser.add_argument('--quota', type=parse_quota, action='append', default=[],
+                            help="Quota minimum : has_disability=true:0.1 ou gender=F:200 (répétable)")
+        parser.add_argument('--waiting-list', type=int, default=50, help="Taille de la liste d'attente")
+        parser.add_argument('--multiply-by-duration', action='store_true',
+                            help="Coût d'une bourse = montant x durée")
+        parser.add_argument('--apply', action='store_true', help="Applique le résultat")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            candidates = Candidates.from_snapshot(
+                get_snapshot(), multiply_by_duration=options['multiply_by_duration']
+            )
+            loaded = time.perf_counter()
+            result = allocate(
+                candidates,
+                budgets=dict(options['budget']) or None,
+                shared_budget=options['shared_budget'],
+                quotas=options['quota'],
+                waiting_list_size=options['waiting_list'],
+            )
+        except AllocationError as exc:
+            raise CommandError(str(exc))
+        done = time.perf_counter()
+
+        summary = result.as_dict()
+        del summary['accepted'], summary['waiting_list']
+        self.stdout.write(json.dumps(summary, indent=2, ensure_ascii=False))
+        self.stderr.write(
+            f"{len(candidates)} candidatures : chargement {loaded - start:.2f}s, allocation {done - loaded:.2f}s"
+        )
+
+        if options['apply']:
+            accepted, waiting = apply_allocation(result)
+            self.stdout.write(self.style.SUCCESS(f"{accepted} acceptées, {waiting} en liste d'attente"))
+        else:
+            self.stdout.write("Simulation uniquement : relancer avec --apply pour appliquer.")
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from applications.archiving import ArchiveError, archive_cycle
+from applications.models import Cycle, ScholarshipApplication
+
+
+class Command(BaseCommand):
+    help = "Déplace les candidatures d'une campagne fermée vers les tables d'archive, par lots"
+
+    def add_arguments(self, parser):
+        parser.add_argument('cycle', help="Identifiant ou nom de la campagne")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--export', metavar='FICHIER',
+                            help="Écrit aussi les candidatures dans un fichier JSON Lines compressé (.jsonl.gz)")
+        parser.add_argument('--dry-run', action='store_true', help="Affiche seulement le nombre de candidatures")
+
+    def handle(self, *args, **options):
+        lookup = {'pk': options['cycle']} if options['cycle'].isdigit() else {'name': options['cycle']}
+        try:
+            cycle = Cycle.objects.get(**lookup)
+        except Cycle.DoesNotExist:
+            raise CommandError(f"Campagne {options['cycle']} introuvable")
+
+        if options['dry_run']:
+            count = ScholarshipApplication.objects.filter(cycle=cycle).count()
+            self.stdout.write(f"{count} candidatures à archiver pour la campagne {cycle}")
+            return
+
+        start = time.perf_counter()
+        try:
+            total = archive_cycle(
+                cycle, batch_size=options['batch_size'], export_path=options['export'],
+                progress=lambda done: self.stderr.write(f"\r{done} candidatures archivées", ending=''),
+            )
+        except ArchiveError as exc:
+            raise CommandError(str(exc))
+        self.stderr.write('')
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} candidatures de la campagne {cycle} archivées en {time.perf_counter() - start:.1f}s"
+        ))
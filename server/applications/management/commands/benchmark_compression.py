@@ -0,0 +1,74 @@
+import time
+import zlib
+
+from applications.recommendations import render_application
+from applications.serializers import ScholarshipApplicationListSerializer, ScholarshipTypeSerializer
+from scholarship_management.compression import brotli, brotli_available, compress_stream
+from scholarship_management.renderers import FastJSONRenderer
+
+from .benchmark_json import Command as JSONBenchmarkCommand
+
+
+class Command(JSONBenchmarkCommand):
+    help = "Mesure le gain de bande passante et le coût CPU de la compression sur des réponses réalistes"
+
+    def handle(self, *args, **options):
+        if not brotli_available():
+            self.stdout.write(self.style.WARNING("Le module brotli n'est pas installé : seul gzip est mesuré."))
+
+        import random
+        random.seed(options['seed'])
+        applications = self._build_applications(options['size'])
+        renderer = FastJSONRenderer()
+        list_data = ScholarshipApplicationListSerializer(applications, many=True).data
+        # Détail : textes longs et type de bourse imbriqué, comme le serializer de détail
+        detail_data = [
+            {**item, 'motivation_letter': app.motivation_letter, 'ai_recommendations': render_application(app),
+             'scholarship_type': ScholarshipTypeSerializer(app.scholarship_type).data}
+            for item, app in zip(list_data, applications)
+        ]
+        payloads = {
+            'detail': renderer.render(detail_data[0]),
+            'list': renderer.render(list_data),
+            'details': renderer.render(detail_data),
+        }
+
+        codecs = [(f'gzip-{level}', self._gzip(level)) for level in (1, 6, 9)]
+        if brotli_available():
+            codecs += [(f'br-{quality}', self._brotli(quality)) for quality in (1, 4, 11)]
+
+        self.stdout.write(
+            f"{'charge':<8} {'codec':<8} {'octets':>10} {'compressé':>10} {'ratio':>6} "
+            f"{'compression':>12} {'Mo/s':>8} {'décompression':>14}"
+        )
+        for name, body in payloads.items():
+            for codec, (compress, decompress) in codecs:
+                compressed = compress(body)
+                if decompress(compressed) != body:
+                    raise ValueError(f"Aller-retour incorrect pour {codec}")
+                compress_time = self._measure(lambda: compress(body), options['repeat'])
+                decompress_time = self._measure(lambda: decompress(compressed), options['repeat'])
+                self.stdout.write(
+                    f"{name:<8} {codec:<8} {len(body):>10} {len(compressed):>10} "
+                    f"{len(body) / len(compressed):>5.1f}x {compress_time * 1000:>10.2f}ms "
+                    f"{len(body) / compress_time / 1e6:>8.1f} {decompress_time * 1000:>12.2f}ms"
+                )
+
+        # Export en streaming : blocs d'une ligne compressés au fil de l'eau
+        rows = [line + b'\n' for line in payloads['details'].split(b'},{')]
+        start = time.perf_counter()
+        streamed = b''.join(compress_stream(iter(rows), 'gzip'))
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"streaming gzip : {len(rows)} blocs, {sum(map(len, rows))} -> {len(streamed)} octets "
+            f"en {elapsed * 1000:.2f}ms"
+        )
+
+    def _gzip(self, level):
+        def compress(data):
+            compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+            return compressor.compress(data) + compressor.flush()
+        return compress, lambda data: zlib.decompress(data, 31)
+
+    def _brotli(self, quality):
+        return (lambda data: brotli.compress(data, quality=quality)), brotli.decompress
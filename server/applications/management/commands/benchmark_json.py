@@ -0,0 +1,119 @@
+import io
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from applications.models import ScholarshipType, ScholarshipApplication
+from applications.serializers import (
+    ScholarshipApplicationListSerializer,
+)
+from scholarship_management.renderers import FastJSONRenderer, FastJSONParser, orjson_available
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Compare le renderer/parser JSON standard et le renderer rapide sur des charges réalistes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=1000, help="Nombre de candidatures par charge")
+        parser.add_argument('--repeat', type=int, default=20, help="Nombre de rendus mesurés")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if not orjson_available():
+            self.stdout.write(self.style.WARNING(
+                "orjson n'est pas installé : le renderer rapide utilise l'encodeur standard."
+            ))
+
+        random.seed(options['seed'])
+        applications = self._build_applications(options['size'])
+        payloads = {
+            'list': ScholarshipApplicationListSerializer(applications, many=True).data,
+            # Données brutes non sérialisées (Decimal, datetime) comme dans les réponses statistiques
+            'raw': [
+                {'id': app.id, 'ai_score': app.ai_score, 'amount': app.scholarship_type.amount,
+                 'created_at': app.created_at}
+                for app in applications
+            ],
+        }
+
+        standard, fast = JSONRenderer(), FastJSONRenderer()
+        self.stdout.write(f"{'charge':<8} {'octets':>10} {'standard':>12} {'rapide':>12} {'gain':>7}")
+        for name, data in payloads.items():
+            reference = standard.render(data)
+            if fast.render(data) != reference:
+                raise CommandError(f"Sortie différente du renderer standard pour la charge '{name}'")
+
+            standard_time = self._measure(lambda: standard.render(data), options['repeat'])
+            fast_time = self._measure(lambda: fast.render(data), options['repeat'])
+            self._report(name, len(reference), standard_time, fast_time)
+
+            parse_standard = self._measure(lambda: JSONParser().parse(io.BytesIO(reference)), options['repeat'])
+            parse_fast = self._measure(lambda: FastJSONParser().parse(io.BytesIO(reference)), options['repeat'])
+            self._report(f"{name}:in", len(reference), parse_standard, parse_fast)
+
+    def _report(self, name, size, standard_time, fast_time):
+        self.stdout.write(
+            f"{name:<8} {size:>10} {standard_time * 1000:>10.2f}ms {fast_time * 1000:>10.2f}ms "
+            f"{standard_time / fast_time:>6.1f}x"
+        )
+
+    def _measure(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    def _build_applications(self, size):
+        """Construit des candidatures en mémoire, sans accès à la base."""
+        now = timezone.now()
+        types = [
+            ScholarshipType(
+                id=i, name=f"Bourse {i}", description="Description détaillée de la bourse. " * 10,
+                requirements="Critères d'éligibilité. " * 5, duration=12 * i,
+                amount=Decimal('150000.00') * i, is_active=True, created_at=now, updated_at=now,
+            )
+            for i in range(1, 6)
+        ]
+        users = [
+            User(id=i, username=f"etudiant{i}", email=f"etudiant{i}@example.com",
+                 first_name="Awa", last_name="Ndiaye")
+            for i in range(1, 51)
+        ]
+        applications = []
+        for i in range(1, size + 1):
+            created_at = now - timedelta(days=random.randint(0, 365), microseconds=random.randint(0, 999999))
+            applications.append(ScholarshipApplication(
+                id=i,
+                user=random.choice(users),
+                scholarship_type=random.choice(types),
+                full_name=f"Candidat Numéro {i}",
+                email=f"candidat{i}@example.com",
+                current_institution="Université Cheikh Anta Diop",
+                current_year="Licence 2",
+                average_grade=Decimal(random.randint(800, 2000)) / 100,
+                baccalaureate_mention=random.choice(['passable', 'assez_bien', 'bien', 'tres_bien']),
+                family_income=Decimal(random.randint(200000, 8000000)),
+                number_of_dependents=random.randint(0, 8),
+                motivation_letter="Je souhaite poursuivre mes études — « avec passion ». " * 30,
+                status=random.choice([choice for choice, _ in ScholarshipApplication.STATUS_CHOICES]),
+                ai_score=Decimal(random.randint(2000, 9500)) / 100,
+                ai_recommendation_band='very_good',
+                ai_recommendation_version=1,
+                ai_academic_score=Decimal(random.randint(2000, 10000)) / 100,
+                ai_socioeconomic_score=Decimal(random.randint(0, 10000)) / 100,
+                ai_motivation_score=Decimal(random.randint(4000, 10000)) / 100,
+                created_at=created_at,
+                updated_at=created_at,
+            ))
+        return applications
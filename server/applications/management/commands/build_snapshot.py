@@ -0,0 +1,31 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from applications.snapshot import ApplicationSnapshot, application_statistics
+
+
+class Command(BaseCommand):
+    help = "Construit l'instantané en colonnes des candidatures et l'enregistre pour les autres processus"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=settings.APPLICATION_SNAPSHOT_PATH,
+                            help="Fichier .npy (APPLICATION_SNAPSHOT_PATH par défaut)")
+
+    def handle(self, *args, **options):
+        if not options['path']:
+            raise CommandError("Préciser --path ou définir APPLICATION_SNAPSHOT_PATH")
+
+        start = time.perf_counter()
+        snapshot = ApplicationSnapshot.build()
+        built = time.perf_counter()
+        snapshot.save(options['path'])
+        saved = time.perf_counter()
+        application_statistics(ApplicationSnapshot.load(options['path']))
+        done = time.perf_counter()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(snapshot)} candidatures ({snapshot.data.nbytes / 1e6:.1f} Mo) : construction {built - start:.2f}s, "
+            f"écriture {saved - built:.2f}s, statistiques sur le fichier {(done - saved) * 1000:.1f}ms"
+        ))
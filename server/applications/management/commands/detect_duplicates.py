@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from applications.duplicates import DUPLICATE_THRESHOLD, MAX_BLOCK_SIZE, rebuild_blocking_keys, scan_duplicates
+
+
+class Command(BaseCommand):
+    help = "Détecte les candidatures en double en comparant uniquement les candidatures d'un même bloc"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild-keys', action='store_true',
+                            help="Recalcule d'abord les clés de regroupement de toutes les candidatures")
+        parser.add_argument('--threshold', type=float, default=DUPLICATE_THRESHOLD)
+        parser.add_argument('--max-block-size', type=int, default=MAX_BLOCK_SIZE)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        if options['rebuild_keys']:
+            total = rebuild_blocking_keys()
+            self.stdout.write(f"Clés recalculées pour {total} candidatures en {time.perf_counter() - start:.1f}s")
+
+        scan_start = time.perf_counter()
+        stats = scan_duplicates(threshold=options['threshold'], max_block_size=options['max_block_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['blocks']} blocs, {stats['pairs']} paires comparées, {stats['matches']} doublons "
+            f"en {stats['clusters']} groupes ({time.perf_counter() - scan_start:.1f}s)"
+        ))
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from applications.documents import process, retry_unsupported
+
+
+class Command(BaseCommand):
+    help = "Extrait le texte des pièces jointes des candidatures et alimente l'index de recherche"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Documents par passage (DOCUMENT_EXTRACTION_BATCH_SIZE par défaut)")
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help="Secondes entre deux passages lorsqu'il n'y a rien à extraire")
+        parser.add_argument('--once', action='store_true', help="Traite les documents en attente puis s'arrête")
+        parser.add_argument('--retry-unsupported', action='store_true',
+                            help="Reprend les documents non pris en charge (après installation de pypdf, Pillow...)")
+
+    def handle(self, *args, **options):
+        if options['retry_unsupported']:
+            self.stdout.write(f"{retry_unsupported()} documents remis en attente")
+        while True:
+            start = time.perf_counter()
+            hashed, extracted = process(options['batch_size'])
+            if hashed or extracted:
+                self.stdout.write(
+                    f"{hashed} pièces jointes hachées, {extracted} documents extraits "
+                    f"en {time.perf_counter() - start:.2f}s"
+                )
+                continue
+            if options['once']:
+                self.stdout.write(self.style.SUCCESS("Aucun document en attente"))
+                return
+            time.sleep(options['interval'])
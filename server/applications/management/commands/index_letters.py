@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from applications.plagiarism import rebuild_letter_index
+
+
+class Command(BaseCommand):
+    help = "Recalcule l'index MinHash/LSH des lettres de motivation"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        total = rebuild_letter_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} lettres indexées en {time.perf_counter() - start:.1f}s"
+        ))
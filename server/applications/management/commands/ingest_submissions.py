@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError
+
+from applications.surge import SubmissionLog, ingest
+
+
+class Command(BaseCommand):
+    help = "Insère en base les candidatures déposées en mode afflux (journal SUBMISSION_LOG_DIR)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Candidatures par transaction (SUBMISSION_INGEST_BATCH_SIZE par défaut)")
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help="Secondes entre deux passages lorsque le journal est vide")
+        parser.add_argument('--once', action='store_true', help="Vide le journal puis s'arrête")
+
+    def handle(self, *args, **options):
+        log = SubmissionLog()
+        while True:
+            start = time.perf_counter()
+            try:
+                ingested = ingest(log, batch_size=options['batch_size'])
+            except DatabaseError as exc:
+                # Base indisponible (verrou SQLite...) : la position n'a pas avancé, les dépôts sont repris
+                if options['once']:
+                    raise
+                self.stderr.write(f"Ingestion interrompue ({exc}), nouvel essai dans {options['interval']}s")
+                time.sleep(options['interval'])
+                continue
+            if ingested:
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f"{ingested} candidatures insérées en {elapsed:.2f}s ({ingested / elapsed:.0f}/s)"
+                )
+            if options['once']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Journal vidé ({log.pending_bytes()} octets en attente)"
+                ))
+                return
+            if not ingested:
+                time.sleep(options['interval'])
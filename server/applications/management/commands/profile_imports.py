@@ -0,0 +1,52 @@
+import statistics
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from scholarship_management.importtime import LAZY_MODULES, TARGETS, profile_startup
+
+
+class Command(BaseCommand):
+    help = "Mesure le temps de démarrage (imports) d'un processus Django, module par module"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=sorted(TARGETS), default='urls',
+                            help="setup : django.setup() ; urls : setup puis chargement des vues ; wsgi")
+        parser.add_argument('--repeat', type=int, default=5, help="Nombre de démarrages mesurés")
+        parser.add_argument('--top', type=int, default=20, help="Nombre de modules les plus coûteux affichés")
+        parser.add_argument('--self-time', action='store_true',
+                            help="Classe les modules par temps propre plutôt que cumulé")
+        parser.add_argument('--budget-ms', type=float, default=None,
+                            help="Échoue si le meilleur démarrage dépasse ce budget (STARTUP_TIME_BUDGET_MS par défaut)")
+
+    def handle(self, *args, **options):
+        profiles = [profile_startup(options['target']) for _ in range(max(options['repeat'], 1))]
+        best = min(profiles, key=lambda profile: profile.elapsed_ms)
+        elapsed = [profile.elapsed_ms for profile in profiles]
+
+        self.stdout.write(f"Modules les plus coûteux ({'temps propre' if options['self_time'] else 'cumulé'}) :")
+        for record in best.slowest(options['top'], cumulative=not options['self_time']):
+            self.stdout.write(
+                f"  {record.cumulative_us / 1000:8.1f}ms {record.self_us / 1000:8.1f}ms  "
+                f"{'  ' * min(record.depth, 10)}{record.module}"
+            )
+
+        self.stdout.write("Temps propre par paquet :")
+        for package, ms in best.by_package()[:options['top']]:
+            self.stdout.write(f"  {ms:8.1f}ms  {package}")
+
+        self.stdout.write(
+            f"Démarrage « {options['target']} » : meilleur {best.elapsed_ms:.0f}ms, "
+            f"médiane {statistics.median(elapsed):.0f}ms sur {len(elapsed)} essais, "
+            f"{len(best.records)} modules importés"
+        )
+
+        loaded = best.lazy_modules_loaded()
+        if loaded:
+            raise CommandError(f"Modules à charger à la demande importés au démarrage : {', '.join(loaded)}")
+        self.stdout.write(f"Aucun des modules chargés à la demande n'est importé ({', '.join(LAZY_MODULES)}).")
+
+        budget = options['budget_ms'] or settings.STARTUP_TIME_BUDGET_MS
+        if best.elapsed_ms > budget:
+            raise CommandError(f"Budget de démarrage dépassé : {best.elapsed_ms:.0f}ms > {budget:.0f}ms")
+        self.stdout.write(self.style.SUCCESS(f"Dans le budget de {budget:.0f}ms"))
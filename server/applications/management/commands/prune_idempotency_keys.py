@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from applications.idempotency import prune_expired_keys
+
+
+class Command(BaseCommand):
+    help = "Supprime les clés Idempotency-Key expirées"
+
+    def handle(self, *args, **options):
+        deleted = prune_expired_keys()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} clés expirées supprimées"))
@@ -0,0 +1,67 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from applications.models import ScoringPolicy
+from applications.rescoring import rescore
+
+
+class Command(BaseCommand):
+    help = "Réévalue toutes les candidatures en parallèle, par tranches d'identifiants"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, help="Nombre de processus (nombre de cœurs par défaut)")
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--policy', type=int, help="Politique à appliquer (la politique active par défaut)")
+        parser.add_argument('--checkpoint', default='rescore_checkpoint.json',
+                            help="Fichier de reprise ; relancer la commande reprend après la dernière tranche écrite")
+        parser.add_argument('--benchmark', type=int, metavar='N',
+                            help="Mesure le débit de 1 à N processus, sans rien écrire")
+
+    def handle(self, *args, **options):
+        policy = None
+        if options['policy']:
+            try:
+                policy = ScoringPolicy.objects.get(pk=options['policy'])
+            except ScoringPolicy.DoesNotExist:
+                raise CommandError(f"Politique {options['policy']} introuvable")
+
+        if options['benchmark']:
+            self._benchmark(options['benchmark'], options['chunk_size'], policy)
+            return
+
+        try:
+            stats = rescore(
+                workers=options['workers'], chunk_size=options['chunk_size'], policy=policy,
+                checkpoint_path=options['checkpoint'], progress=self._progress,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self.stderr.write('')
+        if stats['skipped_chunks']:
+            self.stdout.write(f"{stats['skipped_chunks']} tranches déjà écrites reprises depuis {options['checkpoint']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['scored']} candidatures réévaluées avec {stats['workers']} processus en {stats['seconds']}s"
+        ))
+
+    def _progress(self, processed, total, elapsed):
+        rate = processed / elapsed if elapsed else 0
+        self.stderr.write(f"\r{processed}/{total} candidatures ({rate:.0f}/s)", ending='')
+        self.stderr.flush()
+
+    def _benchmark(self, max_workers, chunk_size, policy):
+        results = []
+        for workers in range(1, max_workers + 1):
+            stats = rescore(workers=workers, chunk_size=chunk_size, policy=policy, dry_run=True)
+            throughput = stats['scored'] / stats['seconds'] if stats['seconds'] else 0
+            results.append({
+                'workers': workers,
+                'seconds': stats['seconds'],
+                'per_second': round(throughput, 1),
+                'speedup': round(results[0]['seconds'] / stats['seconds'], 2) if results else 1.0,
+            })
+            self.stderr.write(
+                f"{workers} processus : {stats['seconds']}s, {throughput:.0f} candidatures/s, "
+                f"accélération x{results[-1]['speedup']}"
+            )
+        self.stdout.write(json.dumps(results, indent=2))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from applications.jobs import process
+
+
+class Command(BaseCommand):
+    help = "Exécute les évaluations groupées demandées depuis l'admin"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=None,
+                            help="Candidatures par tranche (ADMIN_ACTION_CHUNK_SIZE par défaut)")
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help="Secondes entre deux passages lorsqu'il n'y a aucune tâche")
+        parser.add_argument('--once', action='store_true', help="Exécute les tâches en attente puis s'arrête")
+
+    def handle(self, *args, **options):
+        while True:
+            start = time.perf_counter()
+            done = process(options['chunk_size'])
+            if done:
+                self.stdout.write(f"{done} tâches d'évaluation exécutées en {time.perf_counter() - start:.2f}s")
+                continue
+            if options['once']:
+                self.stdout.write(self.style.SUCCESS("Aucune tâche d'évaluation en attente"))
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,57 @@
+import json
+import time
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from applications.models import ScoringPolicy
+from applications.simulation import ScoringColumns, simulate_policy
+from applications.snapshot import get_snapshot
+
+
+class Command(BaseCommand):
+    help = "Simule une politique d'évaluation sur toutes les candidatures, sans rien enregistrer"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--policy', type=int, help="Politique enregistrée à simuler")
+        parser.add_argument('--baseline', type=int, help="Politique de référence (active par défaut)")
+        parser.add_argument('--academic-weight', type=Decimal)
+        parser.add_argument('--socioeconomic-weight', type=Decimal)
+        parser.add_argument('--motivation-weight', type=Decimal)
+        parser.add_argument('--low-income-threshold', type=Decimal)
+        parser.add_argument('--medium-income-threshold', type=Decimal)
+        parser.add_argument('--high-income-threshold', type=Decimal)
+        parser.add_argument('--dependents-brackets', type=json.loads,
+                            help='Barème JSON, par exemple "[[5, 30], [3, 20], [1, 10]]"')
+        parser.add_argument('--disability-bonus', type=int)
+        parser.add_argument('--top-k', type=int, default=100)
+
+    def handle(self, *args, **options):
+        candidate = self._get_policy(options['policy']) if options['policy'] else ScoringPolicy.get_active()
+        for field in ScoringPolicy.SCORING_FIELDS:
+            if options.get(field) is not None:
+                setattr(candidate, field, options[field])
+        try:
+            candidate.clean()
+        except ValidationError as exc:
+            raise CommandError('; '.join(exc.messages))
+
+        baseline = self._get_policy(options['baseline']) if options['baseline'] else None
+
+        start = time.perf_counter()
+        columns = ScoringColumns.from_snapshot(get_snapshot())
+        loaded = time.perf_counter()
+        report = simulate_policy(candidate, baseline=baseline, columns=columns, top_k=options['top_k'])
+        done = time.perf_counter()
+
+        self.stdout.write(json.dumps(report, indent=2, ensure_ascii=False))
+        self.stderr.write(
+            f"{len(columns)} candidatures : chargement {loaded - start:.2f}s, simulation {done - loaded:.2f}s"
+        )
+
+    def _get_policy(self, pk):
+        try:
+            return ScoringPolicy.objects.get(pk=pk)
+        except ScoringPolicy.DoesNotExist:
+            raise CommandError(f"Politique {pk} introuvable")
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.15 on 2026-10-19 18:20
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_comment_counters(apps, schema_editor):
+    ScholarshipApplication = apps.get_model('applications', 'ScholarshipApplication')
+    ApplicationComment = apps.get_model('applications', 'ApplicationComment')
+    comments = ApplicationComment.objects.filter(application=OuterRef('pk')).order_by().values('application')
+    ScholarshipApplication.objects.update(
+        comment_count=Coalesce(Subquery(comments.annotate(n=Count('id')).values('n')), 0),
+        last_commented_at=Subquery(comments.annotate(last=Max('created_at')).values('last')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0002_scholarshiptype_alter_scholarshipapplication_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scholarshipapplication',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Nombre de commentaires'),
+        ),
+        migrations.AddField(
+            model_name='scholarshipapplication',
+            name='last_commented_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Dernier commentaire'),
+        ),
+        migrations.AddIndex(
+            model_name='applicationcomment',
+            index=models.Index(fields=['application', '-created_at', '-id'], name='comment_timeline_idx'),
+        ),
+        migrations.RunPython(backfill_comment_counters, migrations.RunPython.noop),
+    ]
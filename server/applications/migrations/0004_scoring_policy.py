@@ -0,0 +1,40 @@
+# Generated by Django 5.1.15 on 2026-10-19 18:23
+
+import applications.models
+import django.core.validators
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0003_comment_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoringPolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Nom')),
+                ('is_active', models.BooleanField(default=False, verbose_name='Active')),
+                ('academic_weight', models.DecimalField(decimal_places=3, default=Decimal('0.400'), max_digits=4, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(1)], verbose_name='Poids académique')),
+                ('socioeconomic_weight', models.DecimalField(decimal_places=3, default=Decimal('0.300'), max_digits=4, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(1)], verbose_name='Poids socio-économique')),
+                ('motivation_weight', models.DecimalField(decimal_places=3, default=Decimal('0.300'), max_digits=4, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(1)], verbose_name='Poids motivation')),
+                ('low_income_threshold', models.DecimalField(decimal_places=2, default=Decimal('1000000'), max_digits=12, verbose_name='Seuil revenus faibles')),
+                ('medium_income_threshold', models.DecimalField(decimal_places=2, default=Decimal('3000000'), max_digits=12, verbose_name='Seuil revenus moyens')),
+                ('high_income_threshold', models.DecimalField(decimal_places=2, default=Decimal('5000000'), max_digits=12, verbose_name='Seuil revenus élevés')),
+                ('dependents_brackets', models.JSONField(default=applications.models.default_dependents_brackets, verbose_name='Barème des personnes à charge')),
+                ('disability_bonus', models.PositiveIntegerField(default=20, validators=[django.core.validators.MaxValueValidator(100)], verbose_name='Bonus handicap')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': "Politique d'évaluation",
+                'verbose_name_plural': "Politiques d'évaluation",
+                'ordering': ['-created_at'],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('is_active',), name='single_active_scoring_policy')],
+            },
+        ),
+    ]
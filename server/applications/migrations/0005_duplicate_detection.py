@@ -0,0 +1,48 @@
+# Generated by Django 5.1.15 on 2026-10-19 18:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0004_scoring_policy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicantBlockingKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('name', 'Nom (phonétique)'), ('birth', 'Date de naissance'), ('phone', 'Téléphone'), ('email', 'Identifiant email')], max_length=10)),
+                ('value', models.CharField(max_length=100)),
+                ('application', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='blocking_keys', to='applications.scholarshipapplication')),
+            ],
+            options={
+                'verbose_name': 'Clé de regroupement',
+                'verbose_name_plural': 'Clés de regroupement',
+                'indexes': [models.Index(fields=['kind', 'value'], name='blocking_key_lookup_idx')],
+                'constraints': [models.UniqueConstraint(fields=('application', 'kind', 'value'), name='unique_blocking_key')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DuplicateMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.DecimalField(decimal_places=3, max_digits=4, verbose_name='Score de similarité')),
+                ('reasons', models.CharField(max_length=100, verbose_name='Éléments concordants')),
+                ('cluster', models.BigIntegerField(db_index=True, verbose_name='Groupe')),
+                ('is_dismissed', models.BooleanField(default=False, verbose_name='Écarté')),
+                ('detected_at', models.DateTimeField(auto_now_add=True)),
+                ('application', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='duplicate_matches', to='applications.scholarshipapplication')),
+                ('duplicate_of', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='applications.scholarshipapplication')),
+            ],
+            options={
+                'verbose_name': 'Doublon potentiel',
+                'verbose_name_plural': 'Doublons potentiels',
+                'ordering': ['cluster', '-score'],
+                'constraints': [models.UniqueConstraint(fields=('application', 'duplicate_of'), name='unique_duplicate_match')],
+            },
+        ),
+    ]
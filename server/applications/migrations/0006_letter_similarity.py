@@ -0,0 +1,50 @@
+# Generated by Django 5.1.15 on 2026-10-19 18:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0005_duplicate_detection'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scholarshipapplication',
+            name='ai_letter_similarity',
+            field=models.DecimalField(blank=True, decimal_places=3, max_digits=4, null=True, verbose_name='Similarité de la lettre'),
+        ),
+        migrations.AddField(
+            model_name='scholarshipapplication',
+            name='ai_similar_letter',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='applications.scholarshipapplication', verbose_name='Lettre la plus proche'),
+        ),
+        migrations.CreateModel(
+            name='LetterBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.BigIntegerField(db_index=True)),
+                ('application', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='letter_buckets', to='applications.scholarshipapplication')),
+            ],
+            options={
+                'verbose_name': 'Seau LSH',
+                'verbose_name_plural': 'Seaux LSH',
+            },
+        ),
+        migrations.CreateModel(
+            name='LetterSignature',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('letter_hash', models.CharField(max_length=40)),
+                ('minhash', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('application', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='letter_signature', to='applications.scholarshipapplication')),
+            ],
+            options={
+                'verbose_name': 'Signature de lettre',
+                'verbose_name_plural': 'Signatures de lettres',
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.15 on 2026-10-19 18:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0006_letter_similarity'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('status_changed', 'Changement de statut'), ('comment_added', 'Nouveau commentaire'), ('evaluated', 'Évaluation terminée')], max_length=20)),
+                ('payload', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('application', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='applications.scholarshipapplication')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Événement de candidature',
+                'verbose_name_plural': 'Événements de candidature',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['owner', 'id'], name='event_owner_feed_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.15 on 2026-10-19 18:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0007_application_events'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='scholarshipapplication',
+            index=models.Index(fields=['updated_at'], name='application_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.1.15 on 2026-10-19 18:59
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0008_application_updated_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Cycle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Nom')),
+                ('starts_on', models.DateField(verbose_name='Ouverture')),
+                ('ends_on', models.DateField(verbose_name='Clôture')),
+                ('is_closed', models.BooleanField(default=False, verbose_name='Fermée')),
+                ('archived_at', models.DateTimeField(blank=True, null=True, verbose_name='Archivée le')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Campagne',
+                'verbose_name_plural': 'Campagnes',
+                'ordering': ['-starts_on'],
+            },
+        ),
+        migrations.AddField(
+            model_name='scholarshipapplication',
+            name='cycle',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='applications', to='applications.cycle', verbose_name='Campagne'),
+        ),
+        migrations.AddField(
+            model_name='scholarshiptype',
+            name='cycle',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='scholarship_types', to='applications.cycle', verbose_name='Campagne'),
+        ),
+        migrations.CreateModel(
+            name='ArchivedApplication',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.BigIntegerField(unique=True, verbose_name="Identifiant d'origine")),
+                ('full_name', models.CharField(max_length=255)),
+                ('email', models.EmailField(max_length=254)),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('under_review', "En cours d'examen"), ('accepted', 'Acceptée'), ('rejected', 'Rejetée'), ('waiting_list', "Liste d'attente")], max_length=20)),
+                ('ai_score', models.DecimalField(decimal_places=2, max_digits=5, null=True)),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('comments', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('scholarship_type', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='applications.scholarshiptype')),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_applications', to=settings.AUTH_USER_MODEL)),
+                ('cycle', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_applications', to='applications.cycle')),
+            ],
+            options={
+                'verbose_name': 'Candidature archivée',
+                'verbose_name_plural': 'Candidatures archivées',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['cycle', 'status'], name='archive_cycle_status_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,186 @@
+# Generated by Django 5.1.15 on 2026-10-19 19:06
+
+import re
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+# Copie figée de la version 1 du catalogue (applications/recommendations.py)
+# et de ses fonctions de lecture et de rendu : la migration doit convertir les
+# textes de l'époque, quelles que soient les versions ajoutées depuis.
+BANDS = ('exceptional', 'very_good', 'satisfactory', 'average', 'insufficient')
+
+SIMILAR_LETTER = 8
+FLAGS = (
+    (1, 'low_academic'),
+    (2, 'high_socioeconomic'),
+    (4, 'weak_motivation'),
+    (SIMILAR_LETTER, 'similar_letter'),
+)
+
+TEMPLATES = {
+    'exceptional': (
+        "Candidature exceptionnelle. Le candidat présente un excellent profil académique "
+        "et une situation socio-économique justifiant l'attribution d'une bourse. "
+        "Recommandation: Acceptation prioritaire."
+    ),
+    'very_good': (
+        "Très bonne candidature. Le candidat présente un bon profil global. "
+        "Recommandation: Acceptation."
+    ),
+    'satisfactory': (
+        "Candidature satisfaisante. Le candidat présente un profil intéressant. "
+        "Recommandation: Acceptation sous réserve de places disponibles."
+    ),
+    'average': (
+        "Candidature moyenne. Le candidat pourrait bénéficier d'une bourse, mais n'est pas prioritaire. "
+        "Recommandation: Liste d'attente."
+    ),
+    'insufficient': (
+        "Candidature insuffisante selon nos critères d'évaluation. "
+        "Recommandation: Refus avec possibilité de recandidature l'année prochaine."
+    ),
+    'low_academic': (
+        "Le profil académique est en dessous de nos attentes. "
+        "Nous recommandons au candidat d'améliorer ses résultats scolaires."
+    ),
+    'high_socioeconomic': (
+        "La situation socio-économique du candidat justifie pleinement l'attribution d'une bourse."
+    ),
+    'weak_motivation': (
+        "La lettre de motivation pourrait être améliorée. "
+        "Nous recommandons au candidat de mieux expliciter son projet d'études et ses ambitions."
+    ),
+    'similar_letter': (
+        "La lettre de motivation est similaire à {similarity:.0%} à celle de la candidature "
+        "#{other_id}. Une vérification manuelle de l'originalité est recommandée."
+    ),
+}
+
+SEPARATOR = "\n\n"
+
+SIMILAR_LETTER_PATTERN = re.compile(
+    re.escape(TEMPLATES['similar_letter'])
+    .replace(re.escape('{similarity:.0%}'), r'\d+%').replace(re.escape('{other_id}'), r'\d+')
+)
+
+
+def render(band, flags, similar_letter_id=None, letter_similarity=None):
+    paragraphs = [TEMPLATES[band]]
+    for flag, name in FLAGS:
+        if not flags & flag:
+            continue
+        if flag == SIMILAR_LETTER:
+            if similar_letter_id is None or letter_similarity is None:
+                continue
+            paragraphs.append(TEMPLATES[name].format(
+                similarity=float(letter_similarity), other_id=similar_letter_id
+            ))
+        else:
+            paragraphs.append(TEMPLATES[name])
+    return SEPARATOR.join(paragraphs)
+
+
+def parse(text):
+    """(bande, drapeaux) d'un texte produit avec ce catalogue, ou None"""
+    paragraphs = text.split(SEPARATOR)
+    band = next((name for name in BANDS if TEMPLATES[name] == paragraphs[0]), None)
+    if band is None:
+        return None
+    flags = 0
+    remaining = list(FLAGS)
+    for paragraph in paragraphs[1:]:
+        # Les phrases complémentaires apparaissent dans l'ordre de FLAGS
+        while remaining:
+            flag, name = remaining.pop(0)
+            if (SIMILAR_LETTER_PATTERN.fullmatch(paragraph) if flag == SIMILAR_LETTER
+                    else TEMPLATES[name] == paragraph):
+                flags |= flag
+                break
+        else:
+            return None
+    return band, flags
+
+
+def convert_recommendations(apps, schema_editor):
+    """Remplace le texte des recommandations par leurs codes, par lots"""
+    ScholarshipApplication = apps.get_model('applications', 'ScholarshipApplication')
+    rows = (
+        ScholarshipApplication.objects.filter(ai_recommendations__isnull=False, ai_recommendation_band__isnull=True)
+        .exclude(ai_recommendations='')
+        .only('id', 'ai_recommendations', 'ai_similar_letter_id', 'ai_letter_similarity')
+        .order_by('id')
+    )
+    batch = []
+    for application in rows.iterator(chunk_size=BATCH_SIZE):
+        codes = parse(application.ai_recommendations)
+        if codes is None:
+            continue
+        band, flags = codes
+        rendered = render(
+            band, flags, similar_letter_id=application.ai_similar_letter_id,
+            letter_similarity=application.ai_letter_similarity,
+        )
+        # Un texte qui ne se reconstruit pas à l'identique reste le texte de référence
+        if rendered != application.ai_recommendations:
+            continue
+        application.ai_recommendation_band = band
+        application.ai_recommendation_flags = flags
+        application.ai_recommendation_version = 1
+        application.ai_recommendations = None
+        batch.append(application)
+        if len(batch) >= BATCH_SIZE:
+            _write(ScholarshipApplication, batch)
+            batch = []
+    _write(ScholarshipApplication, batch)
+
+
+def restore_recommendations(apps, schema_editor):
+    ScholarshipApplication = apps.get_model('applications', 'ScholarshipApplication')
+    # Seule la version 1 existait avant cette migration : les codes sont rendus avec elle
+    rows = ScholarshipApplication.objects.filter(ai_recommendation_band__isnull=False).order_by('id')
+    batch = []
+    for application in rows.iterator(chunk_size=BATCH_SIZE):
+        application.ai_recommendations = render(
+            application.ai_recommendation_band, application.ai_recommendation_flags,
+            similar_letter_id=application.ai_similar_letter_id, letter_similarity=application.ai_letter_similarity,
+        )
+        batch.append(application)
+        if len(batch) >= BATCH_SIZE:
+            _write(ScholarshipApplication, batch, fields=['ai_recommendations'])
+            batch = []
+    _write(ScholarshipApplication, batch, fields=['ai_recommendations'])
+
+
+def _write(model, batch, fields=(
+    'ai_recommendations', 'ai_recommendation_band', 'ai_recommendation_flags', 'ai_recommendation_version'
+)):
+    if batch:
+        model.objects.bulk_update(batch, list(fields))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0010_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scholarshipapplication',
+            name='ai_recommendation_band',
+            field=models.CharField(blank=True, max_length=16, null=True, verbose_name='Bande de recommandation IA'),
+        ),
+        migrations.AddField(
+            model_name='scholarshipapplication',
+            name='ai_recommendation_flags',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Drapeaux de recommandation IA'),
+        ),
+        migrations.AddField(
+            model_name='scholarshipapplication',
+            name='ai_recommendation_version',
+            field=models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Version du catalogue de recommandations'),
+        ),
+        migrations.RunPython(convert_recommendations, restore_recommendations, elidable=True),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.15 on 2026-10-19 19:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0011_recommendation_codes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scholarshipapplication',
+            name='claimed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='claimed_applications', to=settings.AUTH_USER_MODEL, verbose_name='Évaluateur'),
+        ),
+        migrations.AddField(
+            model_name='scholarshipapplication',
+            name='claimed_until',
+            field=models.DateTimeField(blank=True, null=True, verbose_name="Attribuée jusqu'au"),
+        ),
+        migrations.AddIndex(
+            model_name='scholarshipapplication',
+            index=models.Index(fields=['status', 'claimed_until'], name='application_claim_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-19 19:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0012_review_claims'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scholarshipapplication',
+            name='submission_id',
+            field=models.UUIDField(blank=True, editable=False, null=True, unique=True, verbose_name='Identifiant de dépôt'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.15 on 2026-10-19 19:18
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_evaluated_at(apps, schema_editor):
+    # Meilleure approximation disponible : la dernière modification des candidatures déjà évaluées
+    ScholarshipApplication = apps.get_model('applications', 'ScholarshipApplication')
+    ScholarshipApplication.objects.filter(ai_score__isnull=False).update(ai_evaluated_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0013_submission_ids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scholarshipapplication',
+            name='ai_evaluated_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Évaluée le'),
+        ),
+        migrations.RunPython(backfill_evaluated_at, migrations.RunPython.noop),
+    ]
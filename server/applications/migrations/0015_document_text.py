@@ -0,0 +1,67 @@
+# Generated by Django 5.1.15 on 2026-10-19 19:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0014_evaluated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentText',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('size', models.BigIntegerField(verbose_name='Taille (octets)')),
+                ('kind', models.CharField(blank=True, max_length=10, verbose_name='Format')),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('processing', 'En cours'), ('done', 'Extrait'), ('unsupported', 'Format non pris en charge'), ('failed', 'Échec')], default='pending', max_length=20, verbose_name='Statut')),
+                ('text', models.TextField(blank=True, verbose_name='Texte extrait')),
+                ('page_count', models.PositiveIntegerField(default=0, verbose_name='Pages')),
+                ('error', models.CharField(blank=True, max_length=255, verbose_name='Erreur')),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('extracted_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Texte de document',
+                'verbose_name_plural': 'Textes de documents',
+                'indexes': [models.Index(fields=['status', 'claimed_at'], name='document_text_queue_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DocumentTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=40)),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='applications.documenttext')),
+            ],
+            options={
+                'verbose_name': 'Terme de document',
+                'verbose_name_plural': 'Termes de documents',
+                'indexes': [models.Index(fields=['term', 'document'], name='document_term_lookup_idx')],
+                'constraints': [models.UniqueConstraint(fields=('document', 'term'), name='unique_document_term')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ApplicationDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(choices=[('cv_file', 'CV'), ('transcript_file', 'Relevés de notes'), ('recommendation_letter_file', 'Lettre de recommandation'), ('other_documents_file', 'Documents supplémentaires')], max_length=30, verbose_name='Pièce')),
+                ('name', models.CharField(max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('application', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='documents', to='applications.scholarshipapplication')),
+                ('document', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='attachments', to='applications.documenttext')),
+            ],
+            options={
+                'verbose_name': 'Pièce jointe',
+                'verbose_name_plural': 'Pièces jointes',
+                'indexes': [models.Index(fields=['document', 'application'], name='attachment_document_idx')],
+                'constraints': [models.UniqueConstraint(fields=('application', 'field'), name='unique_application_document')],
+            },
+        ),
+    ]
@@ -0,0 +1,127 @@
+# Generated by Django 5.1.15 on 2026-10-19 19:27
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+BATCH_SIZE = 1000
+
+
+def backfill_status_history(apps, schema_editor):
+    # Date d'entrée dans le statut actuel : la création pour les candidatures
+    # en attente, la dernière modification pour les autres (meilleure approximation)
+    ScholarshipApplication = apps.get_model('applications', 'ScholarshipApplication')
+    ApplicationStatusEvent = apps.get_model('applications', 'ApplicationStatusEvent')
+    ScholarshipApplication.objects.filter(status='pending').update(status_changed_at=F('created_at'))
+    ScholarshipApplication.objects.exclude(status='pending').update(status_changed_at=F('updated_at'))
+
+    # Point de départ de l'historique : un événement par candidature existante
+    batch = []
+    rows = ScholarshipApplication.objects.order_by('id').values_list('id', 'status', 'status_changed_at')
+    for app_id, status, changed_at in rows.iterator(chunk_size=BATCH_SIZE):
+        batch.append(ApplicationStatusEvent(application_id=app_id, to_status=status, changed_at=changed_at))
+        if len(batch) >= BATCH_SIZE:
+            ApplicationStatusEvent.objects.bulk_create(batch)
+            batch = []
+    ApplicationStatusEvent.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0015_document_text'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationStatusEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, choices=[('pending', 'En attente'), ('under_review', "En cours d'examen"), ('accepted', 'Acceptée'), ('rejected', 'Rejetée'), ('waiting_list', "Liste d'attente")], max_length=20, null=True, verbose_name='Statut précédent')),
+                ('to_status', models.CharField(choices=[('pending', 'En attente'), ('under_review', "En cours d'examen"), ('accepted', 'Acceptée'), ('rejected', 'Rejetée'), ('waiting_list', "Liste d'attente")], max_length=20, verbose_name='Nouveau statut')),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Date du changement')),
+                ('previous_changed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Changement de statut',
+                'verbose_name_plural': 'Changements de statut',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RollupCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StatusDurationRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(max_length=20)),
+                ('bucket', models.PositiveSmallIntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Cumul des durées',
+                'verbose_name_plural': 'Cumuls des durées',
+            },
+        ),
+        migrations.CreateModel(
+            name='StatusTransitionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('from_status', models.CharField(blank=True, max_length=20)),
+                ('to_status', models.CharField(max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Cumul des transitions',
+                'verbose_name_plural': 'Cumuls des transitions',
+            },
+        ),
+        migrations.AddField(
+            model_name='scholarshipapplication',
+            name='status_changed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Statut depuis le'),
+        ),
+        migrations.AddIndex(
+            model_name='scholarshipapplication',
+            index=models.Index(fields=['status', 'status_changed_at'], name='application_status_since_idx'),
+        ),
+        migrations.AddField(
+            model_name='applicationstatusevent',
+            name='application',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_events', to='applications.scholarshipapplication'),
+        ),
+        migrations.AddField(
+            model_name='applicationstatusevent',
+            name='changed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Modifié par'),
+        ),
+        migrations.AddConstraint(
+            model_name='statusdurationrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'status', 'bucket'), name='unique_duration_rollup'),
+        ),
+        migrations.AddConstraint(
+            model_name='statustransitionrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'from_status', 'to_status'), name='unique_transition_rollup'),
+        ),
+        migrations.AddIndex(
+            model_name='applicationstatusevent',
+            index=models.Index(fields=['application', 'changed_at'], name='status_event_timeline_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='applicationstatusevent',
+            index=models.Index(fields=['changed_at'], name='status_event_window_idx'),
+        ),
+        migrations.RunPython(backfill_status_history, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.15 on 2026-10-19 20:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0016_status_history'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EvaluationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('selection', models.BinaryField()),
+                ('max_id', models.BigIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(verbose_name='Candidatures')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='Évaluées')),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('running', 'En cours'), ('done', 'Terminée'), ('failed', 'Échec')], default='pending', max_length=20, verbose_name='Statut')),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, verbose_name='Erreur')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Demandée par')),
+            ],
+            options={
+                'verbose_name': "Tâche d'évaluation",
+                'verbose_name_plural': "Tâches d'évaluation",
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'claimed_at'], name='evaluation_job_queue_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.15 on 2026-10-19 20:11
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0017_evaluation_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedapplication',
+            name='status_history',
+            field=models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Historique des statuts'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-19 20:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0018_archived_status_history'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='response_headers',
+            field=models.JSONField(default=dict),
+        ),
+    ]
@@ -1,10 +1,37 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import connections, models, transaction
+from django.db.models.fields.files import FieldFile
+from django.db.models.functions import Cast, JSONObject
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.conf import settings
+from django.utils import timezone
 
 User = get_user_model()
 
+class Cycle(models.Model):
+    """
+    Campagne de candidatures. Une fois fermée, ses candidatures peuvent être
+    déplacées vers les tables d'archive (commande archive_cycle).
+    """
+    name = models.CharField(max_length=100, unique=True, verbose_name="Nom")
+    starts_on = models.DateField(verbose_name="Ouverture")
+    ends_on = models.DateField(verbose_name="Clôture")
+    is_closed = models.BooleanField(default=False, verbose_name="Fermée")
+    archived_at = models.DateTimeField(null=True, blank=True, verbose_name="Archivée le")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-starts_on']
+        verbose_name = "Campagne"
+        verbose_name_plural = "Campagnes"
+
+    def __str__(self):
+        return self.name
+
 class ScholarshipType(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField()
@@ -12,6 +39,8 @@ class ScholarshipType(models.Model):
     duration = models.PositiveIntegerField(help_text="Durée en mois")
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     is_active = models.BooleanField(default=True)
+    cycle = models.ForeignKey(Cycle, on_delete=models.PROTECT, null=True, blank=True, related_name='scholarship_types',
+                              verbose_name="Campagne")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -22,6 +51,178 @@ class ScholarshipType(models.Model):
         verbose_name = "Type de bourse"
         verbose_name_plural = "Types de bourses"
 
+def default_dependents_brackets():
+    # [nombre minimum de personnes à charge, points], du seuil le plus haut au plus bas
+    return [[5, 30], [3, 20], [1, 10]]
+
+class ScoringPolicy(models.Model):
+    """
+    Paramètres du barème d'évaluation IA. Une seule politique est active à la
+    fois ; sans politique active, les valeurs par défaut ci-dessous s'appliquent.
+    """
+    # Champs utilisés par le barème
+    SCORING_FIELDS = (
+        'academic_weight', 'socioeconomic_weight', 'motivation_weight',
+        'low_income_threshold', 'medium_income_threshold', 'high_income_threshold',
+        'dependents_brackets', 'disability_bonus',
+    )
+
+    name = models.CharField(max_length=100, verbose_name="Nom")
+    is_active = models.BooleanField(default=False, verbose_name="Active")
+
+    # Pondérations du score global (somme égale à 1)
+    academic_weight = models.DecimalField(max_digits=4, decimal_places=3, default=Decimal('0.400'),
+                                          validators=[MinValueValidator(0), MaxValueValidator(1)],
+                                          verbose_name="Poids académique")
+    socioeconomic_weight = models.DecimalField(max_digits=4, decimal_places=3, default=Decimal('0.300'),
+                                               validators=[MinValueValidator(0), MaxValueValidator(1)],
+                                               verbose_name="Poids socio-économique")
+    motivation_weight = models.DecimalField(max_digits=4, decimal_places=3, default=Decimal('0.300'),
+                                            validators=[MinValueValidator(0), MaxValueValidator(1)],
+                                            verbose_name="Poids motivation")
+
+    # Seuils de revenus familiaux annuels (en FCFA)
+    low_income_threshold = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('1000000'),
+                                               verbose_name="Seuil revenus faibles")
+    medium_income_threshold = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('3000000'),
+                                                  verbose_name="Seuil revenus moyens")
+    high_income_threshold = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('5000000'),
+                                                verbose_name="Seuil revenus élevés")
+
+    dependents_brackets = models.JSONField(default=default_dependents_brackets,
+                                           verbose_name="Barème des personnes à charge")
+    disability_bonus = models.PositiveIntegerField(default=20, validators=[MaxValueValidator(100)],
+                                                   verbose_name="Bonus handicap")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Politique d'évaluation"
+        verbose_name_plural = "Politiques d'évaluation"
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['is_active'], condition=models.Q(is_active=True),
+                                    name='single_active_scoring_policy'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    def clean(self):
+        total = self.academic_weight + self.socioeconomic_weight + self.motivation_weight
+        if abs(total - 1) > Decimal('0.001'):
+            raise ValidationError("La somme des pondérations doit être égale à 1")
+        if not self.low_income_threshold < self.medium_income_threshold < self.high_income_threshold:
+            raise ValidationError("Les seuils de revenus doivent être strictement croissants")
+        try:
+            brackets = [(int(minimum), int(points)) for minimum, points in self.dependents_brackets]
+        except (TypeError, ValueError):
+            raise ValidationError("Le barème des personnes à charge doit être une liste de paires [minimum, points]")
+        if any(minimum < 1 or points < 0 for minimum, points in brackets):
+            raise ValidationError("Le barème des personnes à charge contient des valeurs invalides")
+
+    def get_dependents_brackets(self):
+        """Retourne le barème trié du seuil le plus haut au plus bas"""
+        return sorted(((int(minimum), int(points)) for minimum, points in self.dependents_brackets), reverse=True)
+
+    @classmethod
+    def get_active(cls):
+        """Retourne la politique active, ou une politique par défaut non enregistrée"""
+        return cls.objects.filter(is_active=True).first() or cls(name="Politique par défaut")
+
+def _snapshot_value(value):
+    # Un fichier est comparé par son nom de stockage
+    if isinstance(value, FieldFile):
+        return value.name
+    return value
+
+
+class ScholarshipApplicationQuerySet(models.QuerySet):
+    # Taille des listes d'identifiants par UPDATE (limite de variables SQLite)
+    bulk_batch_size = 5000
+
+    def set_status(self, new_status, changed_by=None, **fields):
+        """
+        Change le statut de toutes les candidatures du queryset en un seul UPDATE.
+        Les champs supplémentaires sont écrits par la même requête.
+
+        Les changements sont historisés et ajoutés au flux d'événements dans la
+        même transaction, chacun par un seul INSERT ... SELECT : les
+        candidatures ne sont pas chargées en mémoire.
+        """
+        from .events import bump_versions
+
+        now = timezone.now()
+        changing = self.exclude(status=new_status).order_by()
+        with transaction.atomic(using=self.db):
+            owners = list(changing.values_list('user_id', flat=True).distinct())
+            changing._record_status_events(new_status, now, changed_by)
+            changing._record_change_events(new_status, now)
+            # Clients du flux d'événements prévenus après le commit ; la version du
+            # flux fait partie de la clé du tableau de bord des seuls propriétaires
+            transaction.on_commit(lambda: bump_versions(owners), using=self.db)
+            return self.update(
+                status=new_status, updated_at=now,
+                status_changed_at=models.Case(
+                    models.When(~models.Q(status=new_status), then=models.Value(now)),
+                    default=models.F('status_changed_at'),
+                ),
+                **fields
+            )
+
+    def _insert_select(self, model, columns):
+        """INSERT INTO model (colonnes) SELECT ... sur le queryset ; `columns` : {colonne: expression}"""
+        # Uniquement des annotations : les colonnes du SELECT suivent l'ordre de déclaration
+        aliases = {f'_{column}': expression for column, expression in columns.items()}
+        rows = self.annotate(**aliases).values_list(*aliases)
+        sql, params = rows.query.sql_with_params()
+        connection = connections[self.db]
+        names = ', '.join(connection.ops.quote_name(column) for column in columns)
+        table = connection.ops.quote_name(model._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {table} ({names}) {sql}", params)
+
+    def _record_status_events(self, new_status, changed_at, changed_by=None):
+        self._insert_select(ApplicationStatusEvent, {
+            'application_id': models.F('id'),
+            'from_status': models.F('status'),
+            'to_status': models.Value(new_status, output_field=models.CharField()),
+            'changed_at': models.Value(changed_at, output_field=models.DateTimeField()),
+            'previous_changed_at': models.F('status_changed_at'),
+            # Conversion explicite : un NULL sans type serait refusé par PostgreSQL
+            'changed_by_id': Cast(models.Value(changed_by.pk if changed_by else None), models.IntegerField()),
+        })
+
+    def _record_change_events(self, new_status, created_at):
+        # Même contenu que l'événement de `update_status`
+        self._insert_select(ApplicationEvent, {
+            'application_id': models.F('id'),
+            'owner_id': models.F('user_id'),
+            'kind': models.Value('status_changed', output_field=models.CharField()),
+            'payload': JSONObject(
+                status=models.Value(new_status, output_field=models.CharField()),
+                status_display=models.Value(
+                    str(dict(ScholarshipApplication.STATUS_CHOICES)[new_status]), output_field=models.CharField()
+                ),
+                previous_status=models.F('status'),
+            ),
+            'created_at': models.Value(created_at, output_field=models.DateTimeField()),
+        })
+
+    def set_status_for_ids(self, ids, new_status, changed_by=None):
+        """
+        Change le statut d'une liste d'identifiants, par lots, dans une seule transaction.
+        """
+        ids = list(ids)
+        updated = 0
+        with transaction.atomic(using=self.db):
+            for start in range(0, len(ids), self.bulk_batch_size):
+                updated += self.filter(pk__in=ids[start:start + self.bulk_batch_size]).set_status(
+                    new_status, changed_by=changed_by
+                )
+        return updated
+
 class ScholarshipApplication(models.Model):
     STATUS_CHOICES = (
         ('pending', 'En attente'),
@@ -55,6 +256,9 @@ class ScholarshipApplication(models.Model):
 
     # Informations académiques
     scholarship_type = models.ForeignKey(ScholarshipType, on_delete=models.CASCADE, related_name='applications')
+    # Campagne du type de bourse au moment du dépôt
+    cycle = models.ForeignKey(Cycle, on_delete=models.PROTECT, null=True, blank=True, related_name='applications',
+                              verbose_name="Campagne")
     current_institution = models.CharField(max_length=255, verbose_name="Établissement actuel", null=True, blank=True)
     current_year = models.CharField(max_length=100, verbose_name="Année d'études actuelle", null=True, blank=True)
     average_grade = models.DecimalField(max_digits=4, decimal_places=2, verbose_name="Moyenne générale", null=True, blank=True)
@@ -74,27 +278,160 @@ class ScholarshipApplication(models.Model):
 
     # Statut et évaluation
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name="Statut")
+    # Entrée dans le statut actuel (voir ApplicationStatusEvent)
+    status_changed_at = models.DateTimeField(null=True, blank=True, editable=False,
+                                             verbose_name="Statut depuis le")
     admin_notes = models.TextField(null=True, blank=True, verbose_name="Notes administratives")
     
     # Champs d'évaluation IA
     ai_score = models.DecimalField(max_digits=5, decimal_places=2, blank=True, null=True, verbose_name="Score IA")
+    # Texte des évaluations antérieures aux codes de recommandation (voir recommendations.py)
     ai_recommendations = models.TextField(blank=True, null=True, verbose_name="Recommandations IA")
+    ai_recommendation_band = models.CharField(max_length=16, blank=True, null=True, verbose_name="Bande de recommandation IA")
+    ai_recommendation_flags = models.PositiveSmallIntegerField(default=0, verbose_name="Drapeaux de recommandation IA")
+    ai_recommendation_version = models.PositiveSmallIntegerField(blank=True, null=True, verbose_name="Version du catalogue de recommandations")
     ai_academic_score = models.DecimalField(max_digits=5, decimal_places=2, blank=True, null=True, verbose_name="Score académique IA")
     ai_socioeconomic_score = models.DecimalField(max_digits=5, decimal_places=2, blank=True, null=True, verbose_name="Score socio-économique IA")
     ai_motivation_score = models.DecimalField(max_digits=5, decimal_places=2, blank=True, null=True, verbose_name="Score de motivation IA")
+    ai_letter_similarity = models.DecimalField(max_digits=4, decimal_places=3, blank=True, null=True, verbose_name="Similarité de la lettre")
+    ai_similar_letter = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='+',
+                                          verbose_name="Lettre la plus proche")
+    # Date de la dernière évaluation, comparée à la politique active pour repérer les évaluations obsolètes
+    ai_evaluated_at = models.DateTimeField(blank=True, null=True, verbose_name="Évaluée le")
+
+    # Identifiant de suivi d'un dépôt passé par le journal du mode afflux (voir surge.py)
+    submission_id = models.UUIDField(unique=True, null=True, blank=True, editable=False,
+                                     verbose_name="Identifiant de dépôt")
+
+    # Attribution à un évaluateur (voir claims.py) ; l'attribution expire à claimed_until
+    claimed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name='claimed_applications', verbose_name="Évaluateur")
+    claimed_until = models.DateTimeField(null=True, blank=True, verbose_name="Attribuée jusqu'au")
+
+    # Compteurs dénormalisés des commentaires (maintenus par add_comment)
+    comment_count = models.PositiveIntegerField(default=0, verbose_name="Nombre de commentaires")
+    last_commented_at = models.DateTimeField(null=True, blank=True, verbose_name="Dernier commentaire")
     
     # Métadonnées
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Dernière modification")
 
+    objects = ScholarshipApplicationQuerySet.as_manager()
+
+    CLAIM_FIELDS = ('claimed_by', 'claimed_until')
+    # Compteurs de commentaires, écrits par des incréments atomiques (F())
+    COMMENT_COUNTER_FIELDS = ('comment_count', 'last_commented_at')
+
     class Meta:
         verbose_name = "Candidature"
         verbose_name_plural = "Candidatures"
         ordering = ['-created_at']
+        indexes = [
+            # Rafraîchissement incrémental de l'instantané en colonnes
+            models.Index(fields=['updated_at'], name='application_updated_idx'),
+            # File de travail des évaluateurs
+            models.Index(fields=['status', 'claimed_until'], name='application_claim_idx'),
+            # Durées des candidatures encore dans un statut
+            models.Index(fields=['status', 'status_changed_at'], name='application_status_since_idx'),
+        ]
 
     def __str__(self):
         return f"{self.full_name} - {self.scholarship_type.name} ({self.get_status_display()})"
 
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.cycle_id is None and self.scholarship_type_id:
+            self.cycle_id = ScholarshipType.objects.filter(pk=self.scholarship_type_id).values_list(
+                'cycle_id', flat=True
+            ).first()
+        if not self._state.adding and not args and kwargs.get('update_fields') is None:
+            # Seuls les champs modifiés depuis la lecture sont écrits, et transmis aux signaux
+            # post_save (update_fields) : les récepteurs ignorent les champs qui ne les concernent pas
+            kwargs['update_fields'] = self._changed_fields()
+
+        # Historique des statuts : tout changement est enregistré dans la même transaction
+        adding = self._state.adding
+        previous_status = getattr(self, '_loaded_status', None)
+        update_fields = kwargs.get('update_fields')
+        if not adding and (previous_status in (None, self.status)
+                           or (update_fields is not None and 'status' not in update_fields)):
+            super().save(*args, **kwargs)
+            self._remember_values(kwargs.get('update_fields'))
+            return
+
+        now = timezone.now()
+        previous_changed_at = self.status_changed_at
+        self.status_changed_at = now
+        if update_fields is not None and 'status_changed_at' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'status_changed_at']
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            ApplicationStatusEvent.objects.create(
+                application=self,
+                from_status=None if adding else previous_status,
+                to_status=self.status,
+                changed_at=now,
+                previous_changed_at=None if adding else previous_changed_at,
+                # Auteur du changement, renseigné par l'appelant (vue, admin)
+                changed_by=getattr(self, 'changed_by', None),
+            )
+        self._loaded_status = self.status
+        self._remember_values(kwargs.get('update_fields'))
+
+    def _changed_fields(self):
+        """
+        Champs à écrire par un enregistrement complet : ceux qui diffèrent des
+        valeurs lues en base (tous si l'instance n'a pas été lue), plus les
+        dates `auto_now`.
+
+        L'attribution n'est écrite que par claims.py, par mises à jour
+        conditionnelles, et les compteurs par incréments atomiques : ils ne
+        sont jamais écrits, pour ne pas écraser une attribution ou un
+        commentaire concurrents.
+        """
+        excluded = set(self.CLAIM_FIELDS) | set(self.COMMENT_COUNTER_FIELDS) | self.get_deferred_fields()
+        loaded = getattr(self, '_loaded_values', None)
+        return [
+            field.name for field in self._meta.concrete_fields
+            if not field.primary_key and field.name not in excluded and field.attname not in excluded
+            and (loaded is None or field.attname not in loaded or getattr(field, 'auto_now', False)
+                 or getattr(self, field.attname) != loaded[field.attname])
+        ]
+
+    def _remember_values(self, field_names=None):
+        """Valeurs en base après un enregistrement (toutes, ou celles de `field_names`)"""
+        fields = self._meta.concrete_fields
+        if field_names is not None:
+            field_names = set(field_names)
+            fields = [field for field in fields if field.name in field_names]
+        if getattr(self, '_loaded_values', None) is None:
+            if field_names is not None:
+                # Autres valeurs inconnues : le prochain enregistrement complet les écrit toutes
+                return
+            self._loaded_values = {}
+        for field in fields:
+            self._loaded_values[field.attname] = _snapshot_value(getattr(self, field.attname))
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Statut lu en base, comparé à l'enregistrement pour historiser les changements
+        instance._loaded_status = instance.__dict__.get('status')
+        # Valeurs lues, comparées à l'enregistrement pour n'écrire que les champs modifiés
+        instance._loaded_values = {
+            name: _snapshot_value(value) for name, value in zip(field_names, values)
+        }
+        return instance
+
+    def refresh_comment_counters(self):
+        """Recalcule les compteurs dénormalisés à partir des commentaires existants"""
+        stats = self.comments.aggregate(count=models.Count('id'), last=models.Max('created_at'))
+        self.comment_count = stats['count']
+        self.last_commented_at = stats['last']
+        ScholarshipApplication.objects.filter(pk=self.pk).update(
+            comment_count=self.comment_count,
+            last_commented_at=self.last_commented_at
+        )
+
 class ApplicationComment(models.Model):
     application = models.ForeignKey(ScholarshipApplication, on_delete=models.CASCADE, related_name='comments')
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -106,6 +443,371 @@ class ApplicationComment(models.Model):
         verbose_name = "Commentaire"
         verbose_name_plural = "Commentaires"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['application', '-created_at', '-id'], name='comment_timeline_idx'),
+        ]
 
     def __str__(self):
         return f"Commentaire de {self.user.username} sur {self.application}"
+
+class ApplicantBlockingKey(models.Model):
+    """
+    Clés de regroupement d'une candidature pour la détection de doublons.
+    Seules les candidatures partageant une clé sont comparées entre elles.
+    """
+    KIND_CHOICES = (
+        ('name', 'Nom (phonétique)'),
+        ('birth', 'Date de naissance'),
+        ('phone', 'Téléphone'),
+        ('email', 'Identifiant email'),
+    )
+
+    application = models.ForeignKey(ScholarshipApplication, on_delete=models.CASCADE, related_name='blocking_keys')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    value = models.CharField(max_length=100)
+
+    class Meta:
+        verbose_name = "Clé de regroupement"
+        verbose_name_plural = "Clés de regroupement"
+        indexes = [
+            models.Index(fields=['kind', 'value'], name='blocking_key_lookup_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['application', 'kind', 'value'], name='unique_blocking_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} : {self.value}"
+
+class DuplicateMatch(models.Model):
+    """Paire de candidatures probablement déposées par la même personne"""
+    application = models.ForeignKey(ScholarshipApplication, on_delete=models.CASCADE, related_name='duplicate_matches')
+    duplicate_of = models.ForeignKey(ScholarshipApplication, on_delete=models.CASCADE, related_name='+')
+    score = models.DecimalField(max_digits=4, decimal_places=3, verbose_name="Score de similarité")
+    reasons = models.CharField(max_length=100, verbose_name="Éléments concordants")
+    # Plus petit identifiant de candidature du groupe de doublons
+    cluster = models.BigIntegerField(db_index=True, verbose_name="Groupe")
+    is_dismissed = models.BooleanField(default=False, verbose_name="Écarté")
+    detected_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Doublon potentiel"
+        verbose_name_plural = "Doublons potentiels"
+        ordering = ['cluster', '-score']
+        constraints = [
+            models.UniqueConstraint(fields=['application', 'duplicate_of'], name='unique_duplicate_match'),
+        ]
+
+    def __str__(self):
+        return f"#{self.application_id} ~ #{self.duplicate_of_id} ({self.score})"
+
+class LetterSignature(models.Model):
+    """Signature MinHash de la lettre de motivation d'une candidature"""
+    application = models.OneToOneField(ScholarshipApplication, on_delete=models.CASCADE, related_name='letter_signature')
+    # Empreinte du texte normalisé, pour ne pas recalculer une lettre inchangée
+    letter_hash = models.CharField(max_length=40)
+    minhash = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Signature de lettre"
+        verbose_name_plural = "Signatures de lettres"
+
+class LetterBucket(models.Model):
+    """Seau LSH d'une bande de la signature MinHash d'une lettre"""
+    application = models.ForeignKey(ScholarshipApplication, on_delete=models.CASCADE, related_name='letter_buckets')
+    bucket = models.BigIntegerField(db_index=True)
+
+    class Meta:
+        verbose_name = "Seau LSH"
+        verbose_name_plural = "Seaux LSH"
+
+
+class DocumentText(models.Model):
+    """
+    Texte extrait d'un fichier, identifié par l'empreinte SHA-256 de son
+    contenu : un même fichier déposé plusieurs fois n'est extrait qu'une fois.
+    """
+    STATUS_CHOICES = (
+        ('pending', 'En attente'),
+        ('processing', 'En cours'),
+        ('done', 'Extrait'),
+        ('unsupported', 'Format non pris en charge'),
+        ('failed', 'Échec'),
+    )
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    size = models.BigIntegerField(verbose_name="Taille (octets)")
+    kind = models.CharField(max_length=10, blank=True, verbose_name="Format")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name="Statut")
+    text = models.TextField(blank=True, verbose_name="Texte extrait")
+    page_count = models.PositiveIntegerField(default=0, verbose_name="Pages")
+    error = models.CharField(max_length=255, blank=True, verbose_name="Erreur")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Début de l'extraction en cours ; une extraction abandonnée est reprise après DOCUMENT_EXTRACTION_TIMEOUT
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    extracted_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Texte de document"
+        verbose_name_plural = "Textes de documents"
+        indexes = [
+            models.Index(fields=['status', 'claimed_at'], name='document_text_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.status})"
+
+class ApplicationDocument(models.Model):
+    """Fichier déposé avec une candidature ; `document` est renseigné une fois le fichier haché"""
+    FIELD_CHOICES = (
+        ('cv_file', 'CV'),
+        ('transcript_file', 'Relevés de notes'),
+        ('recommendation_letter_file', 'Lettre de recommandation'),
+        ('other_documents_file', 'Documents supplémentaires'),
+    )
+
+    application = models.ForeignKey(ScholarshipApplication, on_delete=models.CASCADE, related_name='documents')
+    field = models.CharField(max_length=30, choices=FIELD_CHOICES, verbose_name="Pièce")
+    # Nom du fichier dans le stockage
+    name = models.CharField(max_length=255)
+    document = models.ForeignKey(DocumentText, on_delete=models.SET_NULL, null=True, blank=True,
+                                 related_name='attachments')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Pièce jointe"
+        verbose_name_plural = "Pièces jointes"
+        constraints = [
+            models.UniqueConstraint(fields=['application', 'field'], name='unique_application_document'),
+        ]
+        indexes = [
+            models.Index(fields=['document', 'application'], name='attachment_document_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_field_display()} de la candidature #{self.application_id}"
+
+class DocumentTerm(models.Model):
+    """Index inversé des textes extraits : un mot normalisé par ligne"""
+    document = models.ForeignKey(DocumentText, on_delete=models.CASCADE, related_name='terms')
+    term = models.CharField(max_length=40)
+
+    class Meta:
+        verbose_name = "Terme de document"
+        verbose_name_plural = "Termes de documents"
+        indexes = [
+            models.Index(fields=['term', 'document'], name='document_term_lookup_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['document', 'term'], name='unique_document_term'),
+        ]
+
+
+class ApplicationStatusEvent(models.Model):
+    """
+    Historique des statuts d'une candidature, en ajout seul : une ligne par
+    changement (la première, sans statut d'origine, à la création).
+    """
+    application = models.ForeignKey(ScholarshipApplication, on_delete=models.CASCADE,
+                                    related_name='status_events')
+    from_status = models.CharField(max_length=20, choices=ScholarshipApplication.STATUS_CHOICES, null=True,
+                                   blank=True, verbose_name="Statut précédent")
+    to_status = models.CharField(max_length=20, choices=ScholarshipApplication.STATUS_CHOICES,
+                                 verbose_name="Nouveau statut")
+    changed_at = models.DateTimeField(default=timezone.now, verbose_name="Date du changement")
+    # Entrée dans le statut précédent : la durée passée dans ce statut se lit sans autre requête
+    previous_changed_at = models.DateTimeField(null=True, blank=True)
+    changed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+',
+                                   verbose_name="Modifié par")
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = "Changement de statut"
+        verbose_name_plural = "Changements de statut"
+        indexes = [
+            # Historique d'une candidature
+            models.Index(fields=['application', 'changed_at'], name='status_event_timeline_idx'),
+            # Changements d'une période
+            models.Index(fields=['changed_at'], name='status_event_window_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.application_id} {self.from_status or '-'} → {self.to_status}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("L'historique des statuts est en ajout seul")
+        super().save(*args, **kwargs)
+
+class StatusTransitionRollup(models.Model):
+    """Nombre de changements de statut par jour et par transition"""
+    day = models.DateField()
+    from_status = models.CharField(max_length=20, blank=True)
+    to_status = models.CharField(max_length=20)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Cumul des transitions"
+        verbose_name_plural = "Cumuls des transitions"
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'from_status', 'to_status'], name='unique_transition_rollup'),
+        ]
+
+class StatusDurationRollup(models.Model):
+    """
+    Histogramme des durées passées dans un statut, par jour de sortie du
+    statut ; `bucket` est l'indice d'une classe de durée (voir history.py).
+    """
+    day = models.DateField()
+    status = models.CharField(max_length=20)
+    bucket = models.PositiveSmallIntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Cumul des durées"
+        verbose_name_plural = "Cumuls des durées"
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'status', 'bucket'], name='unique_duration_rollup'),
+        ]
+
+class RollupCursor(models.Model):
+    """Dernier événement pris en compte par un cumul incrémental"""
+    name = models.CharField(max_length=50, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} : {self.last_id}"
+
+
+class ApplicationEvent(models.Model):
+    """Journal des changements d'une candidature, diffusé aux clients connectés"""
+    KIND_CHOICES = (
+        ('status_changed', 'Changement de statut'),
+        ('comment_added', 'Nouveau commentaire'),
+        ('evaluated', 'Évaluation terminée'),
+    )
+
+    application = models.ForeignKey(ScholarshipApplication, on_delete=models.CASCADE, related_name='events')
+    # Propriétaire de la candidature, copié pour filtrer le flux sans jointure
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = "Événement de candidature"
+        verbose_name_plural = "Événements de candidature"
+        indexes = [
+            models.Index(fields=['owner', 'id'], name='event_owner_feed_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.kind} ({self.application_id})"
+
+class ArchivedApplication(models.Model):
+    """
+    Candidature d'une campagne archivée, avec ses commentaires et son
+    historique de statuts. Les champs filtrables sont recopiés en colonnes, la
+    ligne complète dans `data`.
+    """
+    original_id = models.BigIntegerField(unique=True, verbose_name="Identifiant d'origine")
+    cycle = models.ForeignKey(Cycle, on_delete=models.PROTECT, related_name='archived_applications')
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='archived_applications')
+    scholarship_type = models.ForeignKey(ScholarshipType, on_delete=models.SET_NULL, null=True, related_name='+')
+    full_name = models.CharField(max_length=255)
+    email = models.EmailField()
+    status = models.CharField(max_length=20, choices=ScholarshipApplication.STATUS_CHOICES)
+    ai_score = models.DecimalField(max_digits=5, decimal_places=2, null=True)
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+    comments = models.JSONField(encoder=DjangoJSONEncoder, default=list)
+    status_history = models.JSONField(encoder=DjangoJSONEncoder, default=list, verbose_name="Historique des statuts")
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Candidature archivée"
+        verbose_name_plural = "Candidatures archivées"
+        indexes = [
+            models.Index(fields=['cycle', 'status'], name='archive_cycle_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.full_name} ({self.cycle})"
+
+class IdempotencyKey(models.Model):
+    """Réponse enregistrée pour une clé Idempotency-Key, rejouée en cas de nouvel essai"""
+    STATUS_CHOICES = (
+        ('processing', 'En cours'),
+        ('completed', 'Terminée'),
+    )
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    key = models.CharField(max_length=255)
+    # Empreinte de la méthode, du chemin et du contenu de la requête d'origine
+    fingerprint = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='processing')
+    response_status = models.PositiveSmallIntegerField(null=True)
+    response_body = models.JSONField(encoder=DjangoJSONEncoder, null=True)
+    # En-têtes à rejouer (Location...), voir idempotency.REPLAYED_HEADERS
+    response_headers = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = "Clé d'idempotence"
+        verbose_name_plural = "Clés d'idempotence"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_idempotency_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.key} ({self.status})"
+
+class EvaluationJob(models.Model):
+    """
+    Évaluation groupée demandée depuis l'admin, exécutée hors du serveur web
+    par la commande `run_evaluation_jobs`. La sélection est conservée sous
+    forme de requête (filtres, recherche) bornée par `max_id`, jamais comme
+    liste d'identifiants : sa taille ne dépend pas du nombre de candidatures.
+    La progression (`last_id`) est enregistrée après chaque tranche : une
+    tâche interrompue reprend là où elle s'était arrêtée.
+    """
+    STATUS_CHOICES = (
+        ('pending', 'En attente'),
+        ('running', 'En cours'),
+        ('done', 'Terminée'),
+        ('failed', 'Échec'),
+    )
+
+    # Requête de la sélection (Query Django sérialisée, voir jobs.py)
+    selection = models.BinaryField()
+    # Plus grand identifiant sélectionné : les candidatures créées ensuite sont exclues
+    max_id = models.BigIntegerField(default=0)
+    total = models.PositiveIntegerField(verbose_name="Candidatures")
+    processed = models.PositiveIntegerField(default=0, verbose_name="Évaluées")
+    # Dernier identifiant traité
+    last_id = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name="Statut")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Dernière tranche commencée ; une tâche sans nouvelle tranche est reprise après ADMIN_JOB_TIMEOUT
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True, verbose_name="Erreur")
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+',
+                                   verbose_name="Demandée par")
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Tâche d'évaluation"
+        verbose_name_plural = "Tâches d'évaluation"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'claimed_at'], name='evaluation_job_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"Évaluation #{self.pk} ({self.processed}/{self.total}, {self.get_status_display()})"
@@ -0,0 +1,90 @@
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class CommentCursorPagination(CursorPagination):
+    """
+    Pagination par curseur du fil de commentaires, du plus récent au plus ancien.
+    Le coût d'une page reste constant quelle que soit la longueur du fil.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+
+class DuplicateClusterPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+def estimated_table_count(queryset):
+    """
+    Retourne une estimation du nombre de lignes de la table d'un queryset non
+    filtré, à partir des statistiques du SGBD, ou None si aucune n'est disponible.
+    """
+    if queryset.query.where or queryset.query.distinct or queryset.query.is_sliced:
+        return None
+
+    db_table = queryset.model._meta.db_table
+    connection = connections[queryset.db]
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [db_table])
+            elif connection.vendor == 'mysql':
+                cursor.execute(
+                    "SELECT table_rows FROM information_schema.tables "
+                    "WHERE table_schema = DATABASE() AND table_name = %s", [db_table]
+                )
+            elif connection.vendor == 'sqlite':
+                # sqlite_stat1 n'existe qu'après un ANALYZE
+                cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [db_table])
+            else:
+                return None
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+
+    if not row or row[0] is None:
+        return None
+    estimate = int(str(row[0]).split()[0])
+    return estimate if estimate >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator de l'admin qui remplace le COUNT(*) exact par l'estimation du SGBD
+    lorsque la liste n'est pas filtrée et que la table est volumineuse.
+    """
+    estimate_threshold = 10000
+
+    @cached_property
+    def count(self):
+        if isinstance(self.object_list, QuerySet):
+            estimate = estimated_table_count(self.object_list)
+            if estimate is not None and estimate >= self.estimate_threshold:
+                return estimate
+        return super().count
+
+
+class DocumentSearchPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+class StatusChangePagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+class ArchivePagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    # Les archives grossissent à chaque campagne : nombre estimé sans filtre
+    django_paginator_class = EstimatedCountPaginator
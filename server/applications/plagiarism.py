@@ -0,0 +1,206 @@
+"""
+Index de similarité des lettres de motivation (MinHash/LSH).
+
+Chaque lettre est découpée en shingles de mots, résumée par une signature
+MinHash de NUM_PERM entiers 32 bits (512 octets), puis rangée dans BANDS seaux
+LSH. Une nouvelle lettre n'est comparée qu'aux lettres partageant au moins un
+seau avec elle, sans parcourir le corpus.
+"""
+import hashlib
+import re
+import unicodedata
+import zlib
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+
+from .models import LetterBucket, LetterSignature, ScholarshipApplication
+
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+
+# Plus grand nombre premier inférieur à 2**32 : les valeurs tiennent sur 32 bits
+PRIME = np.uint64(4294967291)
+_random = np.random.RandomState(20240601)
+PERM_A = _random.randint(1, 2 ** 32 - 5, size=(NUM_PERM, 1), dtype=np.uint64)
+PERM_B = _random.randint(0, 2 ** 32 - 5, size=(NUM_PERM, 1), dtype=np.uint64)
+
+# Nombre maximal de lettres candidates vérifiées pour une requête
+MAX_CANDIDATES = 500
+
+
+def normalize_letter(text):
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode().lower()
+    return re.findall(r'[a-z0-9]+', text)
+
+
+def letter_hash(words):
+    return hashlib.sha1(' '.join(words).encode()).hexdigest()
+
+
+def shingles(words):
+    """Empreintes 32 bits des suites de SHINGLE_SIZE mots"""
+    if len(words) < SHINGLE_SIZE:
+        grams = [' '.join(words)] if words else []
+    else:
+        grams = {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    return np.fromiter((zlib.crc32(gram.encode()) for gram in grams), dtype=np.uint64)
+
+
+def minhash(words):
+    """Signature MinHash (NUM_PERM entiers 32 bits) d'une lettre normalisée"""
+    hashes = shingles(words)
+    if not len(hashes):
+        return np.full(NUM_PERM, 2 ** 32 - 1, dtype=np.uint32)
+    return ((PERM_A * hashes + PERM_B) % PRIME).min(axis=1).astype(np.uint32)
+
+
+def lsh_buckets(signature):
+    """Un seau signé 64 bits par bande ; l'indice de bande fait partie de l'empreinte"""
+    buckets = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS].tobytes()
+        digest = hashlib.blake2b(bytes([band]) + rows, digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, 'big', signed=True))
+    return buckets
+
+
+def estimated_similarity(first, second):
+    """Estimation de la similarité de Jaccard entre deux signatures"""
+    return float(np.mean(first == second))
+
+
+def index_letter(application):
+    """
+    Enregistre la signature et les seaux de la lettre d'une candidature.
+
+    Returns:
+        numpy.ndarray: La signature, ou None si la candidature n'a pas de lettre
+    """
+    words = normalize_letter(application.motivation_letter)
+    if not words:
+        LetterSignature.objects.filter(application=application).delete()
+        LetterBucket.objects.filter(application=application).delete()
+        return None
+
+    digest = letter_hash(words)
+    existing = LetterSignature.objects.filter(application=application).first()
+    if existing and existing.letter_hash == digest:
+        return np.frombuffer(bytes(existing.minhash), dtype=np.uint32)
+
+    signature = minhash(words)
+    with transaction.atomic():
+        LetterSignature.objects.update_or_create(
+            application=application,
+            defaults={'letter_hash': digest, 'minhash': signature.tobytes()}
+        )
+        LetterBucket.objects.filter(application=application).delete()
+        LetterBucket.objects.bulk_create([
+            LetterBucket(application=application, bucket=bucket) for bucket in lsh_buckets(signature)
+        ])
+    return signature
+
+
+def rebuild_letter_index(batch_size=2000):
+    """Recalcule les signatures et seaux de toutes les lettres, par lots"""
+    LetterBucket.objects.all().delete()
+    LetterSignature.objects.all().delete()
+    rows = ScholarshipApplication.objects.order_by().exclude(motivation_letter='').values_list(
+        'id', 'motivation_letter'
+    ).iterator(chunk_size=batch_size)
+    signatures, buckets, total = [], [], 0
+    for app_id, letter in rows:
+        words = normalize_letter(letter)
+        if not words:
+            continue
+        signature = minhash(words)
+        signatures.append(LetterSignature(
+            application_id=app_id, letter_hash=letter_hash(words), minhash=signature.tobytes()
+        ))
+        buckets.extend(LetterBucket(application_id=app_id, bucket=bucket) for bucket in lsh_buckets(signature))
+        total += 1
+        if len(signatures) >= batch_size:
+            LetterSignature.objects.bulk_create(signatures)
+            LetterBucket.objects.bulk_create(buckets, batch_size=10000)
+            signatures, buckets = [], []
+    LetterSignature.objects.bulk_create(signatures)
+    LetterBucket.objects.bulk_create(buckets, batch_size=10000)
+    return total
+
+
+def similar_letters(application, signature=None, threshold=None):
+    """
+    Lettres d'autres candidats dont la similarité estimée atteint le seuil.
+    Les lettres réutilisées par un même compte ne sont pas signalées.
+
+    Returns:
+        list: (id de candidature, similarité) par similarité décroissante
+    """
+    if threshold is None:
+        threshold = settings.LETTER_SIMILARITY_THRESHOLD
+    if signature is None:
+        words = normalize_letter(application.motivation_letter)
+        if not words:
+            return []
+        signature = minhash(words)
+
+    candidates = (
+        LetterBucket.objects.filter(bucket__in=lsh_buckets(signature))
+        .exclude(application__user_id=application.user_id)
+        .values('application_id')
+        .annotate(shared=Count('id'))
+        .order_by('-shared')[:MAX_CANDIDATES]
+    )
+    candidate_ids = [candidate['application_id'] for candidate in candidates]
+    matches = []
+    for app_id, stored in LetterSignature.objects.filter(application_id__in=candidate_ids).values_list(
+        'application_id', 'minhash'
+    ):
+        similarity = estimated_similarity(signature, np.frombuffer(bytes(stored), dtype=np.uint32))
+        if similarity >= threshold:
+            matches.append((app_id, round(similarity, 3)))
+    return sorted(matches, key=lambda match: (-match[1], match[0]))
+
+
+def letter_clusters(min_similarity=None):
+    """
+    Groupes de lettres similaires, à partir du lien de chaque candidature
+    évaluée vers la lettre la plus proche.
+
+    Returns:
+        list: dictionnaires {'applications': [...], 'max_similarity': ...}
+    """
+    links = ScholarshipApplication.objects.filter(ai_similar_letter__isnull=False)
+    if min_similarity is not None:
+        links = links.filter(ai_letter_similarity__gte=min_similarity)
+
+    parent, best = {}, {}
+
+    def find(node):
+        parent.setdefault(node, node)
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for app_id, other_id, similarity in links.values_list('id', 'ai_similar_letter_id', 'ai_letter_similarity'):
+        root, other_root = find(app_id), find(other_id)
+        if root != other_root:
+            parent[max(root, other_root)] = min(root, other_root)
+        best[app_id] = similarity
+
+    clusters = {}
+    for node in parent:
+        clusters.setdefault(find(node), []).append(node)
+    result = [
+        {
+            'applications': sorted(members),
+            'max_similarity': max((best[member] for member in members if member in best), default=None),
+        }
+        for members in clusters.values()
+    ]
+    return sorted(result, key=lambda cluster: (-(cluster['max_similarity'] or 0), cluster['applications'][0]))
@@ -0,0 +1,247 @@
+"""
+Recommandations IA stockées sous forme de codes.
+
+L'évaluateur ne produit qu'une bande (selon le score global) et un masque de
+drapeaux ; le texte est rendu à la sérialisation à partir d'un catalogue de
+modèles versionné et traduisible. Modifier un texte existant impose une
+nouvelle version du catalogue : les candidatures déjà évaluées gardent la
+version avec laquelle elles l'ont été.
+
+Les candidatures évaluées avant l'introduction des codes et dont le texte n'a
+pas pu être converti gardent leur texte dans `ai_recommendations`.
+"""
+import re
+
+from django.conf import settings
+from django.utils.translation.trans_real import parse_accept_lang_header
+
+# Seuils du score global délimitant les bandes de recommandation
+RECOMMENDATION_BANDS = (
+    (80, 'exceptional'),
+    (70, 'very_good'),
+    (60, 'satisfactory'),
+    (50, 'average'),
+    (0, 'insufficient'),
+)
+
+LOW_ACADEMIC = 1
+HIGH_SOCIOECONOMIC = 2
+WEAK_MOTIVATION = 4
+SIMILAR_LETTER = 8
+
+# Ordre d'affichage des phrases complémentaires
+FLAGS = (
+    (LOW_ACADEMIC, 'low_academic'),
+    (HIGH_SOCIOECONOMIC, 'high_socioeconomic'),
+    (WEAK_MOTIVATION, 'weak_motivation'),
+    (SIMILAR_LETTER, 'similar_letter'),
+)
+
+CATALOGUE_VERSION = 1
+
+CATALOGUES = {
+    1: {
+        'fr': {
+            'exceptional': (
+                "Candidature exceptionnelle. Le candidat présente un excellent profil académique "
+                "et une situation socio-économique justifiant l'attribution d'une bourse. "
+                "Recommandation: Acceptation prioritaire."
+            ),
+            'very_good': (
+                "Très bonne candidature. Le candidat présente un bon profil global. "
+                "Recommandation: Acceptation."
+            ),
+            'satisfactory': (
+                "Candidature satisfaisante. Le candidat présente un profil intéressant. "
+                "Recommandation: Acceptation sous réserve de places disponibles."
+            ),
+            'average': (
+                "Candidature moyenne. Le candidat pourrait bénéficier d'une bourse, mais n'est pas prioritaire. "
+                "Recommandation: Liste d'attente."
+            ),
+            'insufficient': (
+                "Candidature insuffisante selon nos critères d'évaluation. "
+                "Recommandation: Refus avec possibilité de recandidature l'année prochaine."
+            ),
+            'low_academic': (
+                "Le profil académique est en dessous de nos attentes. "
+                "Nous recommandons au candidat d'améliorer ses résultats scolaires."
+            ),
+            'high_socioeconomic': (
+                "La situation socio-économique du candidat justifie pleinement l'attribution d'une bourse."
+            ),
+            'weak_motivation': (
+                "La lettre de motivation pourrait être améliorée. "
+                "Nous recommandons au candidat de mieux expliciter son projet d'études et ses ambitions."
+            ),
+            'similar_letter': (
+                "La lettre de motivation est similaire à {similarity:.0%} à celle de la candidature "
+                "#{other_id}. Une vérification manuelle de l'originalité est recommandée."
+            ),
+        },
+        'en': {
+            'exceptional': (
+                "Outstanding application. The applicant has an excellent academic record "
+                "and a socio-economic situation that warrants a scholarship. "
+                "Recommendation: Priority acceptance."
+            ),
+            'very_good': (
+                "Very good application. The applicant has a strong overall profile. "
+                "Recommendation: Acceptance."
+            ),
+            'satisfactory': (
+                "Satisfactory application. The applicant has an interesting profile. "
+                "Recommendation: Acceptance subject to available places."
+            ),
+            'average': (
+                "Average application. The applicant could benefit from a scholarship but is not a priority. "
+                "Recommendation: Waiting list."
+            ),
+            'insufficient': (
+                "Application insufficient according to our evaluation criteria. "
+                "Recommendation: Rejection, with the option to reapply next year."
+            ),
+            'low_academic': (
+                "The academic record is below our expectations. "
+                "We recommend that the applicant improve their grades."
+            ),
+            'high_socioeconomic': (
+                "The applicant's socio-economic situation fully warrants a scholarship."
+            ),
+            'weak_motivation': (
+                "The motivation letter could be improved. "
+                "We recommend that the applicant explain their study plans and ambitions more clearly."
+            ),
+            'similar_letter': (
+                "The motivation letter is {similarity:.0%} similar to that of application "
+                "#{other_id}. A manual originality check is recommended."
+            ),
+        },
+    },
+}
+
+SEPARATOR = "\n\n"
+
+
+def available_languages(version=CATALOGUE_VERSION):
+    return list(CATALOGUES[version])
+
+
+def choose_language(requested=None, accept_language=''):
+    """
+    Langue de rendu : `requested` (paramètre `lang`) si le catalogue la
+    propose, sinon la meilleure langue de l'en-tête Accept-Language, sinon
+    RECOMMENDATION_DEFAULT_LANGUAGE.
+    """
+    languages = available_languages()
+    candidates = [requested] if requested else []
+    candidates += [code for code, _ in parse_accept_lang_header(accept_language or '')]
+    for candidate in candidates:
+        candidate = candidate.lower()
+        for code in (candidate, candidate.split('-')[0]):
+            if code in languages:
+                return code
+    return settings.RECOMMENDATION_DEFAULT_LANGUAGE
+
+
+def recommendation_band(total_score):
+    """Retourne la bande de recommandation correspondant à un score global"""
+    for threshold, band in RECOMMENDATION_BANDS:
+        if total_score >= threshold:
+            return band
+    return RECOMMENDATION_BANDS[-1][1]
+
+
+def encode(academic_score, socioeconomic_score, motivation_score, similar_letter=None):
+    """Masque de drapeaux correspondant aux scores d'une évaluation"""
+    flags = 0
+    if academic_score < 50:
+        flags |= LOW_ACADEMIC
+    if socioeconomic_score >= 80:
+        flags |= HIGH_SOCIOECONOMIC
+    if motivation_score < 60:
+        flags |= WEAK_MOTIVATION
+    if similar_letter:
+        flags |= SIMILAR_LETTER
+    return flags
+
+
+def render(band, flags, version=CATALOGUE_VERSION, language=None, similar_letter_id=None, letter_similarity=None):
+    """
+    Texte des recommandations.
+
+    Args:
+        band (str): Bande de recommandation
+        flags (int): Masque de drapeaux
+        version (int): Version du catalogue utilisée lors de l'évaluation
+        language (str): Langue du catalogue (RECOMMENDATION_DEFAULT_LANGUAGE par défaut)
+        similar_letter_id (int): Candidature dont la lettre est similaire
+        letter_similarity (float): Similarité avec cette lettre
+
+    Returns:
+        str: Recommandations textuelles
+    """
+    catalogue = CATALOGUES[version]
+    templates = catalogue.get(language) or catalogue[settings.RECOMMENDATION_DEFAULT_LANGUAGE]
+    paragraphs = [templates[band]]
+    for flag, name in FLAGS:
+        if not flags & flag:
+            continue
+        if flag == SIMILAR_LETTER:
+            # La candidature similaire a pu être supprimée depuis l'évaluation
+            if similar_letter_id is None or letter_similarity is None:
+                continue
+            paragraphs.append(templates[name].format(
+                similarity=float(letter_similarity), other_id=similar_letter_id
+            ))
+        else:
+            paragraphs.append(templates[name])
+    return SEPARATOR.join(paragraphs)
+
+
+def render_application(application, language=None):
+    """Recommandations d'une candidature, ou texte historique s'il n'y a pas de codes"""
+    if not application.ai_recommendation_band:
+        return application.ai_recommendations
+    return render(
+        application.ai_recommendation_band, application.ai_recommendation_flags,
+        version=application.ai_recommendation_version or CATALOGUE_VERSION, language=language,
+        similar_letter_id=application.ai_similar_letter_id, letter_similarity=application.ai_letter_similarity,
+    )
+
+
+def _similar_letter_pattern(template):
+    pattern = re.escape(template)
+    pattern = pattern.replace(re.escape('{similarity:.0%}'), r'\d+%').replace(re.escape('{other_id}'), r'\d+')
+    return re.compile(pattern)
+
+
+def parse(text, version=CATALOGUE_VERSION, language='fr'):
+    """
+    Retrouve la bande et les drapeaux d'un texte produit avec le catalogue
+    `version` dans la langue `language`.
+
+    Returns:
+        tuple: (bande, drapeaux), ou None si le texte ne correspond pas au catalogue
+    """
+    if not text:
+        return None
+    templates = CATALOGUES[version][language]
+    paragraphs = text.split(SEPARATOR)
+    band = next((name for _, name in RECOMMENDATION_BANDS if templates[name] == paragraphs[0]), None)
+    if band is None:
+        return None
+
+    flags = 0
+    similar = _similar_letter_pattern(templates['similar_letter'])
+    remaining = list(FLAGS)
+    for paragraph in paragraphs[1:]:
+        # Les phrases complémentaires apparaissent dans l'ordre de FLAGS
+        while remaining:
+            flag, name = remaining.pop(0)
+            if (similar.fullmatch(paragraph) if flag == SIMILAR_LETTER else templates[name] == paragraph):
+                flags |= flag
+                break
+        else:
+            return None
+    return band, flags
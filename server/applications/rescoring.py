@@ -0,0 +1,285 @@
+"""
+Réévaluation parallèle de toutes les candidatures.
+
+Les candidatures évaluables sont découpées en tranches d'identifiants
+contigus. Chaque tranche est évaluée dans un processus du pool, qui ouvre sa
+propre connexion à la base et charge une seule fois la politique
+d'évaluation ; les processus ne font que lire. Le processus principal écrit
+les résultats tranche par tranche (`bulk_update`), puis enregistre la tranche
+dans un fichier de reprise : une réévaluation interrompue reprend après la
+dernière tranche écrite.
+
+`rescore_selection` évalue une sélection quelconque (actions de l'admin),
+tranche par tranche, dans le processus courant.
+
+Les réévaluations en masse ne sont pas ajoutées au flux d'événements.
+"""
+import json
+import multiprocessing
+import os
+import random
+import time
+from decimal import Decimal
+
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .ai_evaluation import AIEvaluator
+from .dashboard import invalidate_dashboards
+from .models import ScholarshipApplication, ScoringPolicy
+from .recommendations import CATALOGUE_VERSION
+
+RESULT_FIELDS = (
+    'ai_score', 'ai_recommendations', 'ai_recommendation_band', 'ai_recommendation_flags',
+    'ai_recommendation_version', 'ai_academic_score', 'ai_socioeconomic_score',
+    'ai_motivation_score', 'ai_similar_letter', 'ai_letter_similarity', 'ai_evaluated_at', 'updated_at',
+)
+
+# Champs lus par l'évaluateur
+EVALUATION_FIELDS = (
+    'id', 'user_id', 'average_grade', 'baccalaureate_mention', 'family_income',
+    'number_of_dependents', 'has_disability', 'motivation_letter',
+)
+
+# Politique chargée à la première tranche évaluée par un processus
+_worker_policy = None
+
+
+def evaluable_applications():
+    """Candidatures remplissant les conditions de `evaluate_application`"""
+    return ScholarshipApplication.objects.filter(
+        average_grade__isnull=False, motivation_letter__isnull=False
+    ).exclude(average_grade=0).exclude(motivation_letter='')
+
+
+def stale_applications(policy=None):
+    """
+    Candidatures évaluables jamais évaluées, évaluées avant la dernière
+    modification de la politique, ou dont les recommandations viennent d'une
+    autre version du catalogue.
+    """
+    policy = policy or ScoringPolicy.get_active()
+    stale = Q(ai_evaluated_at__isnull=True) | ~Q(ai_recommendation_version=CATALOGUE_VERSION)
+    if policy.pk:
+        stale |= Q(ai_evaluated_at__lt=policy.updated_at)
+    return evaluable_applications().filter(stale)
+
+
+def id_chunks(chunk_size, queryset=None):
+    """
+    Découpe les candidatures évaluables en tranches (premier id, dernier id)
+    d'au plus chunk_size candidatures.
+    """
+    queryset = evaluable_applications() if queryset is None else queryset
+    ids = list(queryset.order_by('id').values_list('id', flat=True))
+    return [
+        (ids[start], ids[min(start + chunk_size, len(ids)) - 1], min(chunk_size, len(ids) - start))
+        for start in range(0, len(ids), chunk_size)
+    ]
+
+
+def _init_worker(policy_id):
+    """Initialisation d'un processus du pool"""
+    global _worker_policy
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+    # Les connexions héritées du processus parent ne doivent pas être partagées
+    for connection in connections.all(initialized_only=True):
+        connection.close()
+    # Après un fork, tous les processus auraient la même suite aléatoire
+    random.seed(os.urandom(16))
+    _worker_policy = policy_id
+
+
+def _get_worker_policy():
+    global _worker_policy
+    if not isinstance(_worker_policy, ScoringPolicy):
+        _worker_policy = (
+            ScoringPolicy.objects.get(pk=_worker_policy) if _worker_policy else ScoringPolicy.get_active()
+        )
+    return _worker_policy
+
+
+def score_chunk(chunk):
+    """
+    Évalue une tranche sans rien écrire en base.
+
+    Returns:
+        tuple: (tranche, liste de tuples dans l'ordre de RESULT_FIELDS précédés de l'id)
+    """
+    first_id, last_id, _ = chunk
+    applications = evaluable_applications().filter(id__gte=first_id, id__lte=last_id)
+    return chunk, _score(applications, _get_worker_policy())
+
+
+def _score(applications, policy):
+    results = []
+    for application in applications.only(*EVALUATION_FIELDS).iterator(chunk_size=500):
+        evaluator = AIEvaluator(application, policy=policy, update_letter_index=False)
+        total, recommendations, academic, socioeconomic, motivation = evaluator.evaluate()
+        similar_id, similarity = evaluator.similar_letter or (None, None)
+        results.append((application.id, total, recommendations, academic, socioeconomic, motivation,
+                        similar_id, similarity))
+    return results
+
+
+def write_results(results, batch_size=500):
+    """Écrit les scores d'une tranche en une transaction"""
+    now = timezone.now()
+    applications = []
+    for app_id, total, (band, flags), academic, socioeconomic, motivation, similar_id, similarity in results:
+        applications.append(ScholarshipApplication(
+            id=app_id,
+            ai_score=Decimal(str(total)),
+            ai_recommendations=None,
+            ai_recommendation_band=band,
+            ai_recommendation_flags=flags,
+            ai_recommendation_version=CATALOGUE_VERSION,
+            ai_academic_score=Decimal(str(academic)),
+            ai_socioeconomic_score=Decimal(str(socioeconomic)),
+            ai_motivation_score=Decimal(str(motivation)),
+            ai_similar_letter_id=similar_id,
+            ai_letter_similarity=similarity,
+            ai_evaluated_at=now,
+            updated_at=now,
+        ))
+    with transaction.atomic():
+        ScholarshipApplication.objects.bulk_update(applications, RESULT_FIELDS, batch_size=batch_size)
+        # Seuls les tableaux de bord des candidats réévalués sont reconstruits
+        invalidate_dashboards(ScholarshipApplication.objects.filter(
+            pk__in=[application.id for application in applications]
+        ).values_list('user_id', flat=True).distinct())
+    return len(applications)
+
+
+class Checkpoint:
+    """Tranches déjà écrites, conservées dans un fichier JSON"""
+
+    def __init__(self, path, policy_id=None, chunk_size=None):
+        self.path = path
+        self.policy_id = policy_id
+        self.chunk_size = chunk_size
+        self.done = set()
+        if path and os.path.exists(path):
+            with open(path) as checkpoint_file:
+                data = json.load(checkpoint_file)
+            if (data.get('policy'), data.get('chunk_size')) != (policy_id, chunk_size):
+                raise ValueError(
+                    f"Le fichier de reprise {path} a été créé avec une autre politique "
+                    f"ou une autre taille de tranche"
+                )
+            self.done = {tuple(chunk) for chunk in data['done']}
+
+    def is_done(self, chunk):
+        return (chunk[0], chunk[1]) in self.done
+
+    def mark_done(self, chunk):
+        self.done.add((chunk[0], chunk[1]))
+        if not self.path:
+            return
+        # Écriture atomique : un arrêt brutal laisse l'ancienne version intacte
+        temporary = f"{self.path}.tmp"
+        with open(temporary, 'w') as checkpoint_file:
+            json.dump({'policy': self.policy_id, 'chunk_size': self.chunk_size, 'done': sorted(self.done)},
+                      checkpoint_file)
+        os.replace(temporary, self.path)
+
+    def clear(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def _results(chunks, workers, policy_id):
+    """Résultats des tranches, dans l'ordre où elles se terminent"""
+    global _worker_policy
+    if workers == 1:
+        _worker_policy = policy_id
+        for chunk in chunks:
+            yield score_chunk(chunk)
+        return
+
+    # Chaque processus ouvrira sa propre connexion
+    connections.close_all()
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(policy_id,)) as pool:
+        yield from pool.imap_unordered(score_chunk, chunks)
+
+
+def rescore(workers=None, chunk_size=1000, policy=None, checkpoint_path=None, dry_run=False, progress=None):
+    """
+    Réévalue toutes les candidatures évaluables.
+
+    Args:
+        workers (int): Nombre de processus (nombre de cœurs par défaut)
+        chunk_size (int): Nombre de candidatures par tranche
+        policy (ScoringPolicy): Politique enregistrée à appliquer (la politique active par défaut)
+        checkpoint_path (str): Fichier de reprise ; supprimé à la fin d'une réévaluation complète
+        dry_run (bool): Évalue sans rien écrire (mesure de performance)
+        progress (callable): Appelé avec (candidatures traitées, total, secondes écoulées)
+
+    Returns:
+        dict: Nombre de candidatures et de tranches traitées, durée
+    """
+    workers = workers or os.cpu_count() or 1
+    policy_id = policy.pk if policy else None
+    checkpoint = Checkpoint(None if dry_run else checkpoint_path, policy_id, chunk_size)
+
+    chunks = id_chunks(chunk_size)
+    total = sum(size for _, _, size in chunks)
+    pending = [chunk for chunk in chunks if not checkpoint.is_done(chunk)]
+    processed = total - sum(size for _, _, size in pending)
+
+    start = time.perf_counter()
+    scored = 0
+    for chunk, results in _results(pending, workers, policy_id):
+        if not dry_run:
+            write_results(results)
+            checkpoint.mark_done(chunk)
+        processed += chunk[2]
+        scored += len(results)
+        if progress:
+            progress(processed, total, time.perf_counter() - start)
+
+    if not dry_run:
+        checkpoint.clear()
+    return {
+        'workers': workers,
+        'total': total,
+        'scored': scored,
+        'chunks': len(pending),
+        'skipped_chunks': len(chunks) - len(pending),
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+
+
+def rescore_selection(queryset, chunk_size=500, policy=None, progress=None):
+    """
+    Évalue les candidatures évaluables d'un queryset, tranche par tranche.
+
+    Les identifiants sont lus par pages successives (id > dernier id traité) :
+    une sélection de plusieurs dizaines de milliers de candidatures n'est
+    jamais chargée en mémoire, et chaque tranche est écrite dans sa propre
+    transaction.
+
+    Args:
+        queryset (QuerySet): Candidatures à évaluer (filtrées, triées ou non)
+        chunk_size (int): Nombre de candidatures par tranche
+        policy (ScoringPolicy): Politique à appliquer (la politique active par défaut)
+        progress (callable): Appelé avec le nombre de candidatures évaluées après chaque tranche
+
+    Returns:
+        int: Nombre de candidatures évaluées
+    """
+    policy = policy or ScoringPolicy.get_active()
+    selection = evaluable_applications().filter(pk__in=queryset.values('pk')).order_by('pk')
+    scored, last_id = 0, 0
+    while True:
+        ids = list(selection.filter(pk__gt=last_id).values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return scored
+        scored += write_results(_score(ScholarshipApplication.objects.filter(pk__in=ids), policy))
+        last_id = ids[-1]
+        if progress:
+            progress(scored)
@@ -1,19 +1,65 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
-from .models import ScholarshipType, ScholarshipApplication, ApplicationComment
+from .models import (
+    ScholarshipType, ScholarshipApplication, ApplicationComment, ScoringPolicy, Cycle, ArchivedApplication
+)
+from .recommendations import choose_language, render_application
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+# Nombre de commentaires embarqués dans le détail d'une candidature ;
+# le fil complet est disponible via l'action paginée `comments`.
+LATEST_COMMENTS_LIMIT = 10
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name']
 
+class CycleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Cycle
+        fields = '__all__'
+        read_only_fields = ['archived_at', 'created_at']
+
+class ArchivedApplicationSerializer(serializers.ModelSerializer):
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    cycle_name = serializers.CharField(source='cycle.name', read_only=True)
+
+    class Meta:
+        model = ArchivedApplication
+        fields = [
+            'id', 'original_id', 'cycle', 'cycle_name', 'user', 'scholarship_type', 'full_name', 'email',
+            'status', 'status_display', 'ai_score', 'created_at', 'archived_at', 'data', 'comments',
+            'status_history'
+        ]
+        read_only_fields = fields
+
 class ScholarshipTypeSerializer(serializers.ModelSerializer):
     class Meta:
         model = ScholarshipType
         fields = '__all__'
 
+class ScoringPolicySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ScoringPolicy
+        fields = '__all__'
+        read_only_fields = ['is_active', 'created_at', 'updated_at']
+
+    def validate(self, data):
+        policy = ScoringPolicy(**{**self._current_values(), **data})
+        try:
+            policy.clean()
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError(exc.messages)
+        return data
+
+    def _current_values(self):
+        if self.instance is None:
+            return {}
+        return {field: getattr(self.instance, field) for field in self.Meta.model.SCORING_FIELDS}
+
 class ApplicationCommentSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     user_name = serializers.SerializerMethodField()
@@ -36,13 +82,27 @@ class ScholarshipApplicationListSerializer(serializers.ModelSerializer):
         model = ScholarshipApplication
         fields = [
             'id', 'user', 'full_name', 'email', 'scholarship_type', 'scholarship_type_name',
-            'current_institution', 'current_year', 'status', 'created_at', 'updated_at',
-            'ai_score'
+            'current_institution', 'current_year', 'status', 'status_display', 'created_at', 'updated_at',
+            'ai_score', 'comment_count', 'last_commented_at', 'claimed_by', 'claimed_until'
         ]
 
     def get_scholarship_type_name(self, obj):
         return obj.scholarship_type.name
 
+class DashboardApplicationSerializer(serializers.ModelSerializer):
+    """Candidature telle qu'affichée sur le tableau de bord du candidat"""
+    scholarship_type = ScholarshipTypeSerializer(read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    # Derniers commentaires, préchargés par dashboard.build_dashboard
+    recent_comments = ApplicationCommentSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = ScholarshipApplication
+        fields = [
+            'id', 'full_name', 'scholarship_type', 'status', 'status_display', 'status_changed_at', 'ai_score',
+            'comment_count', 'last_commented_at', 'recent_comments', 'created_at', 'updated_at',
+        ]
+
 class ScholarshipApplicationDetailSerializer(serializers.ModelSerializer):
     scholarship_type = ScholarshipTypeSerializer(read_only=True)
     scholarship_type_id = serializers.PrimaryKeyRelatedField(
@@ -52,15 +112,20 @@ class ScholarshipApplicationDetailSerializer(serializers.ModelSerializer):
     )
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     user = UserSerializer(read_only=True)
-    comments = ApplicationCommentSerializer(many=True, read_only=True)
+    comments = serializers.SerializerMethodField()
     bac_mention_display = serializers.CharField(source='get_bac_mention_display', read_only=True)
     gender_display = serializers.CharField(source='get_gender_display', read_only=True)
     scholarship_type_name = serializers.SerializerMethodField()
+    # Rendu à partir des codes, dans la langue demandée (`?lang=` ou Accept-Language)
+    ai_recommendations = serializers.SerializerMethodField()
 
     class Meta:
         model = ScholarshipApplication
         fields = '__all__'
-        read_only_fields = ['user', 'score', 'recommendations', 'admin_notes']
+        read_only_fields = ['user', 'score', 'recommendations', 'admin_notes',
+                            'comment_count', 'last_commented_at', 'ai_letter_similarity', 'ai_similar_letter',
+                            'ai_recommendation_band', 'ai_recommendation_flags', 'ai_recommendation_version',
+                            'claimed_by', 'claimed_until']
         extra_kwargs = {
             'cv': {'required': True},
             'transcripts': {'required': True},
@@ -84,3 +149,16 @@ class ScholarshipApplicationDetailSerializer(serializers.ModelSerializer):
 
     def get_scholarship_type_name(self, obj):
         return obj.scholarship_type.name
+
+    def get_ai_recommendations(self, obj):
+        request = self.context.get('request')
+        language = None
+        if request is not None:
+            language = choose_language(
+                request.query_params.get('lang'), request.headers.get('Accept-Language', '')
+            )
+        return render_application(obj, language)
+
+    def get_comments(self, obj):
+        comments = obj.comments.select_related('user')[:LATEST_COMMENTS_LIMIT]
+        return ApplicationCommentSerializer(comments, many=True).data
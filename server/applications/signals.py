@@ -0,0 +1,76 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .dashboard import invalidate_dashboard
+from .documents import DOCUMENT_FIELDS, register_documents
+from .duplicates import record_duplicates, refresh_blocking_keys
+from .models import ApplicationComment, Cycle, ScholarshipApplication, ScholarshipType
+
+IDENTITY_FIELDS = {'full_name', 'date_of_birth', 'phone', 'email'}
+
+
+@receiver(post_save, sender=ScholarshipApplication)
+def update_blocking_keys(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """Maintient les clés de regroupement et signale les doublons à l'enregistrement"""
+    if raw or (update_fields is not None and not IDENTITY_FIELDS & set(update_fields)):
+        return
+    # Après le commit : la recherche ne rallonge pas la transaction du dépôt et ne
+    # compare que des candidatures validées. En cas d'échec, `detect_duplicates`
+    # (recherche complète) rattrape la candidature.
+    transaction.on_commit(lambda: _update_duplicates(instance.pk), robust=True)
+
+
+def _update_duplicates(application_id):
+    # La candidature a pu être supprimée ou modifiée depuis l'enregistrement
+    application = ScholarshipApplication.objects.filter(pk=application_id).first()
+    if application is not None and refresh_blocking_keys(application):
+        record_duplicates(application)
+
+
+@receiver(post_save, sender=ScholarshipApplication)
+def update_letter_signature(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """Tient à jour l'index LSH lorsque la lettre de motivation change"""
+    if raw or (update_fields is not None and 'motivation_letter' not in update_fields):
+        return
+    # Import au premier enregistrement : l'index charge numpy, inutile au démarrage
+    from .plagiarism import index_letter
+    index_letter(instance)
+
+
+@receiver(post_save, sender=ScholarshipApplication)
+def update_documents(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """Enregistre les pièces jointes déposées ; leur texte est extrait par `extract_documents`"""
+    if raw or (update_fields is not None and not set(DOCUMENT_FIELDS) & set(update_fields)):
+        return
+    register_documents(instance)
+
+
+@receiver(post_save, sender=ScholarshipApplication)
+@receiver(post_delete, sender=ScholarshipApplication)
+def invalidate_owner_dashboard(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_dashboard(instance.user_id)
+
+
+@receiver(post_save, sender=ApplicationComment)
+@receiver(post_delete, sender=ApplicationComment)
+def invalidate_commented_dashboard(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # La candidature a pu être supprimée avec ses commentaires : son propre signal suffit alors
+    owner_id = ScholarshipApplication.objects.filter(pk=instance.application_id).values_list(
+        'user_id', flat=True
+    ).first()
+    if owner_id is not None:
+        invalidate_dashboard(owner_id)
+
+
+@receiver(post_save, sender=ScholarshipType)
+@receiver(post_delete, sender=ScholarshipType)
+@receiver(post_save, sender=Cycle)
+@receiver(post_delete, sender=Cycle)
+def invalidate_all_dashboards(sender, raw=False, **kwargs):
+    """Les bourses proposées figurent sur tous les tableaux de bord"""
+    if not raw:
+        invalidate_dashboard()
@@ -0,0 +1,207 @@
+"""
+Simulation de politiques d'évaluation sur l'ensemble des candidatures.
+
+Les colonnes utiles au barème sont chargées une seule fois dans des tableaux
+numpy, puis chaque politique est appliquée de façon vectorisée, sans rien
+écrire en base. Le score de motivation contient une part d'analyse de contenu
+qui ne dépend pas de la politique : le score enregistré est réutilisé tel quel.
+"""
+import numpy as np
+
+from .recommendations import RECOMMENDATION_BANDS
+from .models import ScoringPolicy
+from .snapshot import get_snapshot
+
+MENTION_POINTS = {
+    'tres_bien': 40,
+    'bien': 30,
+    'assez_bien': 20,
+    'passable': 10,
+}
+
+PERCENTILES = (10, 25, 50, 75, 90)
+
+
+class ScoringColumns:
+    """Colonnes du barème pour les candidatures déjà évaluées"""
+
+    fields = (
+        'id', 'average_grade', 'baccalaureate_mention', 'family_income',
+        'number_of_dependents', 'has_disability', 'ai_motivation_score',
+    )
+
+    def __init__(self, ids, average_grade, mention_points, family_income,
+                 number_of_dependents, has_disability, motivation_score):
+        self.ids = ids
+        self.average_grade = average_grade
+        self.mention_points = mention_points
+        self.family_income = family_income
+        self.number_of_dependents = number_of_dependents
+        self.has_disability = has_disability
+        self.motivation_score = motivation_score
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Colonnes extraites de l'instantané en colonnes, sans requête"""
+        from .snapshot import MENTIONS
+        data = snapshot.data[~np.isnan(snapshot['ai_motivation_score'])]
+        # Le code -1 (mention absente) désigne le dernier élément : 0 point
+        mention_points = np.array([MENTION_POINTS.get(mention, 0) for mention in MENTIONS] + [0], dtype=np.float64)
+        return cls(
+            ids=data['id'].astype(np.int64),
+            average_grade=np.nan_to_num(data['average_grade']),
+            mention_points=mention_points[data['baccalaureate_mention']],
+            family_income=np.nan_to_num(data['family_income']),
+            number_of_dependents=np.maximum(data['number_of_dependents'], 0).astype(np.int64),
+            has_disability=data['has_disability'].astype(bool),
+            motivation_score=data['ai_motivation_score'].astype(np.float64),
+        )
+
+
+def academic_scores(columns):
+    """Vectorisation de AIEvaluator._evaluate_academic"""
+    return columns.average_grade / 20 * 60 + columns.mention_points
+
+
+def socioeconomic_scores(columns, policy):
+    """Vectorisation de AIEvaluator._evaluate_socioeconomic"""
+    income = columns.family_income
+    low = float(policy.low_income_threshold)
+    medium = float(policy.medium_income_threshold)
+    high = float(policy.high_income_threshold)
+
+    income_points = np.select(
+        [income <= low, income <= medium, income <= high],
+        [
+            np.full_like(income, 50),
+            50 - (income - low) / (medium - low) * 25,
+            25 - (income - medium) / (high - medium) * 15,
+        ],
+        default=10,
+    )
+    # Comme l'évaluateur, un revenu absent ou nul ne rapporte aucun point
+    score = np.where(income > 0, income_points, 0)
+
+    dependents = columns.number_of_dependents
+    assigned = np.zeros(len(dependents), dtype=bool)
+    for minimum, points in policy.get_dependents_brackets():
+        matched = (dependents >= minimum) & ~assigned
+        score = score + np.where(matched, points, 0)
+        assigned |= matched
+
+    score = score + np.where(columns.has_disability, policy.disability_bonus, 0)
+    return np.minimum(score, 100)
+
+
+def total_scores(columns, policy):
+    """Score global pondéré, arrondi comme dans l'évaluateur"""
+    total = (
+        academic_scores(columns) * float(policy.academic_weight) +
+        socioeconomic_scores(columns, policy) * float(policy.socioeconomic_weight) +
+        columns.motivation_score * float(policy.motivation_weight)
+    )
+    return np.round(total, 2)
+
+
+def band_indexes(scores):
+    """Indice de bande de recommandation (0 = la meilleure) pour chaque score"""
+    thresholds = np.array([threshold for threshold, _ in RECOMMENDATION_BANDS[:-1]][::-1])
+    return len(thresholds) - np.searchsorted(thresholds, scores, side='right')
+
+
+def ranks(scores):
+    """Rang de chaque candidature (0 = meilleur score), stable sur l'ordre des ids"""
+    order = np.argsort(-scores, kind='stable')
+    result = np.empty(len(scores), dtype=np.int64)
+    result[order] = np.arange(len(scores))
+    return result
+
+
+def describe(scores):
+    """Statistiques de distribution d'un vecteur de scores"""
+    if not len(scores):
+        return {'mean': None, 'std': None, 'min': None, 'max': None, 'percentiles': {}, 'histogram': []}
+    histogram, _ = np.histogram(scores, bins=10, range=(0, 100))
+    return {
+        'mean': round(float(scores.mean()), 2),
+        'std': round(float(scores.std()), 2),
+        'min': round(float(scores.min()), 2),
+        'max': round(float(scores.max()), 2),
+        'percentiles': {
+            f'p{p}': round(float(value), 2)
+            for p, value in zip(PERCENTILES, np.percentile(scores, PERCENTILES))
+        },
+        'histogram': histogram.tolist(),
+    }
+
+
+def simulate_policy(candidate, baseline=None, columns=None, top_k=100):
+    """
+    Compare une politique candidate à une politique de référence (la politique
+    active par défaut) sur toutes les candidatures évaluées.
+
+    Args:
+        candidate (ScoringPolicy): Politique à simuler, enregistrée ou non
+        baseline (ScoringPolicy): Politique de référence
+        columns (ScoringColumns): Colonnes déjà chargées, pour enchaîner les simulations
+        top_k (int): Taille du classement de tête dont on mesure le recouvrement
+
+    Returns:
+        dict: Distributions, changements de rang et transitions de bandes
+    """
+    baseline = baseline or ScoringPolicy.get_active()
+    if columns is None:
+        columns = ScoringColumns.from_snapshot(get_snapshot())
+
+    before = total_scores(columns, baseline)
+    after = total_scores(columns, candidate)
+    count = len(columns)
+    band_names = [band for _, band in RECOMMENDATION_BANDS]
+
+    report = {
+        'count': count,
+        'baseline': describe(before),
+        'candidate': describe(after),
+        'score_shift': {},
+        'rank_changes': {},
+        'band_transitions': {band: {other: 0 for other in band_names} for band in band_names},
+    }
+    if not count:
+        return report
+
+    delta = after - before
+    report['score_shift'] = {
+        'mean': round(float(delta.mean()), 2),
+        'mean_absolute': round(float(np.abs(delta).mean()), 2),
+        'max_increase': round(float(delta.max()), 2),
+        'max_decrease': round(float(delta.min()), 2),
+        'increased': int((delta > 0).sum()),
+        'decreased': int((delta < 0).sum()),
+    }
+
+    rank_before, rank_after = ranks(before), ranks(after)
+    rank_delta = np.abs(rank_after - rank_before)
+    k = min(top_k, count)
+    top_before = set(columns.ids[rank_before < k].tolist())
+    top_after = set(columns.ids[rank_after < k].tolist())
+    report['rank_changes'] = {
+        'changed': int((rank_delta > 0).sum()),
+        'mean_absolute': round(float(rank_delta.mean()), 2),
+        'max_absolute': int(rank_delta.max()),
+        'spearman': round(float(np.corrcoef(rank_before, rank_after)[0, 1]), 4) if count > 1 else 1.0,
+        'top_k': k,
+        'top_k_overlap': len(top_before & top_after),
+    }
+
+    bands = len(band_names)
+    transitions = np.bincount(
+        band_indexes(before) * bands + band_indexes(after), minlength=bands * bands
+    ).reshape(bands, bands)
+    report['band_transitions'] = {
+        band: {other: int(transitions[i, j]) for j, other in enumerate(band_names)}
+        for i, band in enumerate(band_names)
+    }
+    return report
@@ -0,0 +1,264 @@
+"""
+Instantané en colonnes des champs numériques et catégoriels des candidatures.
+
+Les champs utiles aux statistiques, classements, simulations et allocations
+sont chargés une fois par processus dans un tableau numpy structuré (environ
+100 octets par candidature, sans les textes). L'instantané est ensuite tenu à
+jour en ne relisant que les lignes dont `updated_at` a avancé.
+
+Avec `APPLICATION_SNAPSHOT_PATH`, l'instantané est aussi enregistré dans un
+fichier `.npy` ouvert en mémoire partagée (`mmap`) : les autres processus
+rechargent le fichier lorsqu'il a changé au lieu d'interroger la base.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+
+from .models import ScholarshipApplication
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+STATUSES = [code for code, _ in ScholarshipApplication.STATUS_CHOICES]
+MENTIONS = [code for code, _ in ScholarshipApplication.BACCALAUREATE_CHOICES]
+GENDERS = [code for code, _ in ScholarshipApplication.GENDER_CHOICES]
+
+# Les valeurs absentes sont NaN pour les décimaux et -1 pour les codes
+DTYPE = np.dtype([
+    ('id', 'i8'),
+    ('scholarship_type_id', 'i8'),
+    ('status', 'i1'),
+    ('average_grade', 'f8'),
+    ('baccalaureate_mention', 'i1'),
+    ('family_income', 'f8'),
+    ('number_of_dependents', 'i4'),
+    ('has_disability', '?'),
+    ('gender', 'i1'),
+    ('ai_score', 'f8'),
+    ('ai_academic_score', 'f8'),
+    ('ai_socioeconomic_score', 'f8'),
+    ('ai_motivation_score', 'f8'),
+    # Microsecondes depuis l'epoch (UTC)
+    ('created_at', 'i8'),
+    ('updated_at', 'i8'),
+])
+
+FIELDS = DTYPE.names
+
+# Une transaction peut être validée après le dernier rafraîchissement avec un
+# updated_at antérieur : les lignes de cette marge sont relues à chaque fois
+REFRESH_MARGIN = timedelta(seconds=5)
+
+_STATUS_CODES = {code: index for index, code in enumerate(STATUSES)}
+_MENTION_CODES = {code: index for index, code in enumerate(MENTIONS)}
+_GENDER_CODES = {code: index for index, code in enumerate(GENDERS)}
+
+
+def to_timestamp(value):
+    return (value - EPOCH) // MICROSECOND if value else 0
+
+
+def _number(value):
+    return float(value) if value is not None else np.nan
+
+
+def _record(row):
+    (app_id, type_id, status, grade, mention, income, dependents, disability, gender,
+     score, academic, socioeconomic, motivation, created_at, updated_at) = row
+    return (
+        app_id, type_id, _STATUS_CODES.get(status, -1), _number(grade), _MENTION_CODES.get(mention, -1),
+        _number(income), dependents if dependents is not None else -1, disability, _GENDER_CODES.get(gender, -1),
+        _number(score), _number(academic), _number(socioeconomic), _number(motivation),
+        to_timestamp(created_at), to_timestamp(updated_at),
+    )
+
+
+def _as_bytes(records):
+    return np.ascontiguousarray(records).view(np.dtype((np.void, DTYPE.itemsize)))
+
+
+def _read(queryset, chunk_size=5000):
+    rows = queryset.order_by('id').values_list(*FIELDS).iterator(chunk_size=chunk_size)
+    return np.fromiter((_record(row) for row in rows), dtype=DTYPE)
+
+
+class ApplicationSnapshot:
+    """Tableau structuré des candidatures, trié par identifiant"""
+
+    def __init__(self, data, source_mtime=None):
+        self.data = data
+        self.source_mtime = source_mtime
+        self.watermark = int(data['updated_at'].max()) if len(data) else 0
+        self.checked_at = time.monotonic()
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, field):
+        return self.data[field]
+
+    @classmethod
+    def build(cls):
+        return cls(_read(ScholarshipApplication.objects.all()))
+
+    @classmethod
+    def load(cls, path):
+        """Ouvre un instantané enregistré, en lecture seule et sans le copier"""
+        return cls(np.load(path, mmap_mode='r'), source_mtime=os.stat(path).st_mtime)
+
+    def save(self, path):
+        # Écriture dans un fichier temporaire puis remplacement atomique :
+        # les processus ayant ouvert l'ancien fichier continuent de le lire
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, 'wb') as snapshot_file:
+            np.save(snapshot_file, np.ascontiguousarray(self.data))
+        os.replace(temporary, path)
+        self.source_mtime = os.stat(path).st_mtime
+
+    def refresh(self):
+        """
+        Applique les modifications survenues depuis le dernier chargement.
+
+        Returns:
+            int: Nombre de lignes ajoutées, modifiées ou supprimées
+        """
+        since = EPOCH + self.watermark * MICROSECOND - REFRESH_MARGIN
+        changed = _read(ScholarshipApplication.objects.filter(updated_at__gte=since))
+        data = self.data
+        changes = 0
+
+        if len(changed):
+            self.watermark = max(self.watermark, int(changed['updated_at'].max()))
+            positions = np.searchsorted(data['id'], changed['id'])
+            found = positions < len(data)
+            found[found] = data['id'][positions[found]] == changed['id'][found]
+            # Les lignes relues dans la marge sont souvent identiques : comparaison octet à octet
+            modified = ~found
+            modified[found] = _as_bytes(data[positions[found]]) != _as_bytes(changed[found])
+            changed, positions, found = changed[modified], positions[modified], found[modified]
+
+        if len(changed):
+            # Un instantané ouvert en mmap est en lecture seule : copie avant modification
+            data = np.array(data)
+            data[positions[found]] = changed[found]
+            if not found.all():
+                data = np.concatenate([data, changed[~found]])
+                data = data[np.argsort(data['id'], kind='stable')]
+            changes += len(changed)
+
+        # Les suppressions ne modifient pas updated_at : elles se voient au nombre de lignes
+        if ScholarshipApplication.objects.count() != len(data):
+            ids = np.fromiter(ScholarshipApplication.objects.values_list('id', flat=True), dtype=np.int64)
+            kept = np.isin(data['id'], ids)
+            changes += int((~kept).sum())
+            data = data[kept]
+
+        self.data = data
+        self.checked_at = time.monotonic()
+        return changes
+
+    def status_mask(self, *statuses):
+        return np.isin(self.data['status'], [_STATUS_CODES[status] for status in statuses])
+
+    def decode(self, field, codes):
+        """Codes d'une colonne catégorielle vers leurs valeurs ('' pour une valeur absente)"""
+        choices = {'status': STATUSES, 'baccalaureate_mention': MENTIONS, 'gender': GENDERS}[field]
+        return np.array(choices + [''], dtype=object)[codes]
+
+
+_snapshot = None
+_lock = threading.Lock()
+
+
+def get_snapshot(max_age=None):
+    """
+    Instantané du processus, rafraîchi s'il a été vérifié il y a plus de
+    max_age secondes (APPLICATION_SNAPSHOT_MAX_AGE par défaut).
+    """
+    global _snapshot
+    if max_age is None:
+        max_age = settings.APPLICATION_SNAPSHOT_MAX_AGE
+    path = settings.APPLICATION_SNAPSHOT_PATH
+
+    with _lock:
+        if _snapshot is not None and time.monotonic() - _snapshot.checked_at < max_age:
+            return _snapshot
+
+        file_mtime = os.stat(path).st_mtime if path and os.path.exists(path) else None
+        if file_mtime is not None and (_snapshot is None or file_mtime != _snapshot.source_mtime):
+            _snapshot = ApplicationSnapshot.load(path)
+        elif _snapshot is None:
+            _snapshot = ApplicationSnapshot.build()
+            if path:
+                _snapshot.save(path)
+            return _snapshot
+
+        if _snapshot.refresh() and path:
+            _snapshot.save(path)
+        return _snapshot
+
+
+def clear_snapshot():
+    global _snapshot
+    with _lock:
+        _snapshot = None
+
+
+def _describe(values):
+    from .simulation import describe
+    return describe(values[~np.isnan(values)])
+
+
+def _mean(values):
+    values = values[~np.isnan(values)]
+    return round(float(values.mean()), 2) if len(values) else None
+
+
+def application_statistics(snapshot, scholarship_type_names=None):
+    """Statistiques globales des candidatures calculées sur l'instantané"""
+    data = snapshot.data
+    statuses = data['status']
+
+    by_status = np.bincount(statuses[statuses >= 0], minlength=len(STATUSES))
+    genders = data['gender']
+    by_gender = np.bincount(genders + 1, minlength=len(GENDERS) + 1)
+
+    type_ids, type_index = np.unique(data['scholarship_type_id'], return_inverse=True)
+    accepted = statuses == _STATUS_CODES['accepted']
+    scores = data['ai_score']
+    by_type = []
+    for position, type_id in enumerate(type_ids.tolist()):
+        in_type = type_index == position
+        by_type.append({
+            'scholarship_type': type_id,
+            'name': (scholarship_type_names or {}).get(type_id),
+            'count': int(in_type.sum()),
+            'accepted': int((in_type & accepted).sum()),
+            'mean_ai_score': _mean(scores[in_type]),
+        })
+
+    months, month_counts = np.unique(
+        data['created_at'].astype('datetime64[us]').astype('datetime64[M]'), return_counts=True
+    )
+
+    return {
+        'total': len(data),
+        'evaluated': int((~np.isnan(scores)).sum()),
+        'by_status': {status: int(count) for status, count in zip(STATUSES, by_status)},
+        'by_gender': {
+            (GENDERS[index - 1] if index else 'unknown'): int(count) for index, count in enumerate(by_gender)
+        },
+        'by_scholarship_type': by_type,
+        'ai_score': _describe(scores),
+        'average_grade': _mean(data['average_grade']),
+        'median_family_income': (
+            round(float(np.nanmedian(data['family_income'])), 2)
+            if (~np.isnan(data['family_income'])).any() else None
+        ),
+        'with_disability': int(data['has_disability'].sum()),
+        'submissions_by_month': {str(month): int(count) for month, count in zip(months, month_counts)},
+    }
@@ -0,0 +1,378 @@
+"""
+Mode « afflux » des dépôts de candidatures (jour de clôture).
+
+Avec SUBMISSION_SURGE_MODE, `POST /api/applications/` valide la candidature,
+enregistre ses fichiers, l'ajoute à un journal local en ajout seul puis
+répond immédiatement (202) avec un identifiant de suivi : la requête n'écrit
+rien en base. La commande `ingest_submissions` vide ensuite le journal dans
+la base par lots, chaque lot étant inséré et évalué dans une seule
+transaction.
+
+Garanties :
+- pas de perte : une ligne est écrite et synchronisée sur disque (fsync)
+  avant la réponse ; la position de lecture n'avance qu'après le commit du
+  lot correspondant ;
+- pas de doublon : l'identifiant de suivi est unique en base
+  (`submission_id`) ; un lot rejoué après un arrêt brutal ignore les
+  candidatures déjà insérées ;
+- seul un dépôt dont les données sont invalides (DATA_ERRORS) est mis de
+  côté dans `rejected.log` ; une erreur de la base (verrou SQLite, connexion
+  perdue...) interrompt le passage sans avancer la position, et le passage
+  suivant reprend les mêmes dépôts.
+
+Le journal est découpé en segments numérotés (`submissions-00000001.log`).
+Les dépôts s'ajoutent au dernier segment ; l'ingesteur ouvre un nouveau
+segment lorsque le sien dépasse SUBMISSION_LOG_SEGMENT_SIZE, puis supprime
+l'ancien une fois entièrement ingéré. Les écritures concurrentes (plusieurs
+processus du serveur) sont sérialisées par un verrou `flock` sur le segment.
+"""
+import json
+import logging
+import os
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DataError, IntegrityError, models, transaction
+
+from .models import ScholarshipApplication
+
+try:
+    import fcntl
+except ImportError:  # Windows : le mode afflux n'est pas disponible
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = 'submissions-'
+SEGMENT_SUFFIX = '.log'
+STATE_FILE = 'state.json'
+INGESTER_LOCK = 'ingester.lock'
+REJECTED_FILE = 'rejected.log'
+
+# Erreurs propres aux données d'un dépôt : le rejouer échouerait de la même façon
+DATA_ERRORS = (ValidationError, IntegrityError, DataError, ValueError, KeyError, TypeError)
+
+
+def surge_mode_enabled():
+    return settings.SUBMISSION_SURGE_MODE
+
+
+def _fsync_directory(directory):
+    # Rend durables les créations, renommages et suppressions de fichiers
+    descriptor = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+class SubmissionLog:
+    """Journal des dépôts, en segments JSON Lines"""
+
+    def __init__(self, directory=None):
+        if fcntl is None:
+            raise ImproperlyConfigured("Le mode afflux nécessite un système POSIX (module fcntl)")
+        self.directory = Path(directory or settings.SUBMISSION_LOG_DIR)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path(self, segment):
+        return self.directory / f"{SEGMENT_PREFIX}{segment:08d}{SEGMENT_SUFFIX}"
+
+    def segments(self):
+        """Numéros des segments existants, par ordre croissant"""
+        numbers = []
+        for path in self.directory.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}"):
+            try:
+                numbers.append(int(path.name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+            except ValueError:
+                continue
+        return sorted(numbers)
+
+    def create_segment(self, segment):
+        try:
+            os.close(os.open(self.path(segment), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600))
+            _fsync_directory(self.directory)
+        except FileExistsError:
+            pass
+
+    def append(self, record):
+        """
+        Ajoute un enregistrement au dernier segment et le synchronise sur disque.
+
+        Returns:
+            int: Numéro du segment
+        """
+        line = (json.dumps(record, cls=DjangoJSONEncoder, separators=(',', ':')) + '\n').encode()
+        while True:
+            segments = self.segments()
+            if not segments:
+                self.create_segment(1)
+                continue
+            segment = segments[-1]
+            try:
+                # Sans O_CREAT : un segment supprimé par l'ingesteur n'est jamais recréé
+                descriptor = os.open(self.path(segment), os.O_RDWR | os.O_APPEND)
+            except FileNotFoundError:
+                continue
+            try:
+                fcntl.flock(descriptor, fcntl.LOCK_EX)
+                # L'ingesteur a pu ouvrir un segment suivant pendant l'attente du verrou
+                if self.segments()[-1] != segment:
+                    continue
+                # Une ligne tronquée par un arrêt brutal est terminée avant d'écrire la suivante
+                size = os.fstat(descriptor).st_size
+                torn = size and os.pread(descriptor, 1, size - 1) != b'\n'
+                os.write(descriptor, b'\n' + line if torn else line)
+                os.fsync(descriptor)
+                return segment
+            finally:
+                os.close(descriptor)
+
+    def wait_for_writers(self, segment):
+        """Attend la fin des ajouts en cours sur un segment"""
+        try:
+            with open(self.path(segment), 'rb') as log_file:
+                fcntl.flock(log_file, fcntl.LOCK_EX)
+        except FileNotFoundError:
+            pass
+
+    def read(self, segment, offset):
+        """
+        Enregistrements complets à partir de `offset`.
+
+        Yields:
+            tuple: (enregistrement, position après l'enregistrement)
+        """
+        try:
+            log_file = open(self.path(segment), 'rb')
+        except FileNotFoundError:
+            return
+        with log_file:
+            log_file.seek(offset)
+            for line in log_file:
+                if not line.endswith(b'\n'):
+                    # Ajout en cours d'écriture : relu au prochain passage
+                    return
+                offset += len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Ligne tronquée par un arrêt brutal : jamais confirmée au client
+                    logger.warning("Ligne illisible ignorée dans %s", self.path(segment))
+                    continue
+                if record:
+                    yield record, offset
+
+    def size(self, segment):
+        try:
+            return self.path(segment).stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def remove(self, segment):
+        try:
+            self.path(segment).unlink()
+            _fsync_directory(self.directory)
+        except FileNotFoundError:
+            pass
+
+    def load_state(self):
+        """Position de l'ingesteur : (segment, offset)"""
+        try:
+            with open(self.directory / STATE_FILE) as state_file:
+                state = json.load(state_file)
+            return state['segment'], state['offset']
+        except FileNotFoundError:
+            segments = self.segments()
+            return (segments[0] if segments else 1), 0
+
+    def save_state(self, segment, offset):
+        temporary = self.directory / f"{STATE_FILE}.tmp"
+        with open(temporary, 'w') as state_file:
+            json.dump({'segment': segment, 'offset': offset}, state_file)
+            state_file.flush()
+            os.fsync(state_file.fileno())
+        os.replace(temporary, self.directory / STATE_FILE)
+        _fsync_directory(self.directory)
+
+    def reject(self, record, error=''):
+        """Conserve un dépôt impossible à ingérer dans `rejected.log`, avec le motif"""
+        with open(self.directory / REJECTED_FILE, 'a') as rejected_file:
+            rejected_file.write(json.dumps({**record, 'error': error}, separators=(',', ':')) + '\n')
+            rejected_file.flush()
+            os.fsync(rejected_file.fileno())
+
+    def rejection(self, submission_id):
+        """Motif du rejet d'un dépôt, ou None s'il n'a pas été rejeté"""
+        marker = f'"id":"{submission_id}"'
+        try:
+            with open(self.directory / REJECTED_FILE) as rejected_file:
+                for line in rejected_file:
+                    if marker in line:
+                        return json.loads(line).get('error', '')
+        except FileNotFoundError:
+            pass
+        return None
+
+    def pending_bytes(self):
+        segment, offset = self.load_state()
+        return sum(self.size(number) for number in self.segments() if number >= segment) - offset
+
+
+def _store_files(validated_data):
+    """Enregistre les fichiers déposés et remplace chacun par son nom de stockage"""
+    stored = {}
+    for name, value in validated_data.items():
+        if isinstance(value, UploadedFile):
+            field = ScholarshipApplication._meta.get_field(name)
+            stored[name] = field.storage.save(field.generate_filename(None, value.name), value)
+    return stored
+
+
+def enqueue_submission(validated_data, user, log=None):
+    """
+    Ajoute une candidature validée au journal.
+
+    Returns:
+        str: Identifiant de suivi
+    """
+    fields = {}
+    for name, value in validated_data.items():
+        if isinstance(value, models.Model):
+            fields[ScholarshipApplication._meta.get_field(name).attname] = value.pk
+        elif not isinstance(value, UploadedFile):
+            fields[name] = value
+    fields.update(_store_files(validated_data))
+
+    submission_id = uuid.uuid4().hex
+    (log or SubmissionLog()).append({'id': submission_id, 'user_id': user.pk, 'fields': fields})
+    return submission_id
+
+
+def _build_application(record):
+    application = ScholarshipApplication(submission_id=uuid.UUID(record['id']), user_id=record['user_id'])
+    for attname, value in record['fields'].items():
+        field = ScholarshipApplication._meta.get_field(attname)
+        setattr(application, field.attname, value if isinstance(field, models.FileField) else field.to_python(value))
+    return application
+
+
+def ingest_batch(records, policy=None):
+    """
+    Insère et évalue un lot d'enregistrements en une transaction.
+
+    Returns:
+        int: Nombre de candidatures insérées (les doublons sont ignorés)
+    """
+    from .ai_evaluation import AIEvaluator
+    from .events import record_event
+    from .models import ScoringPolicy
+    from .rescoring import write_results
+
+    submission_ids = [uuid.UUID(record['id']) for record in records]
+    existing = set(
+        ScholarshipApplication.objects.filter(submission_id__in=submission_ids).values_list('submission_id', flat=True)
+    )
+    policy = policy or ScoringPolicy.get_active()
+    with transaction.atomic():
+        created = []
+        for record, submission_id in zip(records, submission_ids):
+            if submission_id in existing:
+                continue
+            existing.add(submission_id)
+            application = _build_application(record)
+            # Enregistrement individuel : les signaux (doublons, index des lettres) sont déclenchés
+            application.save()
+            created.append(application)
+
+        # Évaluation du lot, écrite en une seule requête groupée
+        results = []
+        for application in created:
+            if not application.average_grade or not application.motivation_letter:
+                continue
+            evaluator = AIEvaluator(application, policy=policy, update_letter_index=False)
+            total, recommendations, academic, socioeconomic, motivation = evaluator.evaluate()
+            similar_id, similarity = evaluator.similar_letter or (None, None)
+            results.append((application.id, total, recommendations, academic, socioeconomic, motivation,
+                            similar_id, similarity))
+            record_event(application, 'evaluated', ai_score=total)
+        write_results(results)
+    return len(created)
+
+
+def _ingest_or_reject(log, batch, policy):
+    # Les autres erreurs (base verrouillée...) remontent : la position n'avance pas
+    try:
+        return ingest_batch(batch, policy)
+    except DATA_ERRORS as exc:
+        if len(batch) == 1:
+            # Dépôt impossible à insérer (type de bourse supprimé...) : mis de côté, pas perdu
+            logger.exception("Dépôt %s rejeté", batch[0]['id'])
+            log.reject(batch[0], f"{type(exc).__name__}: {exc}")
+            return 0
+    # Un dépôt invalide ne doit pas bloquer les autres : le lot est repris un par un
+    return sum(_ingest_or_reject(log, [record], policy) for record in batch)
+
+
+def _drain(log, segment, offset, batch_size, policy):
+    """Ingère un segment à partir de `offset` ; retourne (nouvel offset, candidatures insérées)"""
+    ingested = 0
+    batch, end = [], offset
+    for record, end in log.read(segment, offset):
+        batch.append(record)
+        if len(batch) >= batch_size:
+            ingested += _ingest_or_reject(log, batch, policy)
+            # La position n'avance qu'après le commit du lot
+            log.save_state(segment, end)
+            offset, batch = end, []
+    if batch:
+        ingested += _ingest_or_reject(log, batch, policy)
+        log.save_state(segment, end)
+        offset = end
+    return offset, ingested
+
+
+def ingest(log=None, batch_size=None, segment_size=None):
+    """
+    Vide le journal dans la base.
+
+    Returns:
+        int: Nombre de candidatures insérées
+    """
+    from .models import ScoringPolicy
+
+    log = log or SubmissionLog()
+    batch_size = batch_size or settings.SUBMISSION_INGEST_BATCH_SIZE
+    segment_size = segment_size or settings.SUBMISSION_LOG_SEGMENT_SIZE
+    policy = ScoringPolicy.get_active()
+
+    # Un seul ingesteur à la fois
+    with open(log.directory / INGESTER_LOCK, 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        total = 0
+        while True:
+            segment, offset = log.load_state()
+            # Segments déjà ingérés dont la suppression a été interrompue
+            for number in log.segments():
+                if number < segment:
+                    log.remove(number)
+            offset, ingested = _drain(log, segment, offset, batch_size, policy)
+            total += ingested
+
+            later = [number for number in log.segments() if number > segment]
+            if not later:
+                if log.size(segment) < segment_size:
+                    return total
+                log.create_segment(segment + 1)
+                later = [segment + 1]
+
+            # Les dépôts commencés avant l'ouverture du segment suivant sont terminés et ingérés
+            log.wait_for_writers(segment)
+            offset, ingested = _drain(log, segment, offset, batch_size, policy)
+            total += ingested
+            log.save_state(later[0], 0)
+            log.remove(segment)
@@ -1,3 +1,2006 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+import uuid
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from itertools import count
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.db import connection, connections, transaction
+from django.db.models import Q
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from scholarship_management.importtime import profile_startup
+from scholarship_management.renderers import FastJSONRenderer, orjson_available
+from scholarship_management.throttling import IPTokenBucketThrottle
+
+from .claims import claim_next
+from .models import (
+    ApplicationComment, ApplicationStatusEvent, DuplicateMatch, EvaluationJob, IdempotencyKey, ScholarshipApplication,
+    ScholarshipType
+)
+
+User = get_user_model()
+
+
+class AdminQueryCountTests(TestCase):
+    """Le nombre de requêtes des pages d'admin ne doit pas dépendre du volume"""
+    sequence = count()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.scholarship_type = ScholarshipType.objects.create(
+            name="Excellence", description="Description", requirements="Critères",
+            duration=12, amount=500000
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin_user)
+
+    def _create_applications(self, number):
+        applications = []
+        for _ in range(number):
+            i = next(self.sequence)
+            user = User.objects.create_user(f'etudiant{i}')
+            scholarship_type = ScholarshipType.objects.create(
+                name=f"Bourse {user.username}", description="Description", requirements="Critères",
+                duration=12, amount=100000
+            )
+            application = ScholarshipApplication.objects.create(
+                user=user, scholarship_type=scholarship_type, full_name=f"Candidat {i}",
+                email=f"candidat{i}@example.com"
+            )
+            ApplicationComment.objects.create(application=application, user=user, content="Commentaire")
+            applications.append(application)
+        return applications
+
+    def _count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_application_changelist_is_constant(self):
+        url = reverse('admin:applications_scholarshipapplication_changelist')
+        self._create_applications(3)
+        baseline = self._count_queries(url)
+        self._create_applications(12)
+        self.assertEqual(self._count_queries(url), baseline)
+
+    def test_comment_changelist_is_constant(self):
+        url = reverse('admin:applications_applicationcomment_changelist')
+        self._create_applications(3)
+        baseline = self._count_queries(url)
+        self._create_applications(12)
+        self.assertEqual(self._count_queries(url), baseline)
+
+    def test_change_form_is_constant(self):
+        application = self._create_applications(1)[0]
+        url = reverse('admin:applications_scholarshipapplication_change', args=[application.pk])
+        # La première requête remplit le cache des content types
+        self._count_queries(url)
+        baseline = self._count_queries(url)
+
+        # D'autres utilisateurs, types et commentaires ne doivent rien coûter de plus
+        self._create_applications(5)
+        for i in range(30):
+            ApplicationComment.objects.create(application=application, user=self.admin_user, content=f"Avis {i}")
+        self.assertEqual(self._count_queries(url), baseline)
+
+    def test_comment_inline_is_paginated(self):
+        application = self._create_applications(1)[0]
+        for i in range(30):
+            ApplicationComment.objects.create(application=application, user=self.admin_user, content=f"Avis {i}")
+        url = reverse('admin:applications_scholarshipapplication_change', args=[application.pk])
+
+        response = self.client.get(url)
+        self.assertEqual(response.context['inline_admin_formsets'][0].formset.total_form_count(), 20)
+        response = self.client.get(url, {'comments_page': 2})
+        self.assertEqual(response.context['inline_admin_formsets'][0].formset.total_form_count(), 11)
+
+
+class ClaimNextConcurrencyTests(TransactionTestCase):
+    """Des évaluateurs simultanés ne reçoivent jamais la même candidature"""
+    reviewers = 24
+    batch = 3
+
+    def setUp(self):
+        scholarship_type = ScholarshipType.objects.create(
+            name="Excellence", description="Description", requirements="Critères", duration=12, amount=500000
+        )
+        student = User.objects.create_user('etudiant')
+        ScholarshipApplication.objects.bulk_create([
+            ScholarshipApplication(
+                user=student, scholarship_type=scholarship_type, full_name=f"Candidat {i}",
+                email=f"candidat{i}@example.com", ai_score=i % 97, status=('pending', 'under_review')[i % 2]
+            )
+            for i in range(200)
+        ])
+        # Déjà traitées : jamais attribuées
+        ScholarshipApplication.objects.filter(pk__in=ScholarshipApplication.objects.order_by('id').values('id')[:20]) \
+            .update(status='accepted')
+        self.users = [User.objects.create_user(f'evaluateur{i}', is_staff=True) for i in range(self.reviewers)]
+
+    def _claim_concurrently(self):
+        barrier = threading.Barrier(self.reviewers)
+        claimed = {user.pk: [] for user in self.users}
+        errors = []
+
+        def work(user):
+            try:
+                barrier.wait()
+                while True:
+                    applications = claim_next(user, count=self.batch)
+                    if not applications:
+                        break
+                    claimed[user.pk] += [application.pk for application in applications]
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=work, args=(user,)) for user in self.users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        return claimed
+
+    def _assert_exclusive(self, claimed):
+        all_ids = [pk for ids in claimed.values() for pk in ids]
+        self.assertEqual(len(all_ids), len(set(all_ids)), "candidature attribuée deux fois")
+        claimable = ScholarshipApplication.objects.filter(status__in=('pending', 'under_review'))
+        self.assertEqual(set(all_ids), set(claimable.values_list('id', flat=True)))
+        for user_id, ids in claimed.items():
+            self.assertEqual(
+                set(ScholarshipApplication.objects.filter(claimed_by_id=user_id).values_list('id', flat=True)),
+                set(ids)
+            )
+
+    def test_concurrent_claims_are_exclusive(self):
+        self._assert_exclusive(self._claim_concurrently())
+
+    def test_concurrent_claims_with_skip_locked_path(self):
+        # Substitut local d'une base à verrous de ligne : le chemin SELECT ... FOR UPDATE SKIP LOCKED
+        # est forcé (la clause est ignorée par SQLite) et chaque transaction prend le verrou
+        # d'écriture dès son ouverture, comme un verrou posé par la lecture
+        features = type(connection.features)
+        with mock.patch.object(features, 'has_select_for_update_skip_locked', True), \
+                mock.patch.dict(connection.settings_dict['OPTIONS'], {'transaction_mode': 'IMMEDIATE'}):
+            self._assert_exclusive(self._claim_concurrently())
+
+    def test_expired_claims_are_handed_out_again(self):
+        first, second = self.users[:2]
+        applications = claim_next(first, count=5, order='age')
+        self.assertEqual(len(applications), 5)
+        self.assertTrue(all(application.status in ('pending', 'under_review') for application in applications))
+
+        ScholarshipApplication.objects.filter(pk=applications[0].pk).update(
+            claimed_until=applications[0].claimed_until - timedelta(days=1)
+        )
+        reclaimed = claim_next(second, count=1, order='age')
+        self.assertEqual([application.pk for application in reclaimed], [applications[0].pk])
+
+    def test_priority_order(self):
+        applications = claim_next(self.users[0], count=3)
+        scores = [application.ai_score for application in applications]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        best = ScholarshipApplication.objects.filter(status__in=('pending', 'under_review')) \
+            .order_by('-ai_score').values_list('ai_score', flat=True).first()
+        self.assertEqual(scores[0], best)
+
+
+class StartupBudgetTests(SimpleTestCase):
+    """Démarrage d'un worker : modules chargés et durée (STARTUP_TIME_BUDGET_MS)"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Meilleur de trois démarrages, pour ne pas dépendre d'un pic de charge de la machine
+        cls.profile = min((profile_startup('urls') for _ in range(3)), key=lambda profile: profile.elapsed_ms)
+
+    def test_lazy_modules_are_not_imported_at_startup(self):
+        self.assertEqual(self.profile.lazy_modules_loaded(), [])
+
+    def test_startup_within_budget(self):
+        self.assertLessEqual(self.profile.elapsed_ms, settings.STARTUP_TIME_BUDGET_MS)
+
+
+class CommentCounterTests(TestCase):
+    """Les compteurs de commentaires ne sont jamais écrasés par une instance chargée plus tôt"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.student = User.objects.create_user('etudiant')
+        cls.scholarship_type = ScholarshipType.objects.create(
+            name="Excellence", description="Description", requirements="Critères", duration=12, amount=500000
+        )
+
+    def setUp(self):
+        self.application = ScholarshipApplication.objects.create(
+            user=self.student, scholarship_type=self.scholarship_type, full_name="Awa Ndiaye",
+            email="awa@example.com"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin_user)
+
+    def _comment(self):
+        response = self.client.post(
+            reverse('application-add-comment', args=[self.application.pk]), {'content': "Dossier complet"},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+
+    def test_stale_instance_save_keeps_counters(self):
+        stale = ScholarshipApplication.objects.get(pk=self.application.pk)
+        self._comment()
+        stale.status = 'under_review'
+        stale.save()
+
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.status, 'under_review')
+        self.assertEqual(self.application.comment_count, 1)
+        self.assertIsNotNone(self.application.last_commented_at)
+
+    def test_status_update_after_comment_keeps_counters(self):
+        self._comment()
+        response = self.client.post(
+            reverse('application-update-status', args=[self.application.pk]), {'status': 'accepted'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self._comment()
+
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.comment_count, 2)
+
+
+class ChangedFieldsSaveTests(TestCase):
+    """Un enregistrement complet n'écrit que les champs modifiés et ne déclenche que les signaux concernés"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user('etudiant')
+        cls.scholarship_type = ScholarshipType.objects.create(
+            name="Excellence", description="Description", requirements="Critères", duration=12, amount=500000
+        )
+
+    def setUp(self):
+        application = ScholarshipApplication.objects.create(
+            user=self.student, scholarship_type=self.scholarship_type, full_name="Awa Ndiaye",
+            email="awa@example.com", motivation_letter="Lettre de motivation"
+        )
+        self.application = ScholarshipApplication.objects.get(pk=application.pk)
+
+    def test_status_only_save_skips_indexing(self):
+        with mock.patch('applications.plagiarism.index_letter') as index_letter, \
+                mock.patch('applications.signals.refresh_blocking_keys') as refresh_blocking_keys, \
+                mock.patch('applications.signals.register_documents') as register_documents:
+            self.application.status = 'under_review'
+            self.application.save()
+        index_letter.assert_not_called()
+        refresh_blocking_keys.assert_not_called()
+        register_documents.assert_not_called()
+
+    def test_changed_letter_is_indexed(self):
+        with mock.patch('applications.plagiarism.index_letter') as index_letter:
+            self.application.motivation_letter = "Nouvelle lettre de motivation"
+            self.application.save()
+        index_letter.assert_called_once_with(self.application)
+
+    def test_only_changed_fields_are_written(self):
+        ScholarshipApplication.objects.filter(pk=self.application.pk).update(admin_notes="Écrit ailleurs")
+        self.application.full_name = "Awa N. Ndiaye"
+        self.application.save()
+
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.full_name, "Awa N. Ndiaye")
+        self.assertEqual(self.application.admin_notes, "Écrit ailleurs")
+
+
+@unittest.skipUnless(orjson_available(), "orjson non installé")
+class FastJSONRendererTests(SimpleTestCase):
+    """Le rendu orjson est identique octet pour octet à celui de DRF, erreurs comprises"""
+
+    def assertSameOutput(self, data):
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_floats(self):
+        self.assertSameOutput([0.0, -0.0, 0.1, 2.5, 1e-4, 123456.789, 9999000000000000.0])
+
+    def test_floats_outside_plain_range_keep_their_value(self):
+        # Flottants natifs non inspectés : notation exponentielle d'orjson, même valeur
+        data = [1e16, 1e-5, 5e-324, -1.5e300]
+        self.assertIn(b'1e16', FastJSONRenderer().render(data))
+        self.assertEqual(json.loads(FastJSONRenderer().render(data)), json.loads(JSONRenderer().render(data)))
+
+    def test_native_non_finite_floats_become_null(self):
+        data = {'score': float('nan'), 'max': float('inf')}
+        with self.assertRaises(ValueError):
+            JSONRenderer().render(data)
+        self.assertEqual(FastJSONRenderer().render(data), b'{"score":null,"max":null}')
+
+    def test_converted_values_fall_back_to_drf(self):
+        # Valeur convertie par l'encodeur DRF : vérifiée dans le hook `default`
+        self.assertSameOutput({'amount': Decimal('1E+20'), 'rate': Decimal('0.00001')})
+        with self.assertRaises(ValueError):
+            FastJSONRenderer().render({'score': Decimal('NaN')})
+
+    def test_faster_than_drf_on_benchmark_payload(self):
+        from .management.commands.benchmark_json import Command
+        from .serializers import ScholarshipApplicationListSerializer
+        data = ScholarshipApplicationListSerializer(Command()._build_applications(500), many=True).data
+        standard, fast = JSONRenderer(), FastJSONRenderer()
+        self.assertEqual(fast.render(data), standard.render(data))
+        command = Command()
+        self.assertLess(command._measure(lambda: fast.render(data), 5),
+                        command._measure(lambda: standard.render(data), 5))
+
+    def test_datetimes_decimals_and_uuids(self):
+        self.assertSameOutput({
+            'created_at': datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc),
+            'naive': datetime(2024, 5, 1, 12, 30),
+            'day': date(2024, 5, 1),
+            'duration': timedelta(hours=1, seconds=5),
+            'score': Decimal('87.50'),
+            'id': uuid.UUID('12345678123456781234567812345678'),
+        })
+
+    def test_non_str_keys(self):
+        self.assertSameOutput({1: 'un', 2.5: 'deux et demi', True: 'vrai', None: 'rien'})
+
+    def test_unicode_separators(self):
+        self.assertSameOutput({'text': "Ligne\u2028suivante\u2029fin", 'nom': "Aïssatou Ndiaye"})
+
+
+class TokenBucketThrottleTests(TestCase):
+    """Seaux à jetons : refus avec Retry-After, et jetons jamais consommés deux fois"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_login_is_throttled_with_retry_after(self):
+        url = reverse('token_obtain_pair')
+        credentials = {'username': 'inconnu', 'password': 'mauvais'}
+        # Scope 'login' : 10 jetons par minute
+        for _ in range(10):
+            self.assertEqual(self.client.post(url, credentials).status_code, 401)
+        response = self.client.post(url, credentials)
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+
+    def test_concurrent_requests_share_the_bucket(self):
+        view = mock.Mock(throttle_scope='login', throttle_scopes=None)
+        request = mock.Mock(META={'REMOTE_ADDR': '203.0.113.7'})
+        barrier = threading.Barrier(30)
+        results = []
+
+        def hit():
+            throttle = IPTokenBucketThrottle()
+            barrier.wait()
+            results.append(throttle.allow_request(request, view))
+
+        original_get = LocMemCache.get
+
+        def slow_get(*args, **kwargs):
+            # Élargit la fenêtre entre la lecture et l'écriture d'un seau
+            value = original_get(*args, **kwargs)
+            time.sleep(0.002)
+            return value
+
+        threads = [threading.Thread(target=hit) for _ in range(30)]
+        with mock.patch.object(LocMemCache, 'get', slow_get):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(results.count(True), 10)
+
+
+class AllocationTests(TestCase):
+    """Allocation sous contrainte budgétaire, à partir de l'instantané en colonnes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.student = User.objects.create_user('etudiant')
+        cls.excellence = ScholarshipType.objects.create(
+            name="Excellence", description="Description", requirements="Critères", duration=10, amount=1000
+        )
+        cls.mobility = ScholarshipType.objects.create(
+            name="Mobilité", description="Description", requirements="Critères", duration=2, amount=500
+        )
+
+    def setUp(self):
+        from .snapshot import clear_snapshot
+        clear_snapshot()
+        self.addCleanup(clear_snapshot)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin_user)
+
+    def _application(self, scholarship_type, score, **fields):
+        return ScholarshipApplication.objects.create(
+            user=self.student, scholarship_type=scholarship_type, full_name="Candidat", email="c@example.com",
+            ai_score=score, **fields
+        )
+
+    def _allocate(self, **data):
+        return self.client.post(reverse('application-allocate'), data, format='json')
+
+    def test_snapshot_with_deleted_type_is_an_allocation_error(self):
+        from .allocation import AllocationError, Candidates
+        from .snapshot import get_snapshot
+
+        self._application(self.excellence, 80)
+        self._application(self.mobility, 70)
+        snapshot = get_snapshot(max_age=0)
+        # Instantané construit avant la suppression (instantané partagé pas encore relu)
+        ScholarshipType.objects.filter(pk=self.mobility.pk).delete()
+        with self.assertRaises(AllocationError):
+            Candidates.from_snapshot(snapshot)
+
+    def test_budget_per_type_keeps_best_scores(self):
+        best = self._application(self.excellence, 90)
+        second = self._application(self.excellence, 80)
+        third = self._application(self.excellence, 70)
+        response = self._allocate(budgets={str(self.excellence.pk): '2500'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['accepted'], [best.pk, second.pk])
+        self.assertEqual(response.data['waiting_list'], [third.pk])
+        self.assertEqual(response.data['pools'][str(self.excellence.pk)]['spent'], '2000')
+        self.assertTrue(response.data['dry_run'])
+
+    def test_shared_budget_with_duration_never_exceeds_budget(self):
+        for score in (95, 85, 75):
+            self._application(self.excellence, score)
+        for score in (60, 50):
+            self._application(self.mobility, score)
+        # Coûts : 10 000 par bourse d'excellence, 1 000 par bourse de mobilité
+        response = self._allocate(shared_budget='12500', multiply_by_duration=True)
+        self.assertEqual(response.status_code, 200)
+        pool = response.data['pools']['shared']
+        self.assertLessEqual(Decimal(pool['spent']), Decimal('12500'))
+        self.assertEqual(pool['spent'], '12000')
+        self.assertEqual(pool['accepted'], 3)
+
+    def test_minimum_quota_is_served_first(self):
+        strong = self._application(self.excellence, 90)
+        self._application(self.excellence, 85)
+        disabled = self._application(self.excellence, 40, has_disability=True)
+        response = self._allocate(
+            budgets={str(self.excellence.pk): '2000'},
+            quotas=[{'field': 'has_disability', 'value': True, 'min_count': 1}],
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(response.data['accepted']), sorted([strong.pk, disabled.pk]))
+        self.assertTrue(response.data['quotas'][0]['satisfied'])
+
+    def test_apply_updates_statuses(self):
+        accepted = self._application(self.excellence, 90)
+        waiting = self._application(self.excellence, 80)
+        response = self._allocate(budgets={str(self.excellence.pk): '1000'}, dry_run=False)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], {'accepted': 1, 'waiting_list': 1})
+        accepted.refresh_from_db()
+        waiting.refresh_from_db()
+        self.assertEqual((accepted.status, waiting.status), ('accepted', 'waiting_list'))
+
+    def test_invalid_duration_is_rejected(self):
+        ScholarshipType.objects.filter(pk=self.mobility.pk).update(duration=0)
+        self._application(self.mobility, 70)
+        response = self._allocate(shared_budget='10000', multiply_by_duration=True)
+        self.assertEqual(response.status_code, 400)
+        # Sans multiplication par la durée, la durée n'intervient pas
+        self.assertEqual(self._allocate(shared_budget='10000').status_code, 200)
+
+    def test_invalid_flags_are_rejected(self):
+        self._application(self.excellence, 70)
+        self.assertEqual(self._allocate(shared_budget='1000', multiply_by_duration='parfois').status_code, 400)
+        response = self._allocate(
+            shared_budget='1000', quotas=[{'field': 'has_disability', 'value': 'peut-être', 'min_count': 1}]
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class DuplicateDetectionTests(TestCase):
+    """Doublons signalés à l'enregistrement, regroupés par personne"""
+    sequence = count()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.scholarship_type = ScholarshipType.objects.create(
+            name="Excellence", description="Description", requirements="Critères", duration=12, amount=500000
+        )
+
+    def _application(self, full_name, email, phone='', date_of_birth=None, user=None):
+        user = user or User.objects.create_user(f'candidat{next(self.sequence)}')
+        # Doublons recherchés après le commit du dépôt
+        with self.captureOnCommitCallbacks(execute=True):
+            return ScholarshipApplication.objects.create(
+                user=user, scholarship_type=self.scholarship_type, full_name=full_name, email=email, phone=phone,
+                date_of_birth=date_of_birth
+            )
+
+    def test_spelling_variants_are_flagged(self):
+        first = self._application("Mamadou Diallo", "mamadou.diallo@example.com", "+221 77 123 45 67")
+        second = self._application("Mamadu Dialo", "mamadoudiallo@example.org", "771234567")
+        match = DuplicateMatch.objects.get()
+        self.assertEqual((match.application_id, match.duplicate_of_id), (second.pk, first.pk))
+        self.assertEqual(match.reasons, 'name,phone,email')
+        self.assertEqual(match.cluster, first.pk)
+
+    def test_same_account_is_not_a_duplicate(self):
+        user = User.objects.create_user('candidat_unique')
+        self._application("Awa Ndiaye", "awa@example.com", "770000001", user=user)
+        self._application("Awa Ndiaye", "awa@example.com", "770000001", user=user)
+        self.assertFalse(DuplicateMatch.objects.exists())
+
+    def test_bridging_application_merges_clusters(self):
+        birth = date(2001, 3, 14)
+        awa = self._application("Awa Ndiaye", "awa.ndiaye@example.com", "770000001")
+        awa_again = self._application("Awa Ndiaye", "contact@example.com", "770000001")
+        fatou = self._application("Fatou Sow", "awandiaye@example.org", "770000002", birth)
+        fatou_again = self._application("Fatou Sow", "fatou@example.org", "770000002", birth)
+        self.assertEqual(
+            set(DuplicateMatch.objects.values_list('cluster', flat=True)), {awa.pk, fatou.pk}
+        )
+
+        # Même nom et adresse qu'Awa, même téléphone, date de naissance et adresse que Fatou
+        bridge = self._application("Awa Ndiaye", "awandiaye@example.net", "770000002", birth)
+        matched = set(DuplicateMatch.objects.filter(application=bridge).values_list('duplicate_of_id', flat=True))
+        self.assertEqual(matched, {awa.pk, fatou.pk})
+        self.assertEqual(set(DuplicateMatch.objects.values_list('cluster', flat=True)), {awa.pk})
+        self.assertEqual(DuplicateMatch.objects.count(), 4)
+        self.assertTrue(DuplicateMatch.objects.filter(application=fatou_again).exists())
+        self.assertTrue(DuplicateMatch.objects.filter(application=awa_again).exists())
+
+    def test_search_waits_for_commit(self):
+        first = self._application("Mamadou Diallo", "mamadou.diallo@example.com", "+221 77 123 45 67")
+        with self.captureOnCommitCallbacks() as callbacks:
+            second = ScholarshipApplication.objects.create(
+                user=User.objects.create_user('candidat_tardif'), scholarship_type=self.scholarship_type,
+                full_name="Mamadu Dialo", email="mamadoudiallo@example.org", phone="771234567"
+            )
+            self.assertFalse(second.blocking_keys.exists())
+            # Supprimée avant le commit : rien à rechercher
+            ScholarshipApplication.objects.filter(pk=second.pk).delete()
+        for callback in callbacks:
+            callback()
+        self.assertFalse(DuplicateMatch.objects.exists())
+        self.assertTrue(first.blocking_keys.exists())
+
+    def test_block_size_limit_is_the_same_for_both_searches(self):
+        from .duplicates import find_duplicates, scan_duplicates
+        # Même téléphone pour tous, noms et adresses différents
+        applicants = [
+            self._application(name, f"{name.split()[0].lower()}@example.com", "770000009", date(2000, 1, 1 + i))
+            for i, name in enumerate(["Awa Ndiaye", "Fatou Sow", "Moussa Fall", "Ibrahima Ba"])
+        ]
+        for max_block_size in (3, 4):
+            with self.subTest(max_block_size=max_block_size):
+                scan_duplicates(threshold=0.2, max_block_size=max_block_size)
+                scanned = {
+                    application.pk: set(
+                        DuplicateMatch.objects.filter(Q(application=application) | Q(duplicate_of=application))
+                        .values_list('application_id', 'duplicate_of_id')
+                    )
+                    for application in applicants
+                }
+                for application in applicants:
+                    found = find_duplicates(application, threshold=0.2, max_block_size=max_block_size)
+                    self.assertEqual(
+                        {tuple(sorted((application.pk, other), reverse=True)) for other, _, _ in found},
+                        scanned[application.pk]
+                    )
+                # Bloc de 4 : ignoré au-dessous de la limite, comparé à partir d'elle
+                self.assertEqual(bool(scanned[applicants[0].pk]), max_block_size == 4)
+
+
+@override_settings(ADMIN_ACTION_BACKGROUND_THRESHOLD=3)
+class EvaluationJobTests(TestCase):
+    """Évaluations groupées de l'admin exécutées par la commande run_evaluation_jobs"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        student = User.objects.create_user('etudiant')
+        scholarship_type = ScholarshipType.objects.create(
+            name="Excellence", description="Description", requirements="Critères", duration=12, amount=500000
+        )
+        cls.applications = [
+            ScholarshipApplication.objects.create(
+                user=student, scholarship_type=scholarship_type, full_name=f"Candidat {i}",
+                email=f"candidat{i}@example.com", average_grade=14, motivation_letter="Je souhaite étudier."
+            )
+            for i in range(5)
+        ]
+
+    def _evaluate_selection(self):
+        self.client.force_login(self.admin_user)
+        return self.client.post(reverse('admin:applications_scholarshipapplication_changelist'), {
+            'action': 'evaluate_selected', '_selected_action': [a.pk for a in self.applications]
+        })
+
+    def test_large_selection_becomes_a_job(self):
+        from .jobs import process
+        self._evaluate_selection()
+        job = EvaluationJob.objects.get()
+        self.assertEqual((job.status, job.total, job.created_by), ('pending', 5, self.admin_user))
+        self.assertFalse(ScholarshipApplication.objects.filter(ai_score__isnull=False).exists())
+
+        self.assertEqual(process(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed), ('done', 5))
+        self.assertFalse(ScholarshipApplication.objects.filter(ai_score__isnull=True).exists())
+
+    def test_interrupted_job_resumes_after_last_chunk(self):
+        from . import rescoring
+        from .jobs import create_evaluation_job, process
+        job = create_evaluation_job(ScholarshipApplication.objects.all())
+        ids = sorted(a.pk for a in self.applications)
+        rescore = rescoring.rescore_selection
+        calls = []
+
+        def failing(queryset, **kwargs):
+            calls.append(sorted(queryset.values_list('pk', flat=True)))
+            if len(calls) == 2:
+                raise RuntimeError("worker arrêté")
+            return rescore(queryset, **kwargs)
+
+        with mock.patch.object(rescoring, 'rescore_selection', failing):
+            process(chunk_size=2)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed, job.last_id, job.attempts), ('pending', 2, ids[1], 1))
+        self.assertEqual(job.error, "worker arrêté")
+        # La tâche en erreur n'est reprise qu'après ADMIN_JOB_TIMEOUT
+        self.assertEqual(process(chunk_size=2), 0)
+        EvaluationJob.objects.filter(pk=job.pk).update(
+            claimed_at=timezone.now() - timedelta(seconds=settings.ADMIN_JOB_TIMEOUT + 1)
+        )
+
+        with mock.patch.object(rescoring, 'rescore_selection', failing):
+            process(chunk_size=2)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed, job.error), ('done', 5, ''))
+        # Les tranches déjà écrites ne sont pas réévaluées
+        self.assertEqual(calls, [ids[:2], ids[2:4], ids[2:4], ids[4:]])
+
+    def test_stored_selection_does_not_grow_with_its_size(self):
+        from .jobs import create_evaluation_job, job_selection
+        small = create_evaluation_job(ScholarshipApplication.objects.filter(status='pending'))
+        template = self.applications[0]
+        ScholarshipApplication.objects.bulk_create([
+            ScholarshipApplication(user_id=template.user_id, scholarship_type_id=template.scholarship_type_id,
+                                   full_name=f"Candidat {i}", email=template.email, average_grade=12,
+                                   motivation_letter=template.motivation_letter)
+            for i in range(300)
+        ])
+        large = create_evaluation_job(ScholarshipApplication.objects.filter(status='pending'))
+
+        self.assertEqual((small.total, large.total), (5, 305))
+        self.assertEqual(len(large.selection), len(small.selection))
+        # Les candidatures créées après la tâche n'en font pas partie
+        self.assertEqual(job_selection(small).count(), 5)
+        self.assertEqual(job_selection(large).count(), 305)
+
+    def test_stale_running_job_is_reclaimed(self):
+        from .jobs import claim_job, create_evaluation_job
+        job = create_evaluation_job(ScholarshipApplication.objects.all())
+        self.assertEqual(claim_job(), job)
+        self.assertIsNone(claim_job())
+
+        EvaluationJob.objects.filter(pk=job.pk).update(
+            claimed_at=timezone.now() - timedelta(seconds=settings.ADMIN_JOB_TIMEOUT + 1)
+        )
+        self.assertEqual(claim_job().attempts, 2)
+
+
+class IdempotencyKeyTests(TestCase):
+    """Requêtes rejouées avec l'en-tête Idempotency-Key"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        scholarship_type = ScholarshipType.objects.create(
+            name="Excellence", description="Description", requirements="Critères", duration=12, amount=500000
+        )
+        cls.application = ScholarshipApplication.objects.create(
+            user=User.objects.create_user('etudiant'), scholarship_type=scholarship_type, full_name="Awa Ndiaye",
+            email="awa@example.com"
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin_user)
+
+    def _comment(self, content="Dossier complet", key='cle-1'):
+        return self.client.post(
+            reverse('application-add-comment', args=[self.application.pk]), {'content': content}, format='json',
+            headers={'Idempotency-Key': key}
+        )
+
+    def test_completed_request_is_replayed(self):
+        first = self._comment()
+        self.assertEqual(first.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', first)
+
+        replay = self._comment()
+        self.assertEqual(replay.status_code, 201)
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(replay.json(), first.json())
+        self.assertEqual(ApplicationComment.objects.count(), 1)
+
+        # Une autre clé crée un autre commentaire
+        self.assertEqual(self._comment(key='cle-2').status_code, 201)
+        self.assertEqual(ApplicationComment.objects.count(), 2)
+
+    def test_request_in_progress_is_a_conflict(self):
+        self._comment()
+        IdempotencyKey.objects.update(status='processing', response_status=None, response_body=None)
+
+        response = self._comment()
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(ApplicationComment.objects.count(), 1)
+
+    def test_key_reused_for_another_request_is_rejected(self):
+        self._comment()
+        response = self._comment(content="Autre avis")
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(ApplicationComment.objects.count(), 1)
+
+    def test_server_error_releases_the_key(self):
+        from .serializers import ApplicationCommentSerializer
+        self.client.raise_request_exception = False
+        with mock.patch.object(ApplicationCommentSerializer, 'save', side_effect=RuntimeError("panne")):
+            self.assertEqual(self._comment().status_code, 500)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        # Le client peut réessayer avec la même clé
+        response = self._comment()
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(IdempotencyKey.objects.get().status, 'completed')
+
+
+@unittest.skipIf(os.name != 'posix', "Le mode afflux nécessite fcntl")
+class SurgeIngestTests(TestCase):
+    """Journal des dépôts en mode afflux : ni perte ni doublon à l'ingestion"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user('etudiant')
+        cls.scholarship_type = ScholarshipType.objects.create(
+            name="Excellence", description="Description", requirements="Critères", duration=12, amount=500000
+        )
+
+    def setUp(self):
+        from .surge import SubmissionLog
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.log = SubmissionLog(directory.name)
+
+    def _enqueue(self, number, **fields):
+        from .surge import enqueue_submission
+        return [
+            enqueue_submission({
+                'scholarship_type': self.scholarship_type, 'full_name': f"Candidat {i}",
+                'email': f"candidat{i}@example.com", 'average_grade': Decimal('14.5'),
+                'motivation_letter': "Je souhaite poursuivre mes études.", **fields
+            }, self.student, log=self.log)
+            for i in range(number)
+        ]
+
+    def _ingested_ids(self):
+        return sorted(ScholarshipApplication.objects.values_list('submission_id', flat=True))
+
+    def test_surge_is_ingested_across_segments(self):
+        from .surge import ingest
+        submission_ids = self._enqueue(7)
+        self.assertFalse(ScholarshipApplication.objects.exists())
+
+        # Petits segments : l'ingesteur en ouvre un nouveau et supprime l'ancien
+        self.assertEqual(ingest(self.log, batch_size=3, segment_size=200), 7)
+        self._enqueue(2)
+        self.assertEqual(ingest(self.log, batch_size=3, segment_size=200), 2)
+
+        self.assertEqual(ScholarshipApplication.objects.count(), 9)
+        self.assertTrue({uuid.UUID(pk) for pk in submission_ids} <= set(self._ingested_ids()))
+        self.assertEqual(self.log.pending_bytes(), 0)
+        self.assertGreater(self.log.segments()[0], 1)
+        self.assertFalse(ScholarshipApplication.objects.filter(ai_score__isnull=True).exists())
+
+    def test_replayed_batch_creates_no_duplicates(self):
+        from .surge import ingest, ingest_batch
+        submission_ids = self._enqueue(5)
+        # Arrêt brutal après le commit d'un lot, avant l'enregistrement de la position
+        records = [record for record, _ in self.log.read(*self.log.load_state())]
+        self.assertEqual(ingest_batch(records[:3]), 3)
+        self.assertEqual(self.log.load_state()[1], 0)
+
+        self.assertEqual(ingest(self.log, batch_size=2), 2)
+        self.assertEqual(self._ingested_ids(), sorted(uuid.UUID(pk) for pk in submission_ids))
+        self.assertEqual(ingest(self.log, batch_size=2), 0)
+
+    def test_torn_line_and_invalid_submission_are_not_lost(self):
+        from .surge import REJECTED_FILE, ingest
+        self._enqueue(1)
+        # Ligne tronquée par un arrêt brutal pendant un dépôt, jamais confirmée
+        segment = self.log.segments()[-1]
+        with open(self.log.path(segment), 'ab') as log_file:
+            log_file.write(b'{"id":"tronq')
+        self._enqueue(1, average_grade='quatorze')
+        self._enqueue(1)
+
+        self.assertEqual(ingest(self.log, batch_size=10), 2)
+        rejected = (self.log.directory / REJECTED_FILE).read_text().splitlines()
+        self.assertEqual(len(rejected), 1)
+        self.assertIn('quatorze', rejected[0])
+
+    def test_locked_database_is_retried_not_rejected(self):
+        from django.db import OperationalError
+        from .surge import REJECTED_FILE, ingest
+        submission_ids = self._enqueue(3)
+        with mock.patch.object(ScholarshipApplication, 'save', side_effect=OperationalError("database is locked")):
+            with self.assertRaises(OperationalError):
+                ingest(self.log, batch_size=2)
+        self.assertFalse((self.log.directory / REJECTED_FILE).exists())
+        self.assertEqual(self.log.load_state()[1], 0)
+
+        self.assertEqual(ingest(self.log, batch_size=2), 3)
+        self.assertEqual(self._ingested_ids(), sorted(uuid.UUID(pk) for pk in submission_ids))
+
+    def test_status_endpoint_reports_rejection(self):
+        from .surge import ingest
+        client = APIClient()
+        client.force_authenticate(self.student)
+        queued, = self._enqueue(1, average_grade='quatorze')
+        url = reverse('application-submission', args=[queued])
+        with override_settings(SUBMISSION_LOG_DIR=self.log.directory):
+            self.assertEqual(client.get(url).data['status'], 'queued')
+            ingest(self.log)
+            response = client.get(url)
+        self.assertEqual(response.data['status'], 'rejected')
+        self.assertIn('ValidationError', response.data['detail'])
+
+    def test_replayed_submission_keeps_its_location(self):
+        client = APIClient()
+        client.force_authenticate(self.student)
+        data = {
+            'scholarship_type_id': self.scholarship_type.pk, 'full_name': "Awa Ndiaye", 'email': "awa@example.com",
+            'average_grade': '14.50', 'motivation_letter': "Je souhaite poursuivre mes études.",
+        }
+        with override_settings(SUBMISSION_SURGE_MODE=True, SUBMISSION_LOG_DIR=self.log.directory):
+            first, replay = [
+                client.post(reverse('application-list'), data, format='json', headers={'Idempotency-Key': 'depot-1'})
+                for _ in range(2)
+            ]
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(replay.status_code, 202)
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(replay.json(), first.json())
+        self.assertEqual(replay['Location'], first['Location'])
+        self.assertIn(first.json()['submission_id'], first['Location'])
+        # Seuls les en-têtes de REPLAYED_HEADERS sont enregistrés avec la clé
+        self.assertEqual(IdempotencyKey.objects.get().response_headers, {'Location': first['Location']})
+
+
+class StatusHistoryTests(TestCase):
+    """Historique des statuts en ajout seul et indicateurs de délai cumulés"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.student = User.objects.create_user('etudiant')
+        cls.scholarship_type = ScholarshipType.objects.create(
+            name="Excellence", description="Description", requirements="Critères", duration=12, amount=500000
+        )
+
+    def _application(self, **fields):
+        return ScholarshipApplication.objects.create(
+            user=self.student, scholarship_type=self.scholarship_type, full_name="Candidat",
+            email="candidat@example.com", **fields
+        )
+
+    def _events(self, application):
+        return list(application.status_events.values_list('from_status', 'to_status', 'previous_changed_at'))
+
+    def test_save_records_each_status_change(self):
+        application = self._application()
+        created_at = application.status_changed_at
+        self.assertEqual(self._events(application), [(None, 'pending', None)])
+
+        application.admin_notes = "Dossier incomplet"
+        application.save()
+        self.assertEqual(application.status_events.count(), 1)
+
+        application.status = 'under_review'
+        application.changed_by = self.admin_user
+        application.save()
+        event = application.status_events.last()
+        self.assertEqual((event.from_status, event.to_status), ('pending', 'under_review'))
+        self.assertEqual((event.previous_changed_at, event.changed_by), (created_at, self.admin_user))
+        application.refresh_from_db()
+        self.assertEqual(application.status_changed_at, event.changed_at)
+
+    def test_set_status_records_one_event_per_changed_application(self):
+        pending = self._application()
+        reviewed = self._application(status='under_review')
+        accepted = self._application(status='accepted')
+        entered = {a.pk: a.status_changed_at for a in (pending, reviewed)}
+
+        ScholarshipApplication.objects.all().set_status('accepted', changed_by=self.admin_user)
+        events = ApplicationStatusEvent.objects.filter(to_status='accepted', from_status__isnull=False)
+        self.assertEqual(
+            {(e.application_id, e.from_status, e.previous_changed_at, e.changed_by_id) for e in events},
+            {(pending.pk, 'pending', entered[pending.pk], self.admin_user.pk),
+             (reviewed.pk, 'under_review', entered[reviewed.pk], self.admin_user.pk)}
+        )
+        # Déjà acceptée : ni événement, ni nouvelle date d'entrée dans le statut
+        self.assertEqual(accepted.status_events.count(), 1)
+        self.assertEqual(
+            ScholarshipApplication.objects.get(pk=accepted.pk).status_changed_at, accepted.status_changed_at
+        )
+        pending.refresh_from_db()
+        self.assertEqual(pending.status_changed_at, events.get(application=pending).changed_at)
+
+    def test_rollup_percentiles(self):
+        from .history import refresh_rollups, time_in_status
+        application, = ScholarshipApplication.objects.bulk_create([ScholarshipApplication(
+            user=self.student, scholarship_type=self.scholarship_type, full_name="Candidat",
+            email="candidat@example.com"
+        )])
+        left_at = timezone.now() - timedelta(hours=1)
+        # 10 sorties de « En attente » : 1 à 9 heures, puis 100 heures
+        durations = [3600 * hours for hours in range(1, 10)] + [3600 * 100]
+        ApplicationStatusEvent.objects.bulk_create([
+            ApplicationStatusEvent(application=application, from_status='pending', to_status='under_review',
+                                   changed_at=left_at, previous_changed_at=left_at - timedelta(seconds=seconds))
+            for seconds in durations
+        ])
+        # Trop récent : laissé au passage suivant
+        self._application()
+
+        self.assertEqual(refresh_rollups(), 10)
+        self.assertEqual(refresh_rollups(), 0)
+        stats = time_in_status(statuses=['pending'], percentiles=(50, 90, 100))['pending']
+        self.assertEqual(stats['count'], 10)
+        for key, expected in (('p50', 5 * 3600), ('p90', 9 * 3600), ('p100', 100 * 3600)):
+            self.assertAlmostEqual(stats[key], expected, delta=expected * 0.1)
+
+        self.assertEqual(refresh_rollups(lag=0), 1)
+        self.assertEqual(time_in_status(statuses=['pending'])['pending']['count'], 10)
+
+
+class RecommendationCodesMigrationTests(TransactionTestCase):
+    """Migration 0011 : textes des recommandations convertis en codes, puis restaurés"""
+    before = [('applications', '0010_idempotency_keys')]
+    after = [('applications', '0011_recommendation_codes')]
+
+    def _migrate(self, targets):
+        from django.db.migrations.executor import MigrationExecutor
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        executor.loader.build_graph()
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        from django.db.migrations.executor import MigrationExecutor
+        # Les tests suivants attendent le schéma à jour
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_round_trip(self):
+        from . import recommendations
+        apps = self._migrate(self.before)
+        Application = apps.get_model('applications', 'ScholarshipApplication')
+        scholarship_type = apps.get_model('applications', 'ScholarshipType').objects.create(
+            name="Excellence", description="Description", requirements="Critères", duration=12, amount=500000
+        )
+        user_id = apps.get_model('auth', 'User').objects.create(username='etudiant').pk
+        flags = recommendations.LOW_ACADEMIC | recommendations.WEAK_MOTIVATION
+        text = recommendations.render('average', flags, version=1, language='fr')
+        edited = text + " Entretien demandé."
+
+        def application(recommendation):
+            return Application.objects.create(
+                user_id=user_id, scholarship_type=scholarship_type, full_name="Candidat",
+                email="candidat@example.com", ai_recommendations=recommendation
+            ).pk
+        converted, kept, empty = application(text), application(edited), application(None)
+
+        Application = self._migrate(self.after).get_model('applications', 'ScholarshipApplication')
+        rows = Application.objects.in_bulk([converted, kept, empty])
+        self.assertEqual(
+            (rows[converted].ai_recommendations, rows[converted].ai_recommendation_band,
+             rows[converted].ai_recommendation_flags, rows[converted].ai_recommendation_version),
+            (None, 'average', flags, 1)
+        )
+        # Texte modifié à la main : conservé tel quel
+        self.assertEqual((rows[kept].ai_recommendations, rows[kept].ai_recommendation_band), (edited, None))
+        self.assertIsNone(rows[empty].ai_recommendation_band)
+
+        Application = self._migrate(self.before).get_model('applications', 'ScholarshipApplication')
+        self.assertEqual(
+            dict(Application.objects.values_list('pk', 'ai_recommendations')),
+            {converted: text, kept: edited, empty: None}
+        )
+
+    def test_frozen_catalogue_is_version_1(self):
+        from importlib import import_module
+        from . import recommendations
+        migration = import_module('applications.migrations.0011_recommendation_codes')
+        # La version 1 du catalogue ne doit plus changer : la copie de la migration lui reste identique
+        self.assertEqual(migration.TEMPLATES, recommendations.CATALOGUES[1]['fr'])
+        self.assertEqual(migration.BANDS, tuple(band for _, band in recommendations.RECOMMENDATION_BANDS))
+        self.assertEqual(migration.FLAGS, recommendations.FLAGS)
+        self.assertNotIn('recommendations', vars(migration))
+
+
+class LetterSimilarityTests(TestCase):
+    """Lettres de motivation quasi identiques retrouvées par l'index MinHash/LSH"""
+    sequence = count()
+    letter = (
+        "Madame, Monsieur, titulaire d'un baccalauréat scientifique obtenu avec la mention bien, je souhaite "
+        "poursuivre mes études d'ingénieur en génie civil à l'université de Dakar. Issu d'une famille "
+        "modeste de six enfants, je ne peux financer seul les frais d'inscription, le logement et le "
+        "matériel. Cette bourse me permettrait de me consacrer entièrement à mes études, de participer aux "
+        "projets de l'association des étudiants et de préparer un stage dans une entreprise de travaux "
+        "publics. Mon projet est de contribuer à la construction d'infrastructures durables dans ma région "
+        "natale. Je vous prie d'agréer mes salutations distinguées."
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.scholarship_type = ScholarshipType.objects.create(
+            name="Excellence", description="Description", requirements="Critères", duration=12, amount=500000
+        )
+
+    def _application(self, letter, user=None):
+        user = user or User.objects.create_user(f'candidat{next(self.sequence)}')
+        return ScholarshipApplication.objects.create(
+            user=user, scholarship_type=self.scholarship_type, full_name="Candidat", email="c@example.com",
+            average_grade=14, motivation_letter=letter
+        )
+
+    def _similar(self, application):
+        from .plagiarism import similar_letters
+        return dict(similar_letters(application))
+
+    def test_near_duplicate_letter_is_found(self):
+        original = self._application(self.letter)
+        unrelated = self._application(
+            "Passionnée de médecine depuis l'enfance, je souhaite devenir pédiatre et ouvrir un centre de santé "
+            "dans mon village. Mes résultats en biologie et en chimie témoignent de ma détermination."
+        )
+        copy = self._application(self.letter.replace("génie civil", "génie électrique").replace("six", "sept"))
+        # Casse, accents et ponctuation ne comptent pas
+        retyped = self._application(self.letter.upper().replace("É", "E").replace(",", " ;"))
+
+        similar = self._similar(copy)
+        self.assertEqual(set(similar), {original.pk, retyped.pk})
+        self.assertGreaterEqual(similar[original.pk], settings.LETTER_SIMILARITY_THRESHOLD)
+        self.assertEqual(self._similar(retyped)[original.pk], 1.0)
+        self.assertEqual(self._similar(unrelated), {})
+
+    def test_letter_reused_by_the_same_account_is_not_flagged(self):
+        first = self._application(self.letter)
+        second = self._application(self.letter, user=first.user)
+        self.assertEqual(self._similar(second), {})
+
+    def test_rebuilt_index_gives_the_same_matches(self):
+        from .models import LetterBucket
+        from .plagiarism import rebuild_letter_index
+        applications = [self._application(self.letter) for _ in range(3)]
+        expected = [self._similar(application) for application in applications]
+        buckets = LetterBucket.objects.count()
+
+        self.assertEqual(rebuild_letter_index(batch_size=2), 3)
+        self.assertEqual(LetterBucket.objects.count(), buckets)
+        self.assertEqual([self._similar(application) for application in applications], expected)
+
+    def test_evaluation_links_and_clusters_similar_letters(self):
+        from .ai_evaluation import evaluate_application
+        from .plagiarism import letter_clusters
+        first = self._application(self.letter)
+        second = self._application(self.letter.replace("Dakar", "Thiès"))
+        self._application("Une lettre sans rapport avec les autres, écrite par un autre candidat.")
+        evaluate_application(second.pk)
+
+        second.refresh_from_db()
+        self.assertEqual(second.ai_similar_letter_id, first.pk)
+        self.assertGreaterEqual(second.ai_letter_similarity, settings.LETTER_SIMILARITY_THRESHOLD)
+        self.assertEqual([cluster['applications'] for cluster in letter_clusters()], [[first.pk, second.pk]])
+
+
+@override_settings(EVENT_STREAM_POLL_INTERVAL=0.02, EVENT_STREAM_MAX_DURATION=0.2, EVENT_STREAM_HEARTBEAT=60)
+class EventStreamTests(TransactionTestCase):
+    """Long-polling et flux SSE des changements de candidatures"""
+
+    def setUp(self):
+        cache.clear()
+        self.student = User.objects.create_user('etudiant')
+        self.other = User.objects.create_user('autre')
+        scholarship_type = ScholarshipType.objects.create(
+            name="Excellence", description="Description", requirements="Critères", duration=12, amount=500000
+        )
+        self.application, self.foreign = [
+            ScholarshipApplication.objects.create(
+                user=user, scholarship_type=scholarship_type, full_name="Candidat", email="c@example.com"
+            )
+            for user in (self.student, self.other)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def _record(self, application, kind='comment_added', **payload):
+        from .events import record_event
+        with transaction.atomic():
+            return record_event(application, kind, **payload)
+
+    def _poll(self, since, timeout):
+        start = time.monotonic()
+        response = self.client.get(reverse('event-list'), {'since': since, 'timeout': timeout})
+        self.assertEqual(response.status_code, 200)
+        return response.data, time.monotonic() - start
+
+    def _stream(self, **headers):
+        response = self.client.get(reverse('event-stream'), headers=headers)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return b''.join(response.streaming_content).decode()
+
+    def test_long_poll_times_out_without_database_queries(self):
+        from .events import wait_for_events
+        since = self._record(self.application).id
+        # Événement d'un autre candidat : invisible, ne réveille pas l'étudiant
+        self._record(self.foreign)
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(wait_for_events(self.student, since, 0.2), [])
+        # Une seule lecture des événements : l'attente ne lit que le compteur du cache
+        self.assertEqual(len(context.captured_queries), 1)
+
+        data, elapsed = self._poll(since, 0.2)
+        self.assertEqual(data, {'events': [], 'last_event_id': since})
+        self.assertGreaterEqual(elapsed, 0.2)
+
+    def test_long_poll_wakes_up_on_committed_event(self):
+        since = self._record(self.application).id
+
+        def change():
+            time.sleep(0.1)
+            self._record(self.application, 'status_changed', status='accepted')
+            connections.close_all()
+        thread = threading.Thread(target=change)
+        thread.start()
+        data, elapsed = self._poll(since, 5)
+        thread.join()
+
+        self.assertLess(elapsed, 2)
+        self.assertEqual([(event['kind'], event['status']) for event in data['events']],
+                         [('status_changed', 'accepted')])
+        self.assertEqual(data['last_event_id'], data['events'][0]['id'])
+
+    def test_sse_framing_and_last_event_id_resume(self):
+        first = self._record(self.application, status='under_review')
+        second = self._record(self.application, 'status_changed', status='accepted')
+        self._record(self.foreign)
+
+        body = self._stream(**{'Last-Event-ID': str(first.id)})
+        messages = body.split('\n\n')
+        self.assertEqual(messages[0], 'retry: 3000')
+        self.assertEqual(messages[1].split('\n')[:2], [f'id: {second.id}', 'event: status_changed'])
+        data = json.loads(messages[1].split('\n')[2].removeprefix('data: '))
+        self.assertEqual((data['id'], data['application'], data['status']),
+                         (second.id, self.application.pk, 'accepted'))
+        self.assertEqual(messages[2:], [''])
+
+        # Sans Last-Event-ID : seuls les événements à venir sont envoyés
+        self.assertEqual(self._stream(), 'retry: 3000\n\n')
+
+    def test_streams_per_process_are_capped(self):
+        from . import events
+        with mock.patch.object(events, '_waiting', threading.BoundedSemaphore(1)):
+            response = self.client.get(reverse('event-stream'))
+            refused = self.client.get(reverse('event-stream'))
+            self.assertEqual(refused.status_code, 503)
+            self.assertIn('Retry-After', refused)
+            # Place libérée à la fermeture, même si le flux n'a pas été lu
+            response.close()
+            self.assertEqual(self.client.get(reverse('event-stream')).status_code, 200)
+
+
+class SimulationParityTests(TestCase):
+    """Les scores vectorisés de la simulation sont ceux de AIEvaluator, ligne à ligne"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.scholarship_type = ScholarshipType.objects.create(
+            name="Excellence", description="Description", requirements="Critères", duration=12, amount=500000
+        )
+        letter = "Je souhaite poursuivre mes études d'ingénieur pour servir ma région natale. " * 20
+        profiles = [
+            # Revenu, mention, personnes à charge et handicap absents ou nuls
+            {'average_grade': Decimal('12.50')},
+            {'average_grade': Decimal('18.00'), 'baccalaureate_mention': 'tres_bien', 'family_income': 800000,
+             'number_of_dependents': 7, 'has_disability': True},
+            {'average_grade': Decimal('14.25'), 'baccalaureate_mention': 'bien', 'family_income': 2000000,
+             'number_of_dependents': 3},
+            {'average_grade': Decimal('9.75'), 'baccalaureate_mention': 'passable', 'family_income': 4200000,
+             'number_of_dependents': 0},
+            {'average_grade': Decimal('16.00'), 'baccalaureate_mention': 'assez_bien', 'family_income': 9000000,
+             'number_of_dependents': 1},
+        ]
+        cls.applications = [
+            ScholarshipApplication.objects.create(
+                user=User.objects.create_user(f'candidat{i}'), scholarship_type=cls.scholarship_type,
+                full_name=f"Candidat {i}", email=f"candidat{i}@example.com",
+                # Lettres courtes ou longues ; les deux dernières sont quasi identiques (pénalité)
+                motivation_letter=letter[:600 + 400 * i] if i < 3 else letter + f" Candidat {i}.", **profile
+            )
+            for i, profile in enumerate(profiles)
+        ]
+        # Non évaluée : absente de la simulation
+        ScholarshipApplication.objects.create(
+            user=User.objects.create_user('sans_note'), scholarship_type=cls.scholarship_type,
+            full_name="Sans note", email="sans.note@example.com", motivation_letter=letter
+        )
+
+    def setUp(self):
+        from .snapshot import clear_snapshot
+        clear_snapshot()
+        self.addCleanup(clear_snapshot)
+        # Analyse de contenu simulée : valeur fixe pour comparer deux politiques
+        patcher = mock.patch('applications.ai_evaluation.random.uniform', return_value=55.0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        from .ai_evaluation import evaluate_application
+        for application in self.applications:
+            evaluate_application(application.pk)
+
+    def _columns(self):
+        from .simulation import ScoringColumns
+        from .snapshot import get_snapshot
+        return ScoringColumns.from_snapshot(get_snapshot(max_age=0))
+
+    def test_scores_match_the_evaluator(self):
+        from .ai_evaluation import AIEvaluator
+        from .models import ScoringPolicy
+        from .simulation import academic_scores, socioeconomic_scores, total_scores
+        penalized = ScholarshipApplication.objects.filter(ai_similar_letter__isnull=False)
+        self.assertTrue(penalized.exists())
+
+        candidate = ScoringPolicy(
+            name="Candidate", academic_weight=Decimal('0.5'), socioeconomic_weight=Decimal('0.2'),
+            motivation_weight=Decimal('0.3'), low_income_threshold=500000, medium_income_threshold=2500000,
+            high_income_threshold=6000000, dependents_brackets=[[6, 25], [2, 15], [1, 5]], disability_bonus=30
+        )
+        columns = self._columns()
+        self.assertEqual(sorted(columns.ids.tolist()), [a.pk for a in self.applications])
+        for policy in (ScoringPolicy.get_active(), candidate):
+            expected = {}
+            for application in ScholarshipApplication.objects.filter(pk__in=columns.ids.tolist()):
+                evaluator = AIEvaluator(application, policy=policy, update_letter_index=False)
+                total, _, academic, socioeconomic, _ = evaluator.evaluate()
+                expected[application.pk] = (total, academic, socioeconomic)
+            vectorised = zip(
+                columns.ids.tolist(), total_scores(columns, policy), academic_scores(columns),
+                socioeconomic_scores(columns, policy)
+            )
+            for app_id, total, academic, socioeconomic in vectorised:
+                with self.subTest(policy=policy.name, application=app_id):
+                    # Motivation enregistrée arrondie au centième : écart d'au plus 0,01 sur le total
+                    self.assertAlmostEqual(total, expected[app_id][0], delta=0.01)
+                    self.assertAlmostEqual(academic, expected[app_id][1], places=2)
+                    self.assertAlmostEqual(socioeconomic, expected[app_id][2], places=2)
+
+    def test_simulating_the_active_policy_changes_nothing(self):
+        from .models import ScoringPolicy
+        from .simulation import simulate_policy
+        report = simulate_policy(ScoringPolicy.get_active(), columns=self._columns())
+        self.assertEqual(report['count'], 5)
+        self.assertEqual(report['score_shift']['mean_absolute'], 0)
+        self.assertEqual(report['rank_changes']['changed'], 0)
+
+
+class Interrupted(Exception):
+    pass
+
+
+class RescoringResumeTests(TransactionTestCase):
+    """Une réévaluation interrompue reprend sans réévaluer ni oublier de candidature"""
+    chunk_size = 5
+
+    def setUp(self):
+        scholarship_type = ScholarshipType.objects.create(
+            name="Excellence", description="Description", requirements="Critères", duration=12, amount=500000
+        )
+        student = User.objects.create_user('etudiant')
+        ScholarshipApplication.objects.bulk_create([
+            ScholarshipApplication(
+                user=student, scholarship_type=scholarship_type, full_name=f"Candidat {i}",
+                email=f"candidat{i}@example.com", average_grade=Decimal(10 + i % 9),
+                family_income=500000 * (i % 7), motivation_letter=f"Lettre de motivation numéro {i}. " * (5 + i)
+            )
+            for i in range(23)
+        ])
+        # Non évaluable : jamais réévaluée
+        ScholarshipApplication.objects.create(
+            user=student, scholarship_type=scholarship_type, full_name="Sans note", email="sans.note@example.com",
+            motivation_letter="Lettre"
+        )
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.checkpoint = os.path.join(directory.name, 'rescore_checkpoint.json')
+        self.written = []
+
+    def _record_writes(self):
+        from . import rescoring
+        original = rescoring.write_results
+
+        def write_results(results, **kwargs):
+            self.written += [result[0] for result in results]
+            return original(results, **kwargs)
+        return mock.patch('applications.rescoring.write_results', side_effect=write_results)
+
+    def _interrupt_after(self, chunks, workers):
+        from .rescoring import rescore
+        written_chunks = []
+
+        def progress(processed, total, elapsed):
+            written_chunks.append(processed)
+            if len(written_chunks) == chunks:
+                raise Interrupted
+        with self.assertRaises(Interrupted):
+            rescore(workers=workers, chunk_size=self.chunk_size, checkpoint_path=self.checkpoint, progress=progress)
+        with open(self.checkpoint) as checkpoint_file:
+            self.assertEqual(len(json.load(checkpoint_file)['done']), chunks)
+
+    def _assert_scored_exactly_once(self):
+        from .rescoring import evaluable_applications
+        evaluable = set(evaluable_applications().values_list('id', flat=True))
+        self.assertEqual(len(evaluable), 23)
+        self.assertEqual(len(self.written), len(set(self.written)), "candidature réévaluée deux fois")
+        self.assertEqual(set(self.written), evaluable)
+        self.assertFalse(ScholarshipApplication.objects.filter(id__in=evaluable, ai_evaluated_at__isnull=True).exists())
+        self.assertTrue(ScholarshipApplication.objects.get(full_name="Sans note").ai_evaluated_at is None)
+        # Réévaluation complète : le fichier de reprise est supprimé
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_interrupted_rescore_resumes_after_last_written_chunk(self):
+        from .rescoring import rescore
+        with self._record_writes():
+            self._interrupt_after(2, workers=1)
+            self.assertEqual(len(self.written), 2 * self.chunk_size)
+            stats = rescore(workers=1, chunk_size=self.chunk_size, checkpoint_path=self.checkpoint)
+        self.assertEqual((stats['skipped_chunks'], stats['chunks'], stats['scored']), (2, 3, 13))
+        self._assert_scored_exactly_once()
+
+    def test_parallel_command_resumes_interrupted_pool(self):
+        from io import StringIO
+        from django.core.management import call_command
+        with self._record_writes():
+            # Les processus du pool lisent la base de test sur fichier
+            self._interrupt_after(3, workers=2)
+            output = StringIO()
+            call_command(
+                'rescore_applications', workers=2, chunk_size=self.chunk_size, checkpoint=self.checkpoint,
+                stdout=output, stderr=StringIO()
+            )
+        self.assertIn("3 tranches déjà écrites", output.getvalue())
+        self.assertIn("8 candidatures réévaluées avec 2 processus", output.getvalue())
+        self._assert_scored_exactly_once()
+
+    def test_checkpoint_from_another_chunk_size_is_refused(self):
+        from io import StringIO
+        from django.core.management import CommandError, call_command
+        self._interrupt_after(1, workers=1)
+        with self.assertRaises(CommandError):
+            call_command('rescore_applications', workers=1, chunk_size=10, checkpoint=self.checkpoint,
+                         stderr=StringIO())
+
+
+class ArchivingTests(TestCase):
+    """Archivage d'une campagne fermée et consultation des archives"""
+
+    @classmethod
+    def setUpTestData(cls):
+        from .models import Cycle
+        cls.admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.students = [User.objects.create_user(f'etudiant{i}') for i in range(2)]
+        cls.closed = Cycle.objects.create(name="2025", starts_on=date(2025, 1, 1), ends_on=date(2025, 6, 30),
+                                          is_closed=True)
+        cls.open = Cycle.objects.create(name="2026", starts_on=date(2026, 1, 1), ends_on=date(2026, 6, 30))
+
+    def setUp(self):
+        for cycle, number in ((self.closed, 5), (self.open, 2)):
+            scholarship_type = ScholarshipType.objects.create(
+                name=f"Excellence {cycle}", description="Description", requirements="Critères", duration=12,
+                amount=500000, cycle=cycle
+            )
+            for i in range(number):
+                application = ScholarshipApplication.objects.create(
+                    user=self.students[i % 2], scholarship_type=scholarship_type, full_name=f"Candidat {cycle} {i}",
+                    email=f"candidat{i}@example.com"
+                )
+                ApplicationComment.objects.create(application=application, user=self.admin_user, content="Complet")
+                application.status = 'accepted'
+                application.changed_by = self.admin_user
+                application.save()
+        # Changements anciens : cumulables par refresh_rollups
+        ApplicationStatusEvent.objects.update(changed_at=timezone.now() - timedelta(hours=2))
+
+    def _archive(self, **kwargs):
+        from .archiving import archive_cycle
+        self.closed.refresh_from_db()
+        return archive_cycle(self.closed, batch_size=2, **kwargs)
+
+    def test_closed_cycle_is_moved_with_comments_and_history(self):
+        from .models import ArchivedApplication, StatusTransitionRollup
+        self.assertEqual(self._archive(), 5)
+
+        self.assertEqual(ScholarshipApplication.objects.filter(cycle=self.closed).count(), 0)
+        self.assertEqual(ScholarshipApplication.objects.filter(cycle=self.open).count(), 2)
+        self.assertEqual(ApplicationComment.objects.count(), 2)
+        self.assertEqual(ApplicationStatusEvent.objects.count(), 4)
+        archived = ArchivedApplication.objects.get(full_name="Candidat 2025 0")
+        self.assertEqual(archived.status, 'accepted')
+        self.assertEqual([comment['content'] for comment in archived.comments], ["Complet"])
+        self.assertEqual(
+            [(event['from_status'], event['to_status'], event['username']) for event in archived.status_history],
+            [(None, 'pending', None), ('pending', 'accepted', 'admin')]
+        )
+        # L'historique supprimé a été cumulé avant l'archivage
+        self.assertEqual(
+            StatusTransitionRollup.objects.filter(to_status='accepted').values_list('count', flat=True).get(), 7
+        )
+        self.closed.refresh_from_db()
+        self.assertIsNotNone(self.closed.archived_at)
+
+    def test_open_cycle_is_refused(self):
+        from .archiving import ArchiveError, archive_cycle
+        with self.assertRaises(ArchiveError):
+            archive_cycle(self.open)
+        self.assertEqual(ScholarshipApplication.objects.count(), 7)
+
+    def test_interrupted_archive_can_be_rerun(self):
+        from .models import ArchivedApplication
+
+        def progress(done):
+            raise KeyboardInterrupt
+        with self.assertRaises(KeyboardInterrupt):
+            self._archive(progress=progress)
+        # Le premier lot est archivé en entier, le reste intact
+        self.assertEqual(ArchivedApplication.objects.count(), 2)
+        self.assertEqual(self._archive(), 3)
+        self.assertEqual(self._archive(), 0)
+        original_ids = list(ArchivedApplication.objects.values_list('original_id', flat=True))
+        self.assertEqual(len(original_ids), 5)
+        self.assertEqual(len(set(original_ids)), 5)
+
+    def test_export_is_gzipped_json_lines(self):
+        import gzip
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, '2025.jsonl.gz')
+        ids = set(ScholarshipApplication.objects.filter(cycle=self.closed).values_list('id', flat=True))
+
+        self._archive(export_path=path)
+        # Une relance sans candidature restante n'ajoute rien
+        self._archive(export_path=path)
+        with gzip.open(path, 'rt', encoding='utf-8') as export_file:
+            rows = [json.loads(line) for line in export_file]
+        self.assertEqual({row['id'] for row in rows}, ids)
+        self.assertEqual(len(rows), 5)
+        self.assertTrue(all(len(row['comments']) == 1 and len(row['status_history']) == 2 for row in rows))
+
+    def test_archive_endpoint_is_read_only_and_per_user(self):
+        from .models import ArchivedApplication
+        self._archive()
+        url = reverse('archived-application-list')
+        client = APIClient()
+
+        client.force_authenticate(self.students[0])
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({row['full_name'] for row in response.data['results']},
+                         {"Candidat 2025 0", "Candidat 2025 2", "Candidat 2025 4"})
+        self.assertEqual(len(response.data['results'][0]['status_history']), 2)
+        other = ArchivedApplication.objects.get(full_name="Candidat 2025 1")
+        self.assertEqual(client.get(reverse('archived-application-detail', args=[other.pk])).status_code, 404)
+
+        client.force_authenticate(self.admin_user)
+        response = client.get(url, {'cycle': self.closed.pk, 'search': "2025 3"})
+        self.assertEqual([row['full_name'] for row in response.data['results']], ["Candidat 2025 3"])
+        self.assertEqual(client.delete(reverse('archived-application-detail', args=[other.pk])).status_code, 405)
+        self.assertEqual(client.post(url, {}).status_code, 405)
+        self.assertTrue(ArchivedApplication.objects.filter(pk=other.pk).exists())
+
+
+class ApplicationSnapshotTests(TestCase):
+    """Rafraîchissement incrémental et rechargement d'un instantané enregistré"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user('etudiant')
+        cls.scholarship_type = ScholarshipType.objects.create(
+            name="Excellence", description="Description", requirements="Critères", duration=12, amount=500000
+        )
+
+    def setUp(self):
+        from .snapshot import clear_snapshot
+        clear_snapshot()
+        self.addCleanup(clear_snapshot)
+        self.applications = [self._application(i) for i in range(4)]
+
+    def _application(self, i):
+        return ScholarshipApplication.objects.create(
+            user=self.student, scholarship_type=self.scholarship_type, full_name=f"Candidat {i}",
+            email=f"candidat{i}@example.com", average_grade=Decimal(10 + i), family_income=None if i else 900000
+        )
+
+    def _assert_current(self, snapshot):
+        """L'instantané rafraîchi est identique à un instantané reconstruit"""
+        from .snapshot import ApplicationSnapshot, _as_bytes
+        rebuilt = ApplicationSnapshot.build()
+        self.assertEqual(snapshot['id'].tolist(), rebuilt['id'].tolist())
+        self.assertTrue((_as_bytes(snapshot.data) == _as_bytes(rebuilt.data)).all())
+
+    def test_refresh_applies_updates_inserts_and_deletes(self):
+        from .snapshot import ApplicationSnapshot
+        snapshot = ApplicationSnapshot.build()
+        self.assertEqual(len(snapshot), 4)
+        self.assertTrue(np.isnan(snapshot['family_income'][1]))
+        # Lignes de la marge relues mais identiques : rien ne change
+        self.assertEqual(snapshot.refresh(), 0)
+
+        updated = self.applications[1]
+        updated.status = 'accepted'
+        updated.family_income = 1500000
+        updated.save()
+        self.assertEqual(snapshot.refresh(), 1)
+        self.assertEqual(snapshot.decode('status', snapshot['status'][1:2]).tolist(), ['accepted'])
+        self.assertEqual(snapshot['family_income'][1], 1500000)
+
+        self.applications[2].delete()
+        inserted = self._application(4)
+        self.applications[0].status = 'rejected'
+        self.applications[0].save()
+        self.assertEqual(snapshot.refresh(), 3)
+        self.assertNotIn(self.applications[2].pk, snapshot['id'].tolist())
+        self.assertEqual(snapshot['id'][-1], inserted.pk)
+        self._assert_current(snapshot)
+
+    def test_deleting_then_inserting_is_not_mistaken_for_no_change(self):
+        from .snapshot import ApplicationSnapshot
+        snapshot = ApplicationSnapshot.build()
+        self.applications[3].delete()
+        self._application(5)
+        # Même nombre de lignes qu'avant, mais une candidature en moins
+        self.assertEqual(snapshot.refresh(), 2)
+        self._assert_current(snapshot)
+
+    def test_persisted_snapshot_is_memory_mapped_and_reloaded(self):
+        from .snapshot import ApplicationSnapshot, clear_snapshot, get_snapshot
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'applications.npy')
+
+        with override_settings(APPLICATION_SNAPSHOT_PATH=path):
+            built = get_snapshot(max_age=0)
+            self.assertTrue(os.path.exists(path))
+            self.assertNotIsInstance(built.data, np.memmap)
+
+            # Autre processus : ouvre le fichier au lieu d'interroger la base
+            clear_snapshot()
+            with self.assertNumQueries(2):
+                loaded = get_snapshot(max_age=0)
+            self.assertIsInstance(loaded.data, np.memmap)
+            self.assertFalse(loaded.data.flags.writeable)
+            self._assert_current(loaded)
+
+            # Le rafraîchissement copie le tableau en lecture seule et réécrit le fichier
+            self.applications[0].status = 'under_review'
+            self.applications[0].save()
+            refreshed = get_snapshot(max_age=0)
+            self.assertNotIsInstance(refreshed.data, np.memmap)
+            self._assert_current(refreshed)
+            self.assertEqual(ApplicationSnapshot.load(path)['status'].tolist(), refreshed['status'].tolist())
+
+            # Un fichier réécrit ailleurs est rechargé
+            other = ApplicationSnapshot.build()
+            other.data = other.data[:2]
+            other.save(path)
+            with mock.patch('applications.snapshot.ApplicationSnapshot.refresh', return_value=0):
+                self.assertEqual(len(get_snapshot(max_age=0)), 2)
+
+
+class DocumentExtractionTests(TestCase):
+    """Hachage, extraction, nouvel essai et recherche des pièces jointes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.student = User.objects.create_user('etudiant')
+        cls.scholarship_type = ScholarshipType.objects.create(
+            name="Excellence", description="Description", requirements="Critères", duration=12, amount=500000
+        )
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        media = override_settings(MEDIA_ROOT=directory.name)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def _application(self, name, **files):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        return ScholarshipApplication.objects.create(
+            user=self.student, scholarship_type=self.scholarship_type, full_name=name,
+            email="candidat@example.com",
+            **{field: SimpleUploadedFile(file_name, content) for field, (file_name, content) in files.items()}
+        )
+
+    def _document(self, application, field='cv_file'):
+        from .models import DocumentText
+        return DocumentText.objects.get(attachments__application=application, attachments__field=field)
+
+    def test_identical_files_are_extracted_once_and_searchable(self):
+        from . import documents
+        from .models import DocumentText
+        cv = "Ingénieure en génie civil, stage à Thiès. Bénévole au Sénégal.".encode()
+        first = self._application("Awa", cv_file=('cv.txt', cv), transcript_file=('notes.txt', b"Moyenne 15"))
+        second = self._application("Moussa", cv_file=('mon_cv.txt', cv))
+
+        with mock.patch('applications.documents.extract_text', wraps=documents.extract_text) as extract_text:
+            self.assertEqual(documents.process(), (3, 2))
+        self.assertEqual(extract_text.call_count, 2)
+        self.assertEqual(DocumentText.objects.count(), 2)
+        document = self._document(first)
+        self.assertEqual(document, self._document(second))
+        self.assertEqual((document.status, document.kind, document.attempts), ('done', 'txt', 1))
+        # Rien de plus à faire au passage suivant
+        self.assertEqual(documents.process(), (0, 0))
+
+        # Recherche insensible à la casse et aux accents, tous les mots requis
+        found = documents.search("ingenieure THIES")
+        self.assertEqual(sorted(found.values_list('application__full_name', flat=True)), ["Awa", "Moussa"])
+        self.assertFalse(documents.search("ingenieure Dakar").exists())
+        self.assertEqual(list(documents.search("Moyenne", field='transcript_file').values_list('application', flat=True)),
+                         [first.pk])
+
+        client = APIClient()
+        client.force_authenticate(self.admin_user)
+        response = client.get(reverse('application-document-search'), {'q': 'génie civil'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['full_name'] for row in response.data['results']], ["Moussa", "Awa"])
+        self.assertIn("génie civil", response.data['results'][0]['snippet'])
+
+    def test_failed_extraction_is_retried_then_marked_failed(self):
+        from . import documents
+        application = self._application("Awa", cv_file=('cv.txt', b"Curriculum"))
+        with mock.patch('applications.documents.extract_text', side_effect=OSError("Stockage indisponible")):
+            for attempt in range(1, settings.DOCUMENT_EXTRACTION_MAX_ATTEMPTS + 1):
+                with self.assertLogs('applications.documents', 'ERROR'):
+                    documents.process()
+                document = self._document(application)
+                expected = 'pending' if attempt < settings.DOCUMENT_EXTRACTION_MAX_ATTEMPTS else 'failed'
+                self.assertEqual((document.status, document.attempts, document.claimed_at), (expected, attempt, None))
+                self.assertEqual(document.error, "Stockage indisponible")
+            # Nombre maximal d'essais atteint : plus jamais réservé
+            self.assertEqual(documents.process(), (0, 0))
+        self.assertFalse(documents.search("Curriculum").exists())
+
+    def test_unsupported_document_can_be_retried(self):
+        from . import documents
+        application = self._application("Awa", cv_file=('cv.bin', b"\x00\x01binaire"))
+        documents.process()
+        document = self._document(application)
+        self.assertEqual((document.status, document.error), ('unsupported', "Format non reconnu"))
+
+        self.assertEqual(documents.retry_unsupported(), 1)
+        with mock.patch('applications.documents.extract_text', return_value=('txt', "Texte reconnu", 1)):
+            self.assertEqual(documents.process(), (0, 1))
+        document.refresh_from_db()
+        self.assertEqual((document.status, document.attempts, document.error), ('done', 1, ''))
+        self.assertTrue(documents.search("reconnu").exists())
+
+    def test_abandoned_extraction_is_reclaimed_after_timeout(self):
+        from .documents import claim_documents, hash_attachments
+        from .models import DocumentText
+        application = self._application("Awa", cv_file=('cv.txt', b"Curriculum"))
+        hash_attachments(10)
+        document = self._document(application)
+        self.assertEqual(claim_documents(10), [document.pk])
+        # Réservé par un extracteur toujours en cours
+        self.assertEqual(claim_documents(10), [])
+        DocumentText.objects.filter(pk=document.pk).update(
+            claimed_at=timezone.now() - timedelta(seconds=settings.DOCUMENT_EXTRACTION_TIMEOUT + 1)
+        )
+        self.assertEqual(claim_documents(10), [document.pk])
+
+
+class DocumentClaimConcurrencyTests(TransactionTestCase):
+    """Des extracteurs simultanés ne réservent jamais le même document"""
+    extractors = 8
+
+    def test_concurrent_claims_are_exclusive(self):
+        from .documents import claim_documents
+        from .models import DocumentText
+        DocumentText.objects.bulk_create([DocumentText(sha256=f'{i:064x}', size=i) for i in range(60)])
+        barrier = threading.Barrier(self.extractors)
+        claimed, errors = [], []
+
+        def work():
+            try:
+                barrier.wait()
+                while True:
+                    ids = claim_documents(4)
+                    if not ids:
+                        break
+                    claimed.append(ids)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=work) for _ in range(self.extractors)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        all_ids = [pk for ids in claimed for pk in ids]
+        self.assertEqual(len(all_ids), len(set(all_ids)), "document réservé deux fois")
+        self.assertEqual(set(all_ids), set(DocumentText.objects.values_list('id', flat=True)))
+        self.assertFalse(DocumentText.objects.exclude(status='processing').exists())
+
+
+class DashboardTests(TestCase):
+    """Tableau de bord du candidat : nombre de requêtes fixe et invalidation par candidat"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.students = [User.objects.create_user(f'etudiant{i}') for i in range(2)]
+        cls.scholarship_type = ScholarshipType.objects.create(
+            name="Excellence", description="Description", requirements="Critères", duration=12, amount=500000
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.applications = {student.pk: [] for student in self.students}
+        with self.captureOnCommitCallbacks(execute=True):
+            for student in self.students:
+                for i in range(3):
+                    application = ScholarshipApplication.objects.create(
+                        user=student, scholarship_type=self.scholarship_type, full_name=f"Candidat {i}",
+                        email=f"candidat{i}@example.com", average_grade=Decimal('14.00'),
+                        motivation_letter="Lettre de motivation"
+                    )
+                    for j in range(5):
+                        ApplicationComment.objects.create(application=application, user=self.admin_user,
+                                                          content=f"Avis {j}")
+                    self.applications[student.pk].append(application)
+
+    def _cached(self, user):
+        from .dashboard import get_dashboard
+        return get_dashboard(user)[1]
+
+    def _warm(self):
+        for student in self.students:
+            self._cached(student)
+            self.assertTrue(self._cached(student))
+
+    def test_dashboard_is_built_in_four_queries(self):
+        from .dashboard import RECENT_COMMENTS, build_dashboard
+        ScholarshipType.objects.create(name="Mérite", description="Description", requirements="Critères",
+                                       duration=6, amount=200000)
+        with self.assertNumQueries(4):
+            dashboard = build_dashboard(self.students[0])
+        self.assertEqual(dashboard['counts']['total'], 3)
+        self.assertEqual(len(dashboard['scholarship_types']), 2)
+        comments = dashboard['applications'][0]['recent_comments']
+        self.assertEqual([comment['content'] for comment in comments], ["Avis 4", "Avis 3", "Avis 2"][:RECENT_COMMENTS])
+
+    def test_committed_comment_or_status_change_busts_owner_dashboard(self):
+        from .dashboard import get_dashboard
+        owner, other = self.students
+        self._warm()
+        application = self.applications[owner.pk][0]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ApplicationComment.objects.create(application=application, user=self.admin_user, content="Nouveau")
+        dashboard, cached = get_dashboard(owner)
+        self.assertFalse(cached)
+        self.assertEqual(dashboard['applications'][-1]['recent_comments'][0]['content'], "Nouveau")
+        self.assertTrue(self._cached(other))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            application.status = 'under_review'
+            application.save()
+        dashboard, cached = get_dashboard(owner)
+        self.assertFalse(cached)
+        self.assertEqual(dashboard['counts']['by_status']['under_review'], 1)
+        self.assertTrue(self._cached(other))
+
+    def test_rolled_back_change_keeps_cached_dashboard(self):
+        owner = self.students[0]
+        self._warm()
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(Interrupted), transaction.atomic():
+                ApplicationComment.objects.create(application=self.applications[owner.pk][0], user=self.admin_user,
+                                                  content="Annulé")
+                raise Interrupted
+        self.assertTrue(self._cached(owner))
+
+    def test_bulk_changes_bust_only_affected_owners(self):
+        from .dashboard import get_dashboard
+        from .rescoring import rescore_selection
+        owner, other = self.students
+        self._warm()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ScholarshipApplication.objects.filter(user=owner).set_status('accepted', changed_by=self.admin_user)
+        dashboard, cached = get_dashboard(owner)
+        self.assertFalse(cached)
+        self.assertEqual(dashboard['counts']['by_status']['accepted'], 3)
+        self.assertTrue(self._cached(other))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rescore_selection(ScholarshipApplication.objects.filter(pk=self.applications[other.pk][1].pk))
+        dashboard, cached = get_dashboard(other)
+        self.assertFalse(cached)
+        self.assertIsNotNone(dashboard['applications'][1]['ai_score'])
+        self.assertTrue(self._cached(owner))
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Négociation, seuil, exemptions et flux de CompressionMiddleware"""
+    body = b'{"results": [' + b','.join(b'{"id": %d, "status": "pending"}' % i for i in range(200)) + b']}'
+
+    def _response(self, request, view):
+        from scholarship_management.compression import CompressionMiddleware
+        def get_response(request):
+            # Comme le gestionnaire de Django : la vue est appelée après process_view et sa réponse rendue
+            middleware.process_view(request, view, (), {})
+            response = view(request)
+            return response.render() if hasattr(response, 'render') else response
+        middleware = CompressionMiddleware(get_response)
+        return middleware(request)
+
+    def _get(self, view, accept_encoding='gzip, deflate'):
+        from django.test import RequestFactory
+        return self._response(RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding), view)
+
+    def _view(self, body=None, content_type='application/json', **headers):
+        from django.http import HttpResponse
+
+        def view(request):
+            response = HttpResponse(self.body if body is None else body, content_type=content_type)
+            for name, value in headers.items():
+                response[name] = value
+            return response
+        return view
+
+    def test_large_response_is_gzipped(self):
+        import gzip
+        response = self._get(self._view())
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertEqual(gzip.decompress(response.content), self.body)
+
+    def test_small_response_is_left_alone(self):
+        response = self._get(self._view(body=b'x' * (settings.COMPRESSION_MIN_SIZE - 1)))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertFalse(response.has_header('Vary'))
+        with override_settings(COMPRESSION_MIN_SIZE=100):
+            self.assertEqual(self._get(self._view(body=b'x' * 100))['Content-Encoding'], 'gzip')
+        # Compression inutile : la réponse d'origine est gardée
+        response = self._get(self._view(body=os.urandom(4096), content_type='application/octet-stream'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_accept_encoding_negotiation(self):
+        from scholarship_management.compression import choose_encoding
+        self.assertEqual(choose_encoding('gzip;q=0.5, br;q=0.8'), 'gzip')
+        self.assertEqual(choose_encoding('*'), 'gzip')
+        self.assertEqual(choose_encoding('*;q=0.2, gzip;q=0'), None)
+        self.assertEqual(choose_encoding('identity, deflate'), None)
+        self.assertEqual(choose_encoding(''), None)
+        self.assertEqual(choose_encoding('gzip;q=abc, *;q=0.1'), 'gzip')
+        with mock.patch('scholarship_management.compression.brotli', mock.Mock()):
+            self.assertEqual(choose_encoding('gzip, br'), 'br')
+            self.assertEqual(choose_encoding('*'), 'br')
+            self.assertEqual(choose_encoding('gzip, br;q=0'), 'gzip')
+            self.assertEqual(choose_encoding('br;q=0.5, gzip;q=0.9'), 'gzip')
+
+        response = self._get(self._view(), accept_encoding='gzip;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        # Réponse non compressée mais dépendant tout de même de l'en-tête
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response.content, self.body)
+
+    def test_exempt_function_and_drf_views(self):
+        from rest_framework.response import Response
+        from rest_framework.views import APIView
+        from scholarship_management.compression import compression_exempt
+
+        self.assertFalse(self._get(compression_exempt(self._view())).has_header('Content-Encoding'))
+
+        payload = json.loads(self.body)
+
+        class TokenView(APIView):
+            authentication_classes = permission_classes = []
+            compression_exempt = True
+
+            def get(self, request):
+                return Response(payload)
+
+        class ListView(TokenView):
+            compression_exempt = False
+
+        response = self._get(TokenView.as_view())
+        self.assertFalse(response.has_header('Content-Encoding'))
+        response = self._get(ListView.as_view())
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_event_stream_is_not_compressed(self):
+        from django.http import StreamingHttpResponse
+
+        def view(request):
+            return StreamingHttpResponse((b'data: %d\n\n' % i for i in range(3)), content_type='text/event-stream')
+        response = self._get(view)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(response.streaming_content), b'data: 0\n\ndata: 1\n\ndata: 2\n\n')
+
+    def test_streaming_response_is_compressed_on_the_fly(self):
+        import gzip
+        import hashlib
+        from django.http import StreamingHttpResponse
+        # Lignes peu compressibles : le compresseur rend des blocs avant la fin
+        lines = [b'%d;%s\n' % (i, hashlib.sha256(b'%d' % i).hexdigest().encode()) for i in range(5000)]
+        produced = []
+
+        def rows():
+            for line in lines:
+                produced.append(line)
+                yield line
+
+        def view(request):
+            return StreamingHttpResponse(rows(), content_type='text/csv')
+        response = self._get(view)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        # Rien n'est lu avant que le serveur ne consomme la réponse
+        self.assertEqual(produced, [])
+        stream = iter(response.streaming_content)
+        chunks = [next(stream)]
+        self.assertLess(len(produced), len(lines))
+        chunks += list(stream)
+        self.assertEqual(gzip.decompress(b''.join(chunks)), b''.join(lines))
+
+    def test_strong_etag_is_weakened(self):
+        response = self._get(self._view(ETag='"abc"'))
+        self.assertEqual(response['ETag'], 'W/"abc"')
+        response = self._get(self._view(ETag='W/"abc"'))
+        self.assertEqual(response['ETag'], 'W/"abc"')
+        # Non compressée : l'ETag fort reste valable
+        response = self._get(self._view(ETag='"abc"'), accept_encoding='identity')
+        self.assertEqual(response['ETag'], '"abc"')
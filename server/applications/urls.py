@@ -1,11 +1,19 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ScholarshipTypeViewSet, ScholarshipApplicationViewSet
+from .views import (
+    ScholarshipTypeViewSet, ScholarshipApplicationViewSet, ScoringPolicyViewSet, ApplicationEventViewSet,
+    CycleViewSet, ArchivedApplicationViewSet, DashboardView
+)
 
 router = DefaultRouter()
 router.register(r'scholarship-types', ScholarshipTypeViewSet)
 router.register(r'applications', ScholarshipApplicationViewSet, basename='application')
+router.register(r'scoring-policies', ScoringPolicyViewSet)
+router.register(r'events', ApplicationEventViewSet, basename='event')
+router.register(r'cycles', CycleViewSet)
+router.register(r'archived-applications', ArchivedApplicationViewSet, basename='archived-application')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('me/dashboard/', DashboardView.as_view(), name='me-dashboard'),
 ]
@@ -1,15 +1,80 @@
+import csv
+import itertools
+import uuid
+from datetime import datetime, time, timedelta
+
 from rest_framework import viewsets, permissions, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.conf import settings
+from django.db import transaction
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.db.models import Count, F, Max
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import ScholarshipType, ScholarshipApplication, ApplicationComment
+from .models import (
+    ScholarshipType, ScholarshipApplication, ApplicationComment, ScoringPolicy, DuplicateMatch, Cycle,
+    ArchivedApplication
+)
 from .serializers import (
     ScholarshipTypeSerializer,
+    ScoringPolicySerializer,
     ScholarshipApplicationListSerializer,
     ScholarshipApplicationDetailSerializer,
-    ApplicationCommentSerializer
+    ApplicationCommentSerializer,
+    CycleSerializer,
+    ArchivedApplicationSerializer
+)
+from . import claims, surge
+from .dashboard import get_dashboard
+from .duplicates import find_duplicates
+from .idempotency import idempotent
+from .pagination import (
+    ArchivePagination, CommentCursorPagination, DocumentSearchPagination, DuplicateClusterPagination,
+    StatusChangePagination
+)
+from .events import (
+    ReservedStream, async_event_stream, async_wait_for_events, event_stream, events_since, latest_event_id,
+    record_event, release_thread, reserve_thread, serialize_event, wait_for_events
 )
-from .ai_evaluation import evaluate_application
+from scholarship_management.renderers import EventStreamRenderer, FastJSONRenderer
+from scholarship_management.throttling import UserTokenBucketThrottle
+
+# Colonnes de l'export CSV des candidatures
+EXPORT_FIELDS = (
+    'id', 'full_name', 'email', 'scholarship_type__name', 'status', 'average_grade', 'baccalaureate_mention',
+    'family_income', 'number_of_dependents', 'has_disability', 'ai_score', 'ai_academic_score',
+    'ai_socioeconomic_score', 'ai_motivation_score', 'created_at',
+)
+
+class Echo:
+    """Pseudo-fichier pour csv.writer : renvoie la ligne au lieu de l'écrire"""
+    def write(self, value):
+        return value
+
+def date_param(request, name):
+    """Date `AAAA-MM-JJ` d'un paramètre de requête ; ValueError si elle est invalide"""
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(f"Paramètre {name} invalide (format attendu : AAAA-MM-JJ)")
+    return parsed
+
+class DashboardView(APIView):
+    """
+    Tableau de bord du candidat connecté, en une seule requête
+    (voir applications/dashboard.py).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        dashboard, cached = get_dashboard(request.user)
+        return Response(dashboard, headers={'X-Dashboard-Cache': 'hit' if cached else 'miss'})
 
 class IsAdminOrReadOnly(permissions.BasePermission):
     def has_permission(self, request, view):
@@ -17,18 +82,97 @@ class IsAdminOrReadOnly(permissions.BasePermission):
             return True
         return request.user and request.user.is_staff
 
+class CycleViewSet(viewsets.ModelViewSet):
+    queryset = Cycle.objects.all()
+    serializer_class = CycleSerializer
+    permission_classes = [IsAdminOrReadOnly]
+    filterset_fields = ['is_closed']
+    filter_backends = [DjangoFilterBackend]
+
+class ArchivedApplicationViewSet(viewsets.ReadOnlyModelViewSet):
+    """Candidatures des campagnes archivées, en lecture seule"""
+    serializer_class = ArchivedApplicationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ArchivePagination
+    filter_backends = [filters.SearchFilter, DjangoFilterBackend]
+    search_fields = ['full_name', 'email']
+    filterset_fields = ['cycle', 'status', 'scholarship_type']
+
+    def get_queryset(self):
+        queryset = ArchivedApplication.objects.select_related('cycle')
+        if self.request.user.is_staff:
+            return queryset
+        return queryset.filter(user=self.request.user)
+
 class ScholarshipTypeViewSet(viewsets.ModelViewSet):
     queryset = ScholarshipType.objects.all()
     serializer_class = ScholarshipTypeSerializer
     permission_classes = [IsAdminOrReadOnly]
     filter_backends = [filters.SearchFilter, DjangoFilterBackend]
     search_fields = ['name', 'description']
-    filterset_fields = ['is_active', 'duration']
+    filterset_fields = ['is_active', 'duration', 'cycle']
+
+class ScoringPolicyViewSet(viewsets.ModelViewSet):
+    queryset = ScoringPolicy.objects.all()
+    serializer_class = ScoringPolicySerializer
+    permission_classes = [permissions.IsAdminUser]
+
+    @action(detail=True, methods=['post'])
+    def activate(self, request, pk=None):
+        policy = self.get_object()
+        with transaction.atomic():
+            ScoringPolicy.objects.filter(is_active=True).exclude(pk=policy.pk).update(is_active=False)
+            policy.is_active = True
+            policy.save(update_fields=['is_active', 'updated_at'])
+        return Response(self.get_serializer(policy).data)
+
+    @action(detail=True, methods=['post'])
+    def simulate(self, request, pk=None):
+        """
+        Simule cette politique sur toutes les candidatures évaluées, sans rien
+        enregistrer, et la compare à la politique de référence.
+        """
+        return self._simulate(request, self.get_object())
+
+    @action(detail=False, methods=['post'], url_path='simulate')
+    def simulate_candidate(self, request):
+        """
+        Simule une politique non enregistrée, décrite dans le corps de la requête.
+        """
+        serializer = self.get_serializer(data={'name': 'Simulation', **request.data})
+        serializer.is_valid(raise_exception=True)
+        return self._simulate(request, ScoringPolicy(**serializer.validated_data))
+
+    def _simulate(self, request, candidate):
+        # numpy n'est chargé qu'à la première simulation
+        from .simulation import simulate_policy
+
+        baseline_id = request.data.get('baseline')
+        baseline = None
+        if baseline_id:
+            try:
+                baseline = ScoringPolicy.objects.get(pk=baseline_id)
+            except (ScoringPolicy.DoesNotExist, ValueError):
+                return Response(
+                    {"detail": "Politique de référence introuvable"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        try:
+            top_k = int(request.data.get('top_k', 100))
+        except (TypeError, ValueError):
+            return Response({"detail": "top_k doit être un entier"}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(simulate_policy(candidate, baseline=baseline, top_k=top_k))
 
 class ScholarshipApplicationViewSet(viewsets.ModelViewSet):
     filter_backends = [filters.SearchFilter, DjangoFilterBackend]
     search_fields = ['full_name', 'email', 'current_institution']
-    filterset_fields = ['status', 'scholarship_type', 'current_year']
+    filterset_fields = ['status', 'scholarship_type', 'current_year', 'cycle']
+    throttle_classes = [UserTokenBucketThrottle]
+    throttle_scopes = {
+        'list': 'applications_list',
+        'evaluate': 'evaluate',
+    }
     
     def get_queryset(self):
         if self.request.user.is_staff:
@@ -41,26 +185,40 @@ class ScholarshipApplicationViewSet(viewsets.ModelViewSet):
         return ScholarshipApplicationDetailSerializer
 
     def get_permissions(self):
-        if self.action in ['update', 'partial_update', 'destroy']:
+        if self.action in ['update', 'partial_update', 'destroy', 'allocate', 'duplicates', 'duplicate_clusters',
+                           'similar_letters', 'letter_clusters', 'statistics', 'export', 'claim_next',
+                           'claimed', 'release', 'document_search', 'status_durations', 'status_transitions',
+                           'status_changes']:
             permission_classes = [permissions.IsAdminUser]
         else:
             permission_classes = [permissions.IsAuthenticated]
         return [permission() for permission in permission_classes]
 
     @action(detail=True, methods=['post'])
+    @idempotent
     def add_comment(self, request, pk=None):
         application = self.get_object()
         serializer = ApplicationCommentSerializer(data=request.data)
         
         if serializer.is_valid():
-            serializer.save(
-                application=application,
-                user=request.user
-            )
+            with transaction.atomic():
+                comment = serializer.save(
+                    application=application,
+                    user=request.user
+                )
+                ScholarshipApplication.objects.filter(pk=application.pk).update(
+                    comment_count=F('comment_count') + 1,
+                    last_commented_at=comment.created_at
+                )
+                record_event(
+                    application, 'comment_added',
+                    comment=comment.pk, author=request.user.username
+                )
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=True, methods=['post'])
+    @idempotent
     def update_status(self, request, pk=None):
         if not request.user.is_staff:
             return Response(
@@ -77,24 +235,351 @@ class ScholarshipApplicationViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        application.status = new_status
-        application.save()
+        holder = claims.claim_holder(application)
+        if holder is not None and holder != request.user.id:
+            return Response(
+                {"detail": "Cette candidature est attribuée à un autre évaluateur",
+                 "claimed_until": application.claimed_until},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        previous_status = application.status
+        with transaction.atomic():
+            application.status = new_status
+            application.changed_by = request.user
+            application.save()
+            record_event(
+                application, 'status_changed',
+                status=new_status, status_display=application.get_status_display(),
+                previous_status=previous_status
+            )
+        # Une candidature qui n'est plus à examiner quitte la file de l'évaluateur
+        if new_status not in claims.CLAIMABLE_STATUSES:
+            claims.release(application, request.user)
         
         serializer = self.get_serializer(application)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['post'])
+    def claim_next(self, request):
+        """
+        Attribue à l'évaluateur les prochaines candidatures libres à examiner.
+        Paramètres : `count` (1 par défaut), `order` (`score` ou `age`).
+        """
+        try:
+            count = int(request.data.get('count', 1))
+        except (TypeError, ValueError):
+            count = 0
+        if not 1 <= count <= settings.REVIEW_CLAIM_MAX_BATCH:
+            return Response(
+                {"detail": f"count doit être compris entre 1 et {settings.REVIEW_CLAIM_MAX_BATCH}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        order = request.data.get('order', 'score')
+        if order not in claims.ORDERINGS:
+            return Response(
+                {"detail": f"order doit valoir {' ou '.join(claims.ORDERINGS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        applications = claims.claim_next(request.user, count=count, order=order)
+        serializer = ScholarshipApplicationListSerializer(applications, many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def claimed(self, request):
+        """Candidatures actuellement attribuées à l'évaluateur"""
+        applications = claims.active_claims(request.user).select_related('user', 'scholarship_type')
+        serializer = ScholarshipApplicationListSerializer(applications.order_by('claimed_until'), many=True)
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['post'])
+    def release(self, request, pk=None):
+        """Rend la candidature à la file avant l'expiration de l'attribution"""
+        application = self.get_object()
+        if not claims.release(application, request.user):
+            return Response(
+                {"detail": "Cette candidature ne vous est pas attribuée"},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=False, methods=['post'])
+    def allocate(self, request):
+        """
+        Choisit les candidatures à accepter et la liste d'attente dans le budget.
+        Simulation par défaut ; `dry_run: false` applique le résultat.
+        """
+        from .allocation import AllocationError, Candidates, Quota, allocate, apply_allocation, parse_flag
+        from .snapshot import get_snapshot
+
+        try:
+            quotas = [Quota.from_dict(quota) for quota in request.data.get('quotas', [])]
+            # Les statuts doivent être à jour : rafraîchissement forcé de l'instantané
+            candidates = Candidates.from_snapshot(
+                get_snapshot(max_age=0),
+                multiply_by_duration=parse_flag(request.data.get('multiply_by_duration', False),
+                                                'multiply_by_duration')
+            )
+            result = allocate(
+                candidates,
+                budgets=request.data.get('budgets'),
+                shared_budget=request.data.get('shared_budget'),
+                quotas=quotas,
+                waiting_list_size=int(request.data.get('waiting_list_size', 50)),
+            )
+            dry_run = parse_flag(request.data.get('dry_run', True), 'dry_run')
+        except (AllocationError, TypeError, ValueError, AttributeError) as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = result.as_dict()
+        data['dry_run'] = dry_run
+        if not data['dry_run']:
+            data['updated'] = dict(zip(('accepted', 'waiting_list'), apply_allocation(result)))
+        return Response(data)
+
+    @action(detail=False, methods=['get'])
+    def statistics(self, request):
+        """Statistiques globales, calculées sur l'instantané en colonnes"""
+        from .snapshot import application_statistics, get_snapshot
+
+        names = dict(ScholarshipType.objects.values_list('id', 'name'))
+        return Response(application_statistics(get_snapshot(), scholarship_type_names=names))
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Export CSV des candidatures (filtres de la liste applicables), produit
+        ligne par ligne et compressé au fil de l'eau par le middleware.
+        """
+        queryset = self.filter_queryset(self.get_queryset()).order_by('id').values_list(*EXPORT_FIELDS)
+        writer = csv.writer(Echo())
+        rows = itertools.chain([EXPORT_FIELDS], queryset.iterator(chunk_size=2000))
+        response = StreamingHttpResponse(
+            (writer.writerow(row).encode() for row in rows), content_type='text/csv; charset=utf-8'
+        )
+        response['Content-Disposition'] = 'attachment; filename="candidatures.csv"'
+        return response
+
+    @action(detail=True, methods=['get'])
+    def duplicates(self, request, pk=None):
+        """Candidatures probablement déposées par la même personne"""
+        application = self.get_object()
+        matches = find_duplicates(application)
+        names = dict(
+            ScholarshipApplication.objects.filter(pk__in=[other for other, _, _ in matches])
+            .values_list('id', 'full_name')
+        )
+        return Response([
+            {'id': other, 'full_name': names.get(other), 'score': score, 'reasons': reasons}
+            for other, score, reasons in matches
+        ])
+
+    @action(detail=False, methods=['get'], url_path='duplicates')
+    def duplicate_clusters(self, request):
+        """Groupes de doublons détectés, du plus suspect au moins suspect"""
+        clusters = (
+            DuplicateMatch.objects.filter(is_dismissed=False)
+            .values('cluster')
+            .annotate(size=Count('id'), max_score=Max('score'))
+            .order_by('-max_score', 'cluster')
+        )
+        paginator = DuplicateClusterPagination()
+        page = paginator.paginate_queryset(clusters, request, view=self)
+
+        matches = DuplicateMatch.objects.filter(
+            is_dismissed=False, cluster__in=[cluster['cluster'] for cluster in page]
+        ).values('cluster', 'application_id', 'application__full_name', 'duplicate_of_id',
+                 'duplicate_of__full_name', 'score', 'reasons')
+        members = {}
+        for match in matches:
+            members.setdefault(match['cluster'], []).append({
+                'application': match['application_id'],
+                'application_name': match['application__full_name'],
+                'duplicate_of': match['duplicate_of_id'],
+                'duplicate_of_name': match['duplicate_of__full_name'],
+                'score': match['score'],
+                'reasons': match['reasons'].split(','),
+            })
+        return paginator.get_paginated_response([
+            {'cluster': cluster['cluster'], 'max_score': cluster['max_score'], 'matches': members.get(cluster['cluster'], [])}
+            for cluster in page
+        ])
+
+    @action(detail=True, methods=['get'])
+    def similar_letters(self, request, pk=None):
+        """Lettres de motivation d'autres candidats quasi identiques à celle-ci"""
+        from .plagiarism import similar_letters
+
+        application = self.get_object()
+        matches = similar_letters(application)
+        names = dict(
+            ScholarshipApplication.objects.filter(pk__in=[other for other, _ in matches])
+            .values_list('id', 'full_name')
+        )
+        return Response([
+            {'id': other, 'full_name': names.get(other), 'similarity': similarity}
+            for other, similarity in matches
+        ])
+
+    @action(detail=False, methods=['get'], url_path='letter-clusters')
+    def letter_clusters(self, request):
+        """Groupes de lettres similaires relevés lors des évaluations"""
+        from .plagiarism import letter_clusters
+
+        paginator = DuplicateClusterPagination()
+        page = paginator.paginate_queryset(letter_clusters(), request, view=self)
+        names = dict(
+            ScholarshipApplication.objects.filter(pk__in=[app_id for cluster in page for app_id in cluster['applications']])
+            .values_list('id', 'full_name')
+        )
+        return paginator.get_paginated_response([
+            {
+                'max_similarity': cluster['max_similarity'],
+                'applications': [{'id': app_id, 'full_name': names.get(app_id)} for app_id in cluster['applications']],
+            }
+            for cluster in page
+        ])
+
+    @action(detail=True, methods=['get'])
+    def documents(self, request, pk=None):
+        """Pièces jointes de la candidature et état de l'extraction de leur texte"""
+        application = self.get_object()
+        attachments = application.documents.select_related('document').order_by('field')
+        return Response([
+            {
+                'field': attachment.field,
+                'label': attachment.get_field_display(),
+                'status': attachment.document.status if attachment.document else 'pending',
+                'kind': attachment.document.kind if attachment.document else '',
+                'page_count': attachment.document.page_count if attachment.document else 0,
+                'text': attachment.document.text if attachment.document else '',
+            }
+            for attachment in attachments
+        ])
+
+    @action(detail=False, methods=['get'], url_path='documents/search')
+    def document_search(self, request):
+        """
+        Candidatures dont une pièce jointe contient tous les mots de `q`,
+        éventuellement limitée à une pièce (`field=cv_file`...).
+        """
+        from .documents import search, snippet
+
+        query = request.query_params.get('q', '')
+        attachments = search(query, request.query_params.get('field')).select_related('application', 'document')
+        paginator = DocumentSearchPagination()
+        page = paginator.paginate_queryset(attachments, request, view=self)
+        return paginator.get_paginated_response([
+            {
+                'application': attachment.application_id,
+                'full_name': attachment.application.full_name,
+                'field': attachment.field,
+                'snippet': snippet(attachment.document.text, query),
+            }
+            for attachment in page
+        ])
+
+    @action(detail=True, methods=['get'], url_path='status-history')
+    def status_history(self, request, pk=None):
+        """Historique des statuts de la candidature, du plus ancien au plus récent"""
+        application = self.get_object()
+        events = application.status_events.select_related('changed_by').order_by('changed_at', 'id')
+        return Response([
+            {
+                'from_status': event.from_status,
+                'to_status': event.to_status,
+                'to_status_display': event.get_to_status_display(),
+                'changed_at': event.changed_at,
+                # Temps passé dans le statut précédent, en secondes
+                'previous_status_seconds': (
+                    round((event.changed_at - event.previous_changed_at).total_seconds())
+                    if event.previous_changed_at else None
+                ),
+                # Les évaluateurs ne sont pas nommés aux candidats
+                'changed_by': event.changed_by.username if event.changed_by and request.user.is_staff else None,
+            }
+            for event in events
+        ])
+
+    @action(detail=False, methods=['get'], url_path='status-durations')
+    def status_durations(self, request):
+        """
+        Centiles du temps passé dans chaque statut (secondes) :
+        - `completed` : candidatures ayant quitté le statut entre `since` et `until` ;
+        - `current` : ancienneté des candidatures encore en attente ou en examen.
+        Paramètres : `since`, `until` (AAAA-MM-JJ), `status` (liste séparée par des virgules).
+        """
+        from .history import current_time_in_status, refresh_rollups, time_in_status
+
+        try:
+            since, until = date_param(request, 'since'), date_param(request, 'until')
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        statuses = [value for value in request.query_params.get('status', '').split(',') if value]
+        refresh_rollups()
+        current = statuses or list(claims.CLAIMABLE_STATUSES)
+        return Response({
+            'completed': time_in_status(since, until, statuses),
+            'current': {name: current_time_in_status(name) for name in current},
+        })
+
+    @action(detail=False, methods=['get'], url_path='status-transitions')
+    def status_transitions(self, request):
+        """Nombre de changements de statut par jour et par transition (`since`, `until`)"""
+        from .history import daily_transitions, refresh_rollups
+
+        try:
+            since, until = date_param(request, 'since'), date_param(request, 'until')
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        refresh_rollups()
+        return Response(daily_transitions(since, until))
+
+    @action(detail=False, methods=['get'], url_path='status-changes')
+    def status_changes(self, request):
+        """Changements de statut d'une période (`since`, `until` inclus ; aujourd'hui par défaut)"""
+        from .history import changes_between
+
+        try:
+            since, until = date_param(request, 'since'), date_param(request, 'until')
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        since = since or timezone.localdate()
+        until = until or since
+        start = timezone.make_aware(datetime.combine(since, time.min))
+        end = timezone.make_aware(datetime.combine(until + timedelta(days=1), time.min))
+        paginator = StatusChangePagination()
+        page = paginator.paginate_queryset(changes_between(start, end), request, view=self)
+        return paginator.get_paginated_response([
+            {
+                'application': event.application_id,
+                'full_name': event.application.full_name,
+                'from_status': event.from_status,
+                'to_status': event.to_status,
+                'changed_at': event.changed_at,
+                'changed_by': event.changed_by.username if event.changed_by else None,
+            }
+            for event in page
+        ])
+
     @action(detail=True, methods=['get'])
     def comments(self, request, pk=None):
         application = self.get_object()
-        comments = application.comments.all()
-        serializer = ApplicationCommentSerializer(comments, many=True)
-        return Response(serializer.data)
+        comments = application.comments.select_related('user')
+        paginator = CommentCursorPagination()
+        page = paginator.paginate_queryset(comments, request, view=self)
+        serializer = ApplicationCommentSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     @action(detail=True, methods=['post'])
+    @idempotent
     def evaluate(self, request, pk=None):
         """
         Évalue une candidature avec l'IA et retourne le score et les recommandations.
         """
+        from .ai_evaluation import evaluate_application
+
         if not request.user.is_staff:
             return Response(
                 {"detail": "Seuls les administrateurs peuvent lancer une évaluation"},
@@ -113,9 +598,141 @@ class ScholarshipApplicationViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(application)
         return Response(serializer.data)
 
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        if not surge.surge_mode_enabled():
+            return super().create(request, *args, **kwargs)
+
+        # Mode afflux : la candidature validée est journalisée, insérée plus tard par ingest_submissions
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        submission_id = surge.enqueue_submission(serializer.validated_data, request.user)
+        return Response(
+            {"submission_id": submission_id, "status": "queued"},
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': f"{request.path}submissions/{submission_id}/"}
+        )
+
+    @action(detail=False, methods=['get'], url_path=r'submissions/(?P<submission_id>[0-9a-fA-F-]{32,36})')
+    def submission(self, request, submission_id=None):
+        """Suivi d'un dépôt effectué en mode afflux"""
+        try:
+            submission_uuid = uuid.UUID(submission_id)
+        except ValueError:
+            return Response({"detail": "Identifiant de dépôt invalide"}, status=status.HTTP_400_BAD_REQUEST)
+
+        application = self.get_queryset().filter(submission_id=submission_uuid).first()
+        if application is None:
+            error = surge.SubmissionLog().rejection(submission_uuid.hex) if surge.fcntl else None
+            if error is not None:
+                return Response({"submission_id": submission_uuid.hex, "status": "rejected", "detail": error})
+            # Pas encore ingéré (ou inconnu : les identifiants ne sont pas devinables)
+            return Response({"submission_id": submission_uuid.hex, "status": "queued"})
+        return Response({
+            "submission_id": submission_uuid.hex,
+            "status": "ingested",
+            "application": ScholarshipApplicationDetailSerializer(application, context={'request': request}).data,
+        })
+
+    def perform_update(self, serializer):
+        # Auteur du changement de statut éventuel, pour l'historique
+        serializer.save(changed_by=self.request.user)
+
     def perform_create(self, serializer):
+        # Le module d'évaluation (et numpy) n'est chargé qu'au premier dépôt
+        from .ai_evaluation import evaluate_application
+
         # Sauvegarder la candidature
         application = serializer.save(user=self.request.user)
         
         # Évaluer automatiquement la candidature avec l'IA
         evaluate_application(application.id)
+
+class ApplicationEventViewSet(viewsets.GenericViewSet):
+    """
+    Changements des candidatures visibles par l'utilisateur : toutes pour les
+    administrateurs, les siennes pour un étudiant.
+
+    - `GET /api/events/?since=<id>` : long-polling, répond dès qu'un événement
+      est disponible ou après `timeout` secondes
+    - `GET /api/events/stream/` : flux Server-Sent Events, repris à partir de
+      l'en-tête `Last-Event-ID`
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def _last_event_id(self, value):
+        try:
+            return max(int(value), 0)
+        except (TypeError, ValueError):
+            return None
+
+    def _asgi(self, request):
+        # Servi par un serveur ASGI (uvicorn, daphne) : l'attente peut être asynchrone
+        return isinstance(request._request, ASGIRequest)
+
+    def _events_payload(self, events, since):
+        return {
+            'events': [serialize_event(event) for event in events],
+            'last_event_id': events[-1]['id'] if events else since,
+        }
+
+    def list(self, request):
+        since = self._last_event_id(request.query_params.get('since'))
+        if since is None:
+            # Premier appel : le client reçoit simplement le point de départ
+            return Response({'events': [], 'last_event_id': latest_event_id(request.user)})
+
+        try:
+            timeout = float(request.query_params.get('timeout', settings.EVENT_LONG_POLL_TIMEOUT))
+        except ValueError:
+            return Response({"detail": "timeout invalide"}, status=status.HTTP_400_BAD_REQUEST)
+        timeout = min(max(timeout, 0), settings.EVENT_LONG_POLL_TIMEOUT)
+
+        if timeout and self._asgi(request):
+            # L'attente se fait dans la boucle d'événements, après la fin de la vue :
+            # la réponse est un flux d'un seul morceau, le corps JSON
+            renderer = FastJSONRenderer()
+
+            async def body():
+                events = await async_wait_for_events(request.user, since, timeout)
+                yield renderer.render(self._events_payload(events, since))
+
+            response = StreamingHttpResponse(body(), content_type='application/json')
+            response['Cache-Control'] = 'no-cache'
+            return response
+
+        if timeout and reserve_thread():
+            try:
+                events = wait_for_events(request.user, since, timeout)
+            finally:
+                release_thread()
+        else:
+            # Pas d'attente demandée, ou threads du processus tous occupés par des clients en attente
+            events = events_since(request.user, since)
+        return Response(self._events_payload(events, since))
+
+    @action(detail=False, methods=['get'], renderer_classes=[EventStreamRenderer, FastJSONRenderer])
+    def stream(self, request):
+        last_event_id = self._last_event_id(
+            request.headers.get('Last-Event-ID', request.query_params.get('last_event_id'))
+        )
+        if last_event_id is None:
+            last_event_id = latest_event_id(request.user)
+
+        renderer = FastJSONRenderer()
+        if self._asgi(request):
+            # Sous ASGI, un client inactif n'occupe aucun thread
+            stream = async_event_stream(request.user, last_event_id, renderer.render)
+        elif reserve_thread():
+            stream = ReservedStream(event_stream(request.user, last_event_id, renderer.render))
+        else:
+            return Response(
+                {"detail": "Trop de flux ouverts sur ce serveur, réessayez plus tard"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': str(settings.EVENT_STREAM_RETRY_MS // 1000)}
+            )
+        response = StreamingHttpResponse(stream, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Désactive la mise en tampon de nginx pour ce flux
+        response['X-Accel-Buffering'] = 'no'
+        return response
@@ -0,0 +1,19 @@
+"""
+Caractéristiques des caches configurés.
+
+Plusieurs mécanismes (compteurs de version du flux d'événements, seaux de
+limitation de débit) ne sont corrects que si tous les processus du serveur
+partagent le même cache. LocMemCache est propre à chaque processus et
+DummyCache ne conserve rien : ces mécanismes doivent alors se replier sur la
+base, ou avertir que la limite n'est pas globale.
+"""
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def is_shared_cache(alias='default'):
+    """Vrai si le cache est commun à tous les processus (Redis, Memcached, base...)"""
+    return not isinstance(caches[alias], PROCESS_LOCAL_BACKENDS)
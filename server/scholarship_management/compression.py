@@ -0,0 +1,150 @@
+"""
+Compression des réponses HTTP (gzip, et Brotli lorsque le module `brotli`
+est installé).
+
+Contrairement au GZipMiddleware de Django, l'algorithme est choisi selon
+l'en-tête Accept-Encoding (Brotli de préférence), le seuil et les niveaux sont
+réglables, et une vue peut refuser la compression. Les réponses en streaming
+(exports) sont compressées au fil de l'eau ; les flux Server-Sent Events ne
+le sont pas, pour que chaque événement parte immédiatement.
+
+Réglages : COMPRESSION_MIN_SIZE, COMPRESSION_GZIP_LEVEL,
+COMPRESSION_BROTLI_QUALITY, COMPRESSION_EXCLUDED_CONTENT_TYPES.
+"""
+import zlib
+from functools import wraps
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ACCEPT_ENCODING_RE = _lazy_re_compile(r'\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([\d.]+))?\s*')
+
+
+def brotli_available():
+    return brotli is not None
+
+
+def compression_exempt(view_func):
+    """
+    Désactive la compression des réponses d'une vue. Pour une vue DRF, on peut
+    aussi définir l'attribut de classe `compression_exempt = True`.
+    """
+    @wraps(view_func)
+    def wrapped_view(*args, **kwargs):
+        response = view_func(*args, **kwargs)
+        response.compression_exempt = True
+        return response
+    wrapped_view.compression_exempt = True
+    return wrapped_view
+
+
+def accepted_encodings(header):
+    """Encodages acceptés par le client, avec leur qualité"""
+    encodings = {}
+    for part in header.split(','):
+        match = ACCEPT_ENCODING_RE.fullmatch(part)
+        if match:
+            try:
+                encodings[match.group(1).lower()] = float(match.group(2) or 1)
+            except ValueError:
+                continue
+    return encodings
+
+
+def choose_encoding(header):
+    encodings = accepted_encodings(header)
+    wildcard = encodings.get('*', 0)
+    candidates = (['br'] if brotli is not None else []) + ['gzip']
+    quality = {name: encodings.get(name, wildcard) for name in candidates}
+    best = max(candidates, key=lambda name: quality[name])
+    return best if quality[best] > 0 else None
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_stream(chunks, encoding):
+    """Compresse un itérable de blocs au fil de l'eau"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+        process, finish = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+        process, finish = compressor.compress, compressor.flush
+
+    for chunk in chunks:
+        data = process(chunk)
+        # Le compresseur garde les petits blocs en mémoire tampon jusqu'au suivant
+        if data:
+            yield data
+    yield finish()
+
+
+class CompressionMiddleware:
+    """
+    Compresse les réponses d'au moins COMPRESSION_MIN_SIZE octets. À placer
+    en tête de MIDDLEWARE, comme le GZipMiddleware de Django.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+        if getattr(view_func, 'compression_exempt', False) or getattr(view_class, 'compression_exempt', False):
+            request.compression_exempt = True
+
+    def process_response(self, request, response):
+        if (
+            getattr(request, 'compression_exempt', False)
+            or getattr(response, 'compression_exempt', False)
+            or response.has_header('Content-Encoding')
+            or response.status_code == 206
+        ):
+            return response
+
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type in settings.COMPRESSION_EXCLUDED_CONTENT_TYPES:
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        # Le contenu dépend désormais de l'en-tête, même non compressé
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                # Les flux asynchrones sont laissés tels quels
+                return response
+            response.streaming_content = compress_stream(response.streaming_content, encoding)
+            del response['Content-Length']
+        else:
+            compressed = compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        # Un ETag fort désigne une représentation exacte : il devient faible
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
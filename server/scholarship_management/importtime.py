@@ -0,0 +1,135 @@
+"""
+Mesure du coût de démarrage d'un processus Django.
+
+Le démarrage est rejoué dans un interpréteur neuf avec `python -X importtime`,
+ce qui donne le temps d'import de chaque module (propre et cumulé), en plus
+du temps total mesuré dans le processus.
+
+Les modules de LAZY_MODULES (évaluation IA, index des lettres, numpy) ne
+doivent être chargés qu'à leur première utilisation : ils ne font pas partie
+du démarrage.
+"""
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Étapes du démarrage : configuration des applications, puis chargement de
+# toutes les vues (fait par la première requête d'un worker)
+TARGETS = {
+    'setup': "import django; django.setup()",
+    'urls': (
+        "import django; django.setup(); "
+        "from django.conf import settings; from importlib import import_module; "
+        "import_module(settings.ROOT_URLCONF)"
+    ),
+    'wsgi': (
+        "from scholarship_management.wsgi import application; "
+        "from django.conf import settings; from importlib import import_module; "
+        "import_module(settings.ROOT_URLCONF)"
+    ),
+}
+
+LAZY_MODULES = (
+    'numpy',
+    'applications.ai_evaluation',
+    'applications.plagiarism',
+    'applications.snapshot',
+    'applications.simulation',
+    'applications.allocation',
+    'applications.rescoring',
+)
+
+
+@dataclass
+class ImportRecord:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+@dataclass
+class ImportProfile:
+    target: str
+    # Temps mesuré dans le processus, entre le début et la fin de la cible
+    elapsed_ms: float
+    records: list = field(default_factory=list)
+
+    @property
+    def modules(self):
+        return {record.module for record in self.records}
+
+    @property
+    def import_ms(self):
+        """Somme des imports de premier niveau"""
+        return sum(record.cumulative_us for record in self.records if record.depth == 0) / 1000
+
+    def slowest(self, count=20, cumulative=True):
+        key = (lambda record: record.cumulative_us) if cumulative else (lambda record: record.self_us)
+        return sorted(self.records, key=key, reverse=True)[:count]
+
+    def by_package(self):
+        """Temps propre cumulé par paquet de premier niveau, en millisecondes"""
+        totals = defaultdict(int)
+        for record in self.records:
+            totals[record.module.split('.')[0]] += record.self_us
+        return sorted(((package, us / 1000) for package, us in totals.items()), key=lambda item: -item[1])
+
+    def lazy_modules_loaded(self, lazy_modules=LAZY_MODULES):
+        return [module for module in lazy_modules if module in self.modules]
+
+
+def parse_importtime(output):
+    """Lignes `import time: self | cumulative | module` de -X importtime"""
+    records = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            self_us, cumulative_us = int(self_us), int(cumulative_us)
+        except ValueError:
+            # Ligne d'en-tête
+            continue
+        # Un espace après le séparateur, puis deux par niveau d'imbrication
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        records.append(ImportRecord(name.strip(), self_us, cumulative_us, depth))
+    return records
+
+
+def profile_startup(target='urls', settings_module=None):
+    """
+    Rejoue le démarrage dans un nouvel interpréteur.
+
+    Args:
+        target (str): Étape mesurée, une clé de TARGETS
+        settings_module (str): Module de réglages (DJANGO_SETTINGS_MODULE courant par défaut)
+
+    Returns:
+        ImportProfile
+    """
+    code = (
+        "import time; _start = time.perf_counter()\n"
+        f"{TARGETS[target]}\n"
+        "print((time.perf_counter() - _start) * 1000)\n"
+    )
+    env = {
+        **os.environ,
+        'DJANGO_SETTINGS_MODULE': settings_module or os.environ.get(
+            'DJANGO_SETTINGS_MODULE', 'scholarship_management.settings'
+        ),
+        'PYTHONPATH': os.pathsep.join(filter(None, [str(BASE_DIR), os.environ.get('PYTHONPATH')])),
+    }
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True, check=False
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Échec du démarrage ({target}) :\n{result.stderr[-2000:]}")
+    elapsed_ms = float(result.stdout.strip().splitlines()[-1])
+    return ImportProfile(target, elapsed_ms, parse_importtime(result.stderr))
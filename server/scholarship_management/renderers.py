@@ -0,0 +1,128 @@
+"""
+Renderer et parser JSON rapides pour l'API.
+
+Utilise `orjson` lorsqu'il est installé et se replie sur l'implémentation
+standard de DRF sinon. Les dates, décimaux et autres types non natifs sont
+délégués à l'encodeur DRF : la sortie est celle du `JSONRenderer` de DRF,
+octet pour octet, à une exception près. Les flottants Python natifs sont
+écrits par orjson sans être inspectés (parcourir la réponse coûterait plus
+que l'encodage lui-même) :
+- hors de [1e-4, 1e16), la notation exponentielle diffère d'écriture
+  (`1e16` au lieu de `1e+16`) mais pas de valeur ;
+- NaN et les infinis sont écrits `null`, là où DRF lève ValueError.
+Les valeurs converties par l'encodeur DRF (Decimal...) sont vérifiées, elles,
+et rendues par DRF dans ces deux cas.
+"""
+import math
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+LINE_SEPARATOR = '\u2028'.encode()
+PARAGRAPH_SEPARATOR = '\u2029'.encode()
+
+
+# Plage où orjson et json écrivent les flottants à l'identique (hors notation exponentielle)
+FLOAT_PLAIN_RANGE = (1e-4, 1e16)
+
+
+def orjson_available():
+    """Indique si l'encodeur rapide est utilisable."""
+    return orjson is not None
+
+
+def _written_like_json(value):
+    """Faux pour un flottant que orjson n'écrirait pas comme le module json"""
+    if not isinstance(value, float):
+        return True
+    low, high = FLOAT_PLAIN_RANGE
+    return math.isfinite(value) and (not value or low <= abs(value) < high)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer utilisant orjson pour la sortie compacte.
+
+    Les rendus indentés (API navigable, `?indent=`) et les cas que orjson
+    refuse (entiers hors 64 bits, valeur convertie par l'encodeur DRF qu'il
+    écrirait autrement...) passent par l'implémentation standard de DRF.
+    """
+    encoder = JSONEncoder()
+
+    def _default(self, obj):
+        value = self.encoder.default(obj)
+        # Seul coût hors de orjson : une vérification par valeur convertie
+        if not _written_like_json(value):
+            raise TypeError("Valeur rendue par l'encodeur standard")
+        return value
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        if orjson is None or not self.compact or self.ensure_ascii or not self.strict:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self._default,
+                # Types que json ne connaît pas : délégués à l'encodeur DRF, comme avec JSONRenderer
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Même échappement que DRF pour rester un sous-ensemble strict de JavaScript
+        if LINE_SEPARATOR in ret:
+            ret = ret.replace(LINE_SEPARATOR, b'\\u2028')
+        if PARAGRAPH_SEPARATOR in ret:
+            ret = ret.replace(PARAGRAPH_SEPARATOR, b'\\u2029')
+        return ret
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Type `text/event-stream` des flux Server-Sent Events. Les réponses en
+    erreur (authentification, permissions) sont envoyées comme un événement
+    `error` que le client peut lire avant la fermeture du flux.
+    """
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return b'event: error\ndata: ' + FastJSONRenderer().render(data) + b'\n\n'
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSONParser utilisant orjson pour les corps de requête encodés en UTF-8.
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        if orjson is None or not self.strict or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -46,6 +48,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # En tête : compresse la réponse finale produite par les autres middlewares
+    'scholarship_management.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -81,8 +85,131 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
+    # orjson est utilisé s'il est installé, sinon repli sur l'encodeur standard
+    'DEFAULT_RENDERER_CLASSES': [
+        'scholarship_management.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'scholarship_management.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # Seaux à jetons (voir scholarship_management/throttling.py) :
+    # "débit/période" ou "débit/période:capacité"
+    'DEFAULT_THROTTLE_RATES': {
+        'register': '5/hour:10',
+        'login': '10/min',
+        'evaluate': '30/min:10',
+        'applications_list': '60/min:20',
+    },
 }
 
+# Alias du cache conservant l'état des seaux de limitation de débit
+THROTTLE_CACHE = 'default'
+
+# Détection des lettres de motivation quasi identiques (MinHash/LSH)
+# Similarité de Jaccard estimée à partir de laquelle une lettre est signalée
+LETTER_SIMILARITY_THRESHOLD = 0.8
+# Part du score de motivation retirée aux lettres signalées (0 : signalement seul)
+LETTER_SIMILARITY_PENALTY = 0.5
+
+# Cache local au processus : à remplacer par un cache partagé (Redis,
+# Memcached) lorsque plusieurs processus servent l'API, pour que les flux
+# d'événements et les limites de débit soient communs (voir
+# scholarship_management/caching.py : replis sur la base ou avertissement)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Langue des recommandations IA lorsque la requête n'en demande aucune
+# disponible (paramètre `lang` ou en-tête Accept-Language)
+RECOMMENDATION_DEFAULT_LANGUAGE = 'fr'
+
+# File de travail des évaluateurs : durée d'une attribution (secondes) et
+# nombre maximal de candidatures attribuées par appel à claim_next
+REVIEW_CLAIM_LEASE = 15 * 60
+REVIEW_CLAIM_MAX_BATCH = 20
+
+# Actions groupées de l'admin : taille des tranches d'évaluation, et taille
+# de sélection au-delà de laquelle l'évaluation devient une tâche exécutée par
+# la commande run_evaluation_jobs
+ADMIN_ACTION_CHUNK_SIZE = 500
+ADMIN_ACTION_BACKGROUND_THRESHOLD = 1000
+# Tâche sans nouvelle tranche depuis ce délai (secondes) : son processus est
+# considéré arrêté et elle est reprise (une tâche en erreur attend le même délai) ;
+# nombre d'essais avant abandon
+ADMIN_JOB_TIMEOUT = 10 * 60
+ADMIN_JOB_MAX_ATTEMPTS = 3
+
+# Création de comptes en masse (provision_users, POST /api/users/provision/) :
+# lignes par tranche et processus de hachage (None : nombre de cœurs)
+USER_PROVISIONING_CHUNK_SIZE = 500
+USER_PROVISIONING_WORKERS = None
+
+# Extraction du texte des pièces jointes (commande extract_documents) :
+# documents par passage, délai avant reprise d'une extraction abandonnée
+# (secondes), nombre d'essais et longueur maximale du texte conservé
+DOCUMENT_EXTRACTION_BATCH_SIZE = 20
+DOCUMENT_EXTRACTION_TIMEOUT = 10 * 60
+DOCUMENT_EXTRACTION_MAX_ATTEMPTS = 3
+DOCUMENT_TEXT_MAX_CHARS = 200_000
+
+# Durée de conservation du tableau de bord d'un candidat dans le cache
+# (secondes) ; il est invalidé à chaque changement le concernant
+DASHBOARD_CACHE_TIMEOUT = 10 * 60
+
+# Liste des comptes (GET /api/users/) : durée de conservation du nombre de
+# résultats d'une recherche filtrée, en secondes (0 : recalculé à chaque page)
+USER_LIST_COUNT_CACHE_TIMEOUT = 60
+
+# Budget de démarrage d'un worker (django.setup() puis chargement des vues),
+# vérifié par les tests et la commande profile_imports, en millisecondes
+STARTUP_TIME_BUDGET_MS = 1500
+
+# Mode afflux (jour de clôture) : les dépôts sont écrits dans un journal
+# local puis insérés par la commande ingest_submissions
+SUBMISSION_SURGE_MODE = False
+SUBMISSION_LOG_DIR = BASE_DIR / 'submission_log'
+SUBMISSION_INGEST_BATCH_SIZE = 200
+SUBMISSION_LOG_SEGMENT_SIZE = 64 * 1024 * 1024
+
+# En-tête Idempotency-Key (création, évaluation, commentaires, statut), en secondes
+# Durée de conservation d'une réponse rejouable
+IDEMPOTENCY_KEY_TTL = 24 * 3600
+# Au-delà, une requête restée « en cours » (processus interrompu) libère sa clé
+IDEMPOTENCY_LOCK_TIMEOUT = 60
+# Part des requêtes qui purgent les clés expirées au passage
+IDEMPOTENCY_PRUNE_PROBABILITY = 0.01
+
+# Compression des réponses (gzip, Brotli si le module est installé)
+# Taille minimale en octets d'une réponse compressée (hors streaming)
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_GZIP_LEVEL = 6
+# Qualité Brotli de 0 à 11 : 4 compresse mieux que gzip 6 pour un coût CPU comparable
+COMPRESSION_BROTLI_QUALITY = 4
+# Les flux SSE doivent partir sans mise en tampon
+COMPRESSION_EXCLUDED_CONTENT_TYPES = ('text/event-stream',)
+
+# Instantané en colonnes des candidatures (statistiques, simulations, allocations)
+# Délai en secondes avant de vérifier les lignes modifiées
+APPLICATION_SNAPSHOT_MAX_AGE = 30
+# Fichier .npy partagé entre processus (mmap) ; None : instantané propre à chaque processus
+APPLICATION_SNAPSHOT_PATH = None
+
+# Flux des changements de candidatures (SSE et long-polling), en secondes
+EVENT_STREAM_POLL_INTERVAL = 1.0
+EVENT_STREAM_HEARTBEAT = 15
+# Durée maximale d'une connexion SSE avant reconnexion par le client
+EVENT_STREAM_MAX_DURATION = 300
+EVENT_STREAM_RETRY_MS = 3000
+EVENT_LONG_POLL_TIMEOUT = 25
+# Sous WSGI, chaque client en attente occupe un thread : nombre maximal de
+# clients en attente par processus (sans effet sous ASGI)
+EVENT_STREAM_MAX_PER_PROCESS = 8
+
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
@@ -91,6 +218,11 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'TEST': {
+            # Base de test sur fichier plutôt qu'en mémoire : les tests de
+            # concurrence ouvrent une connexion par thread
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 # Gestion des fichiers uploadés
@@ -156,3 +288,6 @@ CORS_ALLOW_METHODS = [
 
 # Autoriser les cookies dans les requêtes cross-origin
 CORS_ALLOW_CREDENTIALS = True
+
+# En-têtes acceptés en plus des en-têtes par défaut (clé d'idempotence)
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
@@ -0,0 +1,150 @@
+"""
+Limitation de débit par seau à jetons (token bucket).
+
+Chaque client dispose, pour un scope donné, d'un seau de `capacité` jetons
+rempli en continu au débit configuré ; une requête consomme un jeton. Les
+rafales courtes sont donc acceptées, pas un débit soutenu au-delà de la
+limite. L'état d'un seau (jetons restants, date de mise à jour) est conservé
+dans le cache Django configuré : aucune requête en base.
+
+La lecture et l'écriture d'un seau se font sous un verrou pris par
+`cache.add`, atomique sur les caches partagés (Redis, Memcached, base) :
+deux requêtes simultanées d'un même client ne peuvent pas consommer le même
+jeton. La limite n'est globale que si le cache est partagé par tous les
+processus ; avec LocMemCache, chaque processus a ses propres seaux (la
+vérification `check --deploy` le signale).
+
+Les débits se déclarent comme ceux de DRF dans `DEFAULT_THROTTLE_RATES`
+(`"10/min"`), avec une capacité optionnelle différente du débit
+(`"10/min:20"` : 10 jetons par minute, rafale de 20).
+"""
+import math
+import time
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+
+from .caching import is_shared_cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# Verrou d'un seau : durée de vie (secondes) si son détenteur s'arrête, puis
+# tentatives d'acquisition et pause entre deux tentatives
+LOCK_TIMEOUT = 2
+LOCK_ATTEMPTS = 20
+LOCK_RETRY_DELAY = 0.005
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_throttle_cache(app_configs=None, **kwargs):
+    """Les seaux doivent être dans un cache partagé par tous les processus"""
+    alias = getattr(settings, 'THROTTLE_CACHE', 'default')
+    if is_shared_cache(alias):
+        return []
+    return [checks.Warning(
+        f"Le cache '{alias}' des limites de débit est propre à chaque processus : "
+        "la limite effective est multipliée par le nombre de workers.",
+        hint="Configurer un cache partagé (Redis, Memcached) pour THROTTLE_CACHE.",
+        id='scholarship_management.W001',
+    )]
+
+
+def parse_rate(rate):
+    """
+    Returns:
+        tuple: (capacité, jetons par seconde) ou None si le scope n'est pas limité
+    """
+    if rate is None:
+        return None
+    try:
+        rate, _, burst = rate.partition(':')
+        num, period = rate.split('/')
+        num = int(num)
+        capacity = int(burst) if burst else num
+        return capacity, num / PERIODS[period.strip()[0]]
+    except (KeyError, IndexError, ValueError):
+        raise ImproperlyConfigured(f"Débit de limitation invalide : '{rate}'")
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Limitation par scope. La vue déclare `throttle_scope`, ou
+    `throttle_scopes` (dictionnaire action -> scope) pour un viewset.
+    """
+    cache_alias = getattr(settings, 'THROTTLE_CACHE', 'default')
+    key_prefix = 'throttle'
+    # Horloge murale : l'état peut être partagé entre processus
+    timer = time.time
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def get_scope(self, view):
+        scopes = getattr(view, 'throttle_scopes', None)
+        if scopes is not None:
+            return scopes.get(getattr(view, 'action', None))
+        return getattr(view, 'throttle_scope', None)
+
+    def get_ident_key(self, request):
+        raise NotImplementedError('.get_ident_key() must be overridden')
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(view)
+        bucket = parse_rate(api_settings.DEFAULT_THROTTLE_RATES.get(scope)) if scope else None
+        if bucket is None:
+            return True
+        capacity, refill_rate = bucket
+
+        cache = caches[self.cache_alias]
+        key = f"{self.key_prefix}:{scope}:{self.get_ident_key(request)}"
+        lock_key = f"{key}:lock"
+        for _ in range(LOCK_ATTEMPTS):
+            if cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+                break
+            time.sleep(LOCK_RETRY_DELAY)
+        else:
+            # Rafale concurrente d'un même client : refusée plutôt que comptée deux fois
+            self.wait_seconds = 1 / refill_rate
+            return False
+        try:
+            return self._consume(cache, key, capacity, refill_rate)
+        finally:
+            cache.delete(lock_key)
+
+    def _consume(self, cache, key, capacity, refill_rate):
+        now = self.timer()
+        tokens, updated_at = cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * refill_rate)
+
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+            self.wait_seconds = None
+        else:
+            self.wait_seconds = (1 - tokens) / refill_rate
+        # Au-delà de ce délai le seau est de nouveau plein : l'entrée peut expirer
+        cache.set(key, (tokens, now), timeout=math.ceil((capacity - tokens) / refill_rate) + 1)
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """Un seau par utilisateur authentifié, par adresse IP sinon"""
+
+    def get_ident_key(self, request):
+        if request.user and request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+        return f"ip:{self.get_ident(request)}"
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    """Un seau par adresse IP, même pour un utilisateur authentifié"""
+
+    def get_ident_key(self, request):
+        return f"ip:{self.get_ident(request)}"
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        # Enregistre la vérification du cache des limites de débit (check --deploy)
+        from scholarship_management import throttling  # noqa: F401
+        from . import signals  # noqa: F401
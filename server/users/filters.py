@@ -0,0 +1,57 @@
+from functools import reduce
+from operator import or_
+
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.functions import Lower
+from django_filters import rest_framework as filters
+from django.contrib.auth.models import User
+from rest_framework.filters import SearchFilter
+
+from applications.models import ScholarshipApplication
+
+
+class UserFilter(filters.FilterSet):
+    """
+    Filtres de la liste des comptes, tous résolus sur un index : `username`
+    (unique), `email` (users_user_email_lower_idx), `is_staff`
+    (users_user_is_staff_idx) et la clé étrangère des candidatures.
+    """
+    username = filters.CharFilter(field_name='username')
+    email = filters.CharFilter(method='filter_email')
+    is_staff = filters.BooleanFilter(field_name='is_staff')
+    has_applications = filters.BooleanFilter(method='filter_has_applications')
+
+    class Meta:
+        model = User
+        fields = ['username', 'email', 'is_staff', 'has_applications']
+
+    def filter_email(self, queryset, name, value):
+        # LOWER(email) = ... plutôt que iexact (UPPER) : l'index porte sur LOWER(email)
+        return queryset.alias(email_lower=Lower('email')).filter(email_lower=value.lower())
+
+    def filter_has_applications(self, queryset, name, value):
+        applications = ScholarshipApplication.objects.filter(user=OuterRef('pk'))
+        return queryset.filter(Exists(applications) if value else ~Exists(applications))
+
+
+class PrefixSearchFilter(SearchFilter):
+    """
+    Recherche par préfixe insensible à la casse, sur les champs `search_fields`
+    de la vue (sans préfixe `^`, `=`...).
+
+    `^champ` de SearchFilter devient `istartswith`, soit UPPER(champ) LIKE
+    'ABC%' : aucun index ne le sert sous PostgreSQL. Les termes sont ici
+    mis en minuscules et comparés à LOWER(champ) avec LIKE 'abc%', servi par
+    les index users_user_*_lower_idx (migration users 0003).
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        fields = getattr(view, 'search_fields', None)
+        terms = self.get_search_terms(request)
+        if not fields or not terms:
+            return queryset
+        queryset = queryset.alias(**{f'{field}_lower': Lower(field) for field in fields})
+        for term in terms:
+            term = term.lower()
+            queryset = queryset.filter(reduce(or_, (Q(**{f'{field}_lower__startswith': term}) for field in fields)))
+        return queryset
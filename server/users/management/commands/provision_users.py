@@ -0,0 +1,39 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.provisioning import provision, read_csv
+
+
+class Command(BaseCommand):
+    help = "Crée des comptes étudiants à partir d'un fichier CSV (username, email, first_name, last_name, password)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help="Fichier CSV encodé en UTF-8, avec une ligne d'en-tête")
+        parser.add_argument('--workers', type=int, help="Processus de hachage des mots de passe (nombre de cœurs par défaut)")
+        parser.add_argument('--chunk-size', type=int, help="Nombre de lignes par tranche")
+        parser.add_argument('--report', help="Écrit le détail des lignes créées et écartées dans ce fichier CSV")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['csv_file'], encoding='utf-8-sig', newline='') as source:
+                report = provision(read_csv(source), chunk_size=options['chunk_size'], workers=options['workers'])
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        if options['report']:
+            with open(options['report'], 'w', newline='') as report_file:
+                writer = csv.DictWriter(report_file, fieldnames=['line', 'username', 'result', 'detail'])
+                writer.writeheader()
+                for row in report.created:
+                    writer.writerow({**row, 'result': 'created', 'detail': ''})
+                for row in report.skipped:
+                    writer.writerow({'line': row['line'], 'username': row['username'], 'result': row['reason'],
+                                     'detail': row['detail']})
+
+        for row in report.skipped:
+            detail = f" ({row['detail']})" if row['detail'] else ''
+            self.stdout.write(f"Ligne {row['line']} écartée : {row['username']} - {row['reason']}{detail}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(report.created)} comptes créés, {len(report.skipped)} lignes écartées"
+        ))
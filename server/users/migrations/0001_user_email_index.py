@@ -0,0 +1,24 @@
+from django.db import migrations, models
+
+# Index sur auth_user.email : la création de comptes en masse écarte les
+# adresses déjà enregistrées en une requête par tranche (voir provisioning.py)
+EMAIL_INDEX = models.Index(fields=['email'], name='users_user_email_idx')
+
+
+def add_email_index(apps, schema_editor):
+    schema_editor.add_index(apps.get_model('auth', 'User'), EMAIL_INDEX)
+
+
+def remove_email_index(apps, schema_editor):
+    schema_editor.remove_index(apps.get_model('auth', 'User'), EMAIL_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_email_index, remove_email_index),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations, models
+
+# Index sur auth_user.is_staff : filtre de la liste des comptes de
+# l'administration (GET /api/users/?is_staff=true)
+IS_STAFF_INDEX = models.Index(fields=['is_staff'], name='users_user_is_staff_idx')
+
+
+def add_is_staff_index(apps, schema_editor):
+    schema_editor.add_index(apps.get_model('auth', 'User'), IS_STAFF_INDEX)
+
+
+def remove_is_staff_index(apps, schema_editor):
+    schema_editor.remove_index(apps.get_model('auth', 'User'), IS_STAFF_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_user_email_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_is_staff_index, remove_is_staff_index),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+# Index sur LOWER(username) et LOWER(email) : recherche par préfixe insensible
+# à la casse de la liste des comptes (voir users/filters.py) et comparaison
+# des adresses de la création de comptes en masse. Sous PostgreSQL, la classe
+# d'opérateurs text_pattern_ops permet d'utiliser l'index pour LIKE 'abc%'
+# quelle que soit la collation de la base.
+FIELDS = ('username', 'email')
+
+
+def _lower_indexes(schema_editor):
+    for field in FIELDS:
+        expression = Lower(field)
+        if schema_editor.connection.vendor == 'postgresql':
+            from django.contrib.postgres.indexes import OpClass
+            expression = OpClass(expression, name='text_pattern_ops')
+        yield models.Index(expression, name=f'users_user_{field}_lower_idx')
+
+
+def add_lower_indexes(apps, schema_editor):
+    for index in _lower_indexes(schema_editor):
+        schema_editor.add_index(apps.get_model('auth', 'User'), index)
+
+
+def remove_lower_indexes(apps, schema_editor):
+    for index in _lower_indexes(schema_editor):
+        schema_editor.remove_index(apps.get_model('auth', 'User'), index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_is_staff_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_lower_indexes, remove_lower_indexes),
+    ]
@@ -0,0 +1,58 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+
+from applications.events import current_version
+from applications.pagination import EstimatedCountPaginator
+
+# Incrémenté après chaque changement pouvant modifier un nombre de comptes filtré
+COUNT_VERSION_KEY = 'users:count:version'
+
+
+def _bump_count_version():
+    try:
+        cache.incr(COUNT_VERSION_KEY)
+    except ValueError:
+        cache.add(COUNT_VERSION_KEY, 1, timeout=None)
+
+
+def invalidate_counts():
+    """Invalide les nombres de comptes en cache après le commit de la transaction en cours"""
+    transaction.on_commit(_bump_count_version)
+
+
+class CachedCountPaginator(EstimatedCountPaginator):
+    """
+    Sans filtre, le nombre de comptes est estimé par le SGBD ; avec filtre,
+    le COUNT(*) exact est conservé USER_LIST_COUNT_CACHE_TIMEOUT secondes :
+    parcourir les pages d'une même recherche ne le recalcule pas. La clé
+    contient COUNT_VERSION_KEY : un compte créé, modifié ou supprimé, ou une
+    candidature déposée ou supprimée (filtre `has_applications`), rend les
+    nombres en cache caducs.
+    """
+
+    @cached_property
+    def count(self):
+        if not isinstance(self.object_list, QuerySet) or not settings.USER_LIST_COUNT_CACHE_TIMEOUT:
+            return super().count
+        query = self.object_list.order_by().query
+        sql, params = query.sql_with_params()
+        digest = hashlib.sha256(repr((sql, params)).encode()).hexdigest()
+        key = f'users:count:{current_version(COUNT_VERSION_KEY)}:{digest}'
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, settings.USER_LIST_COUNT_CACHE_TIMEOUT)
+        return count
+
+
+class UserPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    django_paginator_class = CachedCountPaginator
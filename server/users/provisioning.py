@@ -0,0 +1,241 @@
+"""
+Création de comptes en masse à partir d'un fichier CSV (listes d'étudiants
+transmises par les établissements).
+
+Colonnes : `username`, `email`, puis facultativement `first_name`,
+`last_name` et `password`. Sans mot de passe, le compte est créé avec un mot
+de passe inutilisable : l'étudiant le définit par la réinitialisation.
+
+Le fichier est lu au fil de l'eau et traité par tranches :
+- une seule requête par tranche (sur les index de `username` et de
+  LOWER(`email`)) écarte les comptes existants ;
+- les mots de passe, dont le hachage est volontairement lent, sont hachés
+  dans un pool de processus ;
+- les comptes sont insérés avec `bulk_create`, une transaction par tranche ;
+  si un compte a été créé entre-temps, la tranche est reprise compte par compte.
+
+Les adresses e-mail sont enregistrées en minuscules, et comparées sans tenir
+compte de la casse aux adresses existantes (parfois enregistrées autrement).
+"""
+import csv
+import io
+import multiprocessing
+import os
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from .pagination import invalidate_counts
+
+REQUIRED_COLUMNS = ('username', 'email')
+OPTIONAL_COLUMNS = ('first_name', 'last_name', 'password')
+
+
+@dataclass
+class ProvisioningReport:
+    created: list = field(default_factory=list)
+    skipped: list = field(default_factory=list)
+
+    def add_created(self, row):
+        self.created.append({'line': row['line'], 'username': row['username']})
+
+    def add_skipped(self, row, reason, detail=''):
+        self.skipped.append({'line': row['line'], 'username': row.get('username', ''), 'reason': reason,
+                             'detail': detail})
+
+    def as_dict(self):
+        return {
+            'created_count': len(self.created),
+            'skipped_count': len(self.skipped),
+            'created': self.created,
+            'skipped': self.skipped,
+        }
+
+
+def read_csv(source):
+    """
+    Lignes d'un fichier CSV, lues au fil de l'eau.
+
+    Args:
+        source: Fichier texte, ou fichier binaire (fichier téléversé) décodé en UTF-8
+
+    Yields:
+        dict: Colonnes de la ligne, avec son numéro (`line`)
+    """
+    if not isinstance(source, io.TextIOBase):
+        source = io.TextIOWrapper(source, encoding='utf-8-sig', newline='')
+    reader = csv.DictReader(source)
+    columns = [column.strip() for column in reader.fieldnames or []]
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise ValueError(f"Colonnes obligatoires manquantes : {', '.join(missing)}")
+    reader.fieldnames = columns
+    for values in reader:
+        row = {column: (values.get(column) or '').strip() for column in REQUIRED_COLUMNS + OPTIONAL_COLUMNS}
+        row['email'] = row['email'].lower()
+        # Le mot de passe est conservé tel quel
+        row['password'] = values.get('password') or ''
+        row['line'] = reader.line_num
+        yield row
+
+
+def _validation_error(row):
+    """Message d'erreur de la ligne, ou None si elle est valide"""
+    try:
+        User._meta.get_field('username').clean(row['username'], None)
+        validate_email(row['email'])
+        for name in ('first_name', 'last_name'):
+            User._meta.get_field(name).clean(row[name], None)
+        if row['password']:
+            validate_password(row['password'], User(username=row['username'], email=row['email'],
+                                                    first_name=row['first_name'], last_name=row['last_name']))
+    except ValidationError as exc:
+        return ' '.join(exc.messages)
+    return None
+
+
+def _init_worker():
+    """Initialisation d'un processus du pool"""
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+@contextmanager
+def password_hasher(workers):
+    """Fonction hachant une liste de mots de passe (None : mot de passe inutilisable)"""
+    if workers == 1:
+        yield lambda passwords: [make_password(password) for password in passwords]
+        return
+
+    # Les processus n'utilisent pas la base : les connexions du parent ne leur sont pas transmises ouvertes
+    connections.close_all()
+    with multiprocessing.Pool(workers, initializer=_init_worker) as pool:
+        yield lambda passwords: pool.map(make_password, passwords, chunksize=max(1, len(passwords) // (workers * 4)))
+
+
+def _existing(rows):
+    """Noms d'utilisateur et adresses (en minuscules) déjà pris, en une requête"""
+    usernames, emails = set(), set()
+    # LOWER(email) : servi par users_user_email_lower_idx
+    taken = User.objects.alias(email_lower=Lower('email')).filter(
+        Q(username__in=[row['username'] for row in rows]) | Q(email_lower__in=[row['email'] for row in rows])
+    ).values_list('username', 'email')
+    for username, email in taken:
+        usernames.add(username)
+        emails.add(email.lower())
+    return usernames, emails
+
+
+def _skip_reason(row, existing_usernames, existing_emails):
+    if row['username'] in existing_usernames:
+        return 'username_exists'
+    if row['email'] in existing_emails:
+        return 'email_exists'
+    return None
+
+
+def _create_one_by_one(rows, users, report):
+    """
+    Reprise d'une tranche dont l'insertion groupée a échoué : des comptes ont
+    été créés entre-temps (inscription simultanée). Les comptes pris sont
+    écartés, puis chaque compte est inséré dans sa propre transaction : un
+    conflit survenu depuis la vérification n'écarte que sa ligne.
+
+    Returns:
+        list: Lignes des comptes créés
+    """
+    existing_usernames, existing_emails = _existing(rows)
+    created = []
+    for row, user in zip(rows, users):
+        reason = _skip_reason(row, existing_usernames, existing_emails)
+        if reason is None:
+            try:
+                with transaction.atomic():
+                    User.objects.bulk_create([user])
+            except IntegrityError:
+                # Seul le nom d'utilisateur est unique dans auth_user
+                reason = 'username_exists'
+            else:
+                created.append(row)
+                continue
+        report.add_skipped(row, reason)
+    return created
+
+
+def _provision_chunk(rows, hash_passwords, report, seen_usernames, seen_emails):
+    candidates = []
+    for row in rows:
+        error = _validation_error(row)
+        if error:
+            report.add_skipped(row, 'invalid', error)
+        elif row['username'] in seen_usernames or row['email'] in seen_emails:
+            report.add_skipped(row, 'duplicate_in_file')
+        else:
+            seen_usernames.add(row['username'])
+            seen_emails.add(row['email'])
+            candidates.append(row)
+
+    existing_usernames, existing_emails = _existing(candidates) if candidates else (set(), set())
+    new_rows = []
+    for row in candidates:
+        reason = _skip_reason(row, existing_usernames, existing_emails)
+        if reason:
+            report.add_skipped(row, reason)
+        else:
+            new_rows.append(row)
+    if not new_rows:
+        return
+
+    hashes = hash_passwords([row['password'] or None for row in new_rows])
+    users = [
+        User(username=row['username'], email=row['email'], first_name=row['first_name'],
+             last_name=row['last_name'], password=password)
+        for row, password in zip(new_rows, hashes)
+    ]
+    try:
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+    except IntegrityError:
+        new_rows = _create_one_by_one(new_rows, users, report)
+    # bulk_create n'envoie pas post_save
+    invalidate_counts()
+    for row in new_rows:
+        report.add_created(row)
+
+
+def provision(rows, chunk_size=None, workers=None):
+    """
+    Crée les comptes d'une suite de lignes (voir `read_csv`).
+
+    Args:
+        rows (iterable): Lignes à traiter, lues au fur et à mesure
+        chunk_size (int): Nombre de lignes par tranche (USER_PROVISIONING_CHUNK_SIZE par défaut)
+        workers (int): Processus de hachage (USER_PROVISIONING_WORKERS, ou nombre de cœurs)
+
+    Returns:
+        ProvisioningReport: Comptes créés et lignes écartées, avec le motif
+    """
+    chunk_size = chunk_size or settings.USER_PROVISIONING_CHUNK_SIZE
+    workers = workers or settings.USER_PROVISIONING_WORKERS or os.cpu_count() or 1
+    report = ProvisioningReport()
+    # Doublons à l'intérieur du fichier
+    seen_usernames, seen_emails = set(), set()
+    rows = iter(rows)
+    with password_hasher(workers) as hash_passwords:
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return report
+            _provision_chunk(chunk, hash_passwords, report, seen_usernames, seen_emails)
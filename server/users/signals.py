@@ -0,0 +1,24 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from applications.models import ScholarshipApplication
+
+from .pagination import invalidate_counts
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_counts(sender, raw=False, update_fields=None, **kwargs):
+    """Nombres de comptes filtrés à recalculer ; une connexion (last_login) n'en change aucun"""
+    if raw or (update_fields is not None and set(update_fields) <= {'last_login'}):
+        return
+    invalidate_counts()
+
+
+@receiver(post_save, sender=ScholarshipApplication)
+@receiver(post_delete, sender=ScholarshipApplication)
+def invalidate_applicant_counts(sender, created=True, raw=False, **kwargs):
+    """Le filtre `has_applications` change au dépôt ou à la suppression d'une candidature"""
+    if not raw and created:
+        invalidate_counts()
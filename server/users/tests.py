@@ -1,3 +1,166 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from applications.models import ScholarshipApplication, ScholarshipType
+
+User = get_user_model()
+
+
+class UserListSearchTests(TestCase):
+    """Recherche par préfixe de la liste des comptes, sur LOWER(username) et LOWER(email)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        User.objects.create_user('Awa.Ndiaye', 'Awa.Ndiaye@Example.org')
+        User.objects.create_user('moussa', 'awa_sow@example.org')
+        User.objects.create_user('fatou', 'fatou@example.org')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin_user)
+
+    def _usernames(self, **params):
+        response = self.client.get(reverse('user-list'), params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(user['username'] for user in response.data['results'])
+
+    def test_search_is_a_case_insensitive_prefix(self):
+        self.assertEqual(self._usernames(search='AWA'), ['Awa.Ndiaye', 'moussa'])
+        self.assertEqual(self._usernames(search='awa.'), ['Awa.Ndiaye'])
+        # Les jokers de LIKE sont échappés
+        self.assertEqual(self._usernames(search='awa_'), ['moussa'])
+        self.assertEqual(self._usernames(search='ndiaye'), [])
+        self.assertEqual(self._usernames(search='awa example'), [])
+
+    def test_search_uses_lower_expressions(self):
+        with CaptureQueriesContext(connection) as context:
+            self._usernames(search='Awa')
+        sql = context.captured_queries[-1]['sql']
+        self.assertIn('LOWER("auth_user"."username") LIKE', sql)
+        self.assertNotIn('UPPER', sql)
+
+    def test_email_filter_ignores_case(self):
+        self.assertEqual(self._usernames(email='awa.ndiaye@example.org'), ['Awa.Ndiaye'])
+
+
+class ProvisioningTests(TestCase):
+    """Création de comptes en masse : motifs des lignes écartées"""
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user('awa', 'Awa.Ndiaye@Example.org')
+
+    def _row(self, line, username, email, password=''):
+        return {'line': line, 'username': username, 'email': email.lower(), 'first_name': '', 'last_name': '',
+                'password': password}
+
+    def _provision(self, rows):
+        from .provisioning import provision
+        return provision(rows, chunk_size=2, workers=1).as_dict()
+
+    def _reasons(self, report):
+        return {row['username']: row['reason'] for row in report['skipped']}
+
+    def test_skip_reasons(self):
+        report = self._provision([
+            self._row(2, 'moussa', 'moussa@example.org'),
+            self._row(3, 'fatou', 'pas-une-adresse'),
+            self._row(4, 'moussa', 'autre@example.org'),
+            self._row(5, 'awa', 'awa@example.org'),
+            self._row(6, 'ndiaye', 'awa.ndiaye@example.org'),
+            self._row(7, 'ibrahima', 'ibrahima@example.org', password='Motdepasse-2024'),
+        ])
+        self.assertEqual(self._reasons(report), {
+            'fatou': 'invalid', 'moussa': 'duplicate_in_file', 'awa': 'username_exists', 'ndiaye': 'email_exists',
+        })
+        self.assertEqual([row['line'] for row in report['created']], [2, 7])
+        self.assertEqual(report['created_count'], 2)
+        self.assertTrue(User.objects.get(username='ibrahima').check_password('Motdepasse-2024'))
+        self.assertFalse(User.objects.get(username='moussa').has_usable_password())
+
+    def test_concurrent_account_only_skips_its_row(self):
+        from . import provisioning
+        # Comptes créés après la vérification : l'insertion groupée échoue, puis
+        # la reprise compte par compte n'écarte que la ligne en conflit
+        with mock.patch.object(provisioning, '_existing', return_value=(set(), set())):
+            report = self._provision([
+                self._row(2, 'moussa', 'moussa@example.org'),
+                self._row(3, 'awa', 'awa@example.org'),
+            ])
+        self.assertEqual(self._reasons(report), {'awa': 'username_exists'})
+        self.assertEqual([row['username'] for row in report['created']], ['moussa'])
+        self.assertTrue(User.objects.filter(username='moussa').exists())
+
+
+class UserListCountCacheTests(TestCase):
+    """Nombre de comptes filtré mis en cache, invalidé par les changements qui le modifient"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.scholarship_type = ScholarshipType.objects.create(
+            name="Excellence", description="Description", requirements="Critères", duration=12, amount=500000
+        )
+        User.objects.create_user('awa', 'awa@example.org')
+        User.objects.create_user('moussa', 'moussa@example.org')
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin_user)
+
+    def _count(self, **params):
+        """Nombre renvoyé et indicateur de COUNT(*) exécuté"""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('user-list'), params)
+        self.assertEqual(response.status_code, 200)
+        counted = any(query['sql'].startswith('SELECT COUNT(*)') for query in context.captured_queries)
+        return response.data['count'], counted
+
+    def test_filtered_count_is_cached(self):
+        self.assertEqual(self._count(search='awa'), (1, True))
+        self.assertEqual(self._count(search='awa', page=1), (1, False))
+        # Une connexion ne change aucun nombre
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.get(username='awa').save(update_fields=['last_login'])
+        self.assertEqual(self._count(search='awa'), (1, False))
+
+    def test_account_changes_invalidate_counts(self):
+        self._count(search='awa')
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.create_user('awa.sow', 'awa.sow@example.org')
+        self.assertEqual(self._count(search='awa'), (2, True))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(username='awa').get().delete()
+        self.assertEqual(self._count(search='awa'), (1, True))
+
+        from .provisioning import provision
+        rows = [{'line': 2, 'username': 'awa.fall', 'email': 'awa.fall@example.org', 'first_name': '',
+                 'last_name': '', 'password': ''}]
+        with self.captureOnCommitCallbacks(execute=True):
+            provision(rows, workers=1)
+        self.assertEqual(self._count(search='awa'), (2, True))
 
-# Create your tests here.
+    def test_new_application_invalidates_has_applications_count(self):
+        self.assertEqual(self._count(has_applications='true'), (0, True))
+        with self.captureOnCommitCallbacks(execute=True):
+            application = ScholarshipApplication.objects.create(
+                user=User.objects.get(username='moussa'), scholarship_type=self.scholarship_type,
+                full_name="Moussa Fall", email="moussa@example.org"
+            )
+        self.assertEqual(self._count(has_applications='true'), (1, True))
+        # Modifier une candidature ne change pas le nombre de candidats
+        with self.captureOnCommitCallbacks(execute=True):
+            application.status = 'under_review'
+            application.save()
+        self.assertEqual(self._count(has_applications='true'), (1, False))
@@ -1,9 +1,10 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
+from scholarship_management.compression import compression_exempt
 from .views import RegisterView, CustomTokenObtainPairView
 
 urlpatterns = [
     path('auth/register/', RegisterView.as_view(), name='auth_register'),
     path('auth/login/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('auth/refresh/', compression_exempt(TokenRefreshView.as_view()), name='token_refresh'),
 ] 
\ No newline at end of file
@@ -1,18 +1,79 @@
-from rest_framework import viewsets, generics, status, permissions
+from rest_framework import viewsets, generics, status, permissions, filters
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.contrib.auth.models import User
-from .serializers import UserSerializer, RegisterSerializer, CustomTokenObtainPairSerializer
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django_filters.rest_framework import DjangoFilterBackend
+from applications.models import ScholarshipApplication
+from .filters import PrefixSearchFilter, UserFilter
+from .pagination import UserPagination
+from .serializers import UserSerializer, UserListSerializer, RegisterSerializer, CustomTokenObtainPairSerializer
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from scholarship_management.throttling import IPTokenBucketThrottle
 
 class UserViewSet(viewsets.ModelViewSet):
+    """
+    Comptes utilisateurs (administration). La liste est paginée, filtrable
+    (voir users/filters.py) et recherchable par préfixe du nom d'utilisateur
+    ou de l'adresse e-mail, insensible à la casse (voir PrefixSearchFilter) ;
+    chaque compte y porte son nombre de candidatures.
+    """
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAdminUser]
+    pagination_class = UserPagination
+    filter_backends = [PrefixSearchFilter, DjangoFilterBackend, filters.OrderingFilter]
+    filterset_class = UserFilter
+    # Recherche par préfixe sur LOWER(...) : pas de LIKE '%...%' sur toute la table
+    search_fields = ['username', 'email']
+    ordering_fields = ['id', 'username']
+    ordering = ['-id']
+
+    def get_queryset(self):
+        queryset = User.objects.all()
+        if self.action != 'list':
+            return queryset
+        # Sous-requête corrélée sur l'index user_id : calculée pour les seules
+        # lignes de la page, dans la requête de la liste
+        application_count = ScholarshipApplication.objects.filter(user=OuterRef('pk')).order_by().values(
+            'user'
+        ).annotate(count=Count('id')).values('count')
+        return queryset.only('id', 'username', 'email', 'is_staff', 'is_active').annotate(
+            application_count=Coalesce(Subquery(application_count, output_field=IntegerField()), Value(0))
+        )
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return UserListSerializer
+        return super().get_serializer_class()
+
+    @action(detail=False, methods=['post'])
+    def provision(self, request):
+        """
+        Crée des comptes à partir d'un fichier CSV envoyé dans le champ `file`
+        (voir users/provisioning.py) et retourne le rapport des lignes créées
+        et écartées.
+        """
+        from .provisioning import provision, read_csv
+
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"detail": "Le fichier CSV doit être envoyé dans le champ 'file'"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            report = provision(read_csv(upload))
+        except (ValueError, UnicodeDecodeError) as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report.as_dict(),
+                        status=status.HTTP_201_CREATED if report.created else status.HTTP_200_OK)
 
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = [permissions.AllowAny]
     serializer_class = RegisterSerializer
+    throttle_classes = [IPTokenBucketThrottle]
+    throttle_scope = 'register'
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -25,3 +86,7 @@ class RegisterView(generics.CreateAPIView):
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_classes = [IPTokenBucketThrottle]
+    throttle_scope = 'login'
+    # Réponse contenant des jetons : pas de compression (attaques de type BREACH)
+    compression_exempt = True